@@ -0,0 +1,19 @@
+# Generated by Django 5.0.6 on 2026-10-19 10:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Admissionapp', '0008_admission_user_email'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='admission',
+            index=models.Index(fields=['status', 'submit_date'], name='admission_triage_idx'),
+        ),
+    ]
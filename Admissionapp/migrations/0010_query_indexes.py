@@ -0,0 +1,19 @@
+# Generated by Django 5.0.6 on 2026-10-19 10:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Admissionapp', '0009_triage_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='admissionlog',
+            index=models.Index(fields=['admission', '-timestamp'], name='admissionlog_history_idx'),
+        ),
+    ]
@@ -58,6 +58,10 @@ class Admission(models.Model):
         verbose_name = "Admission"
         verbose_name_plural = "Admissions"
         ordering = ['-submit_date']
+        indexes = [
+            # Triage queue: open admissions, oldest first
+            models.Index(fields=['status', 'submit_date'], name='admission_triage_idx'),
+        ]
 
     
 
@@ -69,5 +73,11 @@ class AdmissionLog(models.Model):
     changed_fields = models.TextField()  # Store the fields that were changed
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # A record's history, newest first
+            models.Index(fields=['admission', '-timestamp'], name='admissionlog_history_idx'),
+        ]
+
     def __str__(self):
         return f"Log for {self.admission.email} by {self.user_email} at {self.timestamp}"
@@ -5,20 +5,30 @@ from .serializers import AdmissionSerializer, AdmissionLogSerializer
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.decorators import action
 from django.forms.models import model_to_dict
+from django.db import transaction
 from django.db.models import Max
-from sib_api_v3_sdk import Configuration, ApiClient, TransactionalEmailsApi, SendSmtpEmail
-from sib_api_v3_sdk.rest import ApiException
 import os
 import threading
 from django.template.loader import render_to_string
 from django.conf import settings
 import logging
+from sequences.allocator import SequenceAllocator
+from Schoolproject import tracing
 
 logger = logging.getLogger(__name__)
 
+
+def _last_admission_number():
+    """Highest admission number already in use, used to seed the sequence on first use"""
+    last_number = Admission.objects.aggregate(Max('admission_number'))['admission_number__max']
+    return int(last_number[3:]) if last_number else 0
+
+
+ADMISSION_NUMBERS = SequenceAllocator('admission_number', prefix='RCS', padding=6, seed=_last_admission_number)
+
 class EmailThread(threading.Thread):
     def __init__(self, func, *args, **kwargs):
-        self.func = func
+        self.func = tracing.wrap(func, 'admission.email')
         self.args = args
         self.kwargs = kwargs
         super().__init__()
@@ -36,11 +46,16 @@ class AdmissionViewSet(viewsets.ModelViewSet):
         return Admission.objects.all()
 
     def _get_api_instance(self):
+        from sib_api_v3_sdk import Configuration, ApiClient, TransactionalEmailsApi
+
         configuration = Configuration()
         configuration.api_key['api-key'] = os.getenv('BREVO_API_KEY')
         return TransactionalEmailsApi(ApiClient(configuration))
 
     def send_admission_confirmation_email(self, admission):
+        from sib_api_v3_sdk import SendSmtpEmail
+        from sib_api_v3_sdk.rest import ApiException
+
         api_instance = self._get_api_instance()
         
         html_content = render_to_string('email/admission_confirmation.html', {
@@ -61,6 +76,9 @@ class AdmissionViewSet(viewsets.ModelViewSet):
             logger.error(f"Exception when sending confirmation email: {str(e)}")
             
     def send_approval_email(self, admission):
+        from sib_api_v3_sdk import SendSmtpEmail
+        from sib_api_v3_sdk.rest import ApiException
+
         api_instance = self._get_api_instance()
         
         html_content = render_to_string('email/admission_approval.html', {
@@ -99,13 +117,14 @@ class AdmissionViewSet(viewsets.ModelViewSet):
             serializer = self.get_serializer(data=request.data)
             serializer.is_valid(raise_exception=True)
 
-            admission_number = self.generate_admission_number()
-            
-            admission = serializer.save(
-                admission_number=admission_number,
-                user=request.user,
-                user_email=request.user.email if request.user.is_authenticated else None
-            )
+            with transaction.atomic():
+                admission_number = self.generate_admission_number()
+                
+                admission = serializer.save(
+                    admission_number=admission_number,
+                    user=request.user,
+                    user_email=request.user.email if request.user.is_authenticated else None
+                )
 
             # Start email thread
             EmailThread(
@@ -183,15 +202,7 @@ class AdmissionViewSet(viewsets.ModelViewSet):
 
     def generate_admission_number(self):
         try:
-            last_admission = Admission.objects.aggregate(Max('admission_number'))
-            last_number = last_admission['admission_number__max']
-
-            if last_number:
-                new_number = int(last_number[3:]) + 1
-            else:
-                new_number = 1
-
-            return f"RCS{new_number:06d}"
+            return ADMISSION_NUMBERS.next_formatted()
         except Exception as e:
             logger.error(f"Error generating admission number: {str(e)}")
             raise
@@ -216,7 +227,7 @@ class AdmissionViewSet(viewsets.ModelViewSet):
         return ', '.join(changed_fields)
 
     def get_permissions(self):
-        if self.action in ['update', 'partial_update']:
+        if self.action in ['update', 'partial_update', 'my_admissions']:
             self.permission_classes = [IsAuthenticated]
         else:
             self.permission_classes = [AllowAny]
@@ -1,3 +1,9 @@
 from django.contrib import admin
+from .models import DepartmentDayAvailability
 
-# Register your models here.
+
+@admin.register(DepartmentDayAvailability)
+class DepartmentDayAvailabilityAdmin(admin.ModelAdmin):
+    list_display = ['department', 'date', 'booked_mask', 'updated_at']
+    list_filter = ['department']
+    date_hierarchy = 'date'
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ReservationappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Reservationapp'
+
+    def ready(self):
+        # Connect the slot availability receivers
+        import Reservationapp.availability
@@ -0,0 +1,127 @@
+"""
+Slot availability for reservations.
+
+Each department-day is a bitmap of SLOT_MINUTES slots between OPENING_TIME and
+CLOSING_TIME on weekdays, stored in DepartmentDayAvailability. A day is recomputed
+from its confirmed reservations whenever one of them is created, changes status,
+moves or is deleted, so free slots for any date range are answered from one query
+over the bitmaps instead of scanning reservations.
+"""
+import datetime
+
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Reservation, DepartmentDayAvailability
+
+OPENING_TIME = datetime.time(9, 0)
+CLOSING_TIME = datetime.time(16, 0)
+SLOT_MINUTES = 30
+
+SLOT_COUNT = (
+    (CLOSING_TIME.hour * 60 + CLOSING_TIME.minute) - (OPENING_TIME.hour * 60 + OPENING_TIME.minute)
+) // SLOT_MINUTES
+FULL_MASK = (1 << SLOT_COUNT) - 1
+
+SLOT_TIMES = [
+    (datetime.datetime.combine(datetime.date.min, OPENING_TIME) + datetime.timedelta(minutes=SLOT_MINUTES * n)).time()
+    for n in range(SLOT_COUNT)
+]
+
+DEPARTMENTS = [code for code, _label in Reservation.DEPARTMENTS]
+# Longest range a single free-slots request may cover
+MAX_RANGE_DAYS = 62
+
+
+def slot_index(booking_time):
+    """Index of the slot containing `booking_time`, or None outside opening hours"""
+    minutes = (booking_time.hour * 60 + booking_time.minute) - (OPENING_TIME.hour * 60 + OPENING_TIME.minute)
+    if minutes < 0:
+        return None
+    index = minutes // SLOT_MINUTES
+    return index if index < SLOT_COUNT else None
+
+
+def is_bookable_day(date):
+    return date.weekday() < 5
+
+
+def refresh_day(department, date):
+    """Rebuild the bitmap of one department-day from its confirmed reservations"""
+    mask = 0
+    booked_times = Reservation.objects.filter(
+        department=department, booking_date=date, status='Confirmed'
+    ).values_list('booking_time', flat=True)
+    for booking_time in booked_times:
+        index = slot_index(booking_time)
+        if index is not None:
+            mask |= 1 << index
+
+    DepartmentDayAvailability.objects.update_or_create(
+        department=department, date=date, defaults={'booked_mask': mask}
+    )
+    return mask
+
+
+def free_slots(start_date, end_date, departments=None):
+    """
+    Map department -> {date: [free slot times]} for every weekday in the inclusive
+    range. Slots already past are left out for today.
+    """
+    departments = departments or DEPARTMENTS
+    masks = {
+        (row.department, row.date): row.booked_mask
+        for row in DepartmentDayAvailability.objects.filter(
+            date__gte=start_date, date__lte=end_date, department__in=departments
+        ).only('department', 'date', 'booked_mask')
+    }
+
+    now = timezone.localtime()
+    result = {department: {} for department in departments}
+    date = start_date
+    while date <= end_date:
+        if is_bookable_day(date) and date >= now.date():
+            for department in departments:
+                free = FULL_MASK & ~masks.get((department, date), 0)
+                result[department][date] = [
+                    slot_time for index, slot_time in enumerate(SLOT_TIMES)
+                    if free & (1 << index) and (date > now.date() or slot_time > now.time())
+                ]
+        date += datetime.timedelta(days=1)
+    return result
+
+
+# Keep the bitmaps in sync with reservations
+
+def _slot_key(instance):
+    # Read __dict__ so deferred fields are not fetched just to be remembered
+    values = instance.__dict__
+    return (values.get('department'), values.get('booking_date'), values.get('status'))
+
+
+@receiver(post_init, sender=Reservation)
+def remember_slot(sender, instance, **kwargs):
+    instance._availability_original = _slot_key(instance) if instance.pk else None
+
+
+@receiver(post_save, sender=Reservation)
+def update_availability_on_save(sender, instance, created, **kwargs):
+    original = getattr(instance, '_availability_original', None)
+    current = _slot_key(instance)
+    instance._availability_original = current
+
+    # Only days that had or now have a confirmed booking can change
+    days = set()
+    if original and original[2] == 'Confirmed':
+        days.add(original[:2])
+    if current[2] == 'Confirmed':
+        days.add(current[:2])
+    for department, date in days:
+        refresh_day(department, date)
+
+
+@receiver(post_delete, sender=Reservation)
+def update_availability_on_delete(sender, instance, **kwargs):
+    if instance.status == 'Confirmed':
+        refresh_day(instance.department, instance.booking_date)
@@ -0,0 +1,83 @@
+# Generated by Django 5.0.6 on 2026-10-19 10:24
+
+from django.db import migrations, models
+from django.db.models import Count
+
+# Mirrors Reservationapp.availability at the time of writing: 30 minute slots from 9:00
+OPENING_MINUTES = 9 * 60
+SLOT_MINUTES = 30
+SLOT_COUNT = 14
+
+
+def check_confirmed_duplicates(apps, schema_editor):
+    Reservation = apps.get_model('Reservationapp', 'Reservation')
+    duplicates = list(
+        Reservation.objects.filter(status='Confirmed')
+        .values('department', 'booking_date', 'booking_time')
+        .annotate(total=Count('id'))
+        .filter(total__gt=1)
+        .order_by()
+    )
+    if duplicates:
+        slots = ', '.join(
+            f"{row['department']} {row['booking_date']} {row['booking_time']}" for row in duplicates
+        )
+        raise RuntimeError(
+            f"Cannot add the confirmed slot constraint; these slots are confirmed more than once: {slots}. "
+            "Cancel or move the extra reservations and run the migration again."
+        )
+
+
+def build_availability(apps, schema_editor):
+    Reservation = apps.get_model('Reservationapp', 'Reservation')
+    DepartmentDayAvailability = apps.get_model('Reservationapp', 'DepartmentDayAvailability')
+
+    masks = {}
+    confirmed = Reservation.objects.filter(status='Confirmed').values_list('department', 'booking_date', 'booking_time')
+    for department, booking_date, booking_time in confirmed.iterator():
+        index = (booking_time.hour * 60 + booking_time.minute - OPENING_MINUTES) // SLOT_MINUTES
+        if 0 <= index < SLOT_COUNT:
+            masks[(department, booking_date)] = masks.get((department, booking_date), 0) | (1 << index)
+
+    DepartmentDayAvailability.objects.bulk_create([
+        DepartmentDayAvailability(department=department, date=date, booked_mask=mask)
+        for (department, date), mask in masks.items()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Reservationapp', '0019_reservationlog_user_email'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_confirmed_duplicates, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='DepartmentDayAvailability',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('department', models.CharField(choices=[('Finance Department', 'Finance Department'), ('Admissions Department', 'Admissions Department'), ('Student Affairs', 'Student Affairs'), ('Human Resource Department', 'Human Resource Department'), ('Academics Department', 'Academics Department')], max_length=50)),
+                ('date', models.DateField()),
+                ('booked_mask', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Department Day Availability',
+                'verbose_name_plural': 'Department Day Availability',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='reservation',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'Confirmed')), fields=('department', 'booking_date', 'booking_time'), name='unique_confirmed_reservation_slot'),
+        ),
+        migrations.AddIndex(
+            model_name='departmentdayavailability',
+            index=models.Index(fields=['date', 'department'], name='Reservation_date_9c7aaf_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='departmentdayavailability',
+            constraint=models.UniqueConstraint(fields=('department', 'date'), name='unique_department_day'),
+        ),
+        migrations.RunPython(build_availability, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.6 on 2026-10-19 10:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Reservationapp', '0020_slot_availability'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservationlog',
+            index=models.Index(fields=['reservation', '-timestamp'], name='reservationlog_history_idx'),
+        ),
+    ]
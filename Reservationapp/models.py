@@ -62,6 +62,40 @@ class Reservation(models.Model):
         verbose_name = "Reservation"
         verbose_name_plural = "Reservations"
         ordering = ['-created_at']
+        constraints = [
+            # Only one confirmed booking per department and slot; enforced by the
+            # database so two concurrent confirmations cannot both succeed
+            models.UniqueConstraint(
+                fields=['department', 'booking_date', 'booking_time'],
+                condition=models.Q(status='Confirmed'),
+                name='unique_confirmed_reservation_slot',
+            ),
+        ]
+
+
+class DepartmentDayAvailability(models.Model):
+    """
+    Confirmed slots of one department on one day, as a bitmap. Bit n is set when
+    the n-th slot counted from 9:00 (see availability.py) is taken. Days without
+    a row are fully free. Maintained from Reservation saves and deletes.
+    """
+    department = models.CharField(max_length=50, choices=Reservation.DEPARTMENTS)
+    date = models.DateField()
+    booked_mask = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Department Day Availability"
+        verbose_name_plural = "Department Day Availability"
+        constraints = [
+            models.UniqueConstraint(fields=['department', 'date'], name='unique_department_day'),
+        ]
+        indexes = [
+            models.Index(fields=['date', 'department']),
+        ]
+
+    def __str__(self):
+        return f"{self.department} - {self.date} ({self.booked_mask:b})"
 
 
 
@@ -72,12 +106,13 @@ class ReservationLog(models.Model):
     changed_fields = models.TextField()  # Store the fields that were changed
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # A record's history, newest first
+            models.Index(fields=['reservation', '-timestamp'], name='reservationlog_history_idx'),
+        ]
+
     def __str__(self):
         # Display the user's email if it exists, otherwise show 'Unknown user'
         user_email = self.user_email if self.user_email else 'Unknown user'
-        log_str = f"Log for {self.reservation} by {user_email} at {self.timestamp}"
-
-        # Print the details to check for any errors or debugging purposes
-        print(f"ReservationLog: {log_str}")
-
-        return log_str
+        return f"Log for {self.reservation} by {user_email} at {self.timestamp}"
@@ -3,10 +3,14 @@ from .models import Reservation
 from django.utils import timezone
 import datetime  # Ensure datetime module is imported
 from .models import ReservationLog
+from . import availability
 class ReservationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Reservation
         fields = '__all__'
+        # The confirmed slot constraint is enforced by the database on save (the
+        # views answer 409); don't let DRF re-check it with an extra query
+        validators = []
 
     def validate_booking_date(self, value):
         # Check if the date is in the past
@@ -23,6 +27,14 @@ class ReservationSerializer(serializers.ModelSerializer):
         # Ensure booking time is within business hours: 9 AM to 4 PM
         if value < datetime.time(9, 0) or value > datetime.time(16, 0):
             raise serializers.ValidationError("Booking time must be between 9 AM and 4 PM.")
+
+        # Bookings take whole slots: the availability bitmaps and the unique
+        # constraint on confirmed bookings must agree on what a slot is
+        if value not in availability.SLOT_TIMES:
+            raise serializers.ValidationError(
+                f"Booking time must be the start of a {availability.SLOT_MINUTES}-minute slot "
+                f"({availability.SLOT_TIMES[0]:%H:%M} to {availability.SLOT_TIMES[-1]:%H:%M})."
+            )
         
         return value
 
@@ -1,3 +1,86 @@
+import datetime
+
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from authapp.models import CustomUser
+
+from . import availability
+from .models import DepartmentDayAvailability, Reservation
+
+DEPARTMENT = 'Finance Department'
+
+
+def next_weekday():
+    day = timezone.localdate() + datetime.timedelta(days=1)
+    while day.weekday() > 4:
+        day += datetime.timedelta(days=1)
+    return day
+
+
+def make_reservation(day, booking_time, status='Confirmed'):
+    return Reservation.objects.create(
+        full_name='Yaw Mensah', email='yaw@example.com', phone='0240000000', booking_date=day,
+        booking_time=booking_time, department=DEPARTMENT, status=status,
+    )
+
+
+class FreeSlotsTests(TestCase):
+
+    def setUp(self):
+        self.day = next_weekday()
+
+    def free_slots(self, **params):
+        return self.client.get('/api/reservations/free-slots/', params)
+
+    def test_confirmed_booking_takes_its_slot(self):
+        make_reservation(self.day, datetime.time(10, 0))
+        make_reservation(self.day, datetime.time(11, 0), status='Pending')
+        self.assertEqual(DepartmentDayAvailability.objects.get(department=DEPARTMENT, date=self.day).booked_mask, 1 << 2)
+
+        response = self.free_slots(start=self.day.isoformat(), department=DEPARTMENT)
+        self.assertEqual(response.status_code, 200)
+        slots = response.data['departments'][DEPARTMENT][self.day.isoformat()]
+        self.assertNotIn('10:00', slots)
+        self.assertIn('11:00', slots)
+        self.assertEqual(len(slots), availability.SLOT_COUNT - 1)
+
+    def test_cancelling_frees_the_slot(self):
+        reservation = make_reservation(self.day, datetime.time(10, 0))
+        reservation.status = 'Cancelled'
+        reservation.save()
+        self.assertEqual(DepartmentDayAvailability.objects.get(department=DEPARTMENT, date=self.day).booked_mask, 0)
+
+    def test_invalid_dates_are_rejected(self):
+        for params in [{'start': '2024-02-30'}, {'start': 'tomorrow'}, {'start': '2030-01-07', 'end': '2030-13-01'},
+                       {'start': '2030-01-08', 'end': '2030-01-07'}]:
+            with self.subTest(params=params):
+                self.assertEqual(self.free_slots(**params).status_code, 400)
+
+
+class ReservationSlotTests(TestCase):
+
+    def setUp(self):
+        self.day = next_weekday()
+
+    def test_booking_time_must_start_a_slot(self):
+        response = self.client.post('/api/reservations/', {
+            'full_name': 'Yaw Mensah', 'email': 'yaw@example.com', 'phone': '0240000000',
+            'booking_date': self.day.isoformat(), 'booking_time': '09:15', 'department': DEPARTMENT,
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('booking_time', response.data)
+
+    def test_confirming_a_taken_slot_conflicts(self):
+        make_reservation(self.day, datetime.time(10, 0))
+        pending = make_reservation(self.day, datetime.time(10, 0), status='Pending')
+        client = APIClient()
+        client.force_authenticate(CustomUser.objects.create_user(
+            username='admin', email='admin@example.com', password='secret', role='staff',
+        ))
 
-# Create your tests here.
+        response = client.patch(f'/api/reservations/{pending.pk}/', {'status': 'Confirmed'})
+        self.assertEqual(response.status_code, 409)
+        pending.refresh_from_db()
+        self.assertEqual(pending.status, 'Pending')
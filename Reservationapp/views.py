@@ -3,17 +3,19 @@ from rest_framework.response import Response
 from rest_framework.decorators import action
 from .models import Reservation, ReservationLog
 from .serializers import ReservationSerializer, ReservationLogSerializer
+from . import availability
 from datetime import time
+from django.db import IntegrityError, transaction
 from django.utils import timezone
-from sib_api_v3_sdk import Configuration, ApiClient, SendSmtpEmail
-from sib_api_v3_sdk.api.transactional_emails_api import TransactionalEmailsApi
+from django.utils.dateparse import parse_date
 from django.conf import settings
-from sib_api_v3_sdk.rest import ApiException
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from pathlib import Path
+import logging
 import os
 from dotenv import load_dotenv
 
+logger = logging.getLogger(__name__)
 
 
 class ReservationViewSet(viewsets.ModelViewSet):
@@ -32,8 +34,10 @@ class ReservationViewSet(viewsets.ModelViewSet):
         if not self.is_within_business_hours(booking_date, booking_time):
             return Response({'detail': 'Booking must be on a weekday between 9 AM and 4 PM.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Save the reservation without conflict checks during creation
-        reservation = serializer.save()
+        # Only confirmed bookings can conflict, and the database rejects those
+        reservation = self.save_guarded(serializer)
+        if reservation is None:
+            return self.conflict_response()
 
         # Send confirmation email
         self.send_confirmation_email(reservation)
@@ -41,6 +45,9 @@ class ReservationViewSet(viewsets.ModelViewSet):
         return Response({'detail': 'Reservation submitted successfully!', 'data': serializer.data}, status=status.HTTP_201_CREATED)
 
     def send_confirmation_email(self, reservation):
+        from sib_api_v3_sdk import Configuration, ApiClient, TransactionalEmailsApi, SendSmtpEmail
+        from sib_api_v3_sdk.rest import ApiException
+
         configuration = Configuration()
         configuration.api_key['api-key'] = os.getenv('BREVO_API_KEY')
         
@@ -64,14 +71,17 @@ class ReservationViewSet(viewsets.ModelViewSet):
 
         try:
             api_response = api_instance.send_transac_email(send_smtp_email)
-            print("Email sent successfully: %s\n" % api_response)
+            logger.info(f"Email sent successfully: {api_response}")
         except ApiException as e:
-            print("Exception when sending email: %s\n" % e)
+            logger.error(f"Exception when sending email: {e}")
 
     def send_status_confirmation_email(self, reservation):
         """
         Send email notification when reservation status is changed to 'Confirmed'
         """
+        from sib_api_v3_sdk import Configuration, ApiClient, TransactionalEmailsApi, SendSmtpEmail
+        from sib_api_v3_sdk.rest import ApiException
+
         configuration = Configuration()
         configuration.api_key['api-key'] = os.getenv('BREVO_API_KEY')
         
@@ -109,9 +119,9 @@ class ReservationViewSet(viewsets.ModelViewSet):
 
         try:
             api_response = api_instance.send_transac_email(send_smtp_email)
-            print("Status confirmation email sent successfully: %s\n" % api_response)
+            logger.info(f"Status confirmation email sent successfully: {api_response}")
         except ApiException as e:
-            print("Exception when sending status confirmation email: %s\n" % e)
+            logger.error(f"Exception when sending status confirmation email: {e}")
 
     def is_within_business_hours(self, booking_date, booking_time):
         """
@@ -139,47 +149,43 @@ class ReservationViewSet(viewsets.ModelViewSet):
     
 
     def update(self, request, pk=None):
-        print("Starting update process")
+        logger.debug("Starting update process")
         
         reservation = self.get_object()
-        print(f"Fetched reservation: {reservation}")
+        logger.debug("Fetched reservation: %s", reservation)
 
         original_data = ReservationSerializer(reservation).data  # Capture original data before update
-        print(f"Original data: {original_data}")
+        logger.debug("Original data: %s", original_data)
 
         serializer = self.get_serializer(reservation, data=request.data, partial=False)
-        print(f"Request data: {request.data}")
+        logger.debug("Request data: %s", request.data)
         
         serializer.is_valid(raise_exception=True)
-        print("Data validation passed")
+        logger.debug("Data validation passed")
 
         booking_date = serializer.validated_data.get('booking_date', reservation.booking_date)
         booking_time = serializer.validated_data.get('booking_time', reservation.booking_time)
         department = serializer.validated_data.get('department', reservation.department)
         new_status = serializer.validated_data.get('status', reservation.status)
 
-        print(f"Validated booking date: {booking_date}, booking time: {booking_time}, department: {department}, status: {new_status}")
+        logger.debug("Validated booking date: %s, booking time: %s, department: %s, status: %s", booking_date, booking_time, department, new_status)
 
         if not self.is_within_business_hours(booking_date, booking_time):
-            print("Booking not within business hours or not a weekday")
+            logger.debug("Booking not within business hours or not a weekday")
             return Response({'detail': 'Booking updates must be on a weekday between 9 AM and 4 PM.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        if self.is_conflicting_reservation(booking_date, booking_time, department, reservation.id):
-            print("Conflicting reservation found")
-            return Response(
-                {'detail': 'There is already a confirmed booking at this date and time for the same department.'},
-                status=status.HTTP_409_CONFLICT
-            )
-
-        print("No conflicts found, proceeding with update")
+        logger.debug("Proceeding with update")
         reservation.last_modified_by = request.user
-        updated_reservation = serializer.save()
-        print(f"Reservation updated: {serializer.data}")
+        updated_reservation = self.save_guarded(serializer)
+        if updated_reservation is None:
+            logger.debug("Conflicting reservation found")
+            return self.conflict_response()
+        logger.debug("Reservation updated: %s", serializer.data)
 
         # Track changes
         updated_data = serializer.data
         changed_fields = self.get_changed_fields(original_data, updated_data)
-        print(f"Changed fields: {changed_fields}")
+        logger.debug("Changed fields: %s", changed_fields)
 
         ReservationLog.objects.create(
             reservation=reservation,
@@ -187,58 +193,54 @@ class ReservationViewSet(viewsets.ModelViewSet):
             user_email=request.user.email,
             changed_fields=changed_fields
         )
-        print("ReservationLog created")
+        logger.debug("ReservationLog created")
         
         # Check if status was changed to 'Confirmed' and send confirmation email
         if new_status == 'Confirmed' and original_data.get('status') != 'Confirmed':
-            print("Status changed to Confirmed, sending confirmation email")
+            logger.debug("Status changed to Confirmed, sending confirmation email")
             self.send_status_confirmation_email(updated_reservation)
         
-        print("Update process completed successfully")
+        logger.debug("Update process completed successfully")
         return Response(serializer.data)
 
     def partial_update(self, request, pk=None):
-        print("Starting partial update process")
+        logger.debug("Starting partial update process")
         
         reservation = self.get_object()
-        print(f"Fetched reservation: {reservation}")
+        logger.debug("Fetched reservation: %s", reservation)
 
         original_data = ReservationSerializer(reservation).data  # Capture original data before update
-        print(f"Original data: {original_data}")
+        logger.debug("Original data: %s", original_data)
 
         serializer = self.get_serializer(reservation, data=request.data, partial=True)
-        print(f"Request data: {request.data}")
+        logger.debug("Request data: %s", request.data)
         
         serializer.is_valid(raise_exception=True)
-        print("Data validation passed")
+        logger.debug("Data validation passed")
 
         booking_date = serializer.validated_data.get('booking_date', reservation.booking_date)
         booking_time = serializer.validated_data.get('booking_time', reservation.booking_time)
         department = serializer.validated_data.get('department', reservation.department)
         new_status = serializer.validated_data.get('status', reservation.status)
 
-        print(f"Validated booking date: {booking_date}, booking time: {booking_time}, department: {department}, status: {new_status}")
+        logger.debug("Validated booking date: %s, booking time: %s, department: %s, status: %s", booking_date, booking_time, department, new_status)
 
         if not self.is_within_business_hours(booking_date, booking_time):
-            print("Booking not within business hours or not a weekday")
+            logger.debug("Booking not within business hours or not a weekday")
             return Response({'detail': 'Booking updates must be on a weekday between 9 AM and 4 PM.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        if self.is_conflicting_reservation(booking_date, booking_time, department, reservation.id):
-            print("Conflicting reservation found")
-            return Response(
-                {'detail': 'There is already a confirmed booking at this date and time for the same department.'},
-                status=status.HTTP_409_CONFLICT
-            )
-
-        print("No conflicts found, proceeding with partial update")
+        logger.debug("Proceeding with partial update")
         reservation.last_modified_by = request.user
-        updated_reservation = serializer.save()
-        print(f"Reservation partially updated: {serializer.data}")
+        updated_reservation = self.save_guarded(serializer)
+        if updated_reservation is None:
+            logger.debug("Conflicting reservation found")
+            return self.conflict_response()
+        logger.debug("Reservation partially updated: %s", serializer.data)
 
         # Track changes
         updated_data = serializer.data
         changed_fields = self.get_changed_fields(original_data, updated_data)
-        print(f"Changed fields: {changed_fields}")
+        logger.debug("Changed fields: %s", changed_fields)
 
         ReservationLog.objects.create(
             reservation=reservation,
@@ -246,42 +248,90 @@ class ReservationViewSet(viewsets.ModelViewSet):
             user_email=request.user.email,
             changed_fields=changed_fields
         )
-        print("ReservationLog created")
+        logger.debug("ReservationLog created")
         # Example log output inside the update/partial_update method:
-        print(f"ReservationLog created for {request.user.email}")
+        logger.debug("ReservationLog created for %s", request.user.email)
 
         # Check if status was changed to 'Confirmed' and send confirmation email
         if new_status == 'Confirmed' and original_data.get('status') != 'Confirmed':
-            print("Status changed to Confirmed, sending confirmation email")
+            logger.debug("Status changed to Confirmed, sending confirmation email")
             self.send_status_confirmation_email(updated_reservation)
 
-        print("Partial update process completed successfully")
+        logger.debug("Partial update process completed successfully")
         return Response(serializer.data)
 
     def get_changed_fields(self, original_data, updated_data):
         """
         Compare original and updated data and return a list of fields that changed.
         """
-        print(f"Comparing original and updated data")
+        logger.debug("Comparing original and updated data")
         changed_fields = []
         for key, original_value in original_data.items():
             updated_value = updated_data.get(key)
             if original_value != updated_value:
                 changed_fields.append(f"{key}: {original_value} -> {updated_value}")
-                print(f"Field changed: {key} from {original_value} to {updated_value}")
+                logger.debug("Field changed: %s from %s to %s", key, original_value, updated_value)
         return ', '.join(changed_fields)  # Return a string representation of the changes
 
-    def is_conflicting_reservation(self, booking_date, booking_time, department, current_reservation_id=None):
+    def save_guarded(self, serializer):
         """
-        Check if there is a conflicting confirmed reservation with the same date, time, and department.
-        Exclude the current reservation being updated.
+        Save the reservation, relying on the unique constraint on confirmed slots
+        instead of checking first. Returns None when the slot is already confirmed
+        for another reservation.
         """
-        return Reservation.objects.filter(
-            booking_date=booking_date,
-            booking_time=booking_time,
-            department=department,
-            status='Confirmed'
-        ).exclude(id=current_reservation_id).exists()
+        try:
+            with transaction.atomic():
+                return serializer.save()
+        except IntegrityError:
+            return None
+
+    def conflict_response(self):
+        return Response(
+            {'detail': 'There is already a confirmed booking at this date and time for the same department.'},
+            status=status.HTTP_409_CONFLICT
+        )
+
+    @action(detail=False, methods=['get'], url_path='free-slots')
+    def free_slots(self, request):
+        """
+        Free slots per department and day.
+        URL: /reservations/free-slots/?start=YYYY-MM-DD&end=YYYY-MM-DD[&department=...]
+        `end` defaults to `start`; weekends are left out.
+        """
+        start_param = request.query_params.get('start')
+        end_param = request.query_params.get('end')
+        try:
+            # parse_date returns None for a malformed date and raises for an impossible one
+            start = parse_date(start_param) if start_param else timezone.localdate()
+            end = parse_date(end_param) if end_param else start
+        except ValueError:
+            start = end = None
+        if start is None or end is None:
+            return Response({'detail': 'start and end must be valid dates (YYYY-MM-DD).'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if end < start:
+            return Response({'detail': 'end must be a date on or after start.'}, status=status.HTTP_400_BAD_REQUEST)
+        if (end - start).days >= availability.MAX_RANGE_DAYS:
+            return Response(
+                {'detail': f'Date range cannot exceed {availability.MAX_RANGE_DAYS} days.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        department = request.query_params.get('department')
+        if department and department not in availability.DEPARTMENTS:
+            return Response({'detail': 'Unknown department.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        slots = availability.free_slots(start, end, [department] if department else None)
+        return Response({
+            'slot_minutes': availability.SLOT_MINUTES,
+            'departments': {
+                name: {
+                    day.isoformat(): [slot.strftime('%H:%M') for slot in times]
+                    for day, times in days.items()
+                }
+                for name, days in slots.items()
+            }
+        })
 
 from rest_framework import generics
 
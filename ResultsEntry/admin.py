@@ -3,7 +3,6 @@ from .models import Course, ClassCourse, Result, CourseResult, ResultChangeLog
 from django.http import HttpResponse
 from django.urls import path
 from django.shortcuts import get_object_or_404, redirect
-from .utils.pdf_generator import generate_report_card_pdf
 
 class ClassCourseInline(admin.TabularInline):
     model = ClassCourse
@@ -56,6 +55,9 @@ class ResultAdmin(admin.ModelAdmin):
         return custom_urls + urls
     
     def generate_pdf_view(self, request, result_id):
+        # Imported here so that loading the admin doesn't load ReportLab
+        from .utils.pdf_generator import generate_report_card_pdf
+
         result = get_object_or_404(Result, id=result_id)
         
         try:
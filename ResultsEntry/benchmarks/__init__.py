@@ -0,0 +1,10 @@
+"""
+Micro-benchmarks for the results subsystem: ranking, grading, result updates,
+report card PDFs and bulk publishing, each measured at several class sizes.
+
+    python manage.py benchmark_results --sizes 10,30,60
+    python manage.py benchmark_results --save-baseline
+    python manage.py benchmark_results --compare --threshold 0.2
+
+The cases are in cases.py, measuring and comparing in harness.py.
+"""
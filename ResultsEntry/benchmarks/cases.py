@@ -0,0 +1,147 @@
+"""
+The benchmarked operations and the class they run against.
+
+Each case gets the ClassFixture and returns the call to measure; anything it does
+before returning is setup and is not timed. Every run is rolled back afterwards,
+so cases always start from the same data: a class of DRAFT results in SUBJECTS
+courses each, positions already calculated as they would be after entry.
+"""
+import random
+from dataclasses import dataclass, field
+from decimal import Decimal
+from types import SimpleNamespace
+
+from authapp.models import CustomUser
+from ResultsEntry.models import ClassCourse, Course, CourseResult, Result
+from ResultsEntry.serializers import ResultCreateSerializer
+from ResultsEntry.utils.pdf_generator import generate_report_card_pdf
+from ResultsEntry.views import BulkStatusUpdater, PositionCalculator
+
+CLASS_NAME = 'JHS 1'
+TERM = 'first'
+# BulkStatusUpdater recalculates positions for the default academic year, so use it throughout
+ACADEMIC_YEAR = '2023-2024'
+SUBJECTS = 12
+
+
+@dataclass
+class Case:
+    name: str
+    setup: object
+    number: int = 1  # calls per timed run, for operations too quick to time once
+
+
+@dataclass
+class ClassFixture:
+    size: int
+    staff: CustomUser
+    result_ids: list = field(default_factory=list)
+
+
+CASES = []
+
+
+def case(name, number=1):
+    def register(setup):
+        CASES.append(Case(name, setup, number))
+        return setup
+    return register
+
+
+def build_class(size, seed=1):
+    """A class of `size` students with ranked DRAFT results in SUBJECTS courses"""
+    rng = random.Random(seed)
+    staff = CustomUser.objects.create_user(
+        email='benchmark.staff@example.com', username='benchmark.staff', password=None,
+        role='staff', first_name='Bench', last_name='Mark', is_active=True,
+    )
+    CustomUser.objects.bulk_create([
+        CustomUser(
+            email=f"benchmark.student{n}@example.com", username=f"benchmark.student{n}",
+            first_name=f"Student{n}", last_name='Benchmark', role='student', is_active=True,
+            class_name=CLASS_NAME, index_number=f"BENCH{n:04d}",
+        )
+        for n in range(size)
+    ])
+    students = CustomUser.objects.filter(email__startswith='benchmark.student').order_by('id')
+
+    courses = Course.objects.bulk_create([
+        Course(name=f"Benchmark Subject {n}", code=f"BEN{n:02d}", created_by=staff) for n in range(SUBJECTS)
+    ])
+    class_courses = ClassCourse.objects.bulk_create([
+        ClassCourse(course=course, class_name=CLASS_NAME, term=TERM) for course in courses
+    ])
+    results = Result.objects.bulk_create([
+        Result(student=student, class_name=CLASS_NAME, term=TERM, academic_year=ACADEMIC_YEAR,
+               days_present=rng.randint(50, 65), days_absent=rng.randint(0, 8),
+               class_teacher_remarks="Works hard and participates in class.")
+        for student in students
+    ])
+    CourseResult.objects.bulk_create([
+        CourseResult(result=result, class_course=class_course,
+                     class_score=Decimal(rng.randint(10, 40)), exam_score=Decimal(rng.randint(15, 60)),
+                     remarks="Good")
+        for result in results for class_course in class_courses
+    ])
+    PositionCalculator.recalculate_positions(CLASS_NAME, TERM, ACADEMIC_YEAR)
+    return ClassFixture(size=size, staff=staff, result_ids=[result.pk for result in results])
+
+
+def clear_positions(fixture):
+    """Ranking from scratch, as after results are first entered, is the expensive case"""
+    Result.objects.filter(pk__in=fixture.result_ids).update(overall_position=None)
+    CourseResult.objects.filter(result_id__in=fixture.result_ids).update(position=None)
+
+
+@case('PositionCalculator.recalculate_positions')
+def recalculate_positions(fixture):
+    clear_positions(fixture)
+    return lambda: PositionCalculator.recalculate_positions(CLASS_NAME, TERM, ACADEMIC_YEAR)
+
+
+@case('Result._calculate_all_overall_positions')
+def calculate_all_overall_positions(fixture):
+    clear_positions(fixture)
+    result = Result.objects.get(pk=fixture.result_ids[0])
+    return result._calculate_all_overall_positions
+
+
+@case('CourseResult.grade', number=20)
+def grade(fixture):
+    course_results = list(CourseResult.objects.filter(result_id__in=fixture.result_ids))
+    return lambda: [course_result.grade for course_result in course_results]
+
+
+@case(f"ResultCreateSerializer.update ({SUBJECTS} subjects)")
+def serializer_update(fixture):
+    result = Result.objects.get(pk=fixture.result_ids[0])
+    data = {
+        'student': result.student_id, 'class_name': CLASS_NAME, 'term': TERM, 'academic_year': ACADEMIC_YEAR,
+        'status': 'DRAFT', 'days_present': 60, 'days_absent': 2,
+        # Every score changes, as when a teacher re-enters a student's sheet
+        'course_results': [
+            {'class_course': cr.class_course_id, 'class_score': str(min(cr.class_score + 1, 40)),
+             'exam_score': str(max(cr.exam_score - 1, 0)), 'remarks': 'Revised'}
+            for cr in result.course_results.all()
+        ],
+    }
+    serializer = ResultCreateSerializer(result, data=data, context={'request': SimpleNamespace(user=fixture.staff)})
+    serializer.is_valid(raise_exception=True)
+    return serializer.save
+
+
+@case('generate_report_card_pdf')
+def report_card_pdf(fixture):
+    result = Result.objects.select_related('student').get(pk=fixture.result_ids[0])
+    return lambda: generate_report_card_pdf(result)
+
+
+@case('BulkStatusUpdater.execute (publish)')
+def bulk_publish(fixture):
+    updater = BulkStatusUpdater({'class_name': CLASS_NAME, 'term': TERM, 'status': 'PUBLISHED'}, fixture.staff)
+
+    def execute():
+        response = updater.execute()
+        if response.status_code != 200:
+            raise RuntimeError(f"Bulk update failed: {response.data}")
+    return execute
@@ -0,0 +1,99 @@
+"""
+Running the cases and comparing against a baseline.
+
+For every class size the class is built once inside a transaction that is rolled
+back at the end, and every run of a case happens inside a savepoint that is
+rolled back too. Time is the median of `repeat` plain runs; the query count and
+peak Python memory (tracemalloc) come from one further run, since tracing would
+slow the timed ones down.
+"""
+import statistics
+import time
+import tracemalloc
+
+from django.db import connection, transaction
+
+from .cases import CASES, build_class
+
+DEFAULT_SIZES = (10, 30, 60)
+DEFAULT_THRESHOLD = 0.2
+
+
+class QueryCounter:
+    """Counts queries without keeping them (CaptureQueriesContext stops at 9000)"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def _run_once(case, fixture, instrument):
+    savepoint = transaction.savepoint()
+    try:
+        func = case.setup(fixture)
+        if not instrument:
+            started = time.perf_counter()
+            for _ in range(case.number):
+                func()
+            return (time.perf_counter() - started) / case.number
+
+        queries = QueryCounter()
+        tracemalloc.start()
+        try:
+            with connection.execute_wrapper(queries):
+                func()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        return queries.count, peak
+    finally:
+        transaction.savepoint_rollback(savepoint)
+
+
+def measure(case, fixture, repeat):
+    times = sorted(_run_once(case, fixture, instrument=False) for _ in range(repeat))
+    queries, peak = _run_once(case, fixture, instrument=True)
+    return {
+        'time_ms': round(statistics.median(times) * 1000, 3),
+        'min_ms': round(times[0] * 1000, 3),
+        'queries': queries,
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def run(sizes=DEFAULT_SIZES, repeat=3, cases=None, progress=None):
+    """{case name: {str(size): measurement}} for every case at every size"""
+    cases = [case for case in CASES if cases is None or case.name in cases]
+    measurements = {case.name: {} for case in cases}
+    for size in sizes:
+        with transaction.atomic():
+            fixture = build_class(size)
+            for case in cases:
+                measurements[case.name][str(size)] = measurement = measure(case, fixture, repeat)
+                if progress:
+                    progress(case.name, size, measurement)
+            transaction.set_rollback(True)
+    return measurements
+
+
+def compare(current, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Regressions of `current` against `baseline`, as (case, size, metric, before, after)
+    tuples. Time and memory may grow by `threshold` (a fraction) before they count;
+    query counts are exact, so any extra query counts.
+    """
+    regressions = []
+    for name, sizes in current.items():
+        for size, after in sizes.items():
+            before = baseline.get(name, {}).get(size)
+            if before is None:
+                continue
+            for metric in ('time_ms', 'peak_kb'):
+                if after[metric] > before[metric] * (1 + threshold):
+                    regressions.append((name, size, metric, before[metric], after[metric]))
+            if after['queries'] > before['queries']:
+                regressions.append((name, size, 'queries', before['queries'], after['queries']))
+    return regressions
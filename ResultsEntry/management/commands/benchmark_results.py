@@ -0,0 +1,111 @@
+import json
+import logging
+import os
+import platform
+import shutil
+import tempfile
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from loadtest.stub_email import StubEmailApi, use_email_host
+from ResultsEntry.benchmarks import harness
+from ResultsEntry.benchmarks.cases import CASES
+
+BASELINE = os.path.join(os.path.dirname(harness.__file__), 'baseline.json')
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark position calculation, grading, result updates, report card PDFs and bulk "
+        "publishing at several class sizes: median time, queries and peak memory. Runs in a "
+        "throwaway database with emails going to a local stub. --compare flags regressions "
+        "against the stored baseline; times are machine specific, so record the baseline "
+        "with --save-baseline on the machine that compares."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default=','.join(str(size) for size in harness.DEFAULT_SIZES),
+                            help="Comma separated class sizes")
+        parser.add_argument('--repeat', type=int, default=3, help="Timed runs per case and size")
+        parser.add_argument('--case', action='append', dest='cases', choices=[case.name for case in CASES],
+                            help="Only this case (repeatable)")
+        parser.add_argument('--output', help="Also write the measurements to this JSON file")
+        parser.add_argument('--baseline', default=BASELINE)
+        parser.add_argument('--save-baseline', action='store_true', help="Store these measurements as the baseline")
+        parser.add_argument('--compare', action='store_true', help="Fail on regressions against the baseline")
+        parser.add_argument('--threshold', type=float, default=harness.DEFAULT_THRESHOLD,
+                            help="Allowed growth in time and memory, as a fraction (0.2 = 20%%)")
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError("--sizes must be comma separated numbers")
+
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['baseline']) as f:
+                    baseline = json.load(f)
+            except FileNotFoundError:
+                raise CommandError(f"No baseline at {options['baseline']}; record one with --save-baseline")
+
+        self.stdout.write(f"{'case':<46}{'size':>6}{'time ms':>11}{'min ms':>11}{'queries':>9}{'peak KB':>10}")
+
+        def progress(name, size, m):
+            self.stdout.write(
+                f"{name:<46}{size:>6}{m['time_ms']:>11.2f}{m['min_ms']:>11.2f}{m['queries']:>9}{m['peak_kb']:>10.1f}"
+            )
+
+        measurements = self.run_isolated(sizes, options['repeat'], options['cases'], progress)
+        report = {
+            'meta': {
+                'recorded_at': datetime.now(timezone.utc).isoformat(),
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'repeat': options['repeat'],
+            },
+            'results': measurements,
+        }
+
+        for path in filter(None, [options['output'], options['baseline'] if options['save_baseline'] else None]):
+            with open(path, 'w') as f:
+                json.dump(report, f, indent=2)
+                f.write('\n')
+            self.stdout.write(f"Measurements written to {path}")
+
+        if baseline is not None:
+            regressions = harness.compare(measurements, baseline['results'], options['threshold'])
+            for name, size, metric, before, after in regressions:
+                self.stdout.write(self.style.ERROR(f"{name} at {size}: {metric} {before} -> {after}"))
+            if regressions:
+                raise CommandError(f"{len(regressions)} regressions against {options['baseline']}")
+            self.stdout.write(self.style.SUCCESS(
+                f"No regressions beyond {options['threshold']:.0%} against {options['baseline']}"
+            ))
+
+    def run_isolated(self, sizes, repeat, cases, progress):
+        """Run in a fresh database, with generated files and emails kept out of the real ones"""
+        directory = tempfile.mkdtemp(prefix='results-bench-')
+        if connection.vendor == 'sqlite':
+            # On disk like the real database, rather than the in-memory test default
+            connection.settings_dict['TEST']['NAME'] = os.path.join(directory, 'benchmark.sqlite3')
+        old_name = connection.settings_dict['NAME']
+        email = StubEmailApi(latency=0)
+        email.start()
+        use_email_host(f"{email.base_url}/v3")
+        # Per-result log lines would dominate the output and the timings
+        logging.disable(logging.INFO)
+        try:
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            with override_settings(MEDIA_ROOT=os.path.join(directory, 'media')):
+                return harness.run(sizes, repeat, cases, progress)
+        finally:
+            logging.disable(logging.NOTSET)
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            use_email_host(None)
+            email.stop()
+            shutil.rmtree(directory, ignore_errors=True)
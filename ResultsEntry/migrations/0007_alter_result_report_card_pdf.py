@@ -0,0 +1,19 @@
+# Generated by Django 5.0.6 on 2026-10-19 10:19
+
+import media_store.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ResultsEntry', '0006_result_report_card_pdf'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='result',
+            name='report_card_pdf',
+            field=models.FileField(blank=True, help_text='Generated PDF report card', null=True, storage=media_store.storage.content_hash_storage, upload_to='report_cards/'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.6 on 2026-10-19 10:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ResultsEntry', '0007_alter_result_report_card_pdf'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['class_name', 'term', 'academic_year'], name='result_class_term_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['status', 'scheduled_date'], name='result_schedule_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='resultchangelog',
+            index=models.Index(fields=['result', '-changed_at'], name='resultchangelog_history_idx'),
+        ),
+    ]
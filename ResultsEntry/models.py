@@ -4,6 +4,7 @@ from authapp.models import CustomUser
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from django.db import transaction
+from media_store.storage import content_hash_storage
 import os
 
 class Course(models.Model):
@@ -133,6 +134,23 @@ class ClassSize(models.Model):
             class_size = cls.update_class_size(class_name, term, academic_year)
             return class_size.total_students
 
+    @classmethod
+    def get_class_sizes(cls, keys):
+        """get_class_size for several (class_name, term, academic_year) keys, in one query"""
+        keys = set(keys)
+        if not keys:
+            return {}
+        query = models.Q()
+        for class_name, term, academic_year in keys:
+            query |= models.Q(class_name=class_name, term=term, academic_year=academic_year)
+        sizes = {
+            (class_size.class_name, class_size.term, class_size.academic_year): class_size.total_students
+            for class_size in cls.objects.filter(query)
+        }
+        for key in keys - sizes.keys():
+            sizes[key] = cls.get_class_size(*key)
+        return sizes
+
 class Result(models.Model):
     """Represents a complete result for a student in a term"""
     STATUS_CHOICES = [
@@ -166,6 +184,7 @@ class Result(models.Model):
     days_absent = models.PositiveIntegerField(default=0, help_text="Number of days student was absent")
     report_card_pdf = models.FileField(
         upload_to='report_cards/',
+        storage=content_hash_storage,
         null=True,
         blank=True,
         help_text="Generated PDF report card"
@@ -207,8 +226,17 @@ class Result(models.Model):
     
     @property
     def total_students_in_class(self):
-        """Get total number of students in the class for this term"""
-        return ClassSize.get_class_size(self.class_name, self.term, self.academic_year)
+        """Get total number of students in the class for this term (looked up once per instance)"""
+        if getattr(self, '_total_students_in_class', None) is None:
+            self._total_students_in_class = ClassSize.get_class_size(self.class_name, self.term, self.academic_year)
+        return self._total_students_in_class
+
+    @staticmethod
+    def attach_class_sizes(results):
+        """Look up the class sizes of many results at once, e.g. before serializing a list"""
+        sizes = ClassSize.get_class_sizes((r.class_name, r.term, r.academic_year) for r in results)
+        for result in results:
+            result._total_students_in_class = sizes[result.class_name, result.term, result.academic_year]
     
     @property
     def position_context(self):
@@ -370,6 +398,12 @@ class Result(models.Model):
         unique_together = ('student', 'class_name', 'term', 'academic_year')
         verbose_name = "Result"
         verbose_name_plural = "Results"
+        indexes = [
+            # Class lists, class sizes and position calculations
+            models.Index(fields=['class_name', 'term', 'academic_year'], name='result_class_term_idx'),
+            # Publishing scheduled results that are due
+            models.Index(fields=['status', 'scheduled_date'], name='result_schedule_idx'),
+        ]
 
 class CourseResult(models.Model):
     """Individual course results within a result"""
@@ -425,11 +459,8 @@ class CourseResult(models.Model):
     @property
     def position_context(self):
         """Get position context showing current position out of total students"""
-        total_students = ClassSize.get_class_size(
-            self.result.class_name, 
-            self.result.term, 
-            self.result.academic_year
-        )
+        # Shared with the parent result, so a result's course rows cost no extra queries
+        total_students = self.result.total_students_in_class
         if self.position and total_students > 0:
             return f"{self.position}/{total_students}"
         return "N/A"
@@ -493,4 +524,8 @@ class ResultChangeLog(models.Model):
     class Meta:
         ordering = ['-changed_at']
         verbose_name = "Result Change Log"
-        verbose_name_plural = "Result Change Logs"
\ No newline at end of file
+        verbose_name_plural = "Result Change Logs"
+        indexes = [
+            # A result's history, newest first
+            models.Index(fields=['result', '-changed_at'], name='resultchangelog_history_idx'),
+        ]
\ No newline at end of file
@@ -8,7 +8,7 @@ class IsStaffOrPrincipal(permissions.BasePermission):
     Custom permission to only allow staff or principal to access.
     """
     def has_permission(self, request, view):
-        return request.user and request.user.role in ['staff', 'principal']
+        return request.user.is_authenticated and request.user.role in ['staff', 'principal']
 
 class IsOwnerOrReadOnly(permissions.BasePermission):
     """
@@ -32,17 +32,17 @@ class IsOwnerOrStaffOrPrincipal(permissions.BasePermission):
             return True
             
         # Allow if the user is staff or principal
-        return request.user and request.user.role in ['staff', 'principal']
+        return request.user.is_authenticated and request.user.role in ['staff', 'principal']
 
 class IsPrincipal(permissions.BasePermission):
     """
     Custom permission to only allow principal to access.
     """
     def has_permission(self, request, view):
-        return request.user and request.user.role == 'principal'
+        return request.user.is_authenticated and request.user.role == 'principal'
         
     def has_object_permission(self, request, view, obj):
-        return request.user and request.user.role == 'principal'
+        return request.user.is_authenticated and request.user.role == 'principal'
 
 class PublishedResultsOnlyPrincipal(permissions.BasePermission):
     """
@@ -51,18 +51,18 @@ class PublishedResultsOnlyPrincipal(permissions.BasePermission):
     """
     def has_permission(self, request, view):
         # Allow principals always
-        if request.user and request.user.role == 'principal':
+        if request.user.is_authenticated and request.user.role == 'principal':
             return True
         
         # For create actions, allow staff
-        if view.action == 'create' and request.user and request.user.role == 'staff':
+        if view.action == 'create' and request.user.is_authenticated and request.user.role == 'staff':
             return True
             
         # For other actions, permissions are checked at object level
-        if request.user and request.user.role in ['staff', 'principal']:
+        if request.user.is_authenticated and request.user.role in ['staff', 'principal']:
             return True
             
-        logger.error(f"Permission denied: User {request.user.username} with role {request.user.role} attempted to access {view.action} in {view.__class__.__name__}")
+        logger.error(f"Permission denied: User {request.user.username} with role {getattr(request.user, 'role', None)} attempted to access {view.action} in {view.__class__.__name__}")
         return False
     
     def has_object_permission(self, request, view, obj):
@@ -72,10 +72,10 @@ class PublishedResultsOnlyPrincipal(permissions.BasePermission):
             
         # If the result is published, only principal can edit or delete
         if hasattr(obj, 'status') and obj.status == 'PUBLISHED':
-            is_allowed = request.user and request.user.role == 'principal'
+            is_allowed = request.user.is_authenticated and request.user.role == 'principal'
             if not is_allowed:
                 logger.error(f"Permission denied: User {request.user.username} with role {request.user.role} attempted to modify published result {obj.id}")
             return is_allowed
             
         # For non-published results, staff can also edit
-        return request.user and request.user.role in ['staff', 'principal']
\ No newline at end of file
+        return request.user.is_authenticated and request.user.role in ['staff', 'principal']
\ No newline at end of file
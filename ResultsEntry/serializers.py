@@ -1,3 +1,4 @@
+from django.db import models
 from rest_framework import serializers
 from django.utils import timezone
 from datetime import datetime
@@ -78,6 +79,13 @@ class CourseResultSerializer(serializers.ModelSerializer):
             'position_context'
         ]
 
+class ResultListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        # position_context needs each result's class size; fetch them together
+        results = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        Result.attach_class_sizes(results)
+        return super().to_representation(results)
+
 class ResultSerializer(serializers.ModelSerializer):
     course_results = CourseResultSerializer(many=True, read_only=True)
     student_name = serializers.SerializerMethodField(read_only=True)
@@ -91,6 +99,7 @@ class ResultSerializer(serializers.ModelSerializer):
     class Meta:
         model = Result
         fields = '__all__'
+        list_serializer_class = ResultListSerializer
         extra_kwargs = {
             'promoted_to': {'required': False, 'allow_null': True, 'allow_blank': True},
             'report_card_pdf': {'read_only': True}  # Make report_card_pdf read-only in the serializer
@@ -2,7 +2,6 @@ from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.core.files.base import ContentFile
 from .models import Result
-from .utils.pdf_generator import generate_report_card_pdf
 import logging
 
 logger = logging.getLogger(__name__)
@@ -22,7 +21,8 @@ def generate_report_card_on_save(sender, instance, created, **kwargs):
                 # For now, we'll always regenerate for published results
                 pass
             
-            # Generate the PDF
+            # Generate the PDF (ReportLab is imported on first use)
+            from .utils.pdf_generator import generate_report_card_pdf
             pdf_content = generate_report_card_pdf(instance)
             
             # Create filename
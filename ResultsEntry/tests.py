@@ -1,3 +1,55 @@
-from django.test import TestCase
+import tempfile
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from loadtest.stub_email import StubEmailApi, use_email_host
+
+from .benchmarks import harness
+from .benchmarks.cases import CASES
+
+
+class BenchmarkCompareTests(SimpleTestCase):
+
+    baseline = {'case': {'10': {'time_ms': 100.0, 'min_ms': 90.0, 'queries': 40, 'peak_kb': 500.0}}}
+
+    def current(self, **changes):
+        return {'case': {'10': dict(self.baseline['case']['10'], **changes)}}
+
+    def test_within_threshold(self):
+        self.assertEqual(harness.compare(self.current(time_ms=119.0, peak_kb=590.0), self.baseline, 0.2), [])
+
+    def test_slower_and_bigger(self):
+        regressions = harness.compare(self.current(time_ms=121.0, peak_kb=700.0), self.baseline, 0.2)
+        self.assertEqual(regressions, [
+            ('case', '10', 'time_ms', 100.0, 121.0),
+            ('case', '10', 'peak_kb', 500.0, 700.0),
+        ])
+
+    def test_any_extra_query(self):
+        self.assertEqual(harness.compare(self.current(queries=41), self.baseline, 0.2),
+                         [('case', '10', 'queries', 40, 41)])
+
+    def test_new_cases_and_sizes_are_not_compared(self):
+        current = {'case': {'60': self.baseline['case']['10']}, 'other': self.baseline['case']}
+        self.assertEqual(harness.compare(current, self.baseline, 0.2), [])
+
+
+class BenchmarkRunTests(TestCase):
+    """Keeps the cases runnable as the code they measure changes"""
+
+    def test_every_case_runs(self):
+        email = StubEmailApi(latency=0)
+        email.start()
+        self.addCleanup(email.stop)
+        use_email_host(f"{email.base_url}/v3")
+        self.addCleanup(use_email_host, None)
+
+        with tempfile.TemporaryDirectory() as media, override_settings(MEDIA_ROOT=media):
+            measurements = harness.run(sizes=(3,), repeat=1)
+
+        self.assertEqual(set(measurements), {case.name for case in CASES})
+        for name, sizes in measurements.items():
+            self.assertGreater(sizes['3']['time_ms'], 0, name)
+        self.assertEqual(measurements['CourseResult.grade']['3']['queries'], 0)
+        # One email per published result
+        self.assertEqual(len(email.messages), 3 * 2)
@@ -7,9 +7,12 @@ from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT, TA_JUSTIFY
 from reportlab.pdfgen import canvas
 from django.conf import settings
 from django.core.files.base import ContentFile
+from django.utils import timezone
+from Schoolproject import tracing
+from Schoolproject.metrics import REPORT_CARD_RENDER_SECONDS
+from Schoolproject.profiling import span
 from io import BytesIO
 import os
-from datetime import datetime
 import math
 
 
@@ -158,7 +161,8 @@ class ReportCardPDF:
             rightMargin=0.75*inch,
             leftMargin=0.75*inch,
             topMargin=0.75*inch,
-            bottomMargin=0.75*inch
+            bottomMargin=0.75*inch,
+            invariant=1  # Fixed creation date and document ID, so identical data renders identical bytes
         )
         
         # Create frame for content
@@ -579,10 +583,11 @@ class ReportCardPDF:
         
         elements.append(signature_table)
         
-        # Generation timestamp
+        # Timestamp of the underlying result rather than of the render, so
+        # re-rendering unchanged data is deduplicated by the media storage
         elements.append(Spacer(1, 0.3*inch))
-        generation_time = datetime.now().strftime('%B %d, %Y at %I:%M %p')
-        elements.append(Paragraph(f"Generated on {generation_time}", self.styles['FooterText']))
+        updated_time = timezone.localtime(self.result.updated_at).strftime('%B %d, %Y at %I:%M %p')
+        elements.append(Paragraph(f"Last updated on {updated_time}", self.styles['FooterText']))
         
         return elements
 
@@ -593,8 +598,9 @@ def generate_report_card_pdf(result):
     Returns the PDF file content as bytes
     """
     try:
-        pdf_generator = ReportCardPDF(result)
-        pdf_content = pdf_generator.generate_pdf()
+        with span('pdf'), REPORT_CARD_RENDER_SECONDS.time(), tracing.span('report_card.render', result_id=result.id):
+            pdf_generator = ReportCardPDF(result)
+            pdf_content = pdf_generator.generate_pdf()
         return pdf_content
     except Exception as e:
         # Log the error for debugging
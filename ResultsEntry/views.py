@@ -17,11 +17,9 @@ from rest_framework import (
 )
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from sib_api_v3_sdk import Configuration, ApiClient, SendSmtpEmail
-from sib_api_v3_sdk.api.transactional_emails_api import TransactionalEmailsApi
-from sib_api_v3_sdk.rest import ApiException
 
 from authapp.models import CustomUser
+from Schoolproject import metrics, tracing
 from .models import Course, ClassCourse, Result, CourseResult, ResultChangeLog, ClassSize
 from .permissions import (
     IsStaffOrPrincipal, IsOwnerOrReadOnly,
@@ -35,7 +33,6 @@ from .serializers import (
     ResultChangeLogSerializer, StudentSerializer,
     BulkResultUpdateSerializer
 )
-from .utils.pdf_generator import generate_report_card_pdf
 
 logger = logging.getLogger(__name__)
 
@@ -50,7 +47,7 @@ class ResultFilter(FilterSet):
         fields = ['student', 'class_name', 'term', 'status']
 
 class CourseViewSet(viewsets.ModelViewSet):
-    queryset = Course.objects.all()
+    queryset = Course.objects.select_related('created_by')
     serializer_class = CourseSerializer
     permission_classes = [IsOwnerOrReadOnly]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -62,7 +59,7 @@ class CourseViewSet(viewsets.ModelViewSet):
         serializer.save(created_by=self.request.user)
 
 class ClassCourseViewSet(viewsets.ModelViewSet):
-    queryset = ClassCourse.objects.all()
+    queryset = ClassCourse.objects.select_related('course')
     serializer_class = ClassCourseSerializer
     permission_classes = [IsStaffOrPrincipal]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -76,7 +73,7 @@ class ClassCourseViewSet(viewsets.ModelViewSet):
         term = request.query_params.get('term')
         if not class_name or not term:
             return Response({"error": "Both class_name and term parameters are required"}, status=status.HTTP_400_BAD_REQUEST)
-        queryset = self.get_queryset().filter(class_name=class_name, term=term)
+        queryset = self.get_queryset().filter(class_name=class_name, term=term).select_related('course__created_by')
         serializer = ClassCourseDetailSerializer(queryset, many=True)
         return Response(serializer.data)
 
@@ -150,7 +147,8 @@ class ResultViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         
         with transaction.atomic():
-            instance = serializer.save()
+            with tracing.span('results.save'):
+                instance = serializer.save()
             self._handle_post_create_tasks(instance)
         
         response_serializer = ResultSerializer(instance)
@@ -168,7 +166,8 @@ class ResultViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         
         with transaction.atomic():
-            updated_instance = serializer.save()
+            with tracing.span('results.save'):
+                updated_instance = serializer.save()
             self._handle_post_update_tasks(updated_instance, old_data)
         
         response_serializer = ResultSerializer(updated_instance)
@@ -244,7 +243,9 @@ class ResultViewSet(viewsets.ModelViewSet):
             return Response({"error": "class_name parameter is required"}, 
                           status=status.HTTP_400_BAD_REQUEST)
         
-        students = CustomUser.objects.filter(class_name=class_name, role='student')
+        students = CustomUser.objects.filter(
+            class_name=class_name, role='student'
+        ).prefetch_related('groups', 'user_permissions')
         serializer = StudentSerializer(students, many=True)
         return Response(serializer.data)
     
@@ -395,6 +396,8 @@ class ResultViewSet(viewsets.ModelViewSet):
                 changed_result_ids=changed_result_ids_old
             )
 
+    @metrics.timed('results.regenerate_class_pdfs')
+    @tracing.span('results.regenerate_class_pdfs')
     def _regenerate_pdfs_for_all_results_in_class(self, class_name, term, academic_year, 
                                                  exclude_result_id=None, changed_result_ids=None):
         """
@@ -502,6 +505,7 @@ class ResultViewSet(viewsets.ModelViewSet):
                 result.status = 'PUBLISHED'
                 result.published_date = now
                 result.save(update_fields=['status', 'published_date'])
+                metrics.observe_publication_lag('result', result.scheduled_date, now)
                 
                 updated_classes_terms.add((result.class_name, result.term, result.academic_year))
                 EmailNotifier.send_result_published(result)
@@ -572,6 +576,8 @@ class ResultViewSet(viewsets.ModelViewSet):
 # Separate service classes for better organization
 class PositionCalculator:
     @staticmethod
+    @metrics.timed('results.recalculate_positions')
+    @tracing.span('results.recalculate_positions')
     def recalculate_positions(class_name, term, academic_year="2023-2024"):
         """Recalculate positions for all results in a class and term"""
         with transaction.atomic():
@@ -680,6 +686,8 @@ class PDFGenerator:
     @staticmethod
     def generate_for_result(result):
         """Generate PDF for a result with detailed logging"""
+        from .utils.pdf_generator import generate_report_card_pdf
+
         try:
             logger.debug(f"Starting PDF generation for result ID {result.id}")
             result.refresh_from_db()
@@ -697,8 +705,20 @@ class PDFGenerator:
             
             pdf_file = ContentFile(pdf_content, name=filename)
             
-            # Save the PDF file
-            result.report_card_pdf.save(filename, pdf_file, save=True)
+            # Save the PDF file; storage names it by content hash, so an unchanged
+            # report card resolves to the name already stored and needs no row update
+            field_file = result.report_card_pdf
+            stored_name = field_file.storage.save(
+                field_file.field.generate_filename(result, filename),
+                pdf_file,
+                max_length=field_file.field.max_length
+            )
+            if stored_name == field_file.name:
+                logger.info(f"PDF unchanged for result {result.id}, keeping {stored_name}")
+                return True
+            
+            field_file.name = stored_name
+            result.save(update_fields=['report_card_pdf'], calculate_positions=False)
             logger.info(f"PDF saved successfully for result {result.id} at {result.report_card_pdf.url}")
             
             return True
@@ -712,6 +732,7 @@ class PDFGenerator:
 
 class EmailNotifier:
     @staticmethod
+    @tracing.span('results.email_published')
     def send_result_published(result):
         """Send email notification when result is published"""
         try:
@@ -756,6 +777,8 @@ class BulkStatusUpdater:
         self.scheduled_date = data.get('scheduled_date')
         self.user = user
         
+    @metrics.timed('results.bulk_update_status')
+    @tracing.span('results.bulk_update_status')
     def execute(self):
         """Execute bulk status update"""
         if self.status == 'SCHEDULED' and not self.scheduled_date:
@@ -867,6 +890,8 @@ class BulkStatusUpdater:
             "updated_count": updated_count
         })
     
+    @metrics.timed('results.regenerate_class_pdfs')
+    @tracing.span('results.regenerate_class_pdfs')
     def _regenerate_all_pdfs_in_class(self, changed_result_ids):
         """Regenerate PDFs for ALL results in the class"""
         logger.info(f"Starting PDF regeneration for ALL results in {self.class_name} - {self.term} (Bulk Update)")
@@ -958,7 +983,12 @@ class StudentResultsViewSet(viewsets.ReadOnlyModelViewSet):
         user = self.request.user
         self._check_scheduled_results()
         
-        return Result.objects.filter(
+        return Result.objects.select_related('student').prefetch_related(
+            Prefetch(
+                'course_results', 
+                queryset=CourseResult.objects.select_related('class_course__course')
+            )
+        ).filter(
             student=user,
             status__in=['PUBLISHED', 'SCHEDULED'],
         ).filter(
@@ -970,6 +1000,9 @@ class StudentResultsViewSet(viewsets.ReadOnlyModelViewSet):
         """
         Send email notification when result is published
         """
+        from sib_api_v3_sdk import Configuration, ApiClient, TransactionalEmailsApi, SendSmtpEmail
+        from sib_api_v3_sdk.rest import ApiException
+
         try:
             configuration = Configuration()
             configuration.api_key['api-key'] = os.getenv('BREVO_API_KEY')
@@ -1018,6 +1051,7 @@ class StudentResultsViewSet(viewsets.ReadOnlyModelViewSet):
                 result.status = 'PUBLISHED'
                 result.published_date = now
                 result.save()
+                metrics.observe_publication_lag('result', result.scheduled_date, now)
                 
                 # Send email notification for automatically published results
                 self.send_result_published_email(result)
@@ -1057,16 +1091,9 @@ class StudentResultsViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        self._check_scheduled_results()
-        
-        # Get results for current class only
-        queryset = Result.objects.filter(
-            student=user,
+        # Get results for current class only (get_queryset publishes due scheduled results)
+        queryset = self.get_queryset().filter(
             class_name=user.class_name,  # Use the student's current class
-            status__in=['PUBLISHED', 'SCHEDULED']
-        ).filter(
-            Q(status='PUBLISHED') | 
-            Q(status='SCHEDULED', scheduled_date__lte=timezone.now())
         )
         
         # Allow filtering by term
@@ -1100,8 +1127,6 @@ class StudentResultsViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        self._check_scheduled_results()
-        
         # Get current class name
         current_class = user.class_name
         
@@ -1131,14 +1156,9 @@ class StudentResultsViewSet(viewsets.ReadOnlyModelViewSet):
             )
         
         # Get results for specific class and term only
-        queryset = Result.objects.filter(
-            student=user,
+        queryset = self.get_queryset().filter(
             class_name=class_name,
             term=term,
-            status__in=['PUBLISHED', 'SCHEDULED']
-        ).filter(
-            Q(status='PUBLISHED') | 
-            Q(status='SCHEDULED', scheduled_date__lte=timezone.now())
         )
         
         # If no results found for this specific class and term
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.6 on 2026-10-19 10:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Schoolapp', '0006_delete_subscriptionsform_alter_contact_options'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['status', 'timestamp'], name='contact_triage_idx'),
+        ),
+    ]
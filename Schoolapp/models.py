@@ -24,6 +24,10 @@ class Contact(models.Model):
         verbose_name = "Contact"
         verbose_name_plural = "Contacts"
         ordering = ['-timestamp']
+        indexes = [
+            # Triage queue: open contacts, oldest first
+            models.Index(fields=['status', 'timestamp'], name='contact_triage_idx'),
+        ]
 
 
 class ContactLog(models.Model):
@@ -33,5 +37,11 @@ class ContactLog(models.Model):
     changed_fields = models.TextField()  # Store the fields that were changed
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # A record's history, newest first
+            models.Index(fields=['contact', '-timestamp'], name='contactlog_history_idx'),
+        ]
+
     def __str__(self):
         return f"Log for {self.contact.email} by {self.user_email} at {self.timestamp}"
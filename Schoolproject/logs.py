@@ -0,0 +1,167 @@
+"""
+Logging pipeline.
+
+Loggers never write to a file or the console themselves. The one root handler
+is a QueueHandler, which puts each record on an in-memory queue and returns,
+and a QueueListener thread takes records off the queue and writes them out:
+JSON lines to a file, readable lines to the console. A slow disk or terminal
+therefore never holds up a request.
+
+Every gunicorn worker appends to the same file, one write per record, so the
+workers must not rotate it themselves: a RotatingFileHandler in each of them
+would rename the file under the others and lose or overwrite their records.
+The file handler is a WatchedFileHandler and logrotate rotates the file,
+e.g. in /etc/logrotate.d/school-backend:
+
+    /srv/school-backend/debug.log {
+        daily
+        rotate 14
+        maxsize 50M
+        compress
+        delaycompress
+        missingok
+        notifempty
+    }
+
+Each worker notices that the file was moved and reopens LOG_FILE on its next
+record.
+
+Records are prepared before they are queued: the message is formatted, an
+exception becomes its traceback text, and the id of the current trace (see
+tracing.py) is attached, since the listener thread cannot see the request's
+context. When the queue is full, records are dropped and counted rather than
+blocking the caller; the count is reported with the next record written.
+
+DebugRateLimitFilter keeps chatty debug logging affordable when it is turned
+on: each call site may log `rate` DEBUG records per `per` seconds, optionally
+only a `sample` fraction of them, and the number dropped is attached to the
+next record from that call site.
+
+The pipeline is set up from settings.LOGGING (Python 3.11's dictConfig cannot
+build a QueueListener itself, hence queue_handler()).
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import threading
+import time
+from datetime import datetime, timezone
+
+QUEUE_SIZE = 10000
+
+# Attributes every LogRecord has; anything else on a record came from `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with any `extra` fields alongside the standard ones"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'line': record.lineno,
+            'process': record.process,
+            'thread': record.threadName,
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and key not in entry:
+                entry[key] = value
+        return json.dumps(entry, default=str)
+
+
+class DebugRateLimitFilter(logging.Filter):
+    """At most `rate` DEBUG records per call site every `per` seconds, a `sample` fraction of those"""
+
+    def __init__(self, rate=20, per=60, sample=1.0):
+        super().__init__()
+        self.rate = rate
+        self.per = per
+        self.sample = sample
+        self._windows = {}  # (pathname, lineno) -> [window start, records logged, records dropped]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get((record.pathname, record.lineno))
+            if window is None or now - window[0] >= self.per:
+                dropped = window[2] if window else 0
+                window = self._windows[(record.pathname, record.lineno)] = [now, 0, dropped]
+            if window[1] >= self.rate or (self.sample < 1 and random.random() >= self.sample):
+                window[2] += 1
+                return False
+            window[1] += 1
+            if window[2]:
+                record.suppressed = window[2]
+                window[2] = 0
+        return True
+
+
+class QueueHandler(logging.handlers.QueueHandler):
+    """Hands records to the listener thread; drops them when the queue is full"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Imported here: settings import this module before the apps are loaded
+        from Schoolproject.tracing import current_span
+
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        span = current_span()
+        if span is not None:
+            record.trace_id = span.trace_id
+        return record
+
+    def enqueue(self, record):
+        if self.dropped:
+            record.dropped_records = self.dropped
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+        else:
+            self.dropped = 0
+
+
+def queue_handler(queue_size=QUEUE_SIZE, **handlers):
+    """
+    A QueueHandler whose listener thread passes records on to `handlers`. In
+    LOGGING name already configured handlers as 'cfg://handlers.<name>';
+    handlers are configured in name order, so the queue handler's name must sort
+    after theirs.
+    """
+    log_queue = queue.Queue(queue_size)
+    listener = logging.handlers.QueueListener(log_queue, *handlers.values(), respect_handler_level=True)
+    listener.start()
+    # Write out what is still queued when the process exits
+    atexit.register(listener.stop)
+    # A forked worker (gunicorn --preload) has the queue but not the thread
+    os.register_at_fork(after_in_child=lambda: _restart(listener))
+    return QueueHandler(log_queue)
+
+
+def _restart(listener):
+    listener._thread = None
+    listener.start()
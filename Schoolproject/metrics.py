@@ -0,0 +1,205 @@
+"""
+Prometheus metrics, served at /metrics.
+
+- http_request_duration_seconds{method, route, status}: one observation per
+  request; route is the URL name (e.g. 'result-detail'), or the view's dotted
+  path for unnamed URLs, or '<unmatched>' for 404s outside every pattern;
+- http_request_db_queries{route}: SQL queries per request;
+- operation_duration_seconds{operation}: the hot paths wrapped in timed(), such
+  as ranking, bulk publishing and password checks;
+- report_card_render_seconds: generate_report_card_pdf;
+- email_send_seconds{call_site} and email_send_failures_total{call_site}: every
+  Brevo send_transac_email call, labelled with the function that made it;
+- scheduled_publication_lag_seconds{kind}: how long after its scheduled date a
+  result or book list was actually published (both are published lazily, by
+  the next request that looks at them);
+- background_queue_depth{queue}: jobs submitted to the background workers
+  (tasks.py modules, payments) that have not finished yet;
+- logins_total{portal, outcome}.
+
+Under gunicorn every worker keeps its own numbers. Set PROMETHEUS_MULTIPROC_DIR
+to an empty directory before the workers start (gunicorn.conf.py clears it on
+startup) and each worker writes its values there; /metrics then adds up the
+files of all workers, whichever worker answers the scrape.
+
+/metrics requires `Authorization: Bearer <METRICS_TOKEN>`. Without METRICS_TOKEN
+it answers 403 to everyone: the metrics list every route and how busy it is.
+"""
+import importlib.abc
+import importlib.util
+import os
+import secrets
+import sys
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+# Scheduled items wait for the next request that looks at them, so minutes to days
+LAG_BUCKETS = (1, 10, 60, 300, 900, 3600, 4 * 3600, 24 * 3600, 7 * 24 * 3600)
+
+REQUEST_SECONDS = Histogram(
+    'http_request_duration_seconds', "Time to respond to a request",
+    ['method', 'route', 'status'], buckets=LATENCY_BUCKETS,
+)
+REQUEST_QUERIES = Histogram(
+    'http_request_db_queries', "SQL queries run while handling a request", ['route'], buckets=QUERY_BUCKETS,
+)
+OPERATION_SECONDS = Histogram(
+    'operation_duration_seconds', "Time spent in instrumented operations", ['operation'], buckets=LATENCY_BUCKETS,
+)
+REPORT_CARD_RENDER_SECONDS = Histogram(
+    'report_card_render_seconds', "Time to render one report card PDF", buckets=LATENCY_BUCKETS,
+)
+EMAIL_SEND_SECONDS = Histogram(
+    'email_send_seconds', "Time for one Brevo send_transac_email call", ['call_site'], buckets=LATENCY_BUCKETS,
+)
+EMAIL_SEND_FAILURES = Counter(
+    'email_send_failures', "Brevo send_transac_email calls that raised", ['call_site'],
+)
+SCHEDULED_PUBLICATION_LAG = Histogram(
+    'scheduled_publication_lag_seconds', "Delay between the scheduled and the actual publication",
+    ['kind'], buckets=LAG_BUCKETS,
+)
+BACKGROUND_QUEUE_DEPTH = Gauge(
+    'background_queue_depth', "Background jobs submitted and not finished", ['queue'],
+    multiprocess_mode='livesum',
+)
+LOGINS = Counter('logins', "Password login attempts", ['portal', 'outcome'])
+
+
+def timed(operation):
+    """Time a block or function into operation_duration_seconds{operation}"""
+    return OPERATION_SECONDS.labels(operation=operation).time()
+
+
+def observe_publication_lag(kind, scheduled_date, published_date):
+    if scheduled_date is not None:
+        SCHEDULED_PUBLICATION_LAG.labels(kind=kind).observe(max((published_date - scheduled_date).total_seconds(), 0))
+
+
+def track_queue(queue, future):
+    """Count `future` in background_queue_depth{queue} until it is done; returns the future"""
+    depth = BACKGROUND_QUEUE_DEPTH.labels(queue=queue)
+    depth.inc()
+    future.add_done_callback(lambda _: depth.dec())
+    return future
+
+
+class _AfterImport(importlib.abc.MetaPathFinder):
+    """Calls `callback` with module `name` once it has been imported, without importing it"""
+
+    def __init__(self, name, callback):
+        self.name = name
+        self.callback = callback
+
+    def find_spec(self, fullname, path, target=None):
+        if fullname != self.name:
+            return None
+        sys.meta_path.remove(self)
+        spec = importlib.util.find_spec(fullname)
+        exec_module = spec.loader.exec_module
+
+        def exec_and_call(module):
+            exec_module(module)
+            self.callback(module)
+
+        spec.loader.exec_module = exec_and_call
+        return spec
+
+
+EMAIL_API_MODULE = 'sib_api_v3_sdk.api.transactional_emails_api'
+_email_timing_installed = False
+
+
+def _install_email_timing():
+    """
+    Time every TransactionalEmailsApi.send_transac_email call. The call site label
+    is the calling function, e.g. 'ResultsEntry.views.EmailNotifier.send_result_published'.
+    The SDK takes a while to import and the views only import it to send an email,
+    so the method is wrapped once that happens.
+    """
+    global _email_timing_installed
+    if _email_timing_installed:
+        return
+    _email_timing_installed = True
+    module = sys.modules.get(EMAIL_API_MODULE)
+    if module is not None:
+        _instrument_email_api(module)
+    else:
+        sys.meta_path.insert(0, _AfterImport(EMAIL_API_MODULE, _instrument_email_api))
+
+
+def _instrument_email_api(module):
+    TransactionalEmailsApi = module.TransactionalEmailsApi
+    send_transac_email = TransactionalEmailsApi.send_transac_email
+
+    def instrumented_send_transac_email(api, *args, **kwargs):
+        caller = sys._getframe(1)
+        call_site = f"{caller.f_globals.get('__name__')}.{caller.f_code.co_qualname}"
+        started = time.perf_counter()
+        try:
+            return send_transac_email(api, *args, **kwargs)
+        except Exception:
+            EMAIL_SEND_FAILURES.labels(call_site=call_site).inc()
+            raise
+        finally:
+            EMAIL_SEND_SECONDS.labels(call_site=call_site).observe(time.perf_counter() - started)
+
+    TransactionalEmailsApi.send_transac_email = instrumented_send_transac_email
+
+
+def route_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None else '<unmatched>'
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        _install_email_timing()
+
+    def __call__(self, request):
+        queries = _QueryCounter()
+        started = time.perf_counter()
+        with connections['default'].execute_wrapper(queries):
+            response = self.get_response(request)
+        route = route_name(request)
+        REQUEST_SECONDS.labels(method=request.method, route=route, status=response.status_code).observe(
+            time.perf_counter() - started
+        )
+        REQUEST_QUERIES.labels(route=route).observe(queries.count)
+        return response
+
+
+def metrics_view(request):
+    token = getattr(settings, 'METRICS', {}).get('TOKEN')
+    if not token:
+        return HttpResponse("Set METRICS_TOKEN to enable /metrics.", status=403, content_type='text/plain')
+    supplied = request.META.get('HTTP_AUTHORIZATION', '')
+    # As bytes: compare_digest rejects non-ASCII str, and WSGI headers are latin-1
+    if not secrets.compare_digest(supplied.encode('latin-1', 'replace'), f"Bearer {token}".encode()):
+        return HttpResponse(status=401)
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,301 @@
+"""
+Per-request profiling.
+
+ProfilingMiddleware times every request and breaks the time down into
+
+- SQL: number of queries, total time, and the slowest few with the line of our
+  code that ran them (the first frame outside Django and site-packages);
+- outbound HTTP: everything that goes through urllib3, which is Brevo (the
+  sib_api_v3_sdk client), ipinfo and Google (requests and google-auth), per host;
+- PDF rendering: generate_report_card_pdf, through span('pdf').
+
+The breakdown is sent back in a Server-Timing header to staff users and to
+requests carrying the profiling token (it would tell anyone else how long our
+queries take), and requests slower than SLOW_REQUEST_MS are logged with their
+slowest queries:
+
+    Server-Timing: total;dur=812.4, db;dur=640.2;desc="214 queries",
+                   http;dur=95.1;desc="1 call", pdf;dur=60.3;desc="1 render"
+
+A full cProfile profile (or pyinstrument, with PROFILER = 'pyinstrument' and the
+package installed) is written to DIRECTORY for requests carrying
+`X-Profile: <PROFILING['TOKEN']>`, which get the file name back in X-Profile,
+and for a SAMPLE_RATE fraction of all requests. DIRECTORY must not be served:
+profiles show our code, queries and request paths. Open .prof files with
+`python -m pstats` or snakeviz. Without the header and with SAMPLE_RATE at 0 no
+profiler runs; the per-request cost is a few timer calls per query and per
+outbound call.
+
+Settings, in settings.PROFILING: ENABLED, TOKEN, SAMPLE_RATE, PROFILER,
+DIRECTORY (relative to BASE_DIR unless absolute), SLOWEST_QUERIES and
+SLOW_REQUEST_MS.
+"""
+import contextvars
+import cProfile
+import heapq
+import itertools
+import logging
+import os
+import random
+import re
+import secrets
+import sys
+import time
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': True,
+    'TOKEN': '',
+    'SAMPLE_RATE': 0.0,
+    'PROFILER': 'cprofile',
+    'DIRECTORY': 'profiles',
+    'SLOWEST_QUERIES': 5,
+    'SLOW_REQUEST_MS': 1000,
+}
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+
+_current = contextvars.ContextVar('request_profile', default=None)
+_sequence = itertools.count()
+
+# Frames from these are skipped when looking for the code that ran a query
+_FRAMEWORK_PATHS = tuple({
+    os.path.dirname(os.path.dirname(__import__('django').__file__)),
+    os.path.dirname(os.__file__),
+    __file__,
+})
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'PROFILING', {})}
+
+
+@dataclass
+class Timer:
+    count: int = 0
+    seconds: float = 0.0
+
+    def add(self, seconds):
+        self.count += 1
+        self.seconds += seconds
+
+
+@dataclass
+class RequestProfile:
+    """What one request spent its time on"""
+    slowest_queries: int = 5
+    db: Timer = field(default_factory=Timer)
+    spans: dict = field(default_factory=dict)  # name -> Timer
+    http_hosts: dict = field(default_factory=dict)  # host -> Timer
+    # min-heap of (seconds, sequence, sql, call site), the slowest kept
+    queries: list = field(default_factory=list)
+    _http_depth: int = 0
+
+    def add_query(self, seconds, sql):
+        self.db.add(seconds)
+        if len(self.queries) < self.slowest_queries:
+            heapq.heappush(self.queries, (seconds, next(_sequence), sql, call_site()))
+        elif seconds > self.queries[0][0]:
+            heapq.heapreplace(self.queries, (seconds, next(_sequence), sql, call_site()))
+
+    def add_span(self, name, seconds):
+        self.spans.setdefault(name, Timer()).add(seconds)
+
+    def slowest(self):
+        """[(ms, sql, call site)], slowest first"""
+        return [(seconds * 1000, sql, site) for seconds, _, sql, site in sorted(self.queries, reverse=True)]
+
+
+def call_site():
+    """'path/to/module.py:123 in function' for the first frame in our own code"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if not filename.startswith(_FRAMEWORK_PATHS) and 'site-packages' not in filename \
+                and 'dist-packages' not in filename:
+            return f"{os.path.relpath(filename, settings.BASE_DIR)}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return 'unknown'
+
+
+@contextmanager
+def span(name):
+    """Count the time spent in the block towards `name` for the current request, if any"""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add_span(name, time.perf_counter() - started)
+
+
+class _QueryTimer:
+    def __init__(self, profile):
+        self.profile = profile
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.profile.add_query(time.perf_counter() - started, sql)
+
+
+_http_timing_installed = False
+
+
+def _install_http_timing():
+    """
+    Time urllib3 connection pools, which requests, google-auth and the Brevo SDK
+    all send through. Retries and redirects call urlopen again from inside
+    urlopen; only the outermost call is counted.
+    """
+    from urllib3.connectionpool import HTTPConnectionPool
+
+    global _http_timing_installed
+    if _http_timing_installed:
+        return
+    _http_timing_installed = True
+    urlopen = HTTPConnectionPool.urlopen
+
+    def profiled_urlopen(pool, *args, **kwargs):
+        profile = _current.get()
+        if profile is None or profile._http_depth:
+            return urlopen(pool, *args, **kwargs)
+        profile._http_depth += 1
+        started = time.perf_counter()
+        try:
+            return urlopen(pool, *args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - started
+            profile._http_depth -= 1
+            profile.add_span('http', seconds)
+            profile.http_hosts.setdefault(pool.host, Timer()).add(seconds)
+
+    HTTPConnectionPool.urlopen = profiled_urlopen
+
+
+def stop_profiler(profiler):
+    if isinstance(profiler, cProfile.Profile):
+        profiler.disable()
+    else:
+        profiler.stop()
+
+
+def _plural(count, word, plural=None):
+    return f"{count} {word if count == 1 else plural or word + 's'}"
+
+
+def server_timing(total, profile):
+    entries = [f"total;dur={total * 1000:.1f}",
+               f'db;dur={profile.db.seconds * 1000:.1f};desc="{_plural(profile.db.count, "query", "queries")}"']
+    descriptions = {'http': 'call', 'pdf': 'render'}
+    for name, timer in profile.spans.items():
+        entries.append(f'{name};dur={timer.seconds * 1000:.1f};desc="{_plural(timer.count, descriptions.get(name, "call"))}"')
+    return ', '.join(entries)
+
+
+class ProfilingMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.config = get_config()
+        if self.config['ENABLED']:
+            _install_http_timing()
+
+    def __call__(self, request):
+        if not self.config['ENABLED']:
+            return self.get_response(request)
+
+        profile = RequestProfile(slowest_queries=self.config['SLOWEST_QUERIES'])
+        token = _current.set(profile)
+        profiler = self.start_profiler(request)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(_QueryTimer(profile)))
+                response = self.get_response(request)
+        finally:
+            total = time.perf_counter() - started
+            _current.reset(token)
+            if profiler is not None:
+                stop_profiler(profiler)
+
+        has_token = self.has_token(request)
+        if profiler is not None:
+            name = self.save_profile(profiler, request)
+            if has_token:
+                response['X-Profile'] = name
+        timing = server_timing(total, profile)
+        # request.user is read after the view: DRF sets it once it has authenticated the request
+        if has_token or getattr(getattr(request, 'user', None), 'is_staff', False):
+            response['Server-Timing'] = timing
+        if total * 1000 >= self.config['SLOW_REQUEST_MS']:
+            self.log_slow_request(request, response, total, timing, profile)
+        return response
+
+    def has_token(self, request):
+        token = self.config['TOKEN']
+        supplied = request.META.get(PROFILE_HEADER)
+        # compare_digest only takes ASCII str; WSGI headers are latin-1 and may not be
+        return bool(token and supplied and secrets.compare_digest(supplied.encode('latin-1', 'replace'),
+                                                                   token.encode()))
+
+    def wants_profile(self, request):
+        return self.has_token(request) or random.random() < self.config['SAMPLE_RATE']
+
+    def start_profiler(self, request):
+        if not self.wants_profile(request):
+            return None
+        if self.config['PROFILER'] == 'pyinstrument':
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                logger.warning("PROFILING['PROFILER'] is pyinstrument but it is not installed; using cProfile")
+            else:
+                profiler = Profiler()
+                profiler.start()
+                return profiler
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Only one profiler can run per process; a concurrent request has it
+            logger.info(f"Not profiling {request.method} {request.path}: another request is being profiled")
+            return None
+        return profiler
+
+    def save_profile(self, profiler, request):
+        """Write the stopped profiler's output to DIRECTORY; returns the file name"""
+        directory = os.path.join(settings.BASE_DIR, self.config['DIRECTORY'])
+        os.makedirs(directory, exist_ok=True)
+        slug = re.sub(r'[^A-Za-z0-9]+', '-', request.path).strip('-')[:80] or 'root'
+        name = f"{datetime.now():%Y%m%d-%H%M%S-%f}-{request.method}-{slug}"
+        if isinstance(profiler, cProfile.Profile):
+            name += '.prof'
+            profiler.dump_stats(os.path.join(directory, name))
+        else:
+            name += '.html'
+            with open(os.path.join(directory, name), 'w') as f:
+                f.write(profiler.output_html())
+        logger.info(f"Profile of {request.method} {request.path} written to {os.path.join(directory, name)}")
+        return name
+
+    def log_slow_request(self, request, response, total, timing, profile):
+        lines = [f"Slow request {request.method} {request.path} -> {response.status_code} "
+                 f"in {total * 1000:.0f} ms: {timing}"]
+        lines += [f"  {ms:.1f} ms at {site}: {sql[:300]}" for ms, sql, site in profile.slowest()]
+        for host, timer in profile.http_hosts.items():
+            lines.append(f"  {host}: {_plural(timer.count, 'call')} in {timer.seconds * 1000:.1f} ms")
+        logger.warning('\n'.join(lines))
@@ -14,6 +14,7 @@ from datetime import timedelta
 from pathlib import Path
 import os
 from dotenv import load_dotenv
+from corsheaders.defaults import default_headers
 
 # Load environment variables with error handling
 env_path = Path(__file__).resolve().parent.parent / '.env'
@@ -25,23 +26,23 @@ def load_env_with_fallback(env_path):
     for encoding in encodings:
         try:
             load_dotenv(env_path, encoding=encoding)
-            print(f"Successfully loaded .env with {encoding} encoding")
             return
         except UnicodeDecodeError:
             continue
     
     raise ValueError("Could not load .env file with any supported encoding")
 
-# Try to load the environment file
+# Try to load the environment file; without one the variables must already be
+# set, which is checked below
 if env_path.exists():
     load_env_with_fallback(env_path)
-else:
-    print(f"Warning: .env file not found at {env_path}")
 
 # Now get environment variables properly
 BREVO_API_KEY = os.getenv('BREVO_API_KEY')
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL')
 IPINFO_API_KEY = os.getenv('IPINFO_API_KEY')
+# Overrides the Brevo API address, e.g. with the stub from `manage.py run_load_stubs`
+BREVO_API_HOST = os.getenv('BREVO_API_HOST')
 SECRET_KEY = os.getenv('SECRET_KEY')
 
 # Verify required variables are set
@@ -95,6 +96,11 @@ CORS_ORIGIN_ALLOW_ALL = True
 
 CORS_ALLOW_CREDENTIALS = True
 
+# Let the frontends request profiles and traces (see PROFILING and TRACING below).
+# Server-Timing and X-Profile are not exposed: any origin may call the API.
+CORS_ALLOW_HEADERS = (*default_headers, 'x-profile', 'traceparent')
+CORS_EXPOSE_HEADERS = ['X-Trace-Id']
+
 #LOGIN_REDIRECT_URL = '/'
 
 # Application definition
@@ -132,6 +138,10 @@ INSTALLED_APPS = [
     'admin_auth',
     'hubtel',
     'student_auth',
+    'sequences',
+    'media_store',
+    'triage',
+    'loadtest',
     'rest_framework.authtoken',
     'whitenoise.runserver_nostatic',
     
@@ -154,6 +164,9 @@ SIMPLE_JWT = {
 }
 
 MIDDLEWARE = [
+    'Schoolproject.profiling.ProfilingMiddleware',
+    'Schoolproject.metrics.MetricsMiddleware',
+    'Schoolproject.tracing.TracingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -199,12 +212,49 @@ WSGI_APPLICATION = 'Schoolproject.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        # django.db.backends.sqlite3 plus WAL and connection pragmas, BEGIN IMMEDIATE
+        # transactions and lock retries; see Schoolproject/sqlite_backend/base.py
+        'ENGINE': 'Schoolproject.sqlite_backend',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'timeout': 20,
+        },
     }
 }
 
 
+# The book list feeds and job post facets are cached under a data version that
+# every write replaces. By default each worker process has its own in-memory
+# cache, so a write retires the cached copies of the worker that handled it and
+# the other workers start a new version within CACHE_VERSION_TIMEOUT seconds.
+# To retire them in every worker at once, share the cache: set REDIS_URL, or set
+# CACHE_BACKEND=database and run `python manage.py createcachetable` once. The
+# database cache costs a query per cache access and competes for SQLite's write
+# lock, so it suits small deployments only.
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        },
+    }
+    CACHE_VERSION_TIMEOUT = None
+elif os.getenv('CACHE_BACKEND') == 'database':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+        },
+    }
+    CACHE_VERSION_TIMEOUT = None
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+    }
+    CACHE_VERSION_TIMEOUT = 60
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -286,6 +336,10 @@ SESSION_COOKIE_AGE = 25200
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True
 SESSION_SAVE_EVERY_REQUEST = True
 
+# Records go through a queue to a background thread that writes them (see
+# Schoolproject/logs.py): JSON lines to LOG_FILE, readable lines to the console.
+# Every gunicorn worker appends to LOG_FILE, so it is rotated by logrotate, not
+# by the workers (see logs.py).
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -294,25 +348,50 @@ LOGGING = {
             'format': '{levelname} {asctime} {module} {process:d} {thread:d} {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'Schoolproject.logs.JsonFormatter',
+        },
+    },
+    'filters': {
+        'debug_rate_limit': {
+            '()': 'Schoolproject.logs.DebugRateLimitFilter',
+            'rate': int(os.getenv('LOG_DEBUG_RATE', '20')),  # per call site per minute
+            'per': 60,
+            'sample': float(os.getenv('LOG_DEBUG_SAMPLE', '1.0')),
+        },
     },
     'handlers': {
         'file': {
             'level': 'DEBUG',
-            'class': 'logging.FileHandler',
-            'filename': 'debug.log',
-            'formatter': 'verbose',
+            # Reopens the file once logrotate has moved it
+            'class': 'logging.handlers.WatchedFileHandler',
+            'filename': os.getenv('LOG_FILE', os.path.join(BASE_DIR, 'debug.log')),
+            'formatter': 'json',
+            'delay': True,
         },
         'console': {
             'level': 'INFO',
             'class': 'logging.StreamHandler',
             'formatter': 'verbose',
         },
+        # Configured after the handlers it writes to, which sort before it
+        'queue': {
+            '()': 'Schoolproject.logs.queue_handler',
+            'console': 'cfg://handlers.console',
+            'file': 'cfg://handlers.file',
+            'filters': ['debug_rate_limit'],
+        },
+    },
+    'root': {
+        'handlers': ['queue'],
+        'level': os.getenv('LOG_LEVEL', 'INFO'),
     },
     'loggers': {
-        '': {  # Root logger
-            'handlers': ['console', 'file'],
-            'level': 'DEBUG',
-        },
+        # Every SQL statement at DEBUG
+        'django.db.backends': {'level': 'WARNING'},
+        'urllib3': {'level': 'INFO'},
+        'sib_api_v3_sdk': {'level': 'INFO'},
+        'PIL': {'level': 'INFO'},
     },
 }
 
@@ -331,4 +410,75 @@ REPORT_CARD_SETTINGS = {
     'SCHOOL_PHONE': '+233 24 123 4567',
     'SCHOOL_EMAIL': 'philemoncobbina19@gmail.com',
     'SCHOOL_LOGO_PATH': 'https://img.freepik.com/free-vector/gradient-high-school-logo-design_23-2149626932.jpg',  # School logo URL
-}
\ No newline at end of file
+}
+# Payment gateways (see momo_pay/gateways.py); point the base URLs at
+# `python manage.py run_stub_gateway` for local development
+PAYMENT_GATEWAYS = {
+    'momo': {
+        'BASE_URL': os.getenv('MOMO_BASE_URL', 'https://sandbox.momodeveloper.mtn.com'),
+        'SUBSCRIPTION_KEY': os.getenv('MOMO_SUBSCRIPTION_KEY', ''),
+        'API_USER': os.getenv('MOMO_API_USER', ''),
+        'API_KEY': os.getenv('MOMO_API_KEY', ''),
+        'TARGET_ENVIRONMENT': os.getenv('MOMO_TARGET_ENVIRONMENT', 'sandbox'),
+        'CALLBACK_URL': os.getenv('MOMO_CALLBACK_URL', ''),
+        'TIMEOUT': 10,
+        'CONNECT_TIMEOUT': 3,
+        'MAX_ATTEMPTS': 3,
+    },
+    'hubtel': {
+        'BASE_URL': os.getenv('HUBTEL_BASE_URL', 'https://payproxyapi.hubtel.com'),
+        'STATUS_URL': os.getenv('HUBTEL_STATUS_URL', 'https://api-txnstatus.hubtel.com'),
+        'API_ID': os.getenv('HUBTEL_API_ID', ''),
+        'API_KEY': os.getenv('HUBTEL_API_KEY', ''),
+        'MERCHANT_ACCOUNT': os.getenv('HUBTEL_MERCHANT_ACCOUNT', ''),
+        'CALLBACK_URL': os.getenv('HUBTEL_CALLBACK_URL', ''),
+        'RETURN_URL': os.getenv('HUBTEL_RETURN_URL', ''),
+        'CANCELLATION_URL': os.getenv('HUBTEL_CANCELLATION_URL', ''),
+        'TIMEOUT': 10,
+        'CONNECT_TIMEOUT': 3,
+        'MAX_ATTEMPTS': 3,
+    },
+}
+
+PAYMENT_WORKER = {
+    'MAX_CONCURRENT_REQUESTS': 20,
+    'CALLBACK_CONSUMERS': 4,
+}
+
+NEWSLETTER_CAMPAIGNS = {
+    'PROVIDER': os.getenv('NEWSLETTER_PROVIDER', 'brevo'),  # 'fake' sends nothing, for development
+    'SENDER_NAME': 'School Administration',
+    'BATCH_SIZE': 100,
+    'RATE_PER_SECOND': 50,
+}
+
+# Per-request timing in a Server-Timing header (for staff and token holders), slow
+# request logging and on-demand profiles (see Schoolproject/profiling.py). Send
+# `X-Profile: <token>` to profile a request.
+PROFILING = {
+    'ENABLED': True,
+    'TOKEN': os.getenv('PROFILING_TOKEN', ''),
+    'SAMPLE_RATE': float(os.getenv('PROFILING_SAMPLE_RATE', '0')),
+    'PROFILER': os.getenv('PROFILING_PROFILER', 'cprofile'),  # or 'pyinstrument', if installed
+    # Outside MEDIA_ROOT: profiles must never be served
+    'DIRECTORY': os.getenv('PROFILING_DIR', os.path.join(BASE_DIR, 'profiles')),
+    'SLOWEST_QUERIES': 5,
+    'SLOW_REQUEST_MS': 1000,
+}
+
+# Prometheus metrics at /metrics (see Schoolproject/metrics.py). Under gunicorn also
+# set PROMETHEUS_MULTIPROC_DIR so the numbers of all workers are added up.
+METRICS = {
+    # Scrapers send `Authorization: Bearer <METRICS_TOKEN>`; unset, /metrics is closed
+    'TOKEN': os.getenv('METRICS_TOKEN', ''),
+}
+
+# Request traces as OTLP JSON lines (see Schoolproject/tracing.py); nothing is
+# traced unless TRACING_EXPORT is a file path, or '-' for stdout
+TRACING = {
+    'EXPORT': os.getenv('TRACING_EXPORT', ''),
+    'SAMPLE_RATE': float(os.getenv('TRACING_SAMPLE_RATE', '0.1')),
+    # Let callers' traceparent headers decide sampling; only when every caller is ours
+    'TRUST_TRACEPARENT': os.getenv('TRACING_TRUST_TRACEPARENT', '').lower() == 'true',
+    'SERVICE_NAME': 'school-backend',
+}
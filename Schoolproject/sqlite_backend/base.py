@@ -0,0 +1,141 @@
+"""
+SQLite backend tuned for several web workers sharing one database file.
+
+On top of Django's sqlite3 backend this:
+
+- applies PRAGMAS to every new connection: WAL so readers never block the
+  writer, synchronous=NORMAL (durable at checkpoints, safe with WAL), a larger
+  page cache and memory map, and a busy timeout so a locked database is
+  waited on instead of failing at once;
+- starts transactions with BEGIN IMMEDIATE, taking the write lock up front. With
+  a plain BEGIN, two transactions that both read and then write deadlock on the
+  lock upgrade and one fails with "database is locked" without waiting;
+- retries lock errors with exponential backoff where that is safe: the BEGIN
+  itself and statements run in autocommit mode. A statement inside an open
+  transaction is never retried, the error goes to the caller as before;
+- opens a db.transaction span (Schoolproject/tracing.py) from BEGIN to COMMIT
+  or ROLLBACK when the request is traced.
+
+Pragmas and retry settings can be overridden in DATABASES[...]['OPTIONS'] under
+'pragmas', 'lock_retries' and 'lock_retry_backoff'.
+"""
+import logging
+import random
+import time
+
+from django.db.backends.sqlite3 import base
+
+from Schoolproject import tracing
+
+logger = logging.getLogger(__name__)
+
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,  # milliseconds
+    'cache_size': -32000,  # negative means KiB, so 32 MB per connection
+    'mmap_size': 134217728,  # 128 MB
+    'temp_store': 'MEMORY',
+}
+LOCK_RETRIES = 5
+LOCK_RETRY_BACKOFF = 0.05  # seconds, doubled on each retry
+
+
+def is_lock_error(error):
+    # "database is locked", "database table is locked", "database schema is locked"
+    return 'is locked' in str(error)
+
+
+def retry_on_lock(operation, retries, backoff):
+    for attempt in range(retries + 1):
+        try:
+            return operation()
+        except base.Database.OperationalError as e:
+            if attempt == retries or not is_lock_error(e):
+                raise
+            delay = backoff * (2 ** attempt) * (1 + random.random())
+            logger.warning(f"SQLite database locked, retrying in {delay:.2f}s (attempt {attempt + 1}/{retries})")
+            time.sleep(delay)
+
+
+class SQLiteCursorWrapper(base.SQLiteCursorWrapper):
+
+    def _retrying(self, operation):
+        connection = self.connection
+        # Inside a transaction the earlier statements would be lost; let the caller handle it
+        if connection.in_transaction:
+            return operation()
+        return retry_on_lock(operation, connection.lock_retries, connection.lock_retry_backoff)
+
+    def execute(self, query, params=None):
+        return self._retrying(lambda: super(SQLiteCursorWrapper, self).execute(query, params))
+
+    def executemany(self, query, param_list):
+        if not self.connection.in_transaction:
+            # A retry needs the parameters again
+            param_list = list(param_list)
+        return self._retrying(lambda: super(SQLiteCursorWrapper, self).executemany(query, param_list))
+
+
+class Connection(base.Database.Connection):
+    """sqlite3 connection that carries the retry settings for its cursors"""
+    lock_retries = LOCK_RETRIES
+    lock_retry_backoff = LOCK_RETRY_BACKOFF
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    _transaction_span = None
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        # Our own options are not sqlite3.connect() arguments
+        pragmas = kwargs.pop('pragmas', {})
+        self.lock_retries = kwargs.pop('lock_retries', LOCK_RETRIES)
+        self.lock_retry_backoff = kwargs.pop('lock_retry_backoff', LOCK_RETRY_BACKOFF)
+        # The usual 'timeout' option (seconds) sets busy_timeout unless that is given explicitly
+        kwargs.setdefault('timeout', PRAGMAS['busy_timeout'] / 1000)
+        self.pragmas = {**PRAGMAS, 'busy_timeout': int(kwargs['timeout'] * 1000), **pragmas}
+        kwargs['factory'] = Connection
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        conn.lock_retries = self.lock_retries
+        conn.lock_retry_backoff = self.lock_retry_backoff
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def create_cursor(self, name=None):
+        return self.connection.cursor(factory=SQLiteCursorWrapper)
+
+    def _start_transaction_under_autocommit(self):
+        # Spans the whole transaction, including any wait for the write lock
+        self._transaction_span = tracing.open_span('db.transaction', **{'db.system': 'sqlite', 'db.name': self.alias})
+        try:
+            # The cursor retries this statement: no transaction is open yet
+            self.cursor().execute("BEGIN IMMEDIATE")
+        except Exception as e:
+            self._close_transaction_span(e)
+            raise
+
+    def _close_transaction_span(self, error=None, outcome=None):
+        opened, self._transaction_span = self._transaction_span, None
+        if opened is not None and outcome:
+            opened.set_attribute('db.outcome', outcome)
+        tracing.close_span(opened, error)
+
+    def _commit(self):
+        try:
+            return super()._commit()
+        except Exception as e:
+            self._close_transaction_span(e)
+            raise
+        finally:
+            self._close_transaction_span(outcome='commit')
+
+    def _rollback(self):
+        try:
+            return super()._rollback()
+        finally:
+            self._close_transaction_span(outcome='rollback')
@@ -0,0 +1,127 @@
+"""
+Concurrency benchmark for the SQLite backend.
+
+Several processes, like gunicorn workers, run short read-then-write transactions
+(read a row, update it, append a log row: the shape of a session save or a change
+log entry) against one database file, first with Django's stock sqlite3 backend
+and then with Schoolproject.sqlite_backend. Reports committed transactions per
+second, lock errors and latency for each.
+
+    python -m Schoolproject.sqlite_backend.benchmark --workers 8 --seconds 5
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+import django
+from django.conf import settings
+
+BACKENDS = {
+    'stock': 'django.db.backends.sqlite3',
+    'tuned': 'Schoolproject.sqlite_backend',
+}
+ROWS = 50
+
+
+def setup_database(alias):
+    from django.db import connections
+
+    with connections[alias].cursor() as cursor:
+        cursor.execute("CREATE TABLE counter (id INTEGER PRIMARY KEY, value INTEGER NOT NULL)")
+        cursor.execute("CREATE TABLE change_log (id INTEGER PRIMARY KEY, counter_id INTEGER, value INTEGER, at REAL)")
+        cursor.executemany("INSERT INTO counter (id, value) VALUES (%s, 0)", [(n,) for n in range(ROWS)])
+    connections.close_all()
+
+
+def worker(alias, deadline, seed, results):
+    from django.db import OperationalError, connections, transaction
+
+    rng = random.Random(seed)
+    committed, errors, latencies = 0, 0, []
+    while time.time() < deadline:
+        row = rng.randrange(ROWS)
+        started = time.perf_counter()
+        try:
+            with transaction.atomic(using=alias):
+                with connections[alias].cursor() as cursor:
+                    cursor.execute("SELECT value FROM counter WHERE id = %s", [row])
+                    value = cursor.fetchone()[0]
+                    cursor.execute("UPDATE counter SET value = %s WHERE id = %s", [value + 1, row])
+                    cursor.execute(
+                        "INSERT INTO change_log (counter_id, value, at) VALUES (%s, %s, %s)",
+                        [row, value + 1, time.time()],
+                    )
+            committed += 1
+            latencies.append(time.perf_counter() - started)
+        except OperationalError:
+            errors += 1
+    connections.close_all()
+    results.put((committed, errors, latencies))
+
+
+def run(alias, workers, seconds):
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    deadline = time.time() + seconds
+    processes = [
+        context.Process(target=worker, args=(alias, deadline, seed, results)) for seed in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    collected = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    committed = sum(result[0] for result in collected)
+    errors = sum(result[1] for result in collected)
+    latencies = sorted(latency for result in collected for latency in result[2])
+    return committed, errors, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5)
+    options = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='sqlite-bench-')
+    settings.configure(
+        USE_TZ=True,
+        DATABASES={
+            'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'},
+            **{
+                alias: {'ENGINE': engine, 'NAME': os.path.join(directory, f"{alias}.sqlite3")}
+                for alias, engine in BACKENDS.items()
+            },
+        },
+    )
+    django.setup()
+    # Lock retries are expected here; keep their warnings out of the report
+    logging.disable(logging.WARNING)
+
+    print(f"{options.workers} workers, {options.seconds:g}s each, databases in {directory}")
+    print(f"{'backend':<8}{'commits':>10}{'commits/s':>12}{'errors':>9}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}")
+    for alias in BACKENDS:
+        setup_database(alias)
+        committed, errors, latencies = run(alias, options.workers, options.seconds)
+        if latencies:
+            p50 = statistics.median(latencies) * 1000
+            p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000
+            slowest = latencies[-1] * 1000
+        else:
+            p50 = p95 = slowest = 0
+        print(
+            f"{alias:<8}{committed:>10}{committed / options.seconds:>12.0f}{errors:>9}"
+            f"{p50:>9.1f}{p95:>9.1f}{slowest:>9.1f}"
+        )
+    shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
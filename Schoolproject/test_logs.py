@@ -0,0 +1,150 @@
+import json
+import logging
+import os
+import queue
+import sys
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+from django.utils.module_loading import import_string
+
+from Schoolproject import logs, tracing
+
+
+def make_record(msg='Results published for %s', args=('JHS 2',), level=logging.INFO, lineno=10, **extra):
+    record = logging.LogRecord('ResultsEntry.views', level, '/app/ResultsEntry/views.py', lineno, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class ListHandler(logging.Handler):
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class JsonFormatterTests(SimpleTestCase):
+
+    def test_fields(self):
+        entry = json.loads(logs.JsonFormatter().format(make_record(trace_id='ab' * 16, student_id=7)))
+        self.assertEqual(entry['level'], 'INFO')
+        self.assertEqual(entry['logger'], 'ResultsEntry.views')
+        self.assertEqual(entry['message'], 'Results published for JHS 2')
+        self.assertEqual(entry['line'], 10)
+        self.assertEqual(entry['trace_id'], 'ab' * 16)
+        self.assertEqual(entry['student_id'], 7)
+        self.assertNotIn('args', entry)
+
+    def test_exception(self):
+        try:
+            raise ValueError("bad score")
+        except ValueError:
+            record = logging.LogRecord('x', logging.ERROR, __file__, 1, 'failed', (), sys.exc_info())
+        entry = json.loads(logs.JsonFormatter().format(record))
+        self.assertIn('ValueError: bad score', entry['exception'])
+
+
+class DebugRateLimitFilterTests(SimpleTestCase):
+
+    def test_limits_each_call_site(self):
+        rate_limit = logs.DebugRateLimitFilter(rate=2, per=60)
+        self.assertEqual([rate_limit.filter(make_record(level=logging.DEBUG)) for _ in range(4)],
+                         [True, True, False, False])
+        # Another call site has its own allowance, and other levels are never limited
+        self.assertTrue(rate_limit.filter(make_record(level=logging.DEBUG, lineno=11)))
+        self.assertTrue(rate_limit.filter(make_record(level=logging.INFO)))
+
+    def test_reports_suppressed(self):
+        rate_limit = logs.DebugRateLimitFilter(rate=1, per=60)
+        with mock.patch('time.monotonic', return_value=0):
+            for _ in range(3):
+                rate_limit.filter(make_record(level=logging.DEBUG))
+        with mock.patch('time.monotonic', return_value=61):
+            record = make_record(level=logging.DEBUG)
+            self.assertTrue(rate_limit.filter(record))
+        self.assertEqual(record.suppressed, 2)
+
+    def test_sample(self):
+        rate_limit = logs.DebugRateLimitFilter(rate=100, per=60, sample=0.5)
+        with mock.patch('random.random', side_effect=[0.2, 0.7]):
+            self.assertTrue(rate_limit.filter(make_record(level=logging.DEBUG)))
+            self.assertFalse(rate_limit.filter(make_record(level=logging.DEBUG)))
+
+
+class QueueHandlerTests(SimpleTestCase):
+
+    def test_writes_on_listener_thread(self):
+        target = ListHandler()
+        handler = logs.queue_handler(target=target)
+        logger = logging.getLogger('test_logs.queue')
+        logger.addHandler(handler)
+        logger.propagate = False
+        self.addCleanup(logger.removeHandler, handler)
+
+        logger.info("Report card sent to %s", 'parent@example.com')
+        handler.queue.join()
+        [record] = target.records
+        self.assertEqual(record.getMessage(), 'Report card sent to parent@example.com')
+
+    @override_settings(TRACING={'EXPORT': '', 'SAMPLE_RATE': 1})
+    def test_trace_id(self):
+        handler = logs.QueueHandler(queue.Queue())
+        with tracing.start_trace('job', tracing.INTERNAL) as root:
+            handler.handle(make_record())
+        self.assertEqual(handler.queue.get_nowait().trace_id, root.trace_id)
+
+    def test_drops_when_full(self):
+        handler = logs.QueueHandler(queue.Queue(1))
+        for _ in range(3):
+            handler.handle(make_record())
+        self.assertEqual(handler.dropped, 2)
+
+        handler.queue.get_nowait()
+        handler.handle(make_record())
+        self.assertEqual(handler.queue.get_nowait().dropped_records, 2)
+
+    def test_prepares_exception(self):
+        handler = logs.QueueHandler(queue.Queue())
+        try:
+            raise ValueError("bad score")
+        except ValueError:
+            logger = logging.getLogger('test_logs.exception')
+            logger.addHandler(handler)
+            logger.propagate = False
+            self.addCleanup(logger.removeHandler, handler)
+            logger.exception("Grading failed")
+        record = handler.queue.get_nowait()
+        self.assertIsNone(record.exc_info)
+        self.assertIn('ValueError: bad score', record.exc_text)
+
+
+class LogFileTests(SimpleTestCase):
+
+    def test_workers_share_the_file_across_rotation(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'debug.log')
+        config = {key: value for key, value in settings.LOGGING['handlers']['file'].items()
+                  if key not in ('class', 'level', 'formatter')}
+        handler_class = import_string(settings.LOGGING['handlers']['file']['class'])
+        # One handler per gunicorn worker
+        workers = [handler_class(**{**config, 'filename': path}) for _ in range(2)]
+        for worker in workers:
+            self.addCleanup(worker.close)
+
+        for worker in workers:
+            worker.handle(make_record('before', ()))
+        os.rename(path, path + '.1')  # logrotate
+        for worker in workers:
+            worker.handle(make_record('after', ()))
+
+        with open(path + '.1') as f:
+            self.assertEqual(f.read().splitlines(), ['before', 'before'])
+        with open(path) as f:
+            self.assertEqual(f.read().splitlines(), ['after', 'after'])
@@ -0,0 +1,140 @@
+import os
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import Future
+from unittest import mock
+
+import sib_api_v3_sdk
+from django.http import JsonResponse
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import path
+from prometheus_client import REGISTRY
+from sib_api_v3_sdk.rest import ApiException
+
+from authapp.models import CustomUser
+from loadtest.stub_email import StubEmailApi, use_email_host
+from Schoolproject import metrics
+
+
+def count_users(request):
+    return JsonResponse({'users': CustomUser.objects.count()})
+
+
+def send_email(request):
+    configuration = sib_api_v3_sdk.Configuration()
+    configuration.api_key['api-key'] = request.GET.get('key', '')
+    api = sib_api_v3_sdk.TransactionalEmailsApi(sib_api_v3_sdk.ApiClient(configuration))
+    try:
+        api.send_transac_email(sib_api_v3_sdk.SendSmtpEmail(
+            to=[{'email': 'parent@example.com'}], sender={'email': 'school@example.com'},
+            subject='Results', html_content='<p>Published</p>',
+        ))
+    except ApiException:
+        return JsonResponse({'sent': False})
+    return JsonResponse({'sent': True})
+
+
+urlpatterns = [
+    path('users/', count_users, name='users'),
+    path('email/', send_email, name='email'),
+    path('metrics', metrics.metrics_view),
+]
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@override_settings(ROOT_URLCONF=__name__, METRICS={'TOKEN': 'scrape'})
+class MetricsTests(TestCase):
+
+    def scrape(self):
+        return self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape')
+
+    def test_request_metrics(self):
+        labels = {'method': 'GET', 'route': 'users', 'status': '200'}
+        requests_before = sample('http_request_duration_seconds_count', **labels)
+        queries_before = sample('http_request_db_queries_sum', route='users')
+
+        self.client.get('/users/')
+
+        self.assertEqual(sample('http_request_duration_seconds_count', **labels), requests_before + 1)
+        self.assertEqual(sample('http_request_db_queries_sum', route='users'), queries_before + 1)
+        response = self.scrape()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'http_request_duration_seconds_bucket{le="0.01",method="GET",route="users",status="200"}',
+                      response.content)
+
+    def test_unmatched_route(self):
+        before = sample('http_request_duration_seconds_count', method='GET', route='<unmatched>', status='404')
+        self.client.get('/no-such-page/')
+        self.assertEqual(sample('http_request_duration_seconds_count', method='GET', route='<unmatched>', status='404'),
+                         before + 1)
+
+    def test_email_sends_by_call_site(self):
+        email = StubEmailApi(latency=0)
+        email.start()
+        self.addCleanup(email.stop)
+        use_email_host(f"{email.base_url}/v3")
+        self.addCleanup(use_email_host, None)
+        call_site = f"{__name__}.send_email"
+        sends = sample('email_send_seconds_count', call_site=call_site)
+        failures = sample('email_send_failures_total', call_site=call_site)
+
+        self.assertEqual(self.client.get('/email/?key=test').json(), {'sent': True})
+        # The stub refuses requests without an API key
+        self.assertEqual(self.client.get('/email/').json(), {'sent': False})
+
+        self.assertEqual(sample('email_send_seconds_count', call_site=call_site), sends + 2)
+        self.assertEqual(sample('email_send_failures_total', call_site=call_site), failures + 1)
+
+    def test_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer guess').status_code, 401)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer é').status_code, 401)
+        self.assertEqual(self.scrape().status_code, 200)
+
+    @override_settings(METRICS={})
+    def test_closed_without_a_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer ').status_code, 403)
+
+    def test_multiprocess_aggregation(self):
+        with tempfile.TemporaryDirectory() as directory:
+            environment = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=directory)
+            script = "from prometheus_client import Counter; Counter('worker_jobs', 'Jobs').inc(3)"
+            for _ in range(2):
+                subprocess.run([sys.executable, '-c', script], env=environment, check=True)
+
+            with mock.patch.dict(os.environ, PROMETHEUS_MULTIPROC_DIR=directory):
+                response = self.scrape()
+        self.assertIn(b'worker_jobs_total 6.0', response.content)
+
+
+class QueueDepthTests(SimpleTestCase):
+
+    def test_counts_until_done(self):
+        before = sample('background_queue_depth', queue='test')
+        future = metrics.track_queue('test', Future())
+        self.assertEqual(sample('background_queue_depth', queue='test'), before + 1)
+        future.set_result(None)
+        self.assertEqual(sample('background_queue_depth', queue='test'), before)
+
+
+class EmailTimingTests(SimpleTestCase):
+
+    def test_installed_when_sdk_is_imported(self):
+        # A fresh interpreter, since this one has imported the SDK already
+        script = (
+            "import sys, django; django.setup()\n"
+            "from Schoolproject import metrics\n"
+            "metrics.MetricsMiddleware(None)\n"
+            "assert 'sib_api_v3_sdk' not in sys.modules\n"
+            "import sib_api_v3_sdk\n"
+            "print(sib_api_v3_sdk.TransactionalEmailsApi.send_transac_email.__name__)\n"
+        )
+        environment = dict(os.environ, DJANGO_SETTINGS_MODULE='Schoolproject.settings')
+        result = subprocess.run([sys.executable, '-c', script], env=environment, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), 'instrumented_send_transac_email')
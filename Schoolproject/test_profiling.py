@@ -0,0 +1,130 @@
+import os
+import tempfile
+
+import sib_api_v3_sdk
+from django.http import JsonResponse
+from django.test import TestCase, override_settings
+from django.urls import path
+
+from authapp.models import CustomUser
+from loadtest.stub_email import StubEmailApi, use_email_host
+from Schoolproject.profiling import span
+
+
+def count_users(request):
+    return JsonResponse({'users': CustomUser.objects.count()})
+
+
+def send_email(request):
+    configuration = sib_api_v3_sdk.Configuration()
+    configuration.api_key['api-key'] = 'test'
+    api = sib_api_v3_sdk.TransactionalEmailsApi(sib_api_v3_sdk.ApiClient(configuration))
+    api.send_transac_email(sib_api_v3_sdk.SendSmtpEmail(
+        to=[{'email': 'parent@example.com'}], sender={'email': 'school@example.com'},
+        subject='Results', html_content='<p>Published</p>',
+    ))
+    return JsonResponse({'sent': True})
+
+
+def render(request):
+    with span('pdf'):
+        pass
+    return JsonResponse({})
+
+
+urlpatterns = [
+    path('users/', count_users),
+    path('email/', send_email),
+    path('render/', render),
+]
+
+PROFILING = {'TOKEN': 'secret', 'SAMPLE_RATE': 0, 'SLOW_REQUEST_MS': 60000}
+
+
+def timings(response):
+    """{'db': {'dur': '1.2', 'desc': '"1 query"'}, ...} from the Server-Timing header"""
+    parsed = {}
+    for entry in response['Server-Timing'].split(', '):
+        name, *params = entry.split(';')
+        parsed[name] = dict(param.split('=', 1) for param in params)
+    return parsed
+
+
+@override_settings(ROOT_URLCONF=__name__, PROFILING=PROFILING)
+class ProfilingMiddlewareTests(TestCase):
+
+    def setUp(self):
+        self.profiles = tempfile.TemporaryDirectory()
+        self.addCleanup(self.profiles.cleanup)
+        override = override_settings(PROFILING={**PROFILING, 'DIRECTORY': self.profiles.name})
+        override.enable()
+        self.addCleanup(override.disable)
+        staff = CustomUser.objects.create_user(
+            username='staff', email='staff@example.com', password='secret', is_staff=True,
+        )
+        # New accounts start inactive until verified
+        CustomUser.objects.filter(pk=staff.pk).update(is_active=True)
+        self.client.force_login(staff)
+
+    def test_server_timing(self):
+        entries = timings(self.client.get('/users/'))
+        self.assertEqual(set(entries), {'total', 'db'})
+        self.assertGreaterEqual(float(entries['total']['dur']), float(entries['db']['dur']))
+
+        # Without a session only the view's own query runs
+        self.client.logout()
+        self.assertEqual(timings(self.client.get('/users/', HTTP_X_PROFILE='secret'))['db']['desc'], '"1 query"')
+
+    def test_spans(self):
+        self.assertEqual(timings(self.client.get('/render/'))['pdf']['desc'], '"1 render"')
+
+    def test_outbound_http(self):
+        email = StubEmailApi(latency=0.05)
+        email.start()
+        self.addCleanup(email.stop)
+        use_email_host(f"{email.base_url}/v3")
+        self.addCleanup(use_email_host, None)
+
+        entries = timings(self.client.get('/email/'))
+        self.assertEqual(entries['http']['desc'], '"1 call"')
+        self.assertGreaterEqual(float(entries['http']['dur']), 50)
+        self.assertEqual(len(email.messages), 1)
+
+    @override_settings(PROFILING={**PROFILING, 'SLOW_REQUEST_MS': 0})
+    def test_slow_request_logged_with_call_site(self):
+        with self.assertLogs('Schoolproject.profiling', 'WARNING') as logs:
+            self.client.get('/users/')
+        self.assertIn('Slow request GET /users/ -> 200', logs.output[0])
+        self.assertIn(f"Schoolproject/test_profiling.py:{count_users.__code__.co_firstlineno + 1} in count_users",
+                      logs.output[0])
+
+    def test_server_timing_is_not_sent_to_anyone_else(self):
+        self.client.logout()
+        self.assertNotIn('Server-Timing', self.client.get('/users/'))
+        self.assertIn('Server-Timing', self.client.get('/users/', HTTP_X_PROFILE='secret'))
+
+    def test_profile_on_request(self):
+        response = self.client.get('/users/', HTTP_X_PROFILE='secret')
+        self.assertRegex(response['X-Profile'], r'^[^/]*-GET-users\.prof$')
+        self.assertTrue(os.path.getsize(os.path.join(self.profiles.name, response['X-Profile'])))
+
+    def test_profile_needs_the_token(self):
+        response = self.client.get('/users/', HTTP_X_PROFILE='guess')
+        self.assertNotIn('X-Profile', response)
+        self.assertEqual(os.listdir(self.profiles.name), [])
+
+    def test_non_ascii_header(self):
+        response = self.client.get('/users/', HTTP_X_PROFILE='é')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Profile', response)
+
+    def test_sampled_profile(self):
+        with override_settings(PROFILING={**PROFILING, 'DIRECTORY': self.profiles.name, 'SAMPLE_RATE': 1}):
+            response = self.client.get('/users/')
+        # Written for us to read, but the requester is not told where
+        self.assertNotIn('X-Profile', response)
+        self.assertEqual(len(os.listdir(self.profiles.name)), 1)
+
+    @override_settings(PROFILING={**PROFILING, 'ENABLED': False})
+    def test_disabled(self):
+        self.assertNotIn('Server-Timing', self.client.get('/users/'))
@@ -0,0 +1,431 @@
+"""
+Query and payload budgets for the API.
+
+A school-sized fixture (3 classes of 20 students, 12 subjects, results, book
+lists, job posts, tickets, admissions...) is loaded once, then every read route
+in Schoolproject/urls.py is requested as each role and must stay within its
+budget: at most `queries` SQL queries and `kb` kilobytes of response body.
+A serializer that starts loading a related row per object (an N+1) shows up
+here as a blown query budget, and an endpoint that starts shipping far more
+data than before as a blown payload budget.
+
+All budgets live in BUDGETS below. Routes that only accept writes, or whose
+reads have side effects outside the database, are listed in EXCLUDED with the
+reason; test_every_route_is_budgeted fails when a new route is in neither.
+
+After an intended change, print the measured numbers with
+
+    QUERY_BUDGETS_REPORT=1 python manage.py test Schoolproject.test_query_budgets
+
+and update the table in the same commit, so the review shows the new cost.
+"""
+import os
+import re
+from datetime import date, time, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver, resolve
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from Admissionapp.models import Admission, AdmissionLog
+from authapp.models import CustomUser
+from booklist.models import BookList, BookListItem, StudentClassHistory
+from jobapplication.models import JobApplication, JobApplicationLog
+from jobposting.models import JobPost, JobPostLog
+from momo_pay.models import Payment
+from Reservationapp.models import Reservation, ReservationLog
+from ResultsEntry.models import ClassCourse, Course, CourseResult, Result, ResultChangeLog
+from ResultsEntry.views import PositionCalculator
+from Schoolapp.models import Contact, ContactLog
+from Subscriptions.models import Campaign, CampaignRecipient, Subscriber, Subscription
+from tickets.models import Ticket, TicketLog
+
+ROLES = ('anonymous', 'principal', 'staff', 'student')
+
+CLASSES = ('Class 1', 'Class 2', 'Class 3')
+STUDENTS_PER_CLASS = 20
+SUBJECTS = 12
+YEAR = '2024-2025'
+PREVIOUS_YEAR = '2023-2024'
+
+# (queries, kb) per role, in ROLES order. {name} placeholders are filled from
+# the fixture ids in QueryBudgetTests.setUpTestData.
+BUDGETS = {
+    # path                                                         anonymous   principal   staff       student
+    '/api/user-detail/':                                          ((0, 1),     (0, 1),     (0, 1),     (0, 1)),
+    '/api/user-detail-auth/':                                     ((0, 1),     (2, 1),     (2, 1),     (2, 1)),
+    '/api/session-check/':                                        ((0, 1),     (0, 1),     (0, 1),     (0, 1)),
+    '/api/admin/users/':                                          ((0, 1),     (3, 30),    (3, 30),    (0, 1)),
+    '/api/admin/user/{student}/':                                 ((0, 1),     (3, 30),    (3, 30),    (0, 1)),
+
+    '/api/contacts/':                                             ((1, 6),     (1, 6),     (1, 6),     (1, 6)),
+    '/api/contacts/{contact}/':                                   ((1, 1),     (1, 1),     (1, 1),     (1, 1)),
+    '/api/contacts/{contact}/logs/':                              ((1, 1),     (1, 1),     (1, 1),     (1, 1)),
+    '/api/admissions/':                                           ((1, 18),    (1, 18),    (1, 18),    (1, 18)),
+    '/api/admissions/all_admissions/':                            ((1, 18),    (1, 18),    (1, 18),    (1, 18)),
+    '/api/admissions/my_admissions/':                             ((0, 1),     (1, 1),     (1, 1),     (1, 1)),
+    '/api/admissions/{admission}/':                               ((1, 1),     (1, 1),     (1, 1),     (1, 1)),
+    '/api/admissions/{admission}/logs/':                          ((1, 1),     (1, 1),     (1, 1),     (1, 1)),
+    '/api/reservations/':                                         ((1, 4),     (1, 4),     (1, 4),     (1, 4)),
+    '/api/reservations/free-slots/?department=Finance+Department&date={weekday}':
+                                                                  ((1, 1),     (1, 1),     (1, 1),     (1, 1)),
+    '/api/reservations/{reservation}/':                           ((1, 1),     (1, 1),     (1, 1),     (1, 1)),
+    '/api/reservations/{reservation}/logs/':                      ((1, 1),     (1, 1),     (1, 1),     (1, 1)),
+    '/api/tickets/':                                              ((1, 14),    (1, 14),    (1, 14),    (1, 14)),
+    '/api/tickets/{ticket}/':                                     ((1, 1),     (1, 1),     (1, 1),     (1, 1)),
+    '/api/tickets/{ticket}/similar/':                             ((0, 1),     (14, 1),    (14, 1),    (14, 1)),
+    '/api/tickets/{ticket}/logs/':                                ((1, 1),     (1, 1),     (1, 1),     (1, 1)),
+    '/api/triage/depth/':                                         ((0, 1),     (3, 1),     (3, 1),     (3, 1)),
+    '/api/triage/tickets/':                                       ((0, 1),     (4, 7),     (4, 7),     (4, 7)),
+
+    '/api/api/jobposts/':                                         ((0, 1),     (2, 12),    (2, 1),     (2, 1)),
+    '/api/api/jobposts/get_draft_posts/':                         ((0, 1),     (2, 3),     (2, 1),     (2, 1)),
+    '/api/api/jobposts/list_published_posts/':                    ((1, 9),     (1, 9),     (1, 9),     (1, 9)),
+    '/api/api/jobposts/{job_post}/':                              ((0, 1),     (2, 1),     (2, 1),     (2, 1)),
+    '/api/api/jobposts/{job_post}/get_applications_count/':       ((1, 1),     (1, 1),     (1, 1),     (1, 1)),
+    '/api/api/jobposts/{job_post}/get_published_post/':           ((1, 1),     (1, 1),     (1, 1),     (1, 1)),
+    '/api/api/jobposts/{job_post}/logs/':                         ((0, 1),     (1, 1),     (1, 1),     (1, 1)),
+    '/api/job-applications/':                                     ((0, 1),     (1, 13),    (1, 13),    (1, 13)),
+    '/api/job-applications/{application}/':                       ((0, 1),     (1, 1),     (1, 1),     (1, 1)),
+    '/api/job-applications/{application}/logs/':                  ((0, 1),     (1, 1),     (1, 1),     (1, 1)),
+    '/api/payments/{transaction}/':                               ((1, 1),     (1, 1),     (1, 1),     (1, 1)),
+
+    '/api/subscriptions/':                                        ((1, 4),     (1, 4),     (1, 4),     (1, 4)),
+    '/api/subscriptions/{subscription}/':                         ((1, 1),     (1, 1),     (1, 1),     (1, 1)),
+    '/api/email-list/':                                           ((1, 14),    (1, 14),    (1, 14),    (1, 14)),
+    '/api/campaigns/':                                            ((0, 1),     (1, 1),     (0, 1),     (0, 1)),
+    '/api/campaigns/{campaign}/':                                 ((0, 1),     (1, 1),     (0, 1),     (0, 1)),
+    '/api/campaigns/{campaign}/recipients/':                      ((0, 1),     (3, 13),    (0, 1),     (0, 1)),
+
+    '/api/booklists/':                                            ((0, 1),     (3, 16),    (3, 16),    (3, 4)),
+    '/api/booklists/current_class/':                              ((0, 1),     (0, 1),     (0, 1),     (5, 2)),
+    '/api/booklists/draft/':                                      ((0, 1),     (2, 6),     (2, 6),     (0, 1)),
+    '/api/booklists/history/':                                    ((0, 1),     (0, 1),     (0, 1),     (5, 2)),
+    '/api/booklists/my_class/':                                   ((0, 1),     (0, 1),     (0, 1),     (3, 3)),
+    '/api/booklists/previous_classes/':                           ((0, 1),     (0, 1),     (0, 1),     (4, 3)),
+    '/api/booklists/{booklist}/':                                 ((0, 1),     (3, 2),     (3, 2),     (3, 2)),
+    '/api/booklists/{booklist}/items/':                           ((0, 1),     (1, 2),     (1, 2),     (0, 1)),
+    '/api/booklists/{booklist}/items/{booklist_item}/':           ((0, 1),     (1, 1),     (1, 1),     (0, 1)),
+
+    '/api/courses/':                                              ((1, 3),     (1, 3),     (1, 3),     (1, 3)),
+    '/api/courses/{course}/':                                     ((1, 1),     (1, 1),     (1, 1),     (1, 1)),
+    '/api/class-courses/':                                        ((0, 1),     (1, 6),     (1, 6),     (0, 1)),
+    '/api/class-courses/by_class_and_term/?class_name=Class+2&term=first':
+                                                                  ((0, 1),     (1, 4),     (1, 4),     (0, 1)),
+    '/api/class-courses/{class_course}/':                         ((0, 1),     (1, 1),     (1, 1),     (0, 1)),
+    '/api/results/':                                              ((0, 1),     (4, 225),   (4, 225),   (4, 225)),
+    '/api/results/get_available_courses/?class_name=Class+2&term=first':
+                                                                  ((0, 1),     (1, 2),     (1, 2),     (1, 2)),
+    '/api/results/get_class_results/?class_name=Class+2&term=first':
+                                                                  ((0, 1),     (4, 74),    (4, 74),    (4, 74)),
+    '/api/results/get_student_results/?student={student}':        ((0, 1),     (5, 4),     (5, 4),     (5, 4)),
+    '/api/results/get_students_by_class/?class_name=Class+2':     ((0, 1),     (3, 10),    (3, 10),    (3, 10)),
+    '/api/results/{result}/':                                     ((0, 1),     (4, 4),     (4, 4),     (4, 4)),
+    '/api/results/{result}/change_log/':                          ((0, 1),     (8, 2),     (8, 2),     (0, 1)),
+    '/api/my-results/':                                           ((0, 1),     (2, 1),     (2, 1),     (4, 8)),
+    '/api/my-results/current_class/':                             ((0, 1),     (0, 1),     (0, 1),     (4, 4)),
+    '/api/my-results/previous_classes/?class_name=Class+1&term=third':
+                                                                  ((0, 1),     (0, 1),     (0, 1),     (6, 4)),
+    '/api/my-results/{result}/':                                  ((0, 1),     (2, 1),     (2, 1),     (4, 4)),
+}
+
+EXCLUDED = {
+    '/api/signup/': "write only",
+    '/api/google-signin/': "write only",
+    '/api/verify-email/1/token/': "write only",
+    '/api/login/': "write only",
+    '/api/password-reset/': "write only",
+    '/api/password-reset-confirm/': "write only",
+    '/api/verify-reset-code/': "write only",
+    '/api/change-password-request/': "write only",
+    '/api/change-password/': "write only",
+    '/api/verify-change-password-code/': "write only",
+    '/api/student-signup/': "write only",
+    '/api/student-login/': "write only",
+    '/api/batch-create/': "write only",
+    '/api/signup-auth/': "write only",
+    '/api/login-auth/': "write only",
+    '/api/logout-auth/': "write only",
+    '/api/job-applications/apply/': "write only",
+    '/api/api/jobposts/1/publish/': "write only",
+    '/api/api/jobposts/1/schedule/': "write only",
+    '/api/booklists/1/publish/': "write only",
+    '/api/booklists/1/schedule/': "write only",
+    '/api/class-courses/bulk_assign/': "write only",
+    '/api/results/bulk_update_status/': "write only",
+    '/api/results/recalculate_positions/': "write only",
+    '/api/campaigns/1/send/': "write only",
+    '/api/request-payment/': "write only",
+    '/api/request-money/': "write only",
+    '/api/payments/callback/momo/': "write only",
+    '/api/email-list/1/': "write only",
+    '/api/': "API root, no database access",
+    '/api/api/': "API root, no database access",
+    '/metrics': "Prometheus metrics, no database access",
+}
+
+# Prefixes served by third-party apps or by Django itself
+THIRD_PARTY_PREFIXES = ('admin/', 'accounts/', 'o/', '__debug__/', 'media/', 'static/')
+# DRF adds a ".json"-style variant of every router route
+FORMAT_SUFFIX_RE = re.compile(r'\\\.\(\?P<format>|<drf_format_suffix:format>')
+
+
+def iter_routes(patterns, prefix=''):
+    for pattern in patterns:
+        # Joined the way ResolverMatch.route is, without the regex anchors
+        route = prefix + str(pattern.pattern).lstrip('^')
+        if isinstance(pattern, URLResolver):
+            yield from iter_routes(pattern.url_patterns, route)
+        elif isinstance(pattern, URLPattern):
+            yield route
+
+
+class QueryBudgetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.principal = CustomUser.objects.create_user(
+            email='principal@example.com', username='principal', first_name='Ama', last_name='Mensah',
+            password='x', role='principal', is_staff=True,
+        )
+        cls.staff = CustomUser.objects.create_user(
+            email='staff@example.com', username='staff', first_name='Kofi', last_name='Boateng',
+            password='x', role='staff',
+        )
+        CustomUser.objects.bulk_create([
+            CustomUser(
+                email=f"student{c}-{n}@example.com", username=f"student{c}-{n}",
+                first_name=f"Student{n}", last_name=f"Class{c}", role='student',
+                class_name=class_name, index_number=f"IDX{c}{n:03d}",
+            )
+            for c, class_name in enumerate(CLASSES, 1) for n in range(STUDENTS_PER_CLASS)
+        ])
+        students = list(CustomUser.objects.filter(role='student').order_by('id'))
+        # A Class 2 student who was in Class 1 last year
+        cls.student = next(s for s in students if s.class_name == 'Class 2')
+        StudentClassHistory.objects.create(student=cls.student, academic_year=PREVIOUS_YEAR, class_name='Class 1')
+        StudentClassHistory.objects.create(student=cls.student, academic_year=YEAR, class_name='Class 2')
+
+        courses = Course.objects.bulk_create([
+            Course(name=f"Subject {n}", code=f"SUB{n:02d}", created_by=cls.staff) for n in range(SUBJECTS)
+        ])
+        class_courses = {
+            (class_name, term): ClassCourse.objects.bulk_create([
+                ClassCourse(course=course, class_name=class_name, term=term) for course in courses
+            ])
+            for class_name, term in [(name, 'first') for name in CLASSES] + [('Class 1', 'third')]
+        }
+
+        def add_results(class_name, term, year, class_students):
+            results = Result.objects.bulk_create([
+                Result(
+                    student=student, class_name=class_name, term=term, academic_year=year,
+                    status='PUBLISHED', published_date=now, days_present=60, days_absent=i % 5,
+                    class_teacher_remarks="Works hard and participates in class.",
+                )
+                for i, student in enumerate(class_students)
+            ])
+            CourseResult.objects.bulk_create([
+                CourseResult(
+                    result=result, class_course=class_course,
+                    class_score=Decimal(20 + (i * 7 + j) % 20), exam_score=Decimal(30 + (i * 11 + j) % 30),
+                    remarks="Good",
+                )
+                for i, result in enumerate(results) for j, class_course in enumerate(class_courses[class_name, term])
+            ])
+            PositionCalculator.recalculate_positions(class_name, term, year)
+            return results
+
+        for class_name in CLASSES:
+            results = add_results(
+                class_name, 'first', YEAR, [s for s in students if s.class_name == class_name]
+            )
+            if class_name == 'Class 2':
+                cls.result = next(r for r in results if r.student_id == cls.student.pk)
+        add_results('Class 1', 'third', PREVIOUS_YEAR, [cls.student])
+        ResultChangeLog.objects.bulk_create([
+            ResultChangeLog(result=cls.result, changed_by=cls.staff.email, field_name='status',
+                            previous_value='DRAFT', new_value='PUBLISHED')
+            for _ in range(5)
+        ])
+
+        booklists = []
+        for class_name in CLASSES:
+            booklists += [
+                BookList(title=f"{class_name} books", academic_year=YEAR, class_name=class_name,
+                         status='published', publish_date=now, created_by=cls.staff),
+                BookList(title=f"{class_name} books {PREVIOUS_YEAR}", academic_year=PREVIOUS_YEAR,
+                         class_name=class_name, status='published', publish_date=now, created_by=cls.staff),
+            ]
+        # One list per class and year, so the drafts are for next year's classes
+        booklists += [
+            BookList(title=f"{class_name} books (draft)", academic_year=YEAR, class_name=class_name,
+                     status='draft', created_by=cls.principal)
+            for class_name in ('Class 4', 'Class 5', 'Class 6')
+        ]
+        booklists = BookList.objects.bulk_create(booklists)
+        items = BookListItem.objects.bulk_create([
+            BookListItem(book_list=booklist, name=f"Book {n}", description="Textbook", price=Decimal('25.50'),
+                         quantity=1 + n % 3, order=n)
+            for booklist in booklists for n in range(8)
+        ])
+        cls.booklist = booklists[2]  # Class 2, published
+
+        job_posts = [
+            JobPost.objects.create(
+                title=f"Teacher {n}", description="Teach the class. " * 20, requirements="A degree.",
+                location="Accra", salary_range="GHS 3000-4000", created_by=cls.principal,
+                status='PUBLISHED' if n < 10 else 'DRAFT', published_date=now if n < 10 else None,
+            )
+            for n in range(13)
+        ]
+        cls.job_post = job_posts[0]
+        applications = JobApplication.objects.bulk_create([
+            JobApplication(job_post=job_post, resume=f"resumes/applicant-{n}.pdf", first_name="Yaw",
+                           last_name=f"Applicant{n}", email=f"applicant{n}@example.com")
+            for job_post in job_posts[:10] for n in range(3)
+        ])
+        JobPostLog.objects.bulk_create([
+            JobPostLog(job_post=cls.job_post, user=cls.principal, changed_fields="status",
+                       action_type='UPDATE') for _ in range(5)
+        ])
+        JobApplicationLog.objects.bulk_create([
+            JobApplicationLog(application=applications[0], user=cls.staff, changed_fields="status")
+            for _ in range(5)
+        ])
+
+        tickets = Ticket.objects.bulk_create([
+            Ticket(TicketID=f"TCK{n:05d}", full_name=f"Parent {n}", email=f"parent{n}@example.com",
+                   phone_number="0240000000", section=['authentication', 'reservation', 'admissions', 'others'][n % 4],
+                   severity=['low', 'medium', 'high', 'critical'][n % 4],
+                   description="I cannot log in to the parent portal after resetting my password.")
+            for n in range(30)
+        ])
+        TicketLog.objects.bulk_create([
+            TicketLog(ticket=tickets[0], user=cls.staff, changed_fields="status") for _ in range(5)
+        ])
+
+        admissions = Admission.objects.bulk_create([
+            Admission(
+                admission_number=f"ADM{n:04d}", first_name="Esi", last_name=f"Applicant{n}",
+                home_address="Accra", age=6, language_spoken="English", country_of_citizenship="Ghana",
+                gender="Female", date_of_birth=date(2018, 1, 1), parent_full_name="Parent", occupation="Trader",
+                phone_number="0240000000", email=f"admission{n}@example.com", parent_home_address="Accra",
+                previous_school_name="Sunrise", previous_class="KG 2", previous_school_address="Accra",
+                start_date=date(2022, 9, 1), end_date=date(2024, 7, 1), emergency_contact="Parent",
+                emergency_contact_number="0240000000", medical_conditions="None", allergies="None",
+                disabilities="No", vaccinated="Yes",
+            )
+            for n in range(20)
+        ])
+        AdmissionLog.objects.bulk_create([
+            AdmissionLog(admission=admissions[0], user=cls.staff, changed_fields="status") for _ in range(5)
+        ])
+
+        contacts = Contact.objects.bulk_create([
+            Contact(firstName="Kwame", lastName=f"Parent{n}", email=f"contact{n}@example.com",
+                    phoneNumber="0240000000", message="When does the next term begin?")
+            for n in range(20)
+        ])
+        ContactLog.objects.bulk_create([
+            ContactLog(contact=contacts[0], user=cls.staff, changed_fields="status") for _ in range(5)
+        ])
+
+        weekday = date.today() + timedelta(days=7)
+        while weekday.weekday() >= 5:
+            weekday += timedelta(days=1)
+        reservations = [
+            Reservation.objects.create(
+                full_name=f"Visitor {n}", email=f"visitor{n}@example.com", phone="0240000000",
+                booking_date=weekday, booking_time=time(9 + n % 6, 0), department='Finance Department',
+            )
+            for n in range(10)
+        ]
+        ReservationLog.objects.bulk_create([
+            ReservationLog(reservation=reservations[0], user=cls.staff, changed_fields="status") for _ in range(5)
+        ])
+
+        subscriptions = Subscription.objects.bulk_create([
+            Subscription(full_name=f"Reader {n}", email=f"reader{n}@example.com") for n in range(20)
+        ])
+        Subscriber.objects.bulk_create([Subscriber(email=f"subscriber{n}@example.com") for n in range(200)])
+        campaign = Campaign.objects.create(subject="Term news", html_content="<p>News</p>")
+        CampaignRecipient.objects.bulk_create([
+            CampaignRecipient(campaign=campaign, email=f"subscriber{n}@example.com") for n in range(150)
+        ])
+        payment = Payment.objects.create(amount=Decimal('150.00'), transaction_id='budget-txn-1', payer='0240000001')
+
+        cls.ids = {
+            'student': cls.student.pk,
+            'result': cls.result.pk,
+            'course': courses[0].pk,
+            'class_course': class_courses['Class 2', 'first'][0].pk,
+            'booklist': cls.booklist.pk,
+            'booklist_item': next(item.pk for item in items if item.book_list_id == cls.booklist.pk),
+            'job_post': cls.job_post.pk,
+            'application': applications[0].pk,
+            'ticket': tickets[0].pk,
+            'admission': admissions[0].pk,
+            'contact': contacts[0].pk,
+            'reservation': reservations[0].pk,
+            'weekday': weekday.isoformat(),
+            'subscription': subscriptions[0].pk,
+            'campaign': campaign.pk,
+            'transaction': payment.transaction_id,
+        }
+
+    def client_for(self, role):
+        client = APIClient()
+        if role != 'anonymous':
+            client.force_authenticate(getattr(self, role))
+        return client
+
+    def measure(self, role, path):
+        client = self.client_for(role)
+        # Budgets are for a cold cache, and against the fixture as loaded: anything
+        # a request writes (published schedules, cached signatures...) is rolled back
+        cache.clear()
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(path)
+                body = b''.join(response.streaming_content) if response.streaming else response.content
+            transaction.set_rollback(True)
+        return response, body, queries
+
+    def test_budgets(self):
+        report = os.environ.get('QUERY_BUDGETS_REPORT')
+        for template, budgets in BUDGETS.items():
+            path = template.format(**self.ids)
+            for role, (max_queries, max_kb) in zip(ROLES, budgets):
+                with self.subTest(path=template, role=role):
+                    response, body, queries = self.measure(role, path)
+                    if report:
+                        print(f"{template:<70} {role:<10} {response.status_code} "
+                              f"{len(queries):>4} queries {len(body) / 1024:>7.1f} kb")
+                        continue
+                    self.assertLess(response.status_code, 500, body[:500])
+                    self.assertLessEqual(
+                        len(queries), max_queries,
+                        f"{len(queries)} queries:\n" + "\n".join(q['sql'] for q in queries.captured_queries),
+                    )
+                    self.assertLessEqual(len(body), max_kb * 1024, f"{len(body)} bytes")
+
+    def test_every_route_is_budgeted(self):
+        covered = set()
+        for template in list(BUDGETS) + list(EXCLUDED):
+            path = template.format(**self.ids).split('?')[0]
+            covered.add(resolve(path).route)
+
+        missing = [
+            route for route in iter_routes(get_resolver().url_patterns)
+            if not route.startswith(THIRD_PARTY_PREFIXES)
+            and not FORMAT_SUFFIX_RE.search(route)
+            and route not in covered
+        ]
+        self.assertEqual(missing, [], "Add these routes to BUDGETS or EXCLUDED")
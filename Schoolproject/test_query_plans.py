@@ -0,0 +1,123 @@
+"""
+Query-plan regression tests.
+
+Each test runs EXPLAIN QUERY PLAN on the main query behind an endpoint or
+scheduled job and fails when SQLite would read a whole table (a SCAN) instead of
+searching an index, or when the expected index is not used. Adding a filter or
+ordering that no index supports shows up here before it shows up as a slow page.
+"""
+import re
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from Admissionapp.models import AdmissionLog
+from authapp.models import CustomUser
+from booklist.models import BookList
+from jobapplication.models import JobApplicationLog
+from jobposting.models import JobPost, JobPostLog
+from Reservationapp.models import ReservationLog
+from ResultsEntry.models import Result, ResultChangeLog
+from Schoolapp.models import ContactLog
+from tickets.models import TicketLog
+
+SCAN_RE = re.compile(r'\bSCAN (\S+)')
+
+
+class QueryPlanTestCase(TestCase):
+
+    def assertSearchesIndex(self, queryset, index_name):
+        """The query reads `queryset`'s table through `index_name` and scans no table"""
+        if connection.vendor != 'sqlite':
+            self.skipTest("Plans are checked on SQLite only")
+        plan = queryset.explain()
+        # "SCAN t USING INDEX i" still reads every row, just in index order
+        self.assertEqual(SCAN_RE.findall(plan), [], f"Full scan in plan:\n{plan}")
+        self.assertIn(index_name, plan, f"{index_name} not used:\n{plan}")
+
+
+class ResultQueryPlanTests(QueryPlanTestCase):
+
+    def test_class_results(self):
+        # ClassSize.update_class_size and Result.calculate_overall_positions
+        queryset = Result.objects.filter(class_name='Grade 1', term='first', academic_year='2024-2025')
+        self.assertSearchesIndex(queryset, 'result_class_term_idx')
+
+    def test_scheduled_results_due(self):
+        # ResultViewSet._auto_publish_scheduled_results
+        queryset = Result.objects.filter(status='SCHEDULED', scheduled_date__lte=timezone.now())
+        self.assertSearchesIndex(queryset, 'result_schedule_idx')
+
+    def test_students_of_class(self):
+        # Student lists behind class results, report cards and book list emails
+        queryset = CustomUser.objects.filter(class_name='Grade 1', role='student')
+        self.assertSearchesIndex(queryset, 'user_class_role_idx')
+
+    def test_result_change_log(self):
+        queryset = ResultChangeLog.objects.filter(result_id=1).order_by('-changed_at')
+        self.assertSearchesIndex(queryset, 'resultchangelog_history_idx')
+
+
+class BookListQueryPlanTests(QueryPlanTestCase):
+
+    def test_scheduled_lists_due(self):
+        # BookListViewSet.check_and_send_scheduled_emails
+        queryset = BookList.objects.filter(status='scheduled', scheduled_date__lte=timezone.now())
+        self.assertSearchesIndex(queryset, 'booklist_schedule_idx')
+
+    def test_next_scheduled_list(self):
+        # booklist.cache.scheduled_publication_due
+        queryset = BookList.objects.filter(
+            status='scheduled', scheduled_date__isnull=False
+        ).order_by('scheduled_date').only('scheduled_date')[:1]
+        self.assertSearchesIndex(queryset, 'booklist_schedule_idx')
+
+    def test_student_book_lists(self):
+        queryset = BookList.objects.filter(status='published', class_name='Grade 1')
+        self.assertSearchesIndex(queryset, 'booklist_class_status_idx')
+
+    def test_previous_class_book_lists(self):
+        queryset = BookList.objects.filter(status='published', class_name__in=['Grade 1', 'Grade 2'])
+        self.assertSearchesIndex(queryset, 'booklist_class_status_idx')
+
+
+class JobPostQueryPlanTests(QueryPlanTestCase):
+
+    def test_published_listing(self):
+        # list_published_posts without a search term
+        queryset = JobPost.objects.filter(status='PUBLISHED').order_by('-published_date', '-id')[:20]
+        self.assertSearchesIndex(queryset, 'jobpost_published_idx')
+
+    def test_scheduled_posts_due(self):
+        queryset = JobPost.objects.filter(status='SCHEDULED', scheduled_date__lte=timezone.now() + timedelta(days=1))
+        self.assertSearchesIndex(queryset, 'jobpost_published_idx')
+
+
+class LogQueryPlanTests(QueryPlanTestCase):
+    """The log endpoints list one record's history"""
+
+    def test_job_post_log(self):
+        queryset = JobPostLog.objects.filter(job_post_id=1).order_by('-timestamp')
+        self.assertSearchesIndex(queryset, 'jobpostlog_history_idx')
+
+    def test_job_application_log(self):
+        queryset = JobApplicationLog.objects.filter(application_id=1)
+        self.assertSearchesIndex(queryset, 'jobapplog_history_idx')
+
+    def test_admission_log(self):
+        queryset = AdmissionLog.objects.filter(admission__id=1).order_by('-timestamp')
+        self.assertSearchesIndex(queryset, 'admissionlog_history_idx')
+
+    def test_reservation_log(self):
+        queryset = ReservationLog.objects.filter(reservation_id=1).order_by('-timestamp')
+        self.assertSearchesIndex(queryset, 'reservationlog_history_idx')
+
+    def test_contact_log(self):
+        queryset = ContactLog.objects.filter(contact__id=1).order_by('-timestamp')
+        self.assertSearchesIndex(queryset, 'contactlog_history_idx')
+
+    def test_ticket_log(self):
+        queryset = TicketLog.objects.filter(ticket_id=1).order_by('-timestamp')
+        self.assertSearchesIndex(queryset, 'ticketlog_history_idx')
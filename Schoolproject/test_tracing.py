@@ -0,0 +1,172 @@
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.db import transaction
+from django.http import JsonResponse
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import path
+
+from authapp.models import CustomUser
+from loadtest.stub_email import StubEmailApi
+from Schoolproject import tracing
+
+executor = ThreadPoolExecutor(max_workers=1)
+
+
+def count_users(request):
+    with tracing.span('users.count'):
+        return JsonResponse({'users': CustomUser.objects.count()})
+
+
+def call_out(request):
+    with tracing.span('outbound'):
+        requests.post(f"{request.GET['url']}/v3/smtp/email", json={'to': [{'email': 'a@example.com'}]},
+                      headers={'api-key': 'test'})
+    return JsonResponse({})
+
+
+def count_users_later():
+    with tracing.span('users.count'):
+        return CustomUser.objects.count()
+
+
+def queue_work(request):
+    executor.submit(tracing.wrap(count_users_later, 'background.count')).result(timeout=5)
+    return JsonResponse({})
+
+
+urlpatterns = [
+    path('users/', count_users, name='users'),
+    path('call-out/', call_out, name='call-out'),
+    path('queue/', queue_work, name='queue'),
+]
+
+
+class TraceFileMixin:
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.export = os.path.join(directory.name, 'traces.jsonl')
+        override = override_settings(TRACING={'EXPORT': self.export, 'SAMPLE_RATE': 1})
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def exported(self):
+        """The exported batches, as lists of spans"""
+        if not os.path.exists(self.export):
+            return []
+        with open(self.export) as f:
+            return [json.loads(line)['resourceSpans'][0]['scopeSpans'][0]['spans'] for line in f]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class TracingMiddlewareTests(TraceFileMixin, TestCase):
+
+    def test_request_trace(self):
+        response = self.client.get('/users/')
+
+        [spans] = self.exported()
+        child, root = spans
+        self.assertEqual(root['name'], 'GET users')
+        self.assertEqual(root['kind'], tracing.SERVER)
+        self.assertNotIn('parentSpanId', root)
+        self.assertIn({'key': 'http.status_code', 'value': {'intValue': '200'}}, root['attributes'])
+        self.assertEqual(child['name'], 'users.count')
+        self.assertEqual(child['parentSpanId'], root['spanId'])
+        self.assertEqual({child['traceId'], root['traceId']}, {response['X-Trace-Id']})
+
+    def test_not_sampled(self):
+        with override_settings(TRACING={'EXPORT': self.export, 'SAMPLE_RATE': 0}):
+            response = self.client.get('/users/')
+        self.assertNotIn('X-Trace-Id', response)
+        self.assertEqual(self.exported(), [])
+
+    def test_continues_caller_trace(self):
+        trace_id, parent_id = '4bf92f3577b34da6a3ce929d0e0e4736', '00f067aa0ba902b7'
+        with override_settings(TRACING={'EXPORT': self.export, 'SAMPLE_RATE': 0, 'TRUST_TRACEPARENT': True}):
+            self.client.get('/users/', HTTP_TRACEPARENT=f"00-{trace_id}-{parent_id}-01")
+            root = self.exported()[0][-1]
+            self.assertEqual((root['traceId'], root['parentSpanId']), (trace_id, parent_id))
+
+            # The caller decided not to sample
+            self.client.get('/users/', HTTP_TRACEPARENT=f"00-{trace_id}-{parent_id}-00")
+            self.assertEqual(len(self.exported()), 1)
+
+    def test_untrusted_caller_cannot_force_sampling(self):
+        trace_id, parent_id = '4bf92f3577b34da6a3ce929d0e0e4736', '00f067aa0ba902b7'
+        with override_settings(TRACING={'EXPORT': self.export, 'SAMPLE_RATE': 0}):
+            response = self.client.get('/users/', HTTP_TRACEPARENT=f"00-{trace_id}-{parent_id}-01")
+        self.assertNotIn('X-Trace-Id', response)
+        self.assertEqual(self.exported(), [])
+
+        # Sampled by our own rate, the caller's trace is still continued
+        self.client.get('/users/', HTTP_TRACEPARENT=f"00-{trace_id}-{parent_id}-00")
+        self.assertEqual(self.exported()[0][-1]['traceId'], trace_id)
+
+    def test_outbound_http(self):
+        email = StubEmailApi(latency=0)
+        email.start()
+        self.addCleanup(email.stop)
+
+        self.client.get('/call-out/', {'url': email.base_url})
+
+        http, outbound, root = self.exported()[0]
+        self.assertEqual(http['name'], 'POST 127.0.0.1')
+        self.assertEqual(http['kind'], tracing.CLIENT)
+        self.assertEqual(http['parentSpanId'], outbound['spanId'])
+        self.assertIn({'key': 'http.status_code', 'value': {'intValue': '201'}}, http['attributes'])
+
+    def test_background_work_links_to_request(self):
+        self.client.get('/queue/')
+
+        # The background work finishes first, so it is exported first
+        background, request = self.exported()
+        worker_child, worker_root = background
+        root = request[0]
+        self.assertEqual(worker_root['name'], 'background.count')
+        self.assertEqual(worker_root['kind'], tracing.CONSUMER)
+        self.assertEqual(worker_root['traceId'], root['traceId'])
+        self.assertEqual(worker_root['parentSpanId'], root['spanId'])
+        self.assertEqual(worker_child['parentSpanId'], worker_root['spanId'])
+
+    def test_closed_span_is_not_restored(self):
+        with tracing.start_trace('job', tracing.INTERNAL) as root:
+            opened = tracing.open_span('db.transaction')
+            tracing.close_span(opened)
+            self.assertIs(tracing.current_span(), root)
+
+            # Closed while a child span was current, as when a transaction
+            # ends inside a with span() block
+            opened = tracing.open_span('db.transaction')
+            with tracing.span('inner'):
+                tracing.close_span(opened)
+            self.assertIs(tracing.current_span(), root)
+
+    def test_errors(self):
+        with tracing.start_trace('job', tracing.INTERNAL):
+            with self.assertRaises(ValueError), tracing.span('failing'):
+                raise ValueError("bad score")
+        failing, _ = self.exported()[0]
+        self.assertEqual(failing['status'], {'code': tracing.STATUS_ERROR, 'message': 'ValueError: bad score'})
+
+
+class TransactionSpanTests(TraceFileMixin, TransactionTestCase):
+
+    def test_transaction_span(self):
+        with tracing.start_trace('job', tracing.INTERNAL):
+            with transaction.atomic():
+                with tracing.span('inside'):
+                    CustomUser.objects.count()
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                raise RuntimeError
+
+        inside, committed, rolled_back, root = self.exported()[0]
+        self.assertEqual(committed['name'], 'db.transaction')
+        self.assertEqual(inside['parentSpanId'], committed['spanId'])
+        self.assertEqual(committed['parentSpanId'], root['spanId'])
+        self.assertIn({'key': 'db.outcome', 'value': {'stringValue': 'commit'}}, committed['attributes'])
+        self.assertIn({'key': 'db.outcome', 'value': {'stringValue': 'rollback'}}, rolled_back['attributes'])
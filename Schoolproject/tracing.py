@@ -0,0 +1,324 @@
+"""
+Request tracing.
+
+A sampled request becomes a trace: TracingMiddleware opens the root span and
+everything under it opens child spans with span(), which works as a context
+manager and as a decorator:
+
+    with tracing.span('results.save'):
+        serializer.save()
+
+    @tracing.span('results.recalculate_positions')
+    def recalculate_positions(...):
+
+Spans are also opened for database transactions (see sqlite_backend), every
+outbound HTTP call made through urllib3 (Brevo, ipinfo, Google) and every
+payment gateway request. Work handed to a background thread is linked back to
+the request by wrap(): the function runs in a span of the same trace, whose
+parent is the span that queued it.
+
+Each finished trace (and each piece of background work) is written as one line
+of OTLP JSON, an ExportTraceServiceRequest as the OpenTelemetry collector's
+file exporter writes them, to TRACING['EXPORT']: a file path, or '-' for
+stdout. The lines can be replayed into any OTLP endpoint, e.g. Jaeger:
+
+    while read line; do curl -s -H 'Content-Type: application/json' \\
+        -d "$line" http://localhost:4318/v1/traces; done < traces.jsonl
+
+A SAMPLE_RATE fraction of requests is traced. A request with a W3C
+`traceparent` header continues the caller's trace if it is sampled; the
+caller's sampled flag decides that only with TRUST_TRACEPARENT, for deployments
+where every caller is our own, since otherwise any client could have every one
+of its requests traced and exported. Traced responses carry the trace id in
+X-Trace-Id. Outside a sampled trace span() does nothing but look up a context
+variable.
+"""
+import asyncio
+import contextvars
+import functools
+import json
+import random
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from Schoolproject.metrics import route_name
+
+DEFAULTS = {
+    'EXPORT': '',  # file path, or '-' for stdout; nothing is traced without it
+    'SAMPLE_RATE': 0.0,
+    # Follow the sampled flag of inbound traceparent headers instead of SAMPLE_RATE
+    'TRUST_TRACEPARENT': False,
+    'SERVICE_NAME': 'school-backend',
+}
+
+# OTLP span kinds
+INTERNAL, SERVER, CLIENT, PRODUCER, CONSUMER = 1, 2, 3, 4, 5
+# OTLP status codes
+STATUS_OK, STATUS_ERROR = 1, 2
+
+TRACEPARENT_RE = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+
+_current = contextvars.ContextVar('trace_span', default=None)
+_export_lock = threading.Lock()
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'TRACING', {})}
+
+
+class Span:
+    __slots__ = ('name', 'kind', 'trace_id', 'span_id', 'parent_id', 'parent', 'attributes',
+                 'start_ns', 'end_ns', 'status', 'status_message', 'finished', 'token')
+
+    def __init__(self, name, kind, trace_id, parent_id, parent, attributes, finished):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.parent = parent
+        self.attributes = dict(attributes)
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.status = None
+        self.status_message = ''
+        # Shared by the spans of one local trace; exported when its first span ends
+        self.finished = finished
+        # Restores the previous current span, for spans opened with open_span()
+        self.token = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def record_error(self, error):
+        self.status = STATUS_ERROR
+        self.status_message = f"{type(error).__name__}: {error}"[:500]
+
+    def end(self):
+        self.end_ns = time.time_ns()
+        self.finished.append(self)
+        if self.parent is None:
+            export(self.finished)
+
+    @property
+    def traceparent(self):
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+
+def current_span():
+    return _current.get()
+
+
+def open_span(name, kind=INTERNAL, **attributes):
+    """
+    Start a child of the current span and make it current, for code that cannot
+    use a with block; close it with close_span(). None when no trace is active.
+    """
+    parent = _current.get()
+    if parent is None:
+        return None
+    child = Span(name, kind, parent.trace_id, parent.span_id, parent, attributes, parent.finished)
+    child.token = _current.set(child)
+    return child
+
+
+def close_span(opened, error=None):
+    if opened is None:
+        return
+    if error is not None:
+        opened.record_error(error)
+    if _current.get() is opened:
+        try:
+            _current.reset(opened.token)
+        except ValueError:
+            # Opened in another context (e.g. a different thread's copy)
+            _current.set(opened.parent)
+    opened.end()
+
+
+@contextmanager
+def _activate(opened):
+    token = _current.set(opened)
+    try:
+        yield opened
+    except BaseException as e:
+        opened.record_error(e)
+        raise
+    finally:
+        _current.reset(token)
+        # A span from open_span() that was closed inside this block must not
+        # become current again
+        restored = _current.get()
+        if restored is not None and restored.end_ns is not None:
+            while restored is not None and restored.end_ns is not None:
+                restored = restored.parent
+            _current.set(restored)
+        opened.end()
+
+
+@contextmanager
+def span(name, kind=INTERNAL, **attributes):
+    """A child span of the current one around the block; yields it, or None when not tracing"""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    with _activate(Span(name, kind, parent.trace_id, parent.span_id, parent, attributes, parent.finished)) as child:
+        yield child
+
+
+@contextmanager
+def start_trace(name, kind=SERVER, traceparent=None, trust_sampled=True, **attributes):
+    """
+    The root span of a new trace, or of the caller's trace given its `traceparent`
+    header value; yields None when the request is not sampled. The caller's
+    sampled flag is followed only with `trust_sampled`, otherwise SAMPLE_RATE
+    decides as for a new trace.
+    """
+    match = TRACEPARENT_RE.match(traceparent or '')
+    if match:
+        trace_id, parent_id = match.group(1), match.group(2)
+    else:
+        trace_id, parent_id = f"{random.getrandbits(128):032x}", None
+    if match and trust_sampled:
+        sampled = int(match.group(3), 16) & 1
+    else:
+        sampled = random.random() < get_config()['SAMPLE_RATE']
+    if not sampled:
+        yield None
+        return
+    with _activate(Span(name, kind, trace_id, parent_id, None, attributes, [])) as root:
+        yield root
+
+
+def wrap(func, name):
+    """
+    `func`, running in a span of the current trace when called later on another
+    thread or event loop. Returns `func` itself when no trace is active.
+    """
+    parent = _current.get()
+    if parent is None:
+        return func
+    traceparent = parent.traceparent
+
+    if asyncio.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def traced_coroutine(*args, **kwargs):
+            with start_trace(name, CONSUMER, traceparent):
+                return await func(*args, **kwargs)
+        return traced_coroutine
+
+    @functools.wraps(func)
+    def traced(*args, **kwargs):
+        with start_trace(name, CONSUMER, traceparent):
+            return func(*args, **kwargs)
+    return traced
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def to_otlp(spans, service_name):
+    """An OTLP/JSON ExportTraceServiceRequest holding `spans`"""
+    otlp_spans = []
+    for finished in spans:
+        otlp_span = {
+            'traceId': finished.trace_id,
+            'spanId': finished.span_id,
+            'name': finished.name,
+            'kind': finished.kind,
+            'startTimeUnixNano': str(finished.start_ns),
+            'endTimeUnixNano': str(finished.end_ns),
+            'attributes': [{'key': key, 'value': _otlp_value(value)} for key, value in finished.attributes.items()],
+            'status': {'code': finished.status or STATUS_OK, 'message': finished.status_message},
+        }
+        if finished.parent_id:
+            otlp_span['parentSpanId'] = finished.parent_id
+        otlp_spans.append(otlp_span)
+    return {'resourceSpans': [{
+        'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': service_name}}]},
+        'scopeSpans': [{'scope': {'name': __name__}, 'spans': otlp_spans}],
+    }]}
+
+
+def export(spans):
+    config = get_config()
+    if not config['EXPORT']:
+        return
+    line = json.dumps(to_otlp(spans, config['SERVICE_NAME']), separators=(',', ':')) + '\n'
+    with _export_lock:
+        if config['EXPORT'] == '-':
+            sys.stdout.write(line)
+            sys.stdout.flush()
+        else:
+            with open(config['EXPORT'], 'a') as f:
+                f.write(line)
+
+
+_http_tracing_installed = False
+
+
+def _install_http_tracing():
+    """A CLIENT span around every urllib3 request; see profiling._install_http_timing"""
+    from urllib3.connectionpool import HTTPConnectionPool
+
+    global _http_tracing_installed
+    if _http_tracing_installed:
+        return
+    _http_tracing_installed = True
+    urlopen = HTTPConnectionPool.urlopen
+
+    def traced_urlopen(pool, method, url, *args, **kwargs):
+        parent = _current.get()
+        # Retries and redirects call urlopen again inside the first call
+        if parent is None or parent.kind == CLIENT:
+            return urlopen(pool, method, url, *args, **kwargs)
+        with span(f"{method} {pool.host}", CLIENT, **{
+            'http.method': method, 'server.address': pool.host, 'url.path': url.split('?')[0],
+        }) as call:
+            response = urlopen(pool, method, url, *args, **kwargs)
+            call.set_attribute('http.status_code', response.status)
+            return response
+
+    HTTPConnectionPool.urlopen = traced_urlopen
+
+
+class TracingMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        config = get_config()
+        self.enabled = bool(config['EXPORT'])
+        self.trust_traceparent = config['TRUST_TRACEPARENT']
+        if self.enabled:
+            _install_http_tracing()
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        with start_trace(request.method, SERVER, request.META.get('HTTP_TRACEPARENT'), self.trust_traceparent, **{
+            'http.method': request.method, 'url.path': request.path,
+        }) as root:
+            response = self.get_response(request)
+            if root is not None:
+                route = route_name(request)
+                root.name = f"{request.method} {route}"
+                root.set_attribute('http.route', route)
+                root.set_attribute('http.status_code', response.status_code)
+                if response.status_code >= 500:
+                    root.status = STATUS_ERROR
+                response['X-Trace-Id'] = root.trace_id
+        return response
@@ -3,9 +3,12 @@ from django.urls import include, path
 from django.conf import settings
 from django.conf.urls.static import static
 
+from Schoolproject.metrics import metrics_view
+
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
     path('api/', include('authapp.urls')),  # Include your app's URLs
     path('api/', include('Schoolapp.urls')),
     path('api/', include('Admissionapp.urls')),
@@ -19,6 +22,7 @@ urlpatterns = [
     path('api/', include('Subscriptions.urls')),
     path('api/', include('booklist.urls')),
     path('api/', include('ResultsEntry.urls')),
+    path('api/', include('triage.urls')),
     path('api/', include('admin_auth.urls', namespace='admin_auth')),
 
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
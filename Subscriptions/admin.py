@@ -1,3 +1,19 @@
 from django.contrib import admin
+from .models import Subscriber, Campaign
 
-# Register your models here.
+
+@admin.register(Subscriber)
+class SubscriberAdmin(admin.ModelAdmin):
+    list_display = ['email', 'created_at']
+    search_fields = ['email']
+    date_hierarchy = 'created_at'
+
+
+@admin.register(Campaign)
+class CampaignAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'status', 'total_recipients', 'sent_count', 'failed_count', 'queued_at', 'finished_at']
+    list_filter = ['status']
+    readonly_fields = [
+        'status', 'total_recipients', 'sent_count', 'failed_count',
+        'queued_at', 'started_at', 'finished_at', 'claimed_until',
+    ]
@@ -0,0 +1,190 @@
+"""
+Newsletter campaigns.
+
+Queueing a campaign snapshots the mailing list into CampaignRecipient rows, so
+people who subscribe or leave while it is being sent do not change who gets it.
+The sender then takes PENDING recipients in id order, BATCH_SIZE at a time, and
+sends each batch in one provider call under a token-bucket rate limit.
+Outcomes are written back in one executemany together with the campaign counters,
+so the recipient statuses are the checkpoint: a sender that crashes resumes at
+the first PENDING recipient (at worst re-sending the batch that was in flight)
+once its lease on the campaign lapses.
+"""
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Campaign, CampaignRecipient, Subscriber
+from .providers import TransientSendError, get_provider
+
+logger = logging.getLogger(__name__)
+
+CAMPAIGN_SETTINGS = getattr(settings, 'NEWSLETTER_CAMPAIGNS', {})
+BATCH_SIZE = CAMPAIGN_SETTINGS.get('BATCH_SIZE', 100)
+# Emails per second across all batches; 0 disables throttling
+RATE_PER_SECOND = CAMPAIGN_SETTINGS.get('RATE_PER_SECOND', 50)
+MAX_TRANSIENT_RETRIES = CAMPAIGN_SETTINGS.get('MAX_TRANSIENT_RETRIES', 5)
+RETRY_BACKOFF = CAMPAIGN_SETTINGS.get('RETRY_BACKOFF', 2.0)
+LEASE = timedelta(seconds=CAMPAIGN_SETTINGS.get('LEASE_SECONDS', 300))
+SNAPSHOT_BATCH_SIZE = 2000
+
+
+class CampaignStateError(Exception):
+    pass
+
+
+class RateLimiter:
+    """Token bucket refilled at `rate` tokens per second, holding at most `capacity`"""
+
+    def __init__(self, rate, capacity, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = self.capacity
+        self.updated = clock()
+
+    def acquire(self, tokens):
+        if not self.rate:
+            return
+        tokens = min(tokens, self.capacity)
+        while True:
+            now = self.clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return
+            self.sleep((tokens - self.tokens) / self.rate)
+
+
+def queue_campaign(campaign, emails=None):
+    """
+    Snapshot the recipients (the whole mailing list unless `emails` is given) and
+    mark the campaign QUEUED. Only drafts can be queued.
+    """
+    if emails is None:
+        emails = Subscriber.objects.order_by('id').values_list('email', flat=True).iterator(
+            chunk_size=SNAPSHOT_BATCH_SIZE
+        )
+
+    with transaction.atomic():
+        claimed = Campaign.objects.filter(pk=campaign.pk, status='DRAFT').update(
+            status='QUEUED', queued_at=timezone.now()
+        )
+        if not claimed:
+            raise CampaignStateError("Only draft campaigns can be sent.")
+
+        batch = []
+        for email in emails:
+            batch.append(CampaignRecipient(campaign_id=campaign.pk, email=email))
+            if len(batch) >= SNAPSHOT_BATCH_SIZE:
+                CampaignRecipient.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        CampaignRecipient.objects.bulk_create(batch, ignore_conflicts=True)
+
+        total = CampaignRecipient.objects.filter(campaign_id=campaign.pk).count()
+        Campaign.objects.filter(pk=campaign.pk).update(total_recipients=total)
+
+    campaign.refresh_from_db()
+    logger.info(f"Campaign {campaign.pk} queued for {total} recipients")
+    return campaign
+
+
+def _claim(campaign_id):
+    """Take (or renew) the sending lease; False when another sender holds it"""
+    now = timezone.now()
+    return bool(Campaign.objects.filter(
+        Q(claimed_until__isnull=True) | Q(claimed_until__lt=now),
+        pk=campaign_id, status__in=['QUEUED', 'SENDING'],
+    ).update(status='SENDING', claimed_until=now + LEASE, started_at=Coalesce('started_at', now)))
+
+
+def _record_batch(campaign_id, recipients, outcomes):
+    now = timezone.now()
+    by_email = {outcome.email: outcome for outcome in outcomes}
+    sent = failed = 0
+    for recipient in recipients:
+        outcome = by_email.get(recipient.email)
+        if outcome is not None and outcome.sent:
+            recipient.status = 'SENT'
+            recipient.message_id = (outcome.message_id or '')[:255]
+            recipient.sent_at = now
+            sent += 1
+        else:
+            recipient.status = 'FAILED'
+            recipient.error = (outcome.error if outcome else 'No outcome reported by the provider')[:255]
+            failed += 1
+
+    # bulk_update builds a CASE expression per field and row, which costs more than
+    # the provider call at these batch sizes; a parameterised executemany does not
+    table = connection.ops.quote_name(CampaignRecipient._meta.db_table)
+    sent_at = connection.ops.adapt_datetimefield_value(now)
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"UPDATE {table} SET status = %s, message_id = %s, error = %s, sent_at = %s WHERE id = %s",
+                [
+                    (r.status, r.message_id, r.error, sent_at if r.status == 'SENT' else None, r.pk)
+                    for r in recipients
+                ],
+            )
+        Campaign.objects.filter(pk=campaign_id).update(
+            sent_count=F('sent_count') + sent,
+            failed_count=F('failed_count') + failed,
+            claimed_until=now + LEASE,
+        )
+    return sent, failed
+
+
+def send_campaign(campaign_id, provider=None, batch_size=None, rate=None, sleep=time.sleep):
+    """
+    Send every PENDING recipient of a queued campaign. Returns False without doing
+    anything when another sender holds the campaign. Stops early, leaving the
+    campaign resumable, if the provider keeps failing transiently.
+    """
+    if not _claim(campaign_id):
+        return False
+
+    provider = provider or get_provider()
+    batch_size = min(batch_size or BATCH_SIZE, provider.MAX_BATCH_SIZE)
+    rate = RATE_PER_SECOND if rate is None else rate
+    limiter = RateLimiter(rate, batch_size, sleep=sleep)
+    campaign = Campaign.objects.get(pk=campaign_id)
+    retries = 0
+
+    while True:
+        recipients = list(
+            CampaignRecipient.objects.filter(campaign_id=campaign_id, status='PENDING').order_by('id')[:batch_size]
+        )
+        if not recipients:
+            break
+
+        limiter.acquire(len(recipients))
+        try:
+            outcomes = provider.send_batch(campaign.subject, campaign.html_content, [r.email for r in recipients])
+        except TransientSendError as e:
+            retries += 1
+            if retries > MAX_TRANSIENT_RETRIES:
+                logger.error(f"Campaign {campaign_id} paused after {retries - 1} retries: {str(e)}")
+                Campaign.objects.filter(pk=campaign_id).update(claimed_until=None)
+                return True
+            logger.warning(f"Campaign {campaign_id} batch will be retried: {str(e)}")
+            sleep(RETRY_BACKOFF * (2 ** (retries - 1)))
+            continue
+
+        retries = 0
+        _record_batch(campaign_id, recipients, outcomes)
+
+    Campaign.objects.filter(pk=campaign_id).update(
+        status='SENT', finished_at=timezone.now(), claimed_until=None
+    )
+    campaign.refresh_from_db()
+    logger.info(f"Campaign {campaign_id} finished: {campaign.sent_count} sent, {campaign.failed_count} failed")
+    return True
@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from Subscriptions.campaigns import queue_campaign, send_campaign
+from Subscriptions.models import Campaign
+from Subscriptions.providers import FakeProvider
+
+
+class Command(BaseCommand):
+    help = (
+        "Send a throwaway campaign to synthetic recipients through the fake provider and "
+        "report throughput, provider calls and database queries. Nothing is emailed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipients', type=int, default=10000)
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--rate', type=float, default=0, help="Emails per second; 0 for unthrottled")
+        parser.add_argument('--latency', type=float, default=0.05, help="Simulated seconds per provider call")
+        parser.add_argument('--bounce-every', type=int, default=100, help="Every Nth address fails")
+        parser.add_argument('--keep', action='store_true', help="Keep the benchmark campaign afterwards")
+
+    def handle(self, *args, **options):
+        count, bounce_every = options['recipients'], options['bounce_every']
+        emails = (
+            f"bounce{n}@example.com" if bounce_every and n % bounce_every == 0 else f"reader{n}@example.com"
+            for n in range(count)
+        )
+        campaign = Campaign.objects.create(subject='Benchmark', html_content='<p>Benchmark</p>')
+        provider = FakeProvider(latency=options['latency'])
+
+        try:
+            started = time.perf_counter()
+            queue_campaign(campaign, emails=emails)
+            snapshot_time = time.perf_counter() - started
+
+            started = time.perf_counter()
+            with CaptureQueriesContext(connection) as queries:
+                send_campaign(campaign.pk, provider=provider, batch_size=options['batch_size'], rate=options['rate'])
+            send_time = time.perf_counter() - started
+
+            campaign.refresh_from_db()
+            self.stdout.write(f"Snapshot of {campaign.total_recipients} recipients: {snapshot_time:.2f}s")
+            self.stdout.write(
+                f"Sent {campaign.sent_count}, failed {campaign.failed_count} in {send_time:.2f}s "
+                f"({campaign.total_recipients / send_time:.0f} recipients/s)"
+            )
+            self.stdout.write(
+                f"{len(provider.calls)} provider calls, {len(queries)} queries "
+                f"({options['latency'] * len(provider.calls):.2f}s of simulated provider latency)"
+            )
+            one_by_one = options['latency'] * campaign.total_recipients
+            self.stdout.write(self.style.SUCCESS(
+                f"A per-recipient loop would spend {one_by_one:.0f}s in provider calls alone."
+            ))
+        finally:
+            if not options['keep']:
+                campaign.delete()
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from Subscriptions.campaigns import send_campaign
+from Subscriptions.models import Campaign
+
+
+class Command(BaseCommand):
+    help = (
+        "Send queued newsletter campaigns and resume ones interrupted mid-send. "
+        "Campaigns still leased by a running sender are left alone."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('campaign_ids', nargs='*', type=int, help="Only these campaigns")
+
+    def handle(self, *args, **options):
+        campaigns = Campaign.objects.filter(status__in=['QUEUED', 'SENDING']).order_by('queued_at')
+        if options['campaign_ids']:
+            campaigns = campaigns.filter(pk__in=options['campaign_ids'])
+
+        for campaign_id in campaigns.values_list('pk', flat=True):
+            if not send_campaign(campaign_id):
+                self.stdout.write(f"Campaign {campaign_id} is being sent by another process, skipped.")
+                continue
+            campaign = Campaign.objects.get(pk=campaign_id)
+            self.stdout.write(self.style.SUCCESS(
+                f"Campaign {campaign_id} ({campaign.status}): {campaign.sent_count} sent, "
+                f"{campaign.failed_count} failed of {campaign.total_recipients}"
+            ))
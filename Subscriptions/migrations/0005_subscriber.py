@@ -0,0 +1,51 @@
+# Generated by Django 5.0.6 on 2026-10-19 10:37
+
+from django.db import migrations, models
+
+
+def copy_email_list(apps, schema_editor):
+    """Move the ;-joined EmailList blob and existing subscriptions into Subscriber rows"""
+    EmailList = apps.get_model('Subscriptions', 'EmailList')
+    Subscription = apps.get_model('Subscriptions', 'Subscription')
+    Subscriber = apps.get_model('Subscriptions', 'Subscriber')
+
+    emails = set()
+    for blob in EmailList.objects.values_list('emails', flat=True):
+        emails.update(email.strip().lower() for email in blob.split(';'))
+    emails.update(email.strip().lower() for email in Subscription.objects.values_list('email', flat=True))
+    emails.discard('')
+
+    Subscriber.objects.bulk_create(
+        [Subscriber(email=email) for email in sorted(emails)], batch_size=1000, ignore_conflicts=True
+    )
+
+
+def copy_subscribers_back(apps, schema_editor):
+    EmailList = apps.get_model('Subscriptions', 'EmailList')
+    Subscriber = apps.get_model('Subscriptions', 'Subscriber')
+    EmailList.objects.create(id=1, emails=';'.join(Subscriber.objects.values_list('email', flat=True)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Subscriptions', '0004_alter_emaillist_emails'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Subscriber',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.EmailField(max_length=254, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+        migrations.RunPython(copy_email_list, copy_subscribers_back),
+        migrations.DeleteModel(
+            name='EmailList',
+        ),
+    ]
@@ -0,0 +1,116 @@
+"""
+Email providers used to send newsletter campaigns.
+
+A provider sends one batch of recipients per call and reports an outcome for each
+address. Errors worth retrying (rate limiting, provider outages) raise
+TransientSendError so the whole batch is tried again later; anything else is
+recorded as a failure for the affected recipients.
+"""
+import logging
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from urllib3.exceptions import HTTPError
+
+logger = logging.getLogger(__name__)
+
+
+class TransientSendError(Exception):
+    """The batch was not sent but may succeed if retried later"""
+
+
+@dataclass
+class SendOutcome:
+    email: str
+    sent: bool
+    message_id: str = ''
+    error: str = ''
+
+
+class BrevoProvider:
+    """Brevo transactional API; one request carries a message version per recipient"""
+
+    # Brevo accepts at most 1000 message versions per request
+    MAX_BATCH_SIZE = 1000
+
+    def __init__(self, api_key=None, sender=None):
+        from sib_api_v3_sdk import Configuration, ApiClient, TransactionalEmailsApi
+
+        configuration = Configuration()
+        configuration.api_key['api-key'] = api_key or settings.BREVO_API_KEY
+        self.api = TransactionalEmailsApi(ApiClient(configuration))
+        self.sender = sender or {
+            'name': settings.NEWSLETTER_CAMPAIGNS.get('SENDER_NAME', 'School Administration'),
+            'email': settings.DEFAULT_FROM_EMAIL,
+        }
+
+    def send_batch(self, subject, html_content, emails):
+        from sib_api_v3_sdk import SendSmtpEmail
+        from sib_api_v3_sdk.rest import ApiException
+
+        message = SendSmtpEmail(
+            sender=self.sender,
+            subject=subject,
+            html_content=html_content,
+            message_versions=[{'to': [{'email': email}]} for email in emails],
+        )
+        try:
+            response = self.api.send_transac_email(message)
+        except ApiException as e:
+            if e.status == 429 or (e.status or 500) >= 500:
+                raise TransientSendError(f"Brevo returned {e.status}: {e.reason}")
+            logger.error(f"Brevo rejected a campaign batch of {len(emails)}: {e.status} {e.body}")
+            return [SendOutcome(email, False, error=f"{e.status} {e.reason}"[:255]) for email in emails]
+        except (HTTPError, OSError) as e:
+            raise TransientSendError(f"Could not reach Brevo: {str(e)}")
+
+        message_ids = getattr(response, 'message_ids', None) or []
+        if not message_ids and getattr(response, 'message_id', None):
+            message_ids = [response.message_id]
+        return [
+            SendOutcome(email, True, message_id=message_ids[i] if i < len(message_ids) else '')
+            for i, email in enumerate(emails)
+        ]
+
+
+class FakeProvider:
+    """
+    Local stand-in for development, tests and benchmarks. Sleeps `latency` seconds
+    per call, fails addresses containing `fail_marker` and raises TransientSendError
+    for the first `transient_failures` calls.
+    """
+
+    MAX_BATCH_SIZE = 1000
+
+    def __init__(self, latency=0.0, fail_marker='bounce', transient_failures=0):
+        self.latency = latency
+        self.fail_marker = fail_marker
+        self.transient_failures = transient_failures
+        self.calls = []
+
+    def send_batch(self, subject, html_content, emails):
+        if self.latency:
+            time.sleep(self.latency)
+        if self.transient_failures > 0:
+            self.transient_failures -= 1
+            raise TransientSendError("Fake provider is rate limiting")
+
+        self.calls.append(list(emails))
+        call = len(self.calls)
+        return [
+            SendOutcome(email, False, error='Mailbox unavailable')
+            if self.fail_marker and self.fail_marker in email
+            else SendOutcome(email, True, message_id=f"<fake-{call}-{i}@localhost>")
+            for i, email in enumerate(emails)
+        ]
+
+
+PROVIDERS = {
+    'brevo': BrevoProvider,
+    'fake': FakeProvider,
+}
+
+
+def get_provider(name=None):
+    return PROVIDERS[name or settings.NEWSLETTER_CAMPAIGNS.get('PROVIDER', 'brevo')]()
@@ -1,12 +1,31 @@
 from rest_framework import serializers
-from .models import Subscription, EmailList
+from .models import Subscription, Subscriber, Campaign, CampaignRecipient
 
 class SubscriptionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Subscription
         fields = ['id', 'full_name', 'email', 'created_at', 'updated_at']
 
-class EmailListSerializer(serializers.ModelSerializer):
+class SubscriberSerializer(serializers.ModelSerializer):
     class Meta:
-        model = EmailList
-        fields = ['emails']
+        model = Subscriber
+        fields = ['id', 'email', 'created_at']
+
+
+class CampaignSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Campaign
+        fields = [
+            'id', 'subject', 'html_content', 'status', 'total_recipients', 'sent_count', 'failed_count',
+            'created_at', 'queued_at', 'started_at', 'finished_at',
+        ]
+        read_only_fields = [
+            'status', 'total_recipients', 'sent_count', 'failed_count',
+            'created_at', 'queued_at', 'started_at', 'finished_at',
+        ]
+
+
+class CampaignRecipientSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CampaignRecipient
+        fields = ['id', 'email', 'status', 'message_id', 'error', 'sent_at']
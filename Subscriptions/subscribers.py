@@ -0,0 +1,98 @@
+"""
+The mailing list: one Subscriber row per normalised address.
+
+Imports are processed in batches: each batch is deduplicated in memory, the
+addresses already stored are found with one indexed IN query, and the rest are
+inserted with bulk_create(ignore_conflicts=True) so a concurrent signup for the
+same address cannot make the import fail; such an address counts as a duplicate.
+"""
+import re
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from .models import Subscriber
+
+IMPORT_BATCH_SIZE = 1000
+MAX_REPORTED_INVALID = 100
+
+SEPARATORS_RE = re.compile(r'[;,\s]+')
+
+
+def normalize_email(email):
+    return (email or '').strip().lower()
+
+
+def iter_addresses(chunks):
+    """Yield addresses from an iterable of text or bytes chunks separated by ; , or whitespace"""
+    remainder = ''
+    for chunk in chunks:
+        if isinstance(chunk, bytes):
+            chunk = chunk.decode('utf-8', errors='replace')
+        parts = SEPARATORS_RE.split(remainder + chunk)
+        # The last part may continue in the next chunk
+        remainder = parts.pop()
+        for part in parts:
+            if part:
+                yield part
+    if remainder:
+        yield remainder
+
+
+def add_subscriber(email):
+    subscriber, _created = Subscriber.objects.get_or_create(email=normalize_email(email))
+    return subscriber
+
+
+def remove_subscriber(email):
+    Subscriber.objects.filter(email=normalize_email(email)).delete()
+
+
+def import_emails(addresses, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Add every valid address in the iterable `addresses`, which is consumed lazily.
+    Returns counts of added, duplicate and invalid addresses, plus a sample of
+    the invalid ones.
+    """
+    result = {'added': 0, 'duplicates': 0, 'invalid': 0, 'invalid_emails': []}
+    seen = set()
+    batch = []
+
+    def flush():
+        stored = Subscriber.objects.filter(email__in=batch)
+        existing = set(stored.values_list('email', flat=True))
+        with transaction.atomic():
+            before = stored.count()
+            Subscriber.objects.bulk_create(
+                [Subscriber(email=email) for email in batch if email not in existing], ignore_conflicts=True
+            )
+            # bulk_create doesn't report rows skipped as conflicts (an address
+            # that signed up since the check), so count what was really added
+            added = stored.count() - before
+        result['added'] += added
+        result['duplicates'] += len(batch) - added
+        batch.clear()
+
+    for address in addresses:
+        email = normalize_email(address)
+        if not email:
+            continue
+        if email in seen:
+            result['duplicates'] += 1
+            continue
+        seen.add(email)
+        try:
+            validate_email(email)
+        except ValidationError:
+            result['invalid'] += 1
+            if len(result['invalid_emails']) < MAX_REPORTED_INVALID:
+                result['invalid_emails'].append(address)
+            continue
+
+        batch.append(email)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return result
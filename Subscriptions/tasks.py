@@ -0,0 +1,41 @@
+"""
+Background sending of newsletter campaigns.
+
+Campaigns are sent on a single worker thread so two campaigns never compete for
+the provider's rate limit. Campaigns interrupted by a restart are picked up by
+`python manage.py send_campaigns`.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections, transaction
+
+from Schoolproject import metrics, tracing
+
+from .campaigns import send_campaign
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='campaign')
+    return _executor
+
+
+def _run_campaign(campaign_id):
+    try:
+        send_campaign(campaign_id)
+    except Exception as e:
+        logger.error(f"Sending campaign {campaign_id} failed: {str(e)}", exc_info=True)
+    finally:
+        close_old_connections()
+
+
+def queue_campaign_sending(campaign_id):
+    """Start sending once the current transaction commits"""
+    run_campaign = tracing.wrap(_run_campaign, 'campaign.send')
+    transaction.on_commit(lambda: metrics.track_queue('campaign', _get_executor().submit(run_campaign, campaign_id)))
@@ -1,3 +1,150 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.db.models import QuerySet
 from django.test import TestCase
+from django.utils import timezone
+
+from .campaigns import MAX_TRANSIENT_RETRIES, CampaignStateError, RateLimiter, queue_campaign, send_campaign
+from .models import Campaign, CampaignRecipient, Subscriber
+from .providers import FakeProvider
+from .subscribers import import_emails, iter_addresses
+
+
+class SubscriberImportTests(TestCase):
+
+    def test_counts(self):
+        Subscriber.objects.create(email='kept@example.com')
+        result = import_emails(['New@Example.com', 'kept@example.com', 'new@example.com', 'not-an-email', ''],
+                               batch_size=2)
+        self.assertEqual(result, {'added': 1, 'duplicates': 2, 'invalid': 1, 'invalid_emails': ['not-an-email']})
+        self.assertEqual(sorted(Subscriber.objects.values_list('email', flat=True)),
+                         ['kept@example.com', 'new@example.com'])
+
+    def test_concurrent_signup_is_not_counted_as_added(self):
+        values_list = QuerySet.values_list
+
+        def signup_after_check(queryset, *fields, **kwargs):
+            emails = list(values_list(queryset, *fields, **kwargs))
+            # Someone subscribes between the existence check and the insert
+            Subscriber.objects.create(email='race@example.com')
+            return emails
+
+        with mock.patch.object(QuerySet, 'values_list', autospec=True, side_effect=signup_after_check):
+            result = import_emails(['race@example.com', 'other@example.com'])
+        self.assertEqual((result['added'], result['duplicates']), (1, 1))
+        self.assertEqual(Subscriber.objects.count(), 2)
+
+    def test_addresses_split_across_chunks(self):
+        chunks = [b'a@example.com, b@exa', 'mple.com;c@example.com\n', 'd@example.com']
+        self.assertEqual(list(iter_addresses(chunks)),
+                         ['a@example.com', 'b@example.com', 'c@example.com', 'd@example.com'])
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class RateLimiterTests(TestCase):
+
+    def test_waits_for_tokens_once_the_bucket_is_empty(self):
+        clock = FakeClock()
+        limiter = RateLimiter(4, 4, clock=clock, sleep=clock.sleep)
+        limiter.acquire(4)
+        self.assertEqual(clock.sleeps, [])
+        limiter.acquire(4)
+        self.assertEqual(clock.sleeps, [1.0])
+
+        clock.now += 10
+        # Tokens stop accumulating at the bucket's capacity
+        limiter.acquire(4)
+        limiter.acquire(2)
+        self.assertEqual(clock.sleeps, [1.0, 0.5])
+
+    def test_zero_rate_does_not_throttle(self):
+        clock = FakeClock()
+        limiter = RateLimiter(0, 5, clock=clock, sleep=clock.sleep)
+        for _ in range(10):
+            limiter.acquire(5)
+        self.assertEqual(clock.sleeps, [])
+
+
+class CampaignSendingTests(TestCase):
+
+    def setUp(self):
+        for email in ['a@example.com', 'bounce@example.com', 'c@example.com', 'd@example.com', 'e@example.com']:
+            Subscriber.objects.create(email=email)
+        self.campaign = queue_campaign(Campaign.objects.create(subject='Term dates', html_content='<p>Hi</p>'))
+        self.sleeps = []
+
+    def send(self, provider, **kwargs):
+        return send_campaign(self.campaign.pk, provider=provider, batch_size=2, rate=0,
+                             sleep=self.sleeps.append, **kwargs)
+
+    def statuses(self):
+        return dict(CampaignRecipient.objects.values_list('email', 'status'))
+
+    def test_queueing_snapshots_the_mailing_list(self):
+        self.assertEqual((self.campaign.status, self.campaign.total_recipients), ('QUEUED', 5))
+        Subscriber.objects.create(email='late@example.com')
+        self.assertNotIn('late@example.com', self.statuses())
+        with self.assertRaises(CampaignStateError):
+            queue_campaign(self.campaign)
+
+    def test_sends_every_recipient_in_batches(self):
+        provider = FakeProvider()
+        self.assertTrue(self.send(provider))
+        self.assertEqual([len(call) for call in provider.calls], [2, 2, 1])
+
+        self.campaign.refresh_from_db()
+        self.assertEqual((self.campaign.status, self.campaign.sent_count, self.campaign.failed_count), ('SENT', 4, 1))
+        self.assertIsNone(self.campaign.claimed_until)
+        self.assertEqual(self.statuses()['bounce@example.com'], 'FAILED')
+
+    def test_campaign_leased_to_another_sender_is_left_alone(self):
+        Campaign.objects.filter(pk=self.campaign.pk).update(
+            status='SENDING', claimed_until=timezone.now() + timedelta(minutes=5)
+        )
+        provider = FakeProvider()
+        self.assertFalse(self.send(provider))
+        self.assertEqual(provider.calls, [])
+
+    def test_lapsed_lease_resumes_at_the_first_pending_recipient(self):
+        # A sender crashed after its first batch was recorded
+        first = list(CampaignRecipient.objects.order_by('id')[:2])
+        CampaignRecipient.objects.filter(pk__in=[r.pk for r in first]).update(status='SENT')
+        Campaign.objects.filter(pk=self.campaign.pk).update(
+            status='SENDING', sent_count=2, claimed_until=timezone.now() - timedelta(seconds=1)
+        )
+
+        provider = FakeProvider()
+        self.assertTrue(self.send(provider))
+        sent_again = {email for call in provider.calls for email in call}
+        self.assertFalse(sent_again & {r.email for r in first})
+        self.assertEqual(len(sent_again), 3)
+        self.campaign.refresh_from_db()
+        self.assertEqual((self.campaign.status, self.campaign.sent_count), ('SENT', 5))
+
+    def test_transient_errors_back_off_and_retry(self):
+        provider = FakeProvider(transient_failures=2, fail_marker=None)
+        self.assertTrue(self.send(provider))
+        self.assertEqual(self.sleeps, [2.0, 4.0])
+        self.assertEqual(set(self.statuses().values()), {'SENT'})
 
-# Create your tests here.
+    def test_persistent_errors_pause_the_campaign(self):
+        provider = FakeProvider(transient_failures=MAX_TRANSIENT_RETRIES + 1)
+        self.assertTrue(self.send(provider))
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.status, 'SENDING')
+        self.assertIsNone(self.campaign.claimed_until)
+        self.assertEqual(set(self.statuses().values()), {'PENDING'})
@@ -1,11 +1,23 @@
-from rest_framework import viewsets, status
-from rest_framework.response import Response
-from .models import Subscription, EmailList  # Import the new model
-from .serializers import SubscriptionSerializer, EmailListSerializer  
+import csv
+import logging
+
 from django.conf import settings
-from sib_api_v3_sdk import Configuration, ApiClient, SendSmtpEmail
-from sib_api_v3_sdk.api.transactional_emails_api import TransactionalEmailsApi
-from sib_api_v3_sdk.rest import ApiException
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from rest_framework import serializers
+from rest_framework import mixins, permissions, viewsets, status
+from rest_framework.decorators import action
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from .campaigns import CampaignStateError, queue_campaign
+from .models import Subscription, Subscriber, Campaign
+from .serializers import (
+    SubscriptionSerializer, SubscriberSerializer, CampaignSerializer, CampaignRecipientSerializer
+)
+from .tasks import queue_campaign_sending
+from .subscribers import add_subscriber, remove_subscriber, import_emails, iter_addresses
+
+logger = logging.getLogger(__name__)
 
 class SubscriptionViewSet(viewsets.ModelViewSet):
     queryset = Subscription.objects.all()
@@ -16,8 +28,7 @@ class SubscriptionViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         subscription = serializer.save()
 
-        # Update EmailList
-        self.update_email_list(subscription.email)
+        add_subscriber(subscription.email)
 
         # Send confirmation email
         self.send_confirmation_email(subscription)
@@ -25,6 +36,9 @@ class SubscriptionViewSet(viewsets.ModelViewSet):
         return Response({'detail': 'Subscription submitted successfully!', 'data': serializer.data}, status=status.HTTP_201_CREATED)
 
     def send_confirmation_email(self, subscription):
+        from sib_api_v3_sdk import Configuration, ApiClient, TransactionalEmailsApi, SendSmtpEmail
+        from sib_api_v3_sdk.rest import ApiException
+
         configuration = Configuration()
         configuration.api_key['api-key'] = settings.BREVO_API_KEY
         
@@ -47,90 +61,107 @@ class SubscriptionViewSet(viewsets.ModelViewSet):
 
         try:
             api_response = api_instance.send_transac_email(send_smtp_email)
-            print("Email sent successfully: %s\n" % api_response)
+            logger.info(f"Email sent successfully: {api_response}")
         except ApiException as e:
-            print("Exception when sending email: %s\n" % e)
-
-    def update_email_list(self, new_email, remove=False):
-        email_list, created = EmailList.objects.get_or_create(id=1)
-        current_emails = email_list.emails.split(';') if email_list.emails else []
-
-        if remove:
-            # Remove email if present
-            if new_email in current_emails:
-                current_emails.remove(new_email)
-                email_list.emails = ';'.join(current_emails)
-                email_list.save()
-        else:
-            # Add email if not present
-            if new_email not in current_emails:
-                current_emails.append(new_email)
-                email_list.emails = ';'.join(current_emails)
-                email_list.save()
+            logger.error(f"Exception when sending email: {e}")
 
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()  # Get the specific Subscription instance
         email_to_remove = instance.email  # Store the email before deletion
         self.perform_destroy(instance)  # Completely delete the Subscription instance
-        self.update_email_list(email_to_remove, remove=True)  # Remove email from EmailList if it exists
+        remove_subscriber(email_to_remove)  # Take the address off the mailing list too
         return Response({'detail': 'Subscription and email removed successfully!'}, status=status.HTTP_204_NO_CONTENT)
 
-class EmailListViewSet(viewsets.ModelViewSet):
-    queryset = EmailList.objects.all()
-    serializer_class = EmailListSerializer
+class Echo:
+    """File-like object whose write() returns the line, for streaming csv.writer output"""
+
+    def write(self, value):
+        return value
+
+
+class EmailListViewSet(mixins.ListModelMixin, mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """
+    The mailing list. GET streams every address as CSV, POST imports addresses
+    from an uploaded `file` or an `emails` field (a list, or a string separated
+    by ; , or whitespace).
+    """
+    queryset = Subscriber.objects.all()
+    serializer_class = SubscriberSerializer
+
+    def list(self, request, *args, **kwargs):
+        writer = csv.writer(Echo())
+        rows = self.get_queryset().values_list('email', 'created_at').iterator(chunk_size=2000)
+
+        def stream():
+            yield writer.writerow(['email', 'created_at'])
+            for email, created_at in rows:
+                yield writer.writerow([email, created_at.isoformat()])
 
-    def get_queryset(self):
-        # Return only the first instance (assuming there’s only one)
-        return EmailList.objects.filter(id=1)
+        response = StreamingHttpResponse(stream(), content_type='text/csv')
+        response['Content-Disposition'] = 'attachment; filename="email-list.csv"'
+        return response
 
     def create(self, request):
-        emails = request.data.get('emails', '')
-        email_list = self.get_queryset().first()
-
-        if email_list is None:
-            return Response({'detail': 'Email list does not exist.'}, status=status.HTTP_404_NOT_FOUND)
-
-        # Split the incoming emails and update the email list
-        new_emails = emails.split(';')
-        updated = False  # Flag to check if any email was added
-        duplicates = []  # Track any duplicate emails
-
-        for email in new_emails:
-            email = email.strip()
-            if not email:
-                continue
-            if self.is_duplicate_email(email, email_list):
-                duplicates.append(email)
+        upload = request.FILES.get('file')
+        if upload is not None:
+            addresses = iter_addresses(upload.chunks())
+        else:
+            if hasattr(request.data, 'getlist'):
+                # Form data may repeat the field
+                emails = request.data.getlist('emails')
             else:
-                updated = self.update_email_list(email, email_list) or updated
-
-        # If duplicates were found, return an error message
-        if duplicates:
-            return Response(
-                {'detail': f'These emails already exist: {", ".join(duplicates)}'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        # If the list was updated with new emails
-        if updated:
-            email_list.save()
-            return Response({'detail': 'Email list updated successfully!'}, status=status.HTTP_201_CREATED)
-        
-        # If no new emails were added and no duplicates were found
-        return Response({'detail': 'No new emails added.'}, status=status.HTTP_200_OK)
-
-    def update(self, request, *args, **kwargs):
-        return self.create(request)  # Use the same logic as create for updating
-
-    def update_email_list(self, new_email, email_list):
-        # Append the new email if not already present
-        current_emails = email_list.emails.split(';') if email_list.emails else []
-        if new_email not in current_emails:
-            current_emails.append(new_email)
-            email_list.emails = ';'.join(current_emails)
-            return True  # Indicates that a new email was added
-        return False  # Indicates that no email was added
-
-    def is_duplicate_email(self, email, email_list):
-        current_emails = email_list.emails.split(';') if email_list.emails else []
-        return email in current_emails
+                emails = request.data.get('emails', '')
+            if isinstance(emails, str):
+                emails = [emails]
+            elif not isinstance(emails, list):
+                return Response({'detail': 'Provide a file or an emails field.'}, status=status.HTTP_400_BAD_REQUEST)
+            addresses = iter_addresses(str(email) + ';' for email in emails)
+
+        result = import_emails(addresses)
+        response_status = status.HTTP_201_CREATED if result['added'] else status.HTTP_200_OK
+        return Response(result, status=response_status)
+
+
+class RecipientPagination(PageNumberPagination):
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
+class CampaignViewSet(viewsets.ModelViewSet):
+    """Newsletter campaigns to the mailing list. Only drafts can be edited or deleted."""
+    queryset = Campaign.objects.all()
+    serializer_class = CampaignSerializer
+    permission_classes = [permissions.IsAdminUser]
+
+    def perform_update(self, serializer):
+        if serializer.instance.status != 'DRAFT':
+            raise serializers.ValidationError({'detail': 'Only draft campaigns can be edited.'})
+        serializer.save()
+
+    def destroy(self, request, *args, **kwargs):
+        if self.get_object().status != 'DRAFT':
+            return Response({'detail': 'Only draft campaigns can be deleted.'}, status=status.HTTP_400_BAD_REQUEST)
+        return super().destroy(request, *args, **kwargs)
+
+    @action(detail=True, methods=['post'])
+    def send(self, request, pk=None):
+        """Snapshot the mailing list as this campaign's recipients and start sending"""
+        campaign = self.get_object()
+        try:
+            with transaction.atomic():
+                campaign = queue_campaign(campaign)
+                queue_campaign_sending(campaign.pk)
+        except CampaignStateError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(campaign).data, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['get'])
+    def recipients(self, request, pk=None):
+        """Per-recipient outcomes, optionally filtered with ?status=SENT|FAILED|PENDING"""
+        queryset = self.get_object().recipients.order_by('id')
+        if request.query_params.get('status'):
+            queryset = queryset.filter(status=request.query_params['status'].upper())
+        paginator = RecipientPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        return paginator.get_paginated_response(CampaignRecipientSerializer(page, many=True).data)
@@ -4,7 +4,6 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth import get_user_model
-from rest_framework_jwt.settings import api_settings 
 from django.contrib.auth import authenticate, login
 from django.core.mail import send_mail
 from django.urls import reverse
@@ -21,14 +20,12 @@ from django.utils.crypto import get_random_string
 from django.contrib.auth.hashers import make_password
 from rest_framework.permissions import IsAuthenticated, AllowAny
 import base64
-from sib_api_v3_sdk import Configuration, ApiClient, SendSmtpEmail
-from sib_api_v3_sdk.api.transactional_emails_api import TransactionalEmailsApi
-from sib_api_v3_sdk.rest import ApiException
 from django.template.loader import render_to_string
 # admin_auth/views.py
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from authapp.models import CustomUser
+from Schoolproject import metrics
 from .serializers import AdminUserSerializer
 from django.core.exceptions import ObjectDoesNotExist
 from rest_framework import generics
@@ -104,7 +101,7 @@ class AdminUserManagementView(APIView):
         """
         GET method - accessible by staff (read-only), principals, and superusers
         """
-        users = CustomUser.objects.all()
+        users = CustomUser.objects.prefetch_related('groups', 'user_permissions')
         serializer = AdminUserSerializer(users, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -288,6 +285,9 @@ class AdminSignUpView(generics.CreateAPIView):
                         status=status.HTTP_201_CREATED, headers=headers)
 
     def send_verification_email(self, user):
+        from sib_api_v3_sdk import Configuration, ApiClient, TransactionalEmailsApi, SendSmtpEmail
+        from sib_api_v3_sdk.rest import ApiException
+
         verification_token = RefreshToken.for_user(user).access_token
         verification_url = reverse('verify-email', kwargs={'user_id': user.id, 'token': str(verification_token)})
         verification_url = self.request.build_absolute_uri(verification_url)  # Make the URL absolute
@@ -386,7 +386,10 @@ class LoginView(APIView):
             return Response({'error': 'Account not verified. Please check your email for the verification link.'}, status=status.HTTP_401_UNAUTHORIZED)
 
         # Check if the password matches
-        if check_password(password, user.password):
+        with metrics.timed('auth.check_password'):
+            password_matches = check_password(password, user.password)
+        metrics.LOGINS.labels(portal='admin', outcome='success' if password_matches else 'wrong_password').inc()
+        if password_matches:
             login(request, user)
             refresh = RefreshToken.for_user(user)
             return Response({
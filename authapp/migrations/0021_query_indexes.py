@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-19 10:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('authapp', '0020_alter_customuser_class_name'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['class_name', 'role'], name='user_class_role_idx'),
+        ),
+    ]
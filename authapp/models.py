@@ -92,6 +92,12 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
+
+    class Meta:
+        indexes = [
+            # Students of a class
+            models.Index(fields=['class_name', 'role'], name='user_class_role_idx'),
+        ]
     
     def __str__(self):
         return self.email
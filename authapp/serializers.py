@@ -1,7 +1,5 @@
 from rest_framework import serializers
 from .models import CustomUser
-from google.oauth2 import id_token
-from google.auth.transport import requests
 
 class CustomUserSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
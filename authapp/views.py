@@ -22,25 +22,15 @@ from django.urls import reverse
 from django.utils import timezone
 from django.utils.crypto import get_random_string
 from dotenv import load_dotenv
-from geoip2 import database
-from google.auth.transport import requests as google_requests
-from google.oauth2 import id_token
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
-from rest_framework_jwt.settings import api_settings
 from rest_framework_social_oauth2.views import ConvertTokenView
-from sib_api_v3_sdk import (
-    ApiClient, Configuration, SendSmtpEmail,
-    TransactionalEmailsApi
-)
-from sib_api_v3_sdk.rest import ApiException
-from social_core.backends.google import GoogleOAuth2
-from social_core.exceptions import AuthException
 from social_django.utils import load_backend, load_strategy
 
 from authapp.models import CustomUser
+from Schoolproject import metrics, tracing
 from .models import CustomUser
 from .serializers import (
     ChangePasswordRequestSerializer, ChangePasswordSerializer,
@@ -71,16 +61,16 @@ class SignUpView(generics.CreateAPIView):
 
         # Check if the email already exists
         if CustomUser.objects.filter(email=email).exists():
-            print(f"[INFO] Email {email} already exists in the database.")
+            logger.info(f"Email {email} already exists in the database.")
             return Response({'error': 'Email has already been used.'}, status=status.HTTP_400_BAD_REQUEST)
 
         # Modify the mutable data to set the user as inactive initially
         mutable_data['is_active'] = False
         request._mutable_data = mutable_data
-        print(f"[INFO] User data modified, setting is_active=False for email: {email}")
+        logger.debug("User data modified, setting is_active=False for email: %s", email)
 
         # Perform the user creation
-        print(f"[INFO] Attempting to create user with email: {email}")
+        logger.debug("Attempting to create user with email: %s", email)
         serializer = self.get_serializer(data=mutable_data)
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
@@ -88,34 +78,39 @@ class SignUpView(generics.CreateAPIView):
         # Try to get the user instance that was just created
         try:
             user = CustomUser.objects.get(email=email)
-            print(f"[INFO] User {email} successfully created with ID {user.id}.")
+            logger.info(f"User {email} successfully created with ID {user.id}.")
         except ObjectDoesNotExist:
-            print(f"[ERROR] Failed to find user {email} after creation attempt.")
+            logger.error(f"Failed to find user {email} after creation attempt.")
             return Response({'error': 'User creation failed.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
         # Asynchronously send verification email
-        print(f"[INFO] Starting verification email thread for user {email}.")
-        threading.Thread(target=self.send_verification_email, args=(user, request)).start()
+        logger.debug("Starting verification email thread for user %s.", email)
+        threading.Thread(
+            target=tracing.wrap(self.send_verification_email, 'auth.verification_email'), args=(user, request)
+        ).start()
 
         # Return a success response
         response = Response(serializer.data, status=status.HTTP_201_CREATED)
         response.data['message'] = 'User registration successful. Please check your email for the verification link.'
-        print(f"[INFO] Registration successful for user {email}. Returning response to client.")
+        logger.info(f"Registration successful for user {email}. Returning response to client.")
         return response
 
     def send_verification_email(self, user, request):
-        print(f"[INFO] Preparing to send verification email to {user.email}...")
+        from sib_api_v3_sdk import Configuration, ApiClient, TransactionalEmailsApi, SendSmtpEmail
+        from sib_api_v3_sdk.rest import ApiException
+
+        logger.debug("Preparing to send verification email to %s...", user.email)
         try:
             # Generate the verification token and URL
             verification_token = RefreshToken.for_user(user).access_token
             verification_url = reverse('verify-email', kwargs={'user_id': user.id, 'token': str(verification_token)})
             verification_url = request.build_absolute_uri(verification_url)  # Make the URL absolute
-            print(f"[INFO] Verification URL generated for {user.email}: {verification_url}")
+            logger.debug("Verification URL generated for %s: %s", user.email, verification_url)
 
             # Render the HTML content from the template
             context = {'verification_url': verification_url}
             html_content = render_to_string('email_verification.html', context)
-            print(f"[INFO] HTML content rendered for email verification for {user.email}.")
+            logger.debug("HTML content rendered for email verification for %s.", user.email)
 
             # Brevo email sending logic
             configuration = Configuration()
@@ -130,14 +125,14 @@ class SignUpView(generics.CreateAPIView):
             )
 
             # Send the email
-            print(f"[INFO] Attempting to send email to {user.email}...")
+            logger.debug("Attempting to send email to %s...", user.email)
             api_instance.send_transac_email(send_smtp_email)
-            print(f"[INFO] Verification email successfully sent to {user.email}")
+            logger.info(f"Verification email successfully sent to {user.email}")
 
         except ApiException as e:
-            print(f"[ERROR] Exception when sending email to {user.email}: {e}")
+            logger.error(f"Exception when sending email to {user.email}: {e}")
         except Exception as e:
-            print(f"[ERROR] Unexpected error when preparing or sending email to {user.email}: {e}")            
+            logger.error(f"Unexpected error when preparing or sending email to {user.email}: {e}")            
 
 class VerifyEmailView(APIView):
     def get(self, request, user_id, token):
@@ -175,24 +170,22 @@ class VerifyEmailView(APIView):
 
 class GoogleSignInView(APIView):
     def post(self, request):
-        print("=== START GOOGLE SIGN-IN PROCESS ===")
-        print("Received request data:", request.data)
+        logger.debug("Starting Google sign-in")
 
         serializer = GoogleSignInSerializer(data=request.data)
         if serializer.is_valid():
             access_token = serializer.validated_data['access_token']
-            print("✅ Access token received:", access_token)
 
             try:
                 # Step 1: Verify ID Token
                 id_token_info = self.get_id_token_from_access_token(access_token)
                 if id_token_info:
-                    print("✅ ID Token Info:", id_token_info)
+                    logger.debug("ID Token Info: %s", id_token_info)
                     email = id_token_info.get('email')
-                    print("📧 Email extracted:", email)
+                    logger.debug("Email extracted: %s", email)
 
                     if not email:
-                        print("❌ ERROR: No email found in token")
+                        logger.warning("No email found in token")
                         return Response({
                             'success': False,
                             'error': 'Email not found in token'
@@ -200,7 +193,7 @@ class GoogleSignInView(APIView):
 
                     # Step 2: Fetch User Profile with Multiple Methods
                     user_profile = self.get_user_profile_from_google(access_token)
-                    print("👤 User Profile Fetched:", user_profile)
+                    logger.debug("User Profile Fetched: %s", user_profile)
 
                     # Comprehensive Name Extraction
                     first_name = (
@@ -216,45 +209,45 @@ class GoogleSignInView(APIView):
                         ''
                     )
 
-                    print(f"👥 Extracted Names - First: '{first_name}', Last: '{last_name}'")
+                    logger.debug("Extracted Names - First: '%s', Last: '%s'", first_name, last_name)
 
                     # Use the custom user model
                     User = get_user_model()
                     user, created = User.objects.get_or_create(email=email)
 
                     if created:
-                        print("🆕 New user created")
+                        logger.info(f"New user created for {email} via Google sign-in")
                         user.is_google_account = True
                         user.is_active = True
                         user.is_blocked = False
                         user.date_joined = timezone.now()  # Set the date_joined field
                         user.save()
-                        print(f"👤 User created with Date Joined: '{user.date_joined}'")
+                        logger.debug("User created with Date Joined: '%s'", user.date_joined)
                     
                     # Update the first and last name regardless of whether the user was newly created
                     user.first_name = first_name
                     user.last_name = last_name
                     user.last_login = timezone.now()  # Update last_login time on each login
                     user.save()
-                    print(f"👤 User saved with First Name: '{user.first_name}', Last Name: '{user.last_name}', Last Login: '{user.last_login}'")
+                    logger.debug("User saved with First Name: '%s', Last Name: '%s', Last Login: '%s'", user.first_name, user.last_name, user.last_login)
 
                     # Additional User Checks
                     if user.is_blocked:
-                        print("🚫 User account is blocked")
+                        logger.warning("User account is blocked")
                         return Response({
                             'success': False,
                             'error': 'User account is blocked. Please contact support.'
                         }, status=status.HTTP_403_FORBIDDEN)
 
                     if not user.is_active:
-                        print("❌ User account is inactive")
+                        logger.warning("User account is inactive")
                         return Response({
                             'success': False,
                             'error': 'User account is inactive. Please verify your email or contact support.'
                         }, status=status.HTTP_403_FORBIDDEN)
                         
                     if not user.is_google_account:
-                        print("❌ Not a Google account")
+                        logger.warning("Not a Google account")
                         return Response({
                             'success': False,
                             'error': 'Account was not created with Gmail. Please login with your email and password'
@@ -262,7 +255,7 @@ class GoogleSignInView(APIView):
 
                     # Generate JWT tokens
                     refresh = RefreshToken.for_user(user)
-                    print("🔑 JWT tokens generated successfully")
+                    logger.debug("JWT tokens generated successfully")
 
                     return Response({
                         'success': True,
@@ -275,92 +268,95 @@ class GoogleSignInView(APIView):
                     })
 
                 else:
-                    print("❌ ERROR: Invalid or expired token")
+                    logger.warning("Invalid or expired token")
                     return Response({
                         'success': False,
                         'error': 'Invalid or expired token'
                     }, status=status.HTTP_400_BAD_REQUEST)
 
             except Exception as e:
-                print(f"❌ UNEXPECTED ERROR: {str(e)}")
+                logger.error(f"Unexpected error: {str(e)}")
                 return Response({
                     'success': False,
                     'error': str(e)
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-        print("❌ Serializer validation failed")
+        logger.warning("Serializer validation failed")
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @metrics.timed('auth.google_token_info')
     def get_id_token_from_access_token(self, access_token):
         """
         Exchange an access token for an ID token using Google's token info endpoint.
         """
         try:
-            print("🔍 Fetching ID token info...")
+            logger.debug("Fetching ID token info...")
             response = requests.get(
                 "https://www.googleapis.com/oauth2/v3/tokeninfo",
                 params={"access_token": access_token}
             )
-            print(f"ID Token Response Status: {response.status_code}")
-            print(f"ID Token Response Content: {response.text}")
+            logger.debug("ID Token Response Status: %s", response.status_code)
+            logger.debug("ID Token Response Content: %s", response.text)
             
             if response.status_code == 200:
                 return response.json()
             return None
         except Exception as e:
-            print(f"❌ Error while fetching ID token: {e}")
+            logger.error(f"Error while fetching ID token: {e}")
             return None
 
+    @metrics.timed('auth.google_user_profile')
     def get_user_profile_from_google(self, access_token):
         """
         Fetch user's profile from Google with multiple methods
         """
-        print("🌐 Attempting to fetch user profile...")
+        logger.debug("Attempting to fetch user profile...")
         
         # Method 1: UserInfo Endpoint
         try:
-            print("🔍 Trying UserInfo Endpoint...")
+            logger.debug("Trying UserInfo Endpoint...")
             response = requests.get(
                 "https://www.googleapis.com/oauth2/v3/userinfo",
                 headers={
                     'Authorization': f'Bearer {access_token}'
                 }
             )
-            print(f"UserInfo Response Status: {response.status_code}")
-            print(f"UserInfo Response Content: {response.text}")
+            logger.debug("UserInfo Response Status: %s", response.status_code)
+            logger.debug("UserInfo Response Content: %s", response.text)
             
             if response.status_code == 200:
                 user_info = response.json()
-                print("✅ Successfully retrieved UserInfo")
+                logger.debug("Successfully retrieved UserInfo")
                 return user_info
         except Exception as e:
-            print(f"❌ UserInfo Endpoint Error: {e}")
+            logger.error(f"UserInfo Endpoint Error: {e}")
 
         # Method 2: People API
         try:
-            print("🔍 Trying People API...")
+            logger.debug("Trying People API...")
             response = requests.get(
                 "https://people.googleapis.com/v1/people/me?personFields=names,emailAddresses",
                 headers={
                     'Authorization': f'Bearer {access_token}'
                 }
             )
-            print(f"People API Response Status: {response.status_code}")
-            print(f"People API Response Content: {response.text}")
+            logger.debug("People API Response Status: %s", response.status_code)
+            logger.debug("People API Response Content: %s", response.text)
             
             if response.status_code == 200:
                 people_data = response.json()
-                print("✅ Successfully retrieved People API data")
+                logger.debug("Successfully retrieved People API data")
                 return people_data
         except Exception as e:
-            print(f"❌ People API Error: {e}")
+            logger.error(f"People API Error: {e}")
 
-        print("❌ Failed to retrieve user profile")
+        logger.warning("Failed to retrieve user profile")
         return {}
       
 
 
 
+@metrics.timed('auth.ipinfo_lookup')
 def get_location_data():
     """Get IP address and location information using ipinfo.io API"""
     try:
@@ -370,7 +366,7 @@ def get_location_data():
         
         if response.status_code == 200:
             data = response.json()
-            print(f"Location data fetched: {data}")
+            logger.debug("Location data fetched: %s", data)
             return {
                 'ip': data.get('ip', 'N/A'),
                 'city': data.get('city', 'N/A'),
@@ -379,13 +375,16 @@ def get_location_data():
                 'loc': data.get('loc', 'N/A'),
             }
         else:
-            print(f"Failed to fetch location data: {response.status_code}")
+            logger.warning(f"Failed to fetch location data: {response.status_code}")
             return {'ip': 'N/A', 'city': 'N/A', 'country': 'N/A', 'region': 'N/A', 'loc': 'N/A'}
     except Exception as e:
-        print(f"Error fetching location data: {e}")
+        logger.error(f"Error fetching location data: {e}")
         return {'ip': 'N/A', 'city': 'N/A', 'country': 'N/A', 'region': 'N/A', 'loc': 'N/A'}
 
 def send_login_email(user, request, location_data, device_info):
+    from sib_api_v3_sdk import Configuration, ApiClient, TransactionalEmailsApi, SendSmtpEmail
+    from sib_api_v3_sdk.rest import ApiException
+
     try:
         verification_token = RefreshToken.for_user(user).access_token
         verification_url = reverse('verify-email', kwargs={'user_id': user.id, 'token': str(verification_token)})
@@ -414,21 +413,21 @@ def send_login_email(user, request, location_data, device_info):
         )
 
         api_instance.send_transac_email(send_smtp_email)
-        print(f"Email sent successfully to: {user.email}")
+        logger.info(f"Email sent successfully to: {user.email}")
     except ApiException as e:
-        print(f"Error sending email to {user.email}: {e}")
+        logger.error(f"Error sending email to {user.email}: {e}")
 
 class LoginView(APIView):
     def post(self, request):
         email = request.data.get('email')
         password = request.data.get('password')
-        print(f"Login attempt for email: {email}")
+        logger.debug("Login attempt for email: %s", email)
 
         try:
             user = CustomUser.objects.get(email=email)
-            print(f"User found: {user.email}")
+            logger.debug("User found: %s", user.email)
         except CustomUser.DoesNotExist:
-            print(f"User not found with email: {email}")
+            logger.info(f"User not found with email: {email}")
             return Response({'error': 'Incorrect username or password.'}, status=status.HTTP_401_UNAUTHORIZED)
 
         # Check various account conditions
@@ -453,7 +452,10 @@ class LoginView(APIView):
                 'error': 'Please login through the student portal.'
             }, status=status.HTTP_403_FORBIDDEN)
 
-        if check_password(password, user.password):
+        with metrics.timed('auth.check_password'):
+            password_matches = check_password(password, user.password)
+        metrics.LOGINS.labels(portal='public', outcome='success' if password_matches else 'wrong_password').inc()
+        if password_matches:
             # Authentication successful
             login(request, user)
             refresh = RefreshToken.for_user(user)
@@ -469,7 +471,7 @@ class LoginView(APIView):
                 location_data = get_location_data()
                 send_login_email(user, request, location_data, device_info)
 
-            threading.Thread(target=send_login_notification).start()
+            threading.Thread(target=tracing.wrap(send_login_notification, 'auth.login_notification')).start()
 
             # Return user data and tokens
             user_data = CustomUserSerializer(user).data
@@ -519,6 +521,9 @@ class PasswordResetView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def send_verification_email(self, subject, context, to_email):
+        from sib_api_v3_sdk import Configuration, ApiClient, TransactionalEmailsApi, SendSmtpEmail
+        from sib_api_v3_sdk.rest import ApiException
+
         # Render the HTML content from the template
         html_content = render_to_string('password_reset_verification.html', context)
 
@@ -604,6 +609,9 @@ class ChangePasswordRequestView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def send_verification_email(self, subject, context, to_email):
+        from sib_api_v3_sdk import Configuration, ApiClient, TransactionalEmailsApi, SendSmtpEmail
+        from sib_api_v3_sdk.rest import ApiException
+
         # Render the HTML content from the template
         html_content = render_to_string('change_password_verification.html', context)
 
@@ -3,4 +3,8 @@ from django.apps import AppConfig
 class BookListConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'booklist'
-    verbose_name = 'Book Lists Management'
\ No newline at end of file
+    verbose_name = 'Book Lists Management'
+
+    def ready(self):
+        # Connect the feed cache invalidation receivers
+        import booklist.cache
@@ -0,0 +1,118 @@
+# cache.py
+"""
+Response cache for the student book list feed.
+
+Every student in a class gets the same published book lists, so the serialized
+payload is stored once per (class_name, academic_year, data version). Any write
+to a BookList or BookListItem bumps the data version, which retires every cached
+feed at once without having to track individual keys. With a shared cache (see
+settings.CACHES) a write handled by one worker process retires the feeds cached
+by all of them; with the default per-process cache the other workers' versions
+expire after settings.CACHE_VERSION_TIMEOUT.
+"""
+import hashlib
+import json
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import BookList, BookListItem
+
+VERSION_KEY = 'booklist:data_version'
+NEXT_SCHEDULED_KEY = 'booklist:next_scheduled:{version}'
+FEED_KEY = 'booklist:feed:{version}:{class_name}:{academic_year}'
+FEED_TIMEOUT = 60 * 60  # Feeds are retired by version bumps, this only bounds memory
+
+# Stored in place of "no scheduled lists" so a cache miss can be told apart
+NOTHING_SCHEDULED = 'none'
+
+
+def get_data_version():
+    """Return the current book list data version, starting one if unset"""
+    # Versions are random rather than counted: a counter that was evicted and
+    # started again could reach a number whose stale feeds are still cached
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, timeout=settings.CACHE_VERSION_TIMEOUT)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def invalidate_booklist_cache():
+    """Start a new data version so every cached feed is rebuilt on next access"""
+    cache.set(VERSION_KEY, uuid.uuid4().hex, timeout=settings.CACHE_VERSION_TIMEOUT)
+
+
+def invalidate_on_commit():
+    """Invalidate once the surrounding transaction commits (immediately outside one)"""
+    transaction.on_commit(invalidate_booklist_cache)
+
+
+def scheduled_publication_due():
+    """
+    Whether a scheduled book list may have reached its publish date.
+    The earliest scheduled_date is cached per data version, so the scan only
+    runs when something is actually due or the data has changed.
+    """
+    key = NEXT_SCHEDULED_KEY.format(version=get_data_version())
+    next_scheduled = cache.get(key)
+
+    if next_scheduled is None:
+        next_booklist = BookList.objects.filter(
+            status='scheduled', scheduled_date__isnull=False
+        ).order_by('scheduled_date').only('scheduled_date').first()
+        next_scheduled = next_booklist.scheduled_date if next_booklist else NOTHING_SCHEDULED
+        cache.set(key, next_scheduled, FEED_TIMEOUT)
+
+    if next_scheduled == NOTHING_SCHEDULED:
+        return False
+    return next_scheduled <= timezone.now()
+
+
+def make_etag(payload):
+    """Strong ETag over the serialized payload"""
+    body = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return '"%s"' % hashlib.sha1(body.encode('utf-8')).hexdigest()
+
+
+def get_class_feed(class_name, academic_year, build_payload):
+    """
+    Return (payload, etag) for the published book lists of a class.
+    `build_payload` is called only on a cache miss and must return JSON-ready data.
+    """
+    key = FEED_KEY.format(
+        version=get_data_version(),
+        class_name=(class_name or '').replace(' ', '_'),
+        academic_year=academic_year or 'all',
+    )
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    payload = build_payload()
+    cached = (payload, make_etag(payload))
+    cache.set(key, cached, FEED_TIMEOUT)
+    return cached
+
+
+def etag_matches(request, etag):
+    """Check the request's If-None-Match header against a strong ETag"""
+    if_none_match = request.headers.get('If-None-Match')
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    return etag in [tag.strip() for tag in if_none_match.split(',')]
+
+
+@receiver(post_save, sender=BookList)
+@receiver(post_delete, sender=BookList)
+@receiver(post_save, sender=BookListItem)
+@receiver(post_delete, sender=BookListItem)
+def invalidate_booklist_feed(sender, **kwargs):
+    invalidate_on_commit()
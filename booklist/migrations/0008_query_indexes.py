@@ -0,0 +1,23 @@
+# Generated by Django 5.0.6 on 2026-10-19 10:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booklist', '0007_alter_studentclasshistory_academic_year_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booklist',
+            index=models.Index(fields=['status', 'scheduled_date'], name='booklist_schedule_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booklist',
+            index=models.Index(fields=['class_name', 'status'], name='booklist_class_status_idx'),
+        ),
+    ]
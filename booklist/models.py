@@ -60,6 +60,12 @@ class BookList(models.Model):
     class Meta:
         ordering = ['-created_at', 'class_name']
         unique_together = ['academic_year', 'class_name']
+        indexes = [
+            # Publishing scheduled lists that are due, and the next-due lookup
+            models.Index(fields=['status', 'scheduled_date'], name='booklist_schedule_idx'),
+            # A class's published lists for students
+            models.Index(fields=['class_name', 'status'], name='booklist_class_status_idx'),
+        ]
 
 class BookListItem(models.Model):
     """
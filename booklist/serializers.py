@@ -1,4 +1,5 @@
 # serializers.py
+from django.db import transaction
 from rest_framework import serializers
 from .models import BookList, BookListItem, StudentClassHistory
 import django.utils.timezone as timezone    
@@ -49,8 +50,38 @@ class BookListSerializer(serializers.ModelSerializer):
         
         return super().update(instance, validated_data)
 
+class BookListItemNestedSerializer(BookListItemSerializer):
+    """Item serializer used inside a book list payload, where `id` identifies existing rows"""
+    id = serializers.IntegerField(required=False)
+
+
 class BookListDetailSerializer(BookListSerializer):
-    items = BookListItemSerializer(many=True)
+    items = BookListItemNestedSerializer(many=True)
+    
+    ITEM_FIELDS = ['name', 'description', 'price', 'quantity', 'is_required', 'order']
+    
+    def validate_items(self, items):
+        # A PATCH validates nested items partially too, which is right for changes
+        # to existing items but would let a new one be created without its
+        # required fields
+        if self.partial:
+            required = [name for name, field in self.fields['items'].child.fields.items()
+                        if field.required and not field.read_only]
+            for item in items:
+                missing = [name for name in required if name not in item]
+                if 'id' not in item and missing:
+                    raise serializers.ValidationError(
+                        f"New items need {', '.join(missing)}."
+                    )
+        return items
+    
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Only present right after a write, so clients can see what happened to each item
+        item_changes = getattr(self, '_item_changes', None)
+        if item_changes is not None:
+            data['item_changes'] = item_changes
+        return data
     
     def create(self, validated_data):
         items_data = validated_data.pop('items', [])
@@ -62,12 +93,21 @@ class BookListDetailSerializer(BookListSerializer):
         if validated_data.get('status') == 'published' and not validated_data.get('publish_date'):
             validated_data['publish_date'] = timezone.now()
         
-        book_list = BookList.objects.create(**validated_data)
-        
-        # Create all book list items
-        for item_data in items_data:
-            BookListItem.objects.create(book_list=book_list, **item_data)
+        with transaction.atomic():
+            book_list = BookList.objects.create(**validated_data)
             
+            # Create all book list items in a single insert
+            for item_data in items_data:
+                item_data.pop('id', None)
+            created = BookListItem.objects.bulk_create(
+                [BookListItem(book_list=book_list, **item_data) for item_data in items_data]
+            )
+        
+        self._item_changes = {
+            'created': [item.id for item in created],
+            'updated': [],
+            'deleted': [],
+        }
         return book_list
     
     def update(self, instance, validated_data):
@@ -79,19 +119,70 @@ class BookListDetailSerializer(BookListSerializer):
             not instance.publish_date):
             validated_data['publish_date'] = timezone.now()
         
-        # Update the book list instance
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
-        
-        # If items were provided, update them
-        if items_data is not None:
-            # Delete existing items and create new ones
-            instance.items.all().delete()
-            for item_data in items_data:
-                BookListItem.objects.create(book_list=instance, **item_data)
+        with transaction.atomic():
+            # Update the book list instance
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
+            
+            # If items were provided, sync them against the existing rows
+            if items_data is not None:
+                self._item_changes = self._sync_items(instance, items_data)
                 
         return instance
+    
+    def _sync_items(self, book_list, items_data):
+        """
+        Apply the submitted items as a diff against the stored ones.
+        Items are matched by id: changed rows are bulk updated, new rows bulk created
+        and rows missing from the payload deleted, so untouched items keep their ids.
+        """
+        existing_items = {item.id: item for item in book_list.items.all()}
+        
+        to_create = []
+        to_update = []
+        updated_fields = set()
+        updated = []
+        kept_ids = set()
+        
+        for item_data in items_data:
+            item_id = item_data.pop('id', None)
+            
+            if item_id is None:
+                to_create.append(BookListItem(book_list=book_list, **item_data))
+                continue
+            
+            item = existing_items.get(item_id)
+            if item is None or item_id in kept_ids:
+                raise serializers.ValidationError(
+                    {"items": f"Item {item_id} does not belong to this book list or is listed twice."}
+                )
+            kept_ids.add(item_id)
+            
+            changed_fields = [
+                field for field in self.ITEM_FIELDS
+                if field in item_data and getattr(item, field) != item_data[field]
+            ]
+            if changed_fields:
+                for field in changed_fields:
+                    setattr(item, field, item_data[field])
+                to_update.append(item)
+                updated_fields.update(changed_fields)
+                updated.append({'id': item_id, 'changed_fields': changed_fields})
+        
+        deleted_ids = sorted(set(existing_items) - kept_ids)
+        
+        if deleted_ids:
+            BookListItem.objects.filter(book_list=book_list, id__in=deleted_ids).delete()
+        if to_update:
+            BookListItem.objects.bulk_update(to_update, sorted(updated_fields))
+        created = BookListItem.objects.bulk_create(to_create) if to_create else []
+        
+        return {
+            'created': [item.id for item in created],
+            'updated': updated,
+            'deleted': deleted_ids,
+        }
 
 class StudentBookListSerializer(serializers.ModelSerializer):
     """Simplified serializer for student view of book lists"""
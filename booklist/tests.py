@@ -1,3 +1,136 @@
+from unittest import mock
+
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from authapp.models import CustomUser
+
+from .cache import VERSION_KEY
+from .models import BookList, BookListItem
+
+
+class ClassFeedTests(TestCase):
+
+    def setUp(self):
+        self.student = CustomUser.objects.create_user(
+            username='ama', email='ama@example.com', password='secret', role='student', class_name='Class 2',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+        teacher = CustomUser.objects.create_user(
+            username='kofi', email='kofi@example.com', password='secret', role='staff',
+        )
+        self.booklist = BookList.objects.create(
+            title="Class 2 books", academic_year='2024-2025', class_name='Class 2', status='published',
+            created_by=teacher,
+        )
+        BookListItem.objects.create(book_list=self.booklist, name="English Reader", price=20)
+
+    def test_etag_changes_on_write(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.get('/api/booklists/my_class/')
+        etag = response['ETag']
+        self.assertEqual(self.client.get('/api/booklists/my_class/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            BookListItem.objects.create(book_list=self.booklist, name="Atlas", price=35)
+        response = self.client.get('/api/booklists/my_class/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data[0]['items']), 2)
+
+    def test_academic_year_is_validated(self):
+        self.assertEqual(self.client.get('/api/booklists/my_class/', {'academic_year': '2024-2025'}).status_code, 200)
+        self.assertEqual(self.client.get('/api/booklists/my_class/', {'academic_year': 'x' * 50}).status_code, 400)
+
+    def test_lost_version_does_not_bring_back_a_stale_feed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.booklist.save()
+        self.client.get('/api/booklists/my_class/')
+        cache.delete(VERSION_KEY)
+        with self.captureOnCommitCallbacks(execute=True):
+            BookListItem.objects.create(book_list=self.booklist, name="Atlas", price=35)
+        self.assertEqual(len(self.client.get('/api/booklists/my_class/').data[0]['items']), 2)
+
+
+class BookListItemSyncTests(TestCase):
+
+    def setUp(self):
+        teacher = CustomUser.objects.create_user(
+            username='kofi', email='kofi@example.com', password='secret', role='staff',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(teacher)
+        self.booklist = BookList.objects.create(
+            title="Class 2 books", academic_year='2024-2025', class_name='Class 2', status='draft', created_by=teacher,
+        )
+        self.reader = BookListItem.objects.create(book_list=self.booklist, name="English Reader", price=20)
+        self.atlas = BookListItem.objects.create(book_list=self.booklist, name="Atlas", price=35)
+        self.ruler = BookListItem.objects.create(book_list=self.booklist, name="Ruler", price=5)
+        self.url = f'/api/booklists/{self.booklist.pk}/'
+
+    def item(self, item, **changes):
+        return {'id': item.pk, 'name': item.name, 'price': str(item.price), **changes}
+
+    def put(self, items):
+        return self.client.put(self.url, {
+            'title': self.booklist.title, 'academic_year': '2024-2025', 'class_name': 'Class 2', 'status': 'draft',
+            'items': items,
+        }, format='json')
+
+    def stored_items(self):
+        return dict(BookListItem.objects.filter(book_list=self.booklist).values_list('id', 'name'))
+
+    def test_put_applies_the_items_as_a_diff(self):
+        manager = BookListItem.objects
+        with mock.patch.object(manager, 'bulk_update', wraps=manager.bulk_update) as bulk_update, \
+                mock.patch.object(manager, 'bulk_create', wraps=manager.bulk_create) as bulk_create:
+            response = self.put([
+                self.item(self.reader),
+                self.item(self.atlas, price='40.00'),
+                {'name': "Geometry set", 'price': '12.50'},
+            ])
+        self.assertEqual(response.status_code, 200)
+
+        [(updated, fields), _] = bulk_update.call_args
+        self.assertEqual([item.pk for item in updated], [self.atlas.pk])
+        self.assertEqual(fields, ['price'])
+        [(created,), _] = bulk_create.call_args
+        self.assertEqual([item.name for item in created], ["Geometry set"])
+
+        items = self.stored_items()
+        new_id = next(item_id for item_id, name in items.items() if name == "Geometry set")
+        # Untouched and changed items keep their ids; the ruler was left out, so it is gone
+        self.assertEqual(items, {self.reader.pk: "English Reader", self.atlas.pk: "Atlas", new_id: "Geometry set"})
+        self.assertEqual(response.data['item_changes'], {
+            'created': [new_id],
+            'updated': [{'id': self.atlas.pk, 'changed_fields': ['price']}],
+            'deleted': [self.ruler.pk],
+        })
+
+    def test_foreign_or_duplicate_ids_are_rejected(self):
+        other = BookList.objects.create(
+            title="Class 3 books", academic_year='2024-2025', class_name='Class 3', created_by=self.booklist.created_by,
+        )
+        foreign = BookListItem.objects.create(book_list=other, name="Dictionary", price=50)
+        before = self.stored_items()
+
+        for items in [[self.item(self.reader), self.item(foreign)], [self.item(self.reader), self.item(self.reader)]]:
+            with self.subTest(items=items):
+                self.assertEqual(self.put(items).status_code, 400)
+                self.assertEqual(self.stored_items(), before)
+
+    def test_patch_changes_existing_items_partially(self):
+        response = self.client.patch(self.url, {'items': [
+            {'id': self.reader.pk, 'price': '22.00'}, {'id': self.atlas.pk}, {'id': self.ruler.pk},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.reader.refresh_from_db()
+        self.assertEqual((self.reader.name, str(self.reader.price)), ("English Reader", '22.00'))
 
-# Create your tests here.
+    def test_patch_cannot_create_an_incomplete_item(self):
+        before = self.stored_items()
+        response = self.client.patch(self.url, {'items': [{'price': '3.00'}]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('name', str(response.data['items']))
+        self.assertEqual(self.stored_items(), before)
@@ -1,15 +1,15 @@
 # views.py
 import os
 import logging
+import re
 from django.conf import settings
 from rest_framework import viewsets, permissions, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.utils import timezone
 from django.db.models import Q
-from sib_api_v3_sdk import Configuration, ApiClient, SendSmtpEmail
-from sib_api_v3_sdk.api.transactional_emails_api import TransactionalEmailsApi
-from sib_api_v3_sdk.rest import ApiException
+
+from Schoolproject import metrics
 
 from .models import BookList, BookListItem
 from .serializers import (
@@ -19,10 +19,14 @@ from .serializers import (
     StudentBookListSerializer
 )
 from .permissions import IsStaffOrPrincipal, IsOwnerOrReadOnly
+from .cache import get_class_feed, etag_matches, scheduled_publication_due
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# As in BookList.academic_year, e.g. '2024-2025'
+ACADEMIC_YEAR_RE = re.compile(r'^\d{4}-\d{4}$')
+
 
 class BookListViewSet(viewsets.ModelViewSet):
     """
@@ -50,10 +54,14 @@ class BookListViewSet(viewsets.ModelViewSet):
             permission_classes = [permissions.IsAuthenticated, IsOwnerOrReadOnly]
         return [permission() for permission in permission_classes]
     
+    @metrics.timed('booklist.send_publication_email')
     def send_publication_email(self, book_list):
         """
         Send email notification when a book list is published
         """
+        from sib_api_v3_sdk import Configuration, ApiClient, TransactionalEmailsApi, SendSmtpEmail
+        from sib_api_v3_sdk.rest import ApiException
+
         logger.info(f"Starting email sending process for book list: {book_list.title} (ID: {book_list.id})")
         
         # Get all students in the class that this book list belongs to
@@ -111,28 +119,27 @@ class BookListViewSet(viewsets.ModelViewSet):
                         api_response = api_instance.send_transac_email(send_smtp_email)
                         email_count += 1
                         logger.info(f"Email sent successfully to {student.email}. Response: {api_response}")
-                        print(f"Email sent successfully to {student.email}: {api_response}")
                         
                     except ApiException as e:
                         logger.error(f"Exception when sending email to {student.email}: {e}")
-                        print(f"Exception when sending email to {student.email}: {e}")
                     except Exception as e:
                         logger.error(f"Unexpected error when sending email to {student.email}: {e}")
-                        print(f"Unexpected error when sending email to {student.email}: {e}")
                 else:
                     logger.warning(f"Student {student.username} has no email address")
             
             logger.info(f"Email sending process completed. Sent {email_count} emails for book list: {book_list.title}")
-            print(f"Email sending process completed. Sent {email_count} emails for book list: {book_list.title}")
             
         except Exception as e:
             logger.error(f"Error in send_publication_email: {e}")
-            print(f"Error in send_publication_email: {e}")
     
     def check_and_send_scheduled_emails(self):
         """
         Check for scheduled book lists that should be published and send emails
         """
+        # Skip the scan entirely until the earliest scheduled date has passed
+        if not scheduled_publication_due():
+            return
+        
         scheduled_lists = BookList.objects.filter(
             status='scheduled', 
             scheduled_date__lte=timezone.now()
@@ -146,6 +153,7 @@ class BookListViewSet(viewsets.ModelViewSet):
             # If status changed from scheduled to published, send email
             if old_status == 'scheduled' and book_list.status == 'published':
                 logger.info(f"Book list {book_list.title} automatically published from scheduled status")
+                metrics.observe_publication_lag('booklist', book_list.scheduled_date, book_list.publish_date)
                 self.send_publication_email(book_list)
     
     def get_queryset(self):
@@ -156,7 +164,7 @@ class BookListViewSet(viewsets.ModelViewSet):
         
         # For staff and principal, show all book lists
         if user.role in ['staff', 'principal']:
-            return BookList.objects.all()
+            return BookList.objects.select_related('created_by').prefetch_related('items')
         
         # For students, show only published book lists
         # (scheduled ones will be converted to published by check_and_update_status)
@@ -164,7 +172,7 @@ class BookListViewSet(viewsets.ModelViewSet):
             return BookList.objects.filter(
                 status='published',
                 class_name=user.class_name
-            )
+            ).select_related('created_by').prefetch_related('items')
         
         # Default: show nothing
         return BookList.objects.none()
@@ -186,7 +194,6 @@ class BookListViewSet(viewsets.ModelViewSet):
         # If status changed to published, send email
         if old_status != 'published' and updated_instance.status == 'published':
             logger.info(f"Book list {updated_instance.title} status changed to published via update")
-            print(f"Book list {updated_instance.title} status changed to published via update")
             self.send_publication_email(updated_instance)
     
     @action(detail=False, methods=['get'])
@@ -201,19 +208,15 @@ class BookListViewSet(viewsets.ModelViewSet):
         # Check for scheduled book lists that should be published
         self.check_and_send_scheduled_emails()
         
-        # Get ONLY book lists for current class
-        queryset = BookList.objects.filter(
-            status='published',
-            class_name=user.class_name
-        )
-        
-        # Optional: Allow filtering by academic year
+        # Optional: Allow filtering by academic year. It is part of the cache key,
+        # so only well-formed years are accepted
         academic_year = request.query_params.get('academic_year')
-        if academic_year:
-            queryset = queryset.filter(academic_year=academic_year)
+        if academic_year and not ACADEMIC_YEAR_RE.match(academic_year):
+            return Response({"detail": "academic_year must look like 2024-2025."},
+                          status=status.HTTP_400_BAD_REQUEST)
         
-        serializer = StudentBookListSerializer(queryset, many=True)
-        return Response(serializer.data)
+        # Get ONLY book lists for current class
+        return self._class_feed_response(request, user.class_name, academic_year)
 
     @action(detail=False, methods=['get'])
     def previous_classes(self, request):
@@ -243,7 +246,7 @@ class BookListViewSet(viewsets.ModelViewSet):
         queryset = BookList.objects.filter(
             status='published',
             class_name__in=previous_classes
-        )
+        ).prefetch_related('items')
         
         # Allow filtering by academic year
         academic_year = request.query_params.get('academic_year')
@@ -281,7 +284,7 @@ class BookListViewSet(viewsets.ModelViewSet):
         queryset = BookList.objects.filter(
             status='published',
             class_name=user.class_name
-        ).exclude(academic_year=current_year).order_by('-created_at')
+        ).exclude(academic_year=current_year).order_by('-created_at').prefetch_related('items')
         
         serializer = StudentBookListSerializer(queryset, many=True)
         return Response(serializer.data)
@@ -295,7 +298,7 @@ class BookListViewSet(viewsets.ModelViewSet):
             return Response({"detail": "Only staff and principal can access drafts."}, 
                           status=status.HTTP_403_FORBIDDEN)
         
-        queryset = BookList.objects.filter(status='draft')
+        queryset = BookList.objects.filter(status='draft').select_related('created_by').prefetch_related('items')
         
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
@@ -320,7 +323,6 @@ class BookListViewSet(viewsets.ModelViewSet):
         
         # Send email notification when manually published
         logger.info(f"Book list {booklist.title} manually published from {old_status} status")
-        print(f"Book list {booklist.title} manually published from {old_status} status")
         self.send_publication_email(booklist)
         
         serializer = self.get_serializer(booklist)
@@ -374,16 +376,33 @@ class BookListViewSet(viewsets.ModelViewSet):
         current_year = user.class_history.first().academic_year if user.class_history.exists() else None
         
         # Get published book lists for current class and current academic year
-        queryset = BookList.objects.filter(
-            status='published',
-            class_name=user.class_name
-        )
+        return self._class_feed_response(request, user.class_name, current_year)
+    
+    def _class_feed_response(self, request, class_name, academic_year=None):
+        """
+        Serve the published book lists of a class from the shared per-class cache.
+        Repeat visits with a matching If-None-Match get a 304 without a body.
+        """
+        def build_payload():
+            queryset = BookList.objects.filter(
+                status='published',
+                class_name=class_name
+            ).prefetch_related('items')
+            
+            if academic_year:
+                queryset = queryset.filter(academic_year=academic_year)
+            
+            return StudentBookListSerializer(queryset, many=True).data
         
-        if current_year:
-            queryset = queryset.filter(academic_year=current_year)
+        payload, etag = get_class_feed(class_name, academic_year, build_payload)
         
-        serializer = StudentBookListSerializer(queryset, many=True)
-        return Response(serializer.data)
+        if etag_matches(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(payload)
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
 
 
 class BookListItemViewSet(viewsets.ModelViewSet):
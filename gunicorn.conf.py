@@ -0,0 +1,20 @@
+# Loaded by gunicorn from the working directory. With PROMETHEUS_MULTIPROC_DIR set,
+# every worker writes its metrics there and /metrics adds them up (see
+# Schoolproject/metrics.py); these hooks keep that directory to the live workers.
+import glob
+import os
+
+
+def on_starting(server):
+    directory = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        # Values left by a previous run would be added to the new ones
+        for path in glob.glob(os.path.join(directory, '*.db')):
+            os.remove(path)
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -1,3 +1,11 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import ResumeText
+
+
+@admin.register(ResumeText)
+class ResumeTextAdmin(admin.ModelAdmin):
+    list_display = ['resume_name', 'status', 'text_length', 'extracted_at']
+    list_filter = ['status']
+    search_fields = ['resume_name']
+    readonly_fields = ['compressed_text', 'text_length', 'extracted_at']
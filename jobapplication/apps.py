@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class JobapplicationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'jobapplication'
+
+    def ready(self):
+        # Connect the applicant index sync receivers
+        import jobapplication.signals
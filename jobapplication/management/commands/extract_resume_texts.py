@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+
+from jobapplication.models import JobApplication, ResumeText
+from jobapplication.search import rebuild_index
+from jobapplication.tasks import extract_resume_text
+
+
+class Command(BaseCommand):
+    help = (
+        "Extract text from resumes that have not been processed yet and refresh the "
+        "applicant search index. Uploads are normally handled by the background worker; "
+        "this catches anything it missed and backfills older applications."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retry-failed', action='store_true',
+            help="Also retry resumes whose extraction failed before"
+        )
+        parser.add_argument(
+            '--rebuild-index', action='store_true',
+            help="Rebuild the whole applicant search index afterwards"
+        )
+
+    def handle(self, *args, **options):
+        done_statuses = ['EXTRACTED', 'UNSUPPORTED']
+        if not options['retry_failed']:
+            done_statuses.append('FAILED')
+
+        processed = set(
+            ResumeText.objects.filter(status__in=done_statuses).values_list('resume_name', flat=True)
+        )
+        pending = set(
+            JobApplication.objects.exclude(resume='').values_list('resume', flat=True).distinct()
+        ) - processed
+
+        counts = {}
+        for resume_name in sorted(pending):
+            resume = extract_resume_text(resume_name)
+            counts[resume.status] = counts.get(resume.status, 0) + 1
+
+        summary = ', '.join(f"{count} {status.lower()}" for status, count in sorted(counts.items())) or 'nothing to do'
+        self.stdout.write(self.style.SUCCESS(f"Processed {len(pending)} resumes: {summary}"))
+
+        if options['rebuild_index']:
+            indexed = rebuild_index()
+            self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} applications."))
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.6 on 2026-10-19 10:19
+
+import media_store.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobapplication', '0002_jobapplication_last_modified_by_jobapplicationlog'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='jobapplication',
+            name='resume',
+            field=models.FileField(storage=media_store.storage.content_hash_storage, upload_to='resumes/'),
+        ),
+    ]
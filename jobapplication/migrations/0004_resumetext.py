@@ -0,0 +1,55 @@
+# Generated by Django 5.0.6 on 2026-10-19 10:23
+
+from django.db import migrations, models
+
+FTS_TABLE = 'jobapplication_applicant_fts'
+
+
+def create_applicant_index(apps, schema_editor):
+    # FTS5 is SQLite only; other backends search with icontains filters instead
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+        "USING fts5(resume_text, applicant, educational_level, job_reference_number, status, "
+        "tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    # Resume text is filled in by `manage.py extract_resume_texts`
+    schema_editor.execute(
+        f"INSERT INTO {FTS_TABLE} (rowid, resume_text, applicant, educational_level, job_reference_number, status) "
+        "SELECT id, '', first_name || ' ' || last_name || ' ' || email, educational_level, "
+        "COALESCE(job_reference_number, ''), status FROM jobapplication_jobapplication"
+    )
+
+
+def drop_applicant_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobapplication', '0003_alter_jobapplication_resume'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumeText',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resume_name', models.CharField(max_length=255, unique=True)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('EXTRACTED', 'Extracted'), ('UNSUPPORTED', 'Unsupported'), ('FAILED', 'Failed')], default='PENDING', max_length=20)),
+                ('compressed_text', models.BinaryField(blank=True, default=b'')),
+                ('text_length', models.PositiveIntegerField(default=0)),
+                ('error', models.CharField(blank=True, max_length=255)),
+                ('extracted_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Resume Text',
+                'verbose_name_plural': 'Resume Texts',
+            },
+        ),
+        migrations.RunPython(create_applicant_index, drop_applicant_index),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.6 on 2026-10-19 10:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobapplication', '0004_resumetext'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='jobapplicationlog',
+            index=models.Index(fields=['application', '-timestamp'], name='jobapplog_history_idx'),
+        ),
+    ]
@@ -1,6 +1,9 @@
+import zlib
+
 from django.db import models
 from jobposting.models import JobPost
 from django.contrib.auth import get_user_model
+from media_store.storage import content_hash_storage
 
 User = get_user_model()
 
@@ -25,7 +28,7 @@ class JobApplication(models.Model):
         on_delete=models.CASCADE,
         related_name="applications"
     )
-    resume = models.FileField(upload_to="resumes/")
+    resume = models.FileField(upload_to="resumes/", storage=content_hash_storage)
     status = models.CharField(
         max_length=20,
         choices=STATUS_CHOICES,
@@ -71,16 +74,61 @@ class JobApplication(models.Model):
         if not self.job_reference_number:
             self.job_reference_number = self.job_post.reference_number
         
+        is_new = self._state.adding
         super().save(*args, **kwargs)
         
-        # Update application count on JobPost
-        self.job_post.update_application_count()
+        # Only a real insert changes the application count on JobPost
+        if is_new:
+            JobPost.adjust_application_count(self.job_post_id, 1)
     
     def delete(self, *args, **kwargs):
-        super().delete(*args, **kwargs)
+        job_post_id = self.job_post_id
+        deleted = super().delete(*args, **kwargs)
         
         # Update application count on JobPost after deletion
-        self.job_post.update_application_count()
+        if deleted[0]:
+            JobPost.adjust_application_count(job_post_id, -1)
+        return deleted
+
+
+class ResumeText(models.Model):
+    """
+    Plain text extracted once from a stored resume file. Resumes are content-hashed,
+    so every application that uploaded the same file shares one row.
+    """
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('EXTRACTED', 'Extracted'),
+        ('UNSUPPORTED', 'Unsupported'),
+        ('FAILED', 'Failed'),
+    ]
+
+    resume_name = models.CharField(max_length=255, unique=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    # zlib-compressed UTF-8; resumes are mostly prose and shrink to a fraction
+    compressed_text = models.BinaryField(blank=True, default=b'')
+    text_length = models.PositiveIntegerField(default=0)
+    error = models.CharField(max_length=255, blank=True)
+    extracted_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Resume Text'
+        verbose_name_plural = 'Resume Texts'
+
+    def __str__(self):
+        return f"{self.resume_name} ({self.status})"
+
+    @property
+    def text(self):
+        if not self.compressed_text:
+            return ''
+        return zlib.decompress(bytes(self.compressed_text)).decode('utf-8')
+
+    @text.setter
+    def text(self, value):
+        value = value or ''
+        self.compressed_text = zlib.compress(value.encode('utf-8'), 9) if value else b''
+        self.text_length = len(value)
 
 
 class JobApplicationLog(models.Model):
@@ -106,12 +154,11 @@ class JobApplicationLog(models.Model):
         ordering = ['-timestamp']
         verbose_name = 'Job Application Log'
         verbose_name_plural = 'Job Application Logs'
+        indexes = [
+            # An application's history, newest first
+            models.Index(fields=['application', '-timestamp'], name='jobapplog_history_idx'),
+        ]
     
     def __str__(self):
         user_email = self.user_email if self.user_email else 'Unknown user'
-        log_str = f"Log for {self.application} by {user_email} at {self.timestamp}"
-        
-        # Print for debugging purposes
-        print(f"JobApplicationLog: {log_str}")
-        
-        return log_str
\ No newline at end of file
+        return f"Log for {self.application} by {user_email} at {self.timestamp}"
\ No newline at end of file
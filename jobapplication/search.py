@@ -0,0 +1,187 @@
+"""
+Full-text applicant index.
+
+On SQLite each application is mirrored into an FTS5 table (rowid = JobApplication.id)
+holding the extracted resume text next to educational_level, job_reference_number
+and status, so screening applications for a keyword is one ranked MATCH with
+snippets instead of opening every resume. Rows are refreshed by the receivers in
+signals.py and again once the resume text has been extracted.
+
+Other database backends fall back to icontains on the application fields.
+"""
+import re
+
+from django.db import connection
+from django.utils.html import escape
+from django.db.models import Q
+
+from .models import JobApplication, ResumeText
+
+FTS_TABLE = 'jobapplication_applicant_fts'
+INDEXED_FIELDS = [
+    'resume_text', 'applicant', 'educational_level', 'job_reference_number', 'status'
+]
+# bm25 column weights, in INDEXED_FIELDS order
+RANK_WEIGHTS = (1.0, 5.0, 2.0, 2.0, 2.0)
+SNIPPET_TOKENS = 16
+# FTS5 wraps matches in these; the snippet is HTML-escaped before they become <mark> tags
+MATCH_START, MATCH_END = '\x02', '\x03'
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def fts_available():
+    return connection.vendor == 'sqlite'
+
+
+def build_match_query(q):
+    """Every word must match; the last one also as a prefix"""
+    tokens = TOKEN_RE.findall(q or '')
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens[:-1]]
+    terms.append(f'"{tokens[-1]}"*')
+    return ' '.join(terms)
+
+
+# Index maintenance
+
+def _index_values(application, resume_text):
+    return [
+        resume_text,
+        f"{application.first_name} {application.last_name} {application.email}",
+        application.educational_level or '',
+        application.job_reference_number or '',
+        application.status or '',
+    ]
+
+
+def index_application(application, resume_text=None):
+    """Insert or refresh one application; looks the resume text up when not given"""
+    if not fts_available():
+        return
+    if resume_text is None:
+        resume_text = get_resume_text(application.resume.name)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [application.pk])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(INDEXED_FIELDS)}) VALUES (%s, %s, %s, %s, %s, %s)",
+            [application.pk] + _index_values(application, resume_text)
+        )
+
+
+def index_applications_for_resume(resume_name, resume_text):
+    """Refresh every application sharing a resume after its text was extracted"""
+    applications = JobApplication.objects.filter(resume=resume_name)
+    for application in applications:
+        index_application(application, resume_text)
+
+
+def remove_application(application_id):
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [application_id])
+
+
+def get_resume_text(resume_name):
+    if not resume_name:
+        return ''
+    resume = ResumeText.objects.filter(resume_name=resume_name, status='EXTRACTED').first()
+    return resume.text if resume else ''
+
+
+def rebuild_index():
+    """Repopulate the index from scratch; returns the number of applications indexed"""
+    if not fts_available():
+        return 0
+    texts = {
+        resume.resume_name: resume.text
+        for resume in ResumeText.objects.filter(status='EXTRACTED')
+    }
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        rows = [
+            [application.pk] + _index_values(application, texts.get(application.resume.name, ''))
+            for application in JobApplication.objects.all().iterator()
+        ]
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(INDEXED_FIELDS)}) VALUES (%s, %s, %s, %s, %s, %s)",
+            rows
+        )
+    return len(rows)
+
+
+# Searching
+
+def search_applications(q, status=None, educational_level=None, job_reference_number=None, limit=50):
+    """
+    Return [(application, snippet)] ranked by relevance for `q`, optionally
+    narrowed by exact status, educational level or job reference number.
+    """
+    match_query = build_match_query(q)
+    if match_query is None:
+        return []
+
+    if not fts_available():
+        return _search_without_fts(q, status, educational_level, job_reference_number, limit)
+
+    applications_table = JobApplication._meta.db_table
+    where = [f"{FTS_TABLE} MATCH %s"]
+    params = [match_query]
+    for column, value in [
+        ('status', status),
+        ('educational_level', educational_level),
+        ('job_reference_number', job_reference_number),
+    ]:
+        if value:
+            where.append(f"a.{column} = %s")
+            params.append(value)
+
+    weights = ', '.join(str(weight) for weight in RANK_WEIGHTS)
+    with connection.cursor() as cursor:
+        # Column -1 lets FTS5 pick whichever column matched best for the snippet
+        cursor.execute(
+            f"SELECT a.id, snippet({FTS_TABLE}, -1, char(2), char(3), '…', {SNIPPET_TOKENS}) "
+            f"FROM {FTS_TABLE} JOIN {applications_table} a ON a.id = {FTS_TABLE}.rowid "
+            f"WHERE {' AND '.join(where)} "
+            f"ORDER BY bm25({FTS_TABLE}, {weights}), a.id DESC LIMIT %s",
+            params + [limit]
+        )
+        ranked = cursor.fetchall()
+
+    applications = JobApplication.objects.select_related('job_post').in_bulk(
+        [application_id for application_id, _snippet in ranked]
+    )
+    return [
+        (applications[application_id], highlight(snippet))
+        for application_id, snippet in ranked
+        if application_id in applications
+    ]
+
+
+def highlight(snippet):
+    """
+    Escape a snippet of applicant-supplied text for HTML and turn the FTS5
+    match markers into <mark> tags.
+    """
+    return escape(snippet).replace(MATCH_START, '<mark>').replace(MATCH_END, '</mark>')
+
+
+def _search_without_fts(q, status, educational_level, job_reference_number, limit):
+    condition = Q()
+    for token in TOKEN_RE.findall(q):
+        condition &= (
+            Q(first_name__icontains=token) | Q(last_name__icontains=token) |
+            Q(email__icontains=token) | Q(job_title__icontains=token) |
+            Q(job_reference_number__icontains=token) | Q(educational_level__icontains=token)
+        )
+    queryset = JobApplication.objects.select_related('job_post').filter(condition)
+    if status:
+        queryset = queryset.filter(status=status)
+    if educational_level:
+        queryset = queryset.filter(educational_level=educational_level)
+    if job_reference_number:
+        queryset = queryset.filter(job_reference_number=job_reference_number)
+    return [(application, '') for application in queryset[:limit]]
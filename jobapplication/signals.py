@@ -0,0 +1,20 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import JobApplication, ResumeText
+from . import search, tasks
+
+
+@receiver(post_save, sender=JobApplication)
+def index_application_on_save(sender, instance, **kwargs):
+    search.index_application(instance)
+
+    # Extract each stored resume file only once
+    resume_name = instance.resume.name
+    if resume_name and not ResumeText.objects.filter(resume_name=resume_name).exists():
+        tasks.queue_resume_extraction(resume_name)
+
+
+@receiver(post_delete, sender=JobApplication)
+def remove_application_on_delete(sender, instance, **kwargs):
+    search.remove_application(instance.pk)
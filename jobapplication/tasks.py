@@ -0,0 +1,130 @@
+"""
+Background resume text extraction.
+
+After an application commits, its resume is queued on a small bounded thread pool.
+The worker extracts the text once per stored file (resumes are content-hashed, so
+duplicates share a ResumeText row), stores it compressed and refreshes the applicant
+search index. Anything missed, e.g. because the process restarted, is picked up by
+`python manage.py extract_resume_texts`.
+"""
+import io
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from Schoolproject import metrics, tracing
+
+from .models import JobApplication, ResumeText
+from . import search
+
+logger = logging.getLogger(__name__)
+
+WORKERS = getattr(settings, 'RESUME_EXTRACTION_WORKERS', 2)
+# Stop reading after this many characters; later pages rarely matter for screening
+MAX_TEXT_LENGTH = 200_000
+
+WHITESPACE_RE = re.compile(r'\s+')
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='resume-text')
+    return _executor
+
+
+def extract_text(file_obj, filename):
+    """
+    Return the text of a resume file, or None when the format is not supported.
+    Only PDF (needs pypdf) and plain text resumes are read.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+
+    if extension == '.pdf':
+        # Imported on first use: this module is loaded at startup by the signals
+        try:
+            from pypdf import PdfReader
+        except ImportError:  # pragma: no cover - optional dependency
+            return None
+        reader = PdfReader(io.BytesIO(file_obj.read()))
+        parts, length = [], 0
+        for page in reader.pages:
+            page_text = page.extract_text() or ''
+            parts.append(page_text)
+            length += len(page_text)
+            if length >= MAX_TEXT_LENGTH:
+                break
+        text = ' '.join(parts)
+    elif extension == '.txt':
+        text = file_obj.read(MAX_TEXT_LENGTH * 4).decode('utf-8', errors='replace')
+    else:
+        return None
+
+    return WHITESPACE_RE.sub(' ', text).strip()[:MAX_TEXT_LENGTH]
+
+
+def extract_resume_text(resume_name):
+    """
+    Extract and store the text of one stored resume, then reindex the
+    applications using it. Safe to call again; finished files are skipped.
+    """
+    resume, _created = ResumeText.objects.get_or_create(resume_name=resume_name)
+    if resume.status == 'EXTRACTED':
+        return resume
+
+    storage = JobApplication._meta.get_field('resume').storage
+    try:
+        with storage.open(resume_name, 'rb') as file_obj:
+            text = extract_text(file_obj, resume_name)
+    except Exception as e:
+        logger.error(f"Failed to extract text from resume {resume_name}: {str(e)}")
+        resume.status = 'FAILED'
+        resume.error = str(e)[:255]
+        resume.save(update_fields=['status', 'error'])
+        return resume
+
+    if text is None:
+        resume.status = 'UNSUPPORTED'
+        resume.save(update_fields=['status'])
+        logger.info(f"Resume {resume_name} is not a supported format for text extraction")
+        return resume
+
+    with transaction.atomic():
+        resume.text = text
+        resume.status = 'EXTRACTED'
+        resume.error = ''
+        resume.extracted_at = timezone.now()
+        resume.save()
+        search.index_applications_for_resume(resume_name, text)
+
+    logger.info(
+        f"Extracted {resume.text_length} characters from resume {resume_name} "
+        f"({len(resume.compressed_text)} bytes stored)"
+    )
+    return resume
+
+
+def _run_extraction(resume_name):
+    try:
+        extract_resume_text(resume_name)
+    except Exception as e:
+        logger.error(f"Resume extraction task for {resume_name} failed: {str(e)}")
+    finally:
+        close_old_connections()
+
+
+def queue_resume_extraction(resume_name):
+    """Schedule extraction on the worker pool once the current transaction commits"""
+    if not resume_name:
+        return
+    run_extraction = tracing.wrap(_run_extraction, 'resume_text.extract')
+    transaction.on_commit(
+        lambda: metrics.track_queue('resume-text', _get_executor().submit(run_extraction, resume_name))
+    )
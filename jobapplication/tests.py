@@ -1,3 +1,54 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
-# Create your tests here.
+from jobposting.models import JobPost
+
+from .models import JobApplication
+from .search import index_application, search_applications
+
+
+def make_application(job_post, email):
+    return JobApplication.objects.create(
+        job_post_id=job_post.pk, resume='resumes/cv.pdf', first_name='Akosua', last_name='Owusu',
+        email=email, job_title=job_post.title, job_reference_number=job_post.reference_number,
+    )
+
+
+class ApplicationCountTests(TestCase):
+
+    def setUp(self):
+        self.job_post = JobPost.objects.create(
+            title="Mathematics Teacher", description="Teach JHS mathematics", requirements="B.Ed",
+            location="Tema", salary_range="GHS 3,000 - 4,000",
+        )
+
+    def test_count_follows_inserts_and_deletes(self):
+        first = make_application(self.job_post, 'first@example.com')
+        make_application(self.job_post, 'second@example.com')
+        self.job_post.refresh_from_db()
+        self.assertEqual(self.job_post.applications_count, 2)
+
+        with CaptureQueriesContext(connection) as queries:
+            JobApplication.objects.get(pk=first.pk).delete()
+        self.job_post.refresh_from_db()
+        self.assertEqual(self.job_post.applications_count, 1)
+        # The post is updated in place, never loaded
+        self.assertFalse([q for q in queries if q['sql'].startswith('SELECT') and 'jobposting_jobpost' in q['sql']])
+
+
+class ApplicantSearchTests(TestCase):
+
+    def test_snippet_escapes_resume_text(self):
+        job_post = JobPost.objects.create(
+            title="Mathematics Teacher", description="Teach JHS mathematics", requirements="B.Ed",
+            location="Tema", salary_range="GHS 3,000 - 4,000",
+        )
+        application = make_application(job_post, 'first@example.com')
+        index_application(application, '<img src=x onerror=alert(1)> taught mathematics for five years')
+
+        [(found, snippet)] = search_applications('mathematics')
+        self.assertEqual(found, application)
+        self.assertIn('&lt;img src=x onerror=alert(1)&gt;', snippet)
+        self.assertIn('<mark>mathematics</mark>', snippet)
+        self.assertNotIn('<img', snippet)
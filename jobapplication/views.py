@@ -2,15 +2,16 @@ from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from .models import JobApplication, JobApplicationLog
 from .serializers import JobApplicationSerializer, JobApplicationLogSerializer
-from sib_api_v3_sdk import Configuration, ApiClient, SendSmtpEmail
-from sib_api_v3_sdk.api.transactional_emails_api import TransactionalEmailsApi
+from .search import search_applications
 from django.conf import settings
-from sib_api_v3_sdk.rest import ApiException
 from rest_framework.exceptions import ValidationError
+import logging
 import os
 from rest_framework import serializers
 from rest_framework.decorators import action
 
+logger = logging.getLogger(__name__)
+
 class ApplyToJobView(generics.CreateAPIView):
     queryset = JobApplication.objects.all()
     serializer_class = JobApplicationSerializer
@@ -30,7 +31,7 @@ class ApplyToJobView(generics.CreateAPIView):
                     user_email=request.user.email if request.user.email else "anonymous@system.com",
                     changed_fields="Initial application created"
                 )
-                print(f"JobApplicationLog created for new application by {request.user.email}")
+                logger.debug("JobApplicationLog created for new application by %s", request.user.email)
             else:
                 # For non-authenticated users (public applications)
                 JobApplicationLog.objects.create(
@@ -38,7 +39,7 @@ class ApplyToJobView(generics.CreateAPIView):
                     user_email=job_application.email,
                     changed_fields="Initial application created by applicant"
                 )
-                print(f"JobApplicationLog created for new application by applicant {job_application.email}")
+                logger.debug("JobApplicationLog created for new application by applicant %s", job_application.email)
             
             return Response({
                 "success": True,
@@ -76,6 +77,9 @@ class ApplyToJobView(generics.CreateAPIView):
 
     def _send_confirmation_email(self, job_application):
         """Send confirmation email using Brevo (formerly Sendinblue)"""
+        from sib_api_v3_sdk import Configuration, ApiClient, TransactionalEmailsApi, SendSmtpEmail
+        from sib_api_v3_sdk.rest import ApiException
+
         try:
             # Configure Brevo API client
             configuration = Configuration()
@@ -98,7 +102,7 @@ class ApplyToJobView(generics.CreateAPIView):
             
         except ApiException as e:
             # Log the error but don't fail the application submission
-            print(f"Failed to send confirmation email: {e}")
+            logger.error(f"Failed to send confirmation email: {e}")
 
     def _get_email_template(self, application):
         """Generate HTML email content"""
@@ -141,14 +145,14 @@ class JobApplicationDetailView(generics.RetrieveUpdateDestroyAPIView):
     lookup_field = 'id'
     
     def update(self, request, *args, **kwargs):
-        print("Starting update process for job application")
+        logger.debug("Starting update process for job application")
         
         instance = self.get_object()
-        print(f"Fetched job application: {instance}")
+        logger.debug("Fetched job application: %s", instance)
         
         # Capture original data before update
         original_data = JobApplicationSerializer(instance).data  
-        print(f"Original data: {original_data}")
+        logger.debug("Original data: %s", original_data)
         
         # Store original status for email logic
         original_status = instance.status
@@ -157,7 +161,7 @@ class JobApplicationDetailView(generics.RetrieveUpdateDestroyAPIView):
         serializer = self.get_serializer(instance, data=request.data, partial=False)
         
         if not serializer.is_valid():
-            print("Validation Errors:", serializer.errors)
+            logger.debug("Validation Errors: %s", serializer.errors)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
         # Set last_modified_by to current user
@@ -166,11 +170,11 @@ class JobApplicationDetailView(generics.RetrieveUpdateDestroyAPIView):
         
         # Get updated data after save
         updated_data = serializer.data
-        print(f"Updated data: {updated_data}")
+        logger.debug("Updated data: %s", updated_data)
         
         # Track changes by comparing original and updated data
         changed_fields = self._get_changed_fields(original_data, updated_data)
-        print(f"Changed fields: {changed_fields}")
+        logger.debug("Changed fields: %s", changed_fields)
         
         # Create log entry
         JobApplicationLog.objects.create(
@@ -179,25 +183,25 @@ class JobApplicationDetailView(generics.RetrieveUpdateDestroyAPIView):
             user_email=request.user.email,
             changed_fields=changed_fields
         )
-        print(f"JobApplicationLog created for {request.user.email}")
+        logger.debug("JobApplicationLog created for %s", request.user.email)
         
         # Check if status was changed to REJECTED and send email
         if original_status != 'REJECTED' and updated_instance.status == 'REJECTED':
-            print("Status changed to REJECTED, sending rejection email")
+            logger.debug("Status changed to REJECTED, sending rejection email")
             self._send_rejection_email(updated_instance)
             
-        print("Update process completed successfully")
+        logger.debug("Update process completed successfully")
         return Response(serializer.data, status=status.HTTP_200_OK)
     
     def partial_update(self, request, *args, **kwargs):
-        print("Starting partial update process for job application")
+        logger.debug("Starting partial update process for job application")
         
         instance = self.get_object()
-        print(f"Fetched job application: {instance}")
+        logger.debug("Fetched job application: %s", instance)
         
         # Capture original data before update
         original_data = JobApplicationSerializer(instance).data  
-        print(f"Original data: {original_data}")
+        logger.debug("Original data: %s", original_data)
         
         # Store original status for email logic
         original_status = instance.status
@@ -206,7 +210,7 @@ class JobApplicationDetailView(generics.RetrieveUpdateDestroyAPIView):
         serializer = self.get_serializer(instance, data=request.data, partial=True)
         
         if not serializer.is_valid():
-            print("Validation Errors:", serializer.errors)
+            logger.debug("Validation Errors: %s", serializer.errors)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
         # Set last_modified_by to current user
@@ -215,11 +219,11 @@ class JobApplicationDetailView(generics.RetrieveUpdateDestroyAPIView):
         
         # Get updated data after save
         updated_data = serializer.data
-        print(f"Updated data: {updated_data}")
+        logger.debug("Updated data: %s", updated_data)
         
         # Track changes by comparing original and updated data
         changed_fields = self._get_changed_fields(original_data, updated_data)
-        print(f"Changed fields: {changed_fields}")
+        logger.debug("Changed fields: %s", changed_fields)
         
         # Create log entry
         JobApplicationLog.objects.create(
@@ -228,14 +232,14 @@ class JobApplicationDetailView(generics.RetrieveUpdateDestroyAPIView):
             user_email=request.user.email,
             changed_fields=changed_fields
         )
-        print(f"JobApplicationLog created for {request.user.email}")
+        logger.debug("JobApplicationLog created for %s", request.user.email)
         
         # Check if status was changed to REJECTED and send email
         if original_status != 'REJECTED' and updated_instance.status == 'REJECTED':
-            print("Status changed to REJECTED, sending rejection email")
+            logger.debug("Status changed to REJECTED, sending rejection email")
             self._send_rejection_email(updated_instance)
             
-        print("Partial update process completed successfully")
+        logger.debug("Partial update process completed successfully")
         return Response(serializer.data, status=status.HTTP_200_OK)
     
     def _get_changed_fields(self, original_data, updated_data):
@@ -243,7 +247,7 @@ class JobApplicationDetailView(generics.RetrieveUpdateDestroyAPIView):
         Compare original and updated data and return a string of fields that changed.
         Format: "field1: old_value -> new_value, field2: old_value -> new_value"
         """
-        print("Comparing original and updated data")
+        logger.debug("Comparing original and updated data")
         changed_fields = []
         
         # Fields to exclude from comparison
@@ -262,7 +266,7 @@ class JobApplicationDetailView(generics.RetrieveUpdateDestroyAPIView):
                 # Only consider resume changed if the actual filename changed
                 if original_filename != updated_filename:
                     changed_fields.append(f"resume: {original_resume} -> {updated_resume}")
-                    print(f"Field changed: resume from {original_resume} to {updated_resume}")
+                    logger.debug("Field changed: resume from %s to %s", original_resume, updated_resume)
         
         # Compare all other fields
         for key, original_value in original_data.items():
@@ -273,12 +277,15 @@ class JobApplicationDetailView(generics.RetrieveUpdateDestroyAPIView):
             updated_value = updated_data.get(key)
             if original_value != updated_value:
                 changed_fields.append(f"{key}: {original_value} -> {updated_value}")
-                print(f"Field changed: {key} from {original_value} to {updated_value}")
+                logger.debug("Field changed: %s from %s to %s", key, original_value, updated_value)
                     
         return ', '.join(changed_fields)  # Return a string representation of the changes
 
     def _send_rejection_email(self, job_application):
         """Send rejection email using Brevo (formerly Sendinblue)"""
+        from sib_api_v3_sdk import Configuration, ApiClient, TransactionalEmailsApi, SendSmtpEmail
+        from sib_api_v3_sdk.rest import ApiException
+
         try:
             # Configure Brevo API client
             configuration = Configuration()
@@ -301,7 +308,7 @@ class JobApplicationDetailView(generics.RetrieveUpdateDestroyAPIView):
             
         except ApiException as e:
             # Log the error but don't fail the status update
-            print(f"Failed to send rejection email: {e}")
+            logger.error(f"Failed to send rejection email: {e}")
     
     def _get_rejection_email_template(self, application):
         """Generate HTML rejection email content"""
@@ -338,7 +345,7 @@ class JobApplicationDetailView(generics.RetrieveUpdateDestroyAPIView):
             user_email=request.user.email,
             changed_fields="Application deleted"
         )
-        print(f"JobApplicationLog created for deletion by {request.user.email}")
+        logger.debug("JobApplicationLog created for deletion by %s", request.user.email)
         
         self.perform_destroy(instance)
         return Response(status=status.HTTP_204_NO_CONTENT)
@@ -347,8 +354,41 @@ class JobApplicationListView(generics.ListAPIView):
     serializer_class = JobApplicationSerializer
     permission_classes = [permissions.IsAuthenticated]
     
+    DEFAULT_SEARCH_LIMIT = 50
+    MAX_SEARCH_LIMIT = 500
+    
     def get_queryset(self):
         return JobApplication.objects.all()
+    
+    def list(self, request, *args, **kwargs):
+        """
+        Search mode: ?q=<keywords>[&status=&educational_level=&job_reference_number=&limit=]
+        returns applications ranked by how well their resume and details match,
+        each with an HTML-escaped snippet whose matches are wrapped in <mark>.
+        """
+        if 'q' not in request.query_params:
+            return super().list(request, *args, **kwargs)
+        
+        params = request.query_params
+        try:
+            limit = min(int(params.get('limit', self.DEFAULT_SEARCH_LIMIT)), self.MAX_SEARCH_LIMIT)
+        except ValueError:
+            raise ValidationError({"limit": "Must be an integer."})
+        
+        matches = search_applications(
+            params.get('q', ''),
+            status=params.get('status') or None,
+            educational_level=params.get('educational_level') or None,
+            job_reference_number=params.get('job_reference_number') or None,
+            limit=max(limit, 1)
+        )
+        
+        results = []
+        for application, snippet in matches:
+            data = self.get_serializer(application).data
+            data['snippet'] = snippet
+            results.append(data)
+        return Response(results)
 
 class JobApplicationLogListView(generics.ListAPIView):
     """
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class JobpostingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'jobposting'
+
+    def ready(self):
+        # Connect the search index sync receivers
+        import jobposting.signals
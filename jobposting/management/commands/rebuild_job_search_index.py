@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from jobposting.search import fts_available, rebuild_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the job post full-text search index from the JobPost table. "
+        "The index is kept in sync by signals, so this is only needed after bulk "
+        "updates or raw SQL that bypass them."
+    )
+
+    def handle(self, *args, **options):
+        if not fts_available():
+            self.stdout.write(self.style.WARNING("Full-text index is only used on SQLite; nothing to rebuild."))
+            return
+
+        count = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} published job posts."))
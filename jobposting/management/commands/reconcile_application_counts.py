@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from jobapplication.models import JobApplication
+from jobposting.models import JobPost
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconcile JobPost.applications_count with the actual number of applications. "
+        "The counter is maintained incrementally, so this only catches drift from bulk "
+        "deletes or manual edits. Intended to run periodically (e.g. nightly cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Report drifted job posts without updating them",
+        )
+
+    def handle(self, *args, **options):
+        drifted = JobPost.objects.annotate(
+            actual_count=Count('applications')
+        ).exclude(applications_count=F('actual_count'))
+
+        drifted_posts = list(drifted.values_list('id', 'reference_number', 'applications_count', 'actual_count'))
+
+        if not drifted_posts:
+            self.stdout.write(self.style.SUCCESS("All application counts are in sync."))
+            return
+
+        for post_id, reference_number, stored, actual in drifted_posts:
+            self.stdout.write(f"{reference_number or post_id}: stored {stored}, actual {actual}")
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f"{len(drifted_posts)} job posts out of sync (dry run, nothing updated)."))
+            return
+
+        # One set-based UPDATE with a correlated count for the drifted posts
+        actual_count = JobApplication.objects.filter(
+            job_post=OuterRef('pk')
+        ).order_by().values('job_post').annotate(total=Count('pk')).values('total')
+
+        with transaction.atomic():
+            updated = JobPost.objects.filter(
+                id__in=[post_id for post_id, *_ in drifted_posts]
+            ).update(applications_count=Coalesce(Subquery(actual_count), 0))
+
+        self.stdout.write(self.style.SUCCESS(f"Reconciled application counts for {updated} job posts."))
@@ -0,0 +1,34 @@
+from django.db import migrations
+
+FTS_TABLE = 'jobposting_jobpost_fts'
+
+
+def create_search_index(apps, schema_editor):
+    # FTS5 is SQLite only; other backends search with icontains filters instead
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+        "USING fts5(title, description, requirements, location, tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    schema_editor.execute(
+        f"INSERT INTO {FTS_TABLE} (rowid, title, description, requirements, location) "
+        "SELECT id, title, description, requirements, location FROM jobposting_jobpost WHERE status = 'PUBLISHED'"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobposting', '0004_jobpostlog'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
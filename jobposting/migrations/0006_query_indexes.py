@@ -0,0 +1,23 @@
+# Generated by Django 5.0.6 on 2026-10-19 10:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobposting', '0005_jobpost_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='jobpost',
+            index=models.Index(fields=['status', '-published_date'], name='jobpost_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobpostlog',
+            index=models.Index(fields=['job_post', '-timestamp'], name='jobpostlog_history_idx'),
+        ),
+    ]
@@ -1,7 +1,8 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
-from django.db.models import Max, Count
+from django.db.models import Max, Count, F
 from authapp.models import CustomUser
+from sequences.allocator import SequenceAllocator
 
 class JobPost(models.Model):
     STATUS_CHOICES = [
@@ -50,33 +51,55 @@ class JobPost(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Job Post'
         verbose_name_plural = 'Job Posts'
+        indexes = [
+            # The public listing: published posts, newest first
+            models.Index(fields=['status', '-published_date'], name='jobpost_published_idx'),
+        ]
     
     def save(self, *args, **kwargs):
-        if not self.reference_number:
-            last_ref_num = JobPost.objects.aggregate(Max('reference_number'))['reference_number__max']
-            if last_ref_num:
-                try:
-                    last_num = int(last_ref_num[2:])
-                    new_num = last_num + 1
-                except (ValueError, IndexError):
-                    new_num = 1
-            else:
-                new_num = 1
-            self.reference_number = f'RF{new_num:06d}'
-        
         if self.created_by and not self.created_by_email:
             self.created_by_email = self.created_by.email
-            
-        super().save(*args, **kwargs)
+        
+        if self.reference_number:
+            super().save(*args, **kwargs)
+            return
+        
+        # Allocate inside the insert's transaction so a failed save gives the number back
+        with transaction.atomic():
+            self.reference_number = REFERENCE_NUMBERS.next_formatted()
+            super().save(*args, **kwargs)
 
     def update_application_count(self):
-        """Update the count of job applications for this job post."""
+        """Recount the job applications for this job post (used for reconciliation)."""
         self.applications_count = self.applications.count()
-        self.save(update_fields=['applications_count'])
+        JobPost.objects.filter(pk=self.pk).update(applications_count=self.applications_count)
+    
+    @classmethod
+    def adjust_application_count(cls, pk, delta):
+        """Atomically add delta to a post's applications_count without loading it, recounting or a full save."""
+        queryset = cls.objects.filter(pk=pk)
+        if delta < 0:
+            # Never push the counter below zero if it has drifted
+            queryset = queryset.filter(applications_count__gte=-delta)
+        queryset.update(applications_count=F('applications_count') + delta)
     
     def __str__(self):
         return f"{self.reference_number or 'No Reference'} - {self.title}"
 
+def _last_reference_number():
+    """Highest reference number already in use, used to seed the sequence on first use"""
+    last_ref_num = JobPost.objects.aggregate(Max('reference_number'))['reference_number__max']
+    try:
+        return int(last_ref_num[2:]) if last_ref_num else 0
+    except (ValueError, IndexError):
+        return 0
+
+
+REFERENCE_NUMBERS = SequenceAllocator(
+    'job_post_reference', prefix='RF', padding=6, seed=_last_reference_number
+)
+
+
 class JobPostLog(models.Model):
     job_post = models.ForeignKey(JobPost, on_delete=models.CASCADE, related_name='logs')
     user = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True)
@@ -91,5 +114,11 @@ class JobPostLog(models.Model):
         ('SCHEDULE', 'Schedule')
     ])
 
+    class Meta:
+        indexes = [
+            # A record's history, newest first
+            models.Index(fields=['job_post', '-timestamp'], name='jobpostlog_history_idx'),
+        ]
+
     def __str__(self):
         return f"Log for JobPost {self.job_post.reference_number} by {self.user_email} at {self.timestamp}"
\ No newline at end of file
@@ -0,0 +1,208 @@
+"""
+Full-text search over published job posts.
+
+On SQLite the posts are mirrored into an FTS5 virtual table (rowid = JobPost.id)
+that is kept in sync by the receivers in signals.py, so a search is one indexed
+MATCH ranked with bm25 instead of downloading every post. Location and salary
+facet counts are cached per data version and only recomputed after a write;
+with a shared cache (see settings.CACHES) a write handled by one worker process
+retires the counts cached by all of them, otherwise the other workers' versions
+expire after settings.CACHE_VERSION_TIMEOUT.
+
+Other database backends fall back to icontains filtering.
+"""
+import re
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count, Q
+
+from .models import JobPost
+
+FTS_TABLE = 'jobposting_jobpost_fts'
+INDEXED_FIELDS = ['title', 'description', 'requirements', 'location']
+# bm25 column weights, in INDEXED_FIELDS order: title matches rank highest
+RANK_WEIGHTS = (10.0, 1.0, 1.0, 5.0)
+
+FACET_FIELDS = ['location', 'salary_range']
+FACET_VERSION_KEY = 'jobposting:facet_version'
+FACET_KEY = 'jobposting:facets:{version}'
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+PHRASE_RE = re.compile(r'"([^"]*)"')
+
+
+def fts_available():
+    return connection.vendor == 'sqlite'
+
+
+def build_match_query(q):
+    """
+    Turn free text into a safe FTS5 query: every word must match, words in
+    double quotes must match as a phrase, and the last unquoted word also
+    matches as a prefix so results update while the user is typing.
+    """
+    q = q or ''
+    # Only word characters reach FTS5, so its operators and syntax can't be injected
+    terms = []
+    for phrase in PHRASE_RE.findall(q):
+        tokens = TOKEN_RE.findall(phrase)
+        if tokens:
+            terms.append(f'"{" ".join(tokens)}"')
+    tokens = TOKEN_RE.findall(PHRASE_RE.sub(' ', q))
+    if tokens:
+        terms.extend(f'"{token}"' for token in tokens[:-1])
+        terms.append(f'"{tokens[-1]}"*')
+    return ' '.join(terms) or None
+
+
+# Index maintenance
+
+def index_job_post(job_post):
+    """Add, refresh or drop a post in the search index depending on its status"""
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [job_post.pk])
+        if job_post.status == 'PUBLISHED':
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(INDEXED_FIELDS)}) VALUES (%s, %s, %s, %s, %s)",
+                [job_post.pk] + [getattr(job_post, field) or '' for field in INDEXED_FIELDS]
+            )
+
+
+def remove_job_post(job_post_id):
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [job_post_id])
+
+
+def rebuild_index():
+    """Repopulate the index from scratch; returns the number of posts indexed"""
+    if not fts_available():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(INDEXED_FIELDS)}) "
+            f"SELECT id, {', '.join(INDEXED_FIELDS)} FROM {JobPost._meta.db_table} WHERE status = 'PUBLISHED'"
+        )
+        cursor.execute(f"SELECT COUNT(*) FROM {FTS_TABLE}")
+        count = cursor.fetchone()[0]
+    invalidate_facets()
+    return count
+
+
+# Facets
+
+def invalidate_facets():
+    """Start a new facet version, retiring the cached counts"""
+    cache.set(FACET_VERSION_KEY, uuid.uuid4().hex, timeout=settings.CACHE_VERSION_TIMEOUT)
+
+
+def get_global_facets():
+    """Facet counts over all published posts, computed once per data version"""
+    # Versions are random rather than counted: a counter that was evicted and
+    # started again could reach a number whose stale counts are still cached
+    version = cache.get(FACET_VERSION_KEY)
+    if version is None:
+        cache.add(FACET_VERSION_KEY, uuid.uuid4().hex, timeout=settings.CACHE_VERSION_TIMEOUT)
+        version = cache.get(FACET_VERSION_KEY)
+
+    key = FACET_KEY.format(version=version)
+    facets = cache.get(key)
+    if facets is None:
+        facets = _count_facets(JobPost.objects.filter(status='PUBLISHED'))
+        cache.set(key, facets, 60 * 60)
+    return facets
+
+
+def _count_facets(queryset):
+    facets = {}
+    for field in FACET_FIELDS:
+        rows = queryset.order_by().values(field).annotate(count=Count('id')).order_by('-count', field)
+        facets[field] = [{'value': row[field], 'count': row['count']} for row in rows if row[field]]
+    return facets
+
+
+# Searching
+
+def search_job_posts(q=None, location=None, salary_range=None, offset=0, limit=20):
+    """
+    Return (job_posts, total, facets) for one page of published posts.
+    With a query the posts are ranked by relevance and the facets describe the
+    matching posts; without one they are newest first with the cached global facets.
+    """
+    match_query = build_match_query(q)
+
+    if match_query is None:
+        queryset = JobPost.objects.filter(status='PUBLISHED')
+        if location:
+            queryset = queryset.filter(location=location)
+        if salary_range:
+            queryset = queryset.filter(salary_range=salary_range)
+        total = queryset.count()
+        job_posts = list(queryset.order_by('-published_date', '-id')[offset:offset + limit])
+        return job_posts, total, get_global_facets()
+
+    if not fts_available():
+        return _search_without_fts(q, location, salary_range, offset, limit)
+
+    posts_table = JobPost._meta.db_table
+    where = [f"{FTS_TABLE} MATCH %s", "p.status = 'PUBLISHED'"]
+    params = [match_query]
+    if location:
+        where.append("p.location = %s")
+        params.append(location)
+    if salary_range:
+        where.append("p.salary_range = %s")
+        params.append(salary_range)
+
+    from_clause = (
+        f"FROM {FTS_TABLE} JOIN {posts_table} p ON p.id = {FTS_TABLE}.rowid "
+        f"WHERE {' AND '.join(where)}"
+    )
+
+    with connection.cursor() as cursor:
+        weights = ', '.join(str(weight) for weight in RANK_WEIGHTS)
+        cursor.execute(
+            f"SELECT p.id {from_clause} ORDER BY bm25({FTS_TABLE}, {weights}), p.id DESC LIMIT %s OFFSET %s",
+            params + [limit, offset]
+        )
+        ranked_ids = [row[0] for row in cursor.fetchall()]
+
+        cursor.execute(f"SELECT COUNT(*) {from_clause}", params)
+        total = cursor.fetchone()[0]
+
+        facets = {}
+        for field in FACET_FIELDS:
+            cursor.execute(
+                f"SELECT p.{field}, COUNT(*) {from_clause} GROUP BY p.{field} ORDER BY COUNT(*) DESC, p.{field}",
+                params
+            )
+            facets[field] = [{'value': value, 'count': count} for value, count in cursor.fetchall() if value]
+
+    posts_by_id = JobPost.objects.in_bulk(ranked_ids)
+    job_posts = [posts_by_id[post_id] for post_id in ranked_ids if post_id in posts_by_id]
+    return job_posts, total, facets
+
+
+def _search_without_fts(q, location, salary_range, offset, limit):
+    condition = Q()
+    for token in TOKEN_RE.findall(q):
+        condition &= (
+            Q(title__icontains=token) | Q(description__icontains=token) |
+            Q(requirements__icontains=token) | Q(location__icontains=token)
+        )
+    queryset = JobPost.objects.filter(condition, status='PUBLISHED')
+    facets = _count_facets(queryset)
+    if location:
+        queryset = queryset.filter(location=location)
+    if salary_range:
+        queryset = queryset.filter(salary_range=salary_range)
+    total = queryset.count()
+    job_posts = list(queryset.order_by('-published_date', '-id')[offset:offset + limit])
+    return job_posts, total, facets
@@ -0,0 +1,19 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import JobPost
+from . import search
+
+
+@receiver(post_save, sender=JobPost)
+def index_job_post_on_save(sender, instance, **kwargs):
+    # Runs inside the saving transaction, so the index never disagrees with the row
+    search.index_job_post(instance)
+    transaction.on_commit(search.invalidate_facets)
+
+
+@receiver(post_delete, sender=JobPost)
+def remove_job_post_on_delete(sender, instance, **kwargs):
+    search.remove_job_post(instance.pk)
+    transaction.on_commit(search.invalidate_facets)
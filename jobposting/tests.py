@@ -1,3 +1,146 @@
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from .models import JobPost
+from .search import FTS_TABLE, build_match_query, get_global_facets, search_job_posts
+
+
+def make_post(location, status='PUBLISHED', title='Teacher', description='Teach'):
+    return JobPost.objects.create(
+        title=title, description=description, requirements='Degree',
+        location=location, salary_range='GHS 3000', status=status,
+    )
+
+
+class FacetCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def locations(self):
+        return {row['value']: row['count'] for row in get_global_facets()['location']}
+
+    def test_facets_follow_writes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            make_post('Accra')
+        self.assertEqual(self.locations(), {'Accra': 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            draft = make_post('Kumasi', status='DRAFT')
+        self.assertEqual(self.locations(), {'Accra': 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            draft.status = 'PUBLISHED'
+            draft.save()
+        self.assertEqual(self.locations(), {'Accra': 1, 'Kumasi': 1})
+
+    def test_lost_version_is_not_reset_to_a_stale_one(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            make_post('Accra')
+        self.assertEqual(self.locations(), {'Accra': 1})
+        cache.delete('jobposting:facet_version')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            make_post('Accra')
+        self.assertEqual(self.locations(), {'Accra': 2})
+
+
+class SearchTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('jobpost-list-published-posts')
+        self.maths = make_post('Accra', title='Mathematics Teacher', description='Teach algebra to form two')
+        self.science = make_post('Kumasi', title='Science Teacher', description='Some mathematics is required')
+        self.librarian = make_post('Accra', title='Librarian', description='Run the school library')
+
+    def search(self, q, **kwargs):
+        job_posts, total, facets = search_job_posts(q, **kwargs)
+        return [post.pk for post in job_posts]
+
+    def indexed_ids(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT rowid FROM {FTS_TABLE}")
+            return {row[0] for row in cursor.fetchall()}
+
+    def test_build_match_query(self):
+        self.assertEqual(build_match_query('maths teach'), '"maths" "teach"*')
+        self.assertEqual(build_match_query('"form two" algebra'), '"form two" "algebra"*')
+        self.assertEqual(build_match_query('NEAR(a b) OR c*'), '"NEAR" "a" "b" "OR" "c"*')
+        self.assertIsNone(build_match_query('" * - ^ :'))
+
+    def test_title_matches_rank_first(self):
+        self.assertEqual(self.search('mathematics'), [self.maths.pk, self.science.pk])
+
+    def test_last_word_matches_as_prefix(self):
+        self.assertEqual(self.search('libr'), [self.librarian.pk])
+        self.assertEqual(self.search('libr school'), [])
+        self.assertEqual(self.search('school libr'), [self.librarian.pk])
+
+    def test_quoted_words_match_as_a_phrase(self):
+        self.assertEqual(self.search('"form two"'), [self.maths.pk])
+        self.assertEqual(self.search('"two form"'), [])
+
+    def test_search_facets_describe_matches(self):
+        job_posts, total, facets = search_job_posts('teacher')
+        self.assertEqual(total, 2)
+        self.assertEqual(facets['location'], [{'value': 'Accra', 'count': 1}, {'value': 'Kumasi', 'count': 1}])
+
+        job_posts, total, facets = search_job_posts('teacher', location='Kumasi')
+        self.assertEqual([post.pk for post in job_posts], [self.science.pk])
+        self.assertEqual(total, 1)
+
+    def test_hostile_queries_are_not_errors(self):
+        for q in ['"', '"unclosed', 'teacher OR', 'NEAR(', 'NEAR(a b', '*', 'teach*er', '-teacher',
+                  'title:teacher', '^teacher', 'a AND NOT b', '(', "'; DROP TABLE jobposting_jobpost; --"]:
+            with self.subTest(q=q):
+                response = self.client.get(self.url, {'q': q})
+                self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(JobPost.objects.count(), 3)
+
+    def test_index_follows_status_and_deletes(self):
+        self.assertEqual(self.indexed_ids(), {self.maths.pk, self.science.pk, self.librarian.pk})
+
+        self.librarian.status = 'DRAFT'
+        self.librarian.save()
+        self.assertEqual(self.search('library'), [])
+        self.assertNotIn(self.librarian.pk, self.indexed_ids())
+
+        self.librarian.status = 'PUBLISHED'
+        self.librarian.title = 'Head Librarian'
+        self.librarian.save()
+        self.assertEqual(self.search('head'), [self.librarian.pk])
+
+        self.maths.delete()
+        self.assertEqual(self.search('mathematics'), [self.science.pk])
+        self.assertEqual(self.indexed_ids(), {self.science.pk, self.librarian.pk})
+
+        draft = make_post('Tema', status='DRAFT', title='Chemistry Teacher')
+        self.assertEqual(self.search('chemistry'), [])
+        self.assertNotIn(draft.pk, self.indexed_ids())
+
+    def test_pagination(self):
+        response = self.client.get(self.url, {'q': 'teacher', 'page_size': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {key: response.data[key] for key in ('count', 'page', 'page_size', 'num_pages')},
+            {'count': 2, 'page': 1, 'page_size': 1, 'num_pages': 2},
+        )
+        first = [post['id'] for post in response.data['results']]
+
+        response = self.client.get(self.url, {'q': 'teacher', 'page_size': 1, 'page': 2})
+        second = [post['id'] for post in response.data['results']]
+        self.assertEqual(len(first + second), 2)
+        self.assertEqual(set(first + second), {self.maths.pk, self.science.pk})
+
+        response = self.client.get(self.url, {'page': 3, 'page_size': 1})
+        self.assertEqual([post['id'] for post in response.data['results']], [self.maths.pk])
+        self.assertEqual(self.client.get(self.url, {'page': 5}).data['results'], [])
+
+    def test_bad_page_values(self):
+        for params in [{'page': 'two'}, {'page': 0}, {'page': -1}, {'page': '1.5'}, {'page_size': 0},
+                       {'page_size': 'all'}, {'page': 10 ** 20}, {'q': 'teacher', 'page': 10 ** 20}]:
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(self.url, params).status_code, 400)
@@ -10,6 +10,7 @@ from django.shortcuts import get_object_or_404
 from django.forms.models import model_to_dict
 from .models import JobPost, JobPostLog
 from .serializers import JobPostSerializer, JobPostLogSerializer
+from .search import search_job_posts
 from datetime import datetime
 import pytz
 
@@ -357,17 +358,32 @@ class JobPostViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    SEARCH_PARAMS = ('q', 'location', 'salary_range', 'page', 'page_size')
+    DEFAULT_PAGE_SIZE = 20
+    MAX_PAGE_SIZE = 100
+    MAX_PAGE = 1000
+
     @action(detail=False, methods=['get'])
     def list_published_posts(self, request):
         """
         Get all published posts.
         URL: /api/jobposts/list_published_posts/
+
+        Search mode, used when any of these query params is given:
+        ?q=<text>&location=<exact>&salary_range=<exact>&page=<n>&page_size=<n>
+        Words in double quotes in q match as a phrase.
+        Returns one ranked page of posts with location and salary facet counts.
         """
         try:
+            if any(param in request.query_params for param in self.SEARCH_PARAMS):
+                return self._search_published_posts(request)
+
             queryset = JobPost.objects.filter(status='PUBLISHED')
             logger.debug("Retrieving all PUBLISHED posts")
             serializer = self.serializer_class(queryset, many=True)
             return Response(serializer.data)
+        except ValidationError:
+            raise
         except Exception as e:
             logger.error(f"Error retrieving PUBLISHED posts: {str(e)}")
             return Response(
@@ -375,6 +391,38 @@ class JobPostViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR   
             )
 
+    def _search_published_posts(self, request):
+        params = request.query_params
+        try:
+            page = int(params.get('page', 1))
+            page_size = int(params.get('page_size', self.DEFAULT_PAGE_SIZE))
+        except ValueError:
+            raise ValidationError({"error": "page and page_size must be integers."})
+        if page < 1 or page_size < 1:
+            raise ValidationError({"error": "page and page_size must be positive."})
+        if page > self.MAX_PAGE:
+            raise ValidationError({"error": f"page must be at most {self.MAX_PAGE}."})
+        page_size = min(page_size, self.MAX_PAGE_SIZE)
+
+        query = params.get('q', '').strip()
+        job_posts, total, facets = search_job_posts(
+            q=query,
+            location=params.get('location') or None,
+            salary_range=params.get('salary_range') or None,
+            offset=(page - 1) * page_size,
+            limit=page_size
+        )
+        logger.debug(f"Job post search q={query!r} returned {total} results")
+
+        return Response({
+            'count': total,
+            'page': page,
+            'page_size': page_size,
+            'num_pages': (total + page_size - 1) // page_size,
+            'results': self.serializer_class(job_posts, many=True).data,
+            'facets': facets,
+        })
+
     @action(detail=True, methods=['get'])
     def get_applications_count(self, request, pk=None):
         """
@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+from django.conf import settings
+
+
+class LoadtestConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'loadtest'
+    verbose_name = 'Load testing'
+
+    def ready(self):
+        # Under load tests the server's emails go to the stub from run_load_stubs
+        if settings.BREVO_API_HOST:
+            from .stub_email import use_email_host
+            use_email_host(settings.BREVO_API_HOST)
@@ -0,0 +1,293 @@
+"""
+Synthetic school data for load tests.
+
+Everything is drawn from one random.Random(seed), so the same seed and sizes give
+the same students, scores and positions on every run and every machine; load test
+reports from different commits are then measured against identical data. Rows are
+written with bulk_create, and every generated account and applicant uses an
+address at DOMAIN so clear() can remove them again.
+"""
+import logging
+import random
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from authapp.models import CustomUser
+from booklist.cache import invalidate_booklist_cache
+from booklist.models import BookList, BookListItem, StudentClassHistory
+from jobapplication.models import JobApplication
+from jobposting.models import JobPost
+from ResultsEntry.models import ClassCourse, Course, CourseResult, Result
+from ResultsEntry.views import PositionCalculator
+
+logger = logging.getLogger(__name__)
+
+DOMAIN = 'loadtest.example.com'
+CLASSES = [name for name, _ in CustomUser.CLASS_CHOICES]
+TERMS = ('first', 'second', 'third')
+
+SUBJECTS = [
+    ('English Language', 'LT-ENG'),
+    ('Mathematics', 'LT-MATH'),
+    ('Integrated Science', 'LT-SCI'),
+    ('Social Studies', 'LT-SOC'),
+    ('Computing', 'LT-ICT'),
+    ('French', 'LT-FRE'),
+    ('Ghanaian Language', 'LT-GHL'),
+    ('Religious and Moral Education', 'LT-RME'),
+    ('Creative Arts', 'LT-ART'),
+    ('Career Technology', 'LT-CTE'),
+    ('Physical Education', 'LT-PE'),
+    ('History', 'LT-HIS'),
+    ('Music and Dance', 'LT-MUS'),
+    ('Agricultural Science', 'LT-AGR'),
+    ('Home Economics', 'LT-HEC'),
+]
+
+FIRST_NAMES = [
+    'Kwame', 'Kofi', 'Kwaku', 'Yaw', 'Kwabena', 'Kwasi', 'Kojo', 'Ama', 'Akua', 'Abena', 'Adwoa',
+    'Afua', 'Yaa', 'Esi', 'Efua', 'Ekow', 'Nana', 'Akosua', 'Selorm', 'Elikem', 'Dzifa', 'Naa',
+]
+LAST_NAMES = [
+    'Mensah', 'Boateng', 'Owusu', 'Asante', 'Osei', 'Agyeman', 'Appiah', 'Danso', 'Addo', 'Amoah',
+    'Quaye', 'Tetteh', 'Ofori', 'Antwi', 'Sarpong', 'Nyarko', 'Adjei', 'Frimpong', 'Badu', 'Lartey',
+]
+REMARKS = [
+    "Works hard and participates in class.",
+    "A pleasant pupil who should read more.",
+    "Shows steady improvement this term.",
+    "Capable, but must concentrate in class.",
+    "An excellent term. Keep it up.",
+]
+BOOKS = [
+    'Mathematics Textbook', 'English Reader', 'Science Workbook', 'Exercise Books (pack of 10)', 'Atlas',
+    'Dictionary', 'Drawing Book', 'French Workbook', 'Mathematical Set', 'Story Book', 'Social Studies Textbook',
+    'Computing Textbook',
+]
+JOB_TITLES = [
+    'Class Teacher', 'Mathematics Teacher', 'Science Teacher', 'French Teacher', 'Music Teacher',
+    'Librarian', 'Accountant', 'School Nurse', 'Administrator', 'Driver', 'Security Officer', 'Cook',
+]
+# Fixed so regenerated data does not drift with the calendar
+BASE_DATE = datetime(2024, 9, 2, 8, 0, tzinfo=timezone.utc)
+
+
+def previous_academic_year(academic_year):
+    start, end = academic_year.split('-')
+    return f"{int(start) - 1}-{int(end) - 1}"
+
+
+def clear():
+    """Delete everything an earlier generate() created"""
+    with transaction.atomic():
+        # Job posts outlive their author (SET_NULL), so they are matched on the stored email
+        JobPost.objects.filter(created_by_email__endswith=f"@{DOMAIN}").delete()
+        JobApplication.objects.filter(email__endswith=f"@{DOMAIN}").delete()
+        # Results, courses, book lists and class history cascade from the accounts
+        deleted, _ = CustomUser.objects.filter(email__endswith=f"@{DOMAIN}").delete()
+    invalidate_booklist_cache()
+    return deleted
+
+
+def _score(rng, ability):
+    """Class score (of 40) and exam score (of 60) around a student's ability"""
+    total = min(max(rng.gauss(ability, 9), 12), 99)
+    class_score = min(round(total * rng.uniform(0.35, 0.45), 2), 40)
+    exam_score = min(round(total - class_score, 2), 60)
+    return Decimal(f"{class_score:.2f}"), Decimal(f"{exam_score:.2f}")
+
+
+def _accounts(rng, students, staff, password):
+    hashed = make_password(password)  # hashing is slow, so every account shares one
+    people = [
+        CustomUser(
+            email=f"principal@{DOMAIN}", username='principal', first_name='Ama', last_name='Mensah',
+            role='principal', is_staff=True, is_active=True, password=hashed,
+        )
+    ]
+    people += [
+        CustomUser(
+            email=f"staff{n:03d}@{DOMAIN}", username=f"staff{n:03d}", first_name=rng.choice(FIRST_NAMES),
+            last_name=rng.choice(LAST_NAMES), role='staff', is_active=True, password=hashed,
+        )
+        for n in range(1, staff)
+    ]
+    # Spread the students evenly, in class order
+    people += [
+        CustomUser(
+            email=f"student{n:05d}@{DOMAIN}", username=f"student{n:05d}", first_name=rng.choice(FIRST_NAMES),
+            last_name=rng.choice(LAST_NAMES), role='student', is_active=True, password=hashed,
+            index_number=f"LT{n:06d}", class_name=CLASSES[n * len(CLASSES) // students],
+        )
+        for n in range(students)
+    ]
+    CustomUser.objects.bulk_create(people, batch_size=500)
+    accounts = list(CustomUser.objects.filter(email__endswith=f"@{DOMAIN}").order_by('id'))
+    return [a for a in accounts if a.role != 'student'], [a for a in accounts if a.role == 'student']
+
+
+def _courses(subjects, author):
+    chosen = SUBJECTS[:subjects]
+    existing = set(Course.objects.filter(code__in=[code for _, code in chosen]).values_list('code', flat=True))
+    Course.objects.bulk_create([
+        Course(name=name, code=code, created_by=author) for name, code in chosen if code not in existing
+    ])
+    return list(Course.objects.filter(code__in=[code for _, code in chosen]).order_by('code'))
+
+
+def previous_class(class_name):
+    """The class a student was in last year (the youngest class has none, so its own)"""
+    return CLASSES[max(CLASSES.index(class_name) - 1, 0)]
+
+
+def _results(rng, students, courses, academic_year, terms):
+    """
+    Published results for every student and term, one course result per subject,
+    plus last year's third term results for everyone who was in another class.
+    """
+    previous_year = previous_academic_year(academic_year)
+    ClassCourse.objects.bulk_create(
+        [
+            ClassCourse(course=course, class_name=class_name, term=term)
+            for class_name in CLASSES for term in sorted(set(terms) | {'third'}) for course in courses
+        ],
+        ignore_conflicts=True,
+    )
+    class_courses = {}
+    for class_course in ClassCourse.objects.filter(course__in=courses).order_by('course__code'):
+        class_courses.setdefault((class_course.class_name, class_course.term), []).append(class_course)
+
+    ability = {student.pk: rng.gauss(58, 12) for student in students}
+    batches = [
+        (previous_year, 'third', BASE_DATE - timedelta(days=60),
+         [(s, previous_class(s.class_name)) for s in students if s.class_name != CLASSES[0]]),
+    ]
+    batches += [
+        (academic_year, term, BASE_DATE + timedelta(days=100 * n), [(s, s.class_name) for s in students])
+        for n, term in enumerate(terms)
+    ]
+
+    result_count = course_result_count = 0
+    for year, term, published, entries in batches:
+        results = Result.objects.bulk_create(
+            [
+                Result(
+                    student=student, class_name=class_name, term=term, academic_year=year,
+                    status='PUBLISHED', published_date=published, days_present=rng.randint(50, 65),
+                    days_absent=rng.randint(0, 8), class_teacher_remarks=rng.choice(REMARKS),
+                )
+                for student, class_name in entries
+            ],
+            batch_size=500,
+        )
+        rows = []
+        for result in results:
+            for class_course in class_courses[result.class_name, term]:
+                class_score, exam_score = _score(rng, ability[result.student_id])
+                rows.append(CourseResult(
+                    result=result, class_course=class_course, class_score=class_score, exam_score=exam_score,
+                    remarks='Good' if class_score + exam_score >= 50 else 'Can do better',
+                ))
+        CourseResult.objects.bulk_create(rows, batch_size=1000)
+        result_count += len(results)
+        course_result_count += len(rows)
+
+        for class_name in sorted({class_name for _, class_name in entries}):
+            PositionCalculator.recalculate_positions(class_name, term, year)
+    return result_count, course_result_count
+
+
+def _class_history(students, academic_year):
+    """This year's class for everyone, and last year's for all but the youngest class"""
+    previous_year = previous_academic_year(academic_year)
+    history = [StudentClassHistory(student=s, academic_year=academic_year, class_name=s.class_name) for s in students]
+    history += [
+        StudentClassHistory(student=s, academic_year=previous_year, class_name=previous_class(s.class_name))
+        for s in students if s.class_name != CLASSES[0]
+    ]
+    StudentClassHistory.objects.bulk_create(history, batch_size=1000, ignore_conflicts=True)
+
+
+def _book_lists(rng, author, academic_year, items_per_list):
+    """A published list per class for this year and last year"""
+    booklists = BookList.objects.bulk_create([
+        BookList(
+            title=f"{class_name} book list {year}", academic_year=year, class_name=class_name,
+            status='published', publish_date=BASE_DATE, created_by=author,
+        )
+        for year in (previous_academic_year(academic_year), academic_year) for class_name in CLASSES
+    ])
+    BookListItem.objects.bulk_create([
+        BookListItem(
+            book_list=booklist, name=name, description=f"For {booklist.class_name}",
+            price=Decimal(rng.randrange(500, 12000)) / 100, quantity=rng.randint(1, 3),
+            is_required=rng.random() < 0.8, order=order,
+        )
+        for booklist in booklists
+        for order, name in enumerate(rng.sample(BOOKS, min(items_per_list, len(BOOKS))))
+    ])
+    invalidate_booklist_cache()
+    return len(booklists)
+
+
+def _job_posts(rng, author, posts, applications_per_post):
+    # One at a time: saving allocates the reference number and indexes the post for search
+    job_posts = []
+    for n in range(posts):
+        published = n % 5 != 4
+        job_posts.append(JobPost.objects.create(
+            title=f"{rng.choice(JOB_TITLES)} ({n + 1})", location=rng.choice(['Accra', 'Kumasi', 'Tema']),
+            description=" ".join(rng.choice(REMARKS) for _ in range(12)),
+            requirements="A relevant degree or diploma and two years of experience.",
+            salary_range=f"GHS {rng.randrange(2000, 5000, 500)}-{rng.randrange(5000, 9000, 500)}",
+            created_by=author, status='PUBLISHED' if published else 'DRAFT',
+            published_date=BASE_DATE - timedelta(days=n) if published else None,
+        ))
+
+    applications = [
+        JobApplication(
+            job_post=job_post, job_title=job_post.title, resume=f"resumes/loadtest-{job_post.pk}-{n}.pdf",
+            first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES),
+            email=f"applicant{job_post.pk}-{n}@{DOMAIN}",
+        )
+        for job_post in job_posts if job_post.status == 'PUBLISHED' for n in range(applications_per_post)
+    ]
+    JobApplication.objects.bulk_create(applications, batch_size=500)
+    # bulk_create skips the signal that keeps the denormalised count
+    for job_post in job_posts:
+        JobPost.objects.filter(pk=job_post.pk).update(applications_count=job_post.applications.count())
+    return len(job_posts), len(applications)
+
+
+def generate(seed=1, students=2600, staff=20, subjects=12, academic_year='2024-2025', terms=TERMS,
+             items_per_list=10, job_posts=30, applications_per_post=20, password='loadtest'):
+    """Create a school's worth of data; returns the number of rows of each kind"""
+    if CustomUser.objects.filter(email__endswith=f"@{DOMAIN}").exists():
+        raise ValueError("Generated data already exists; clear it first.")
+
+    rng = random.Random(seed)
+    staff_accounts, student_accounts = _accounts(rng, students, max(staff, 1), password)
+    principal = staff_accounts[0]
+    author = staff_accounts[1] if len(staff_accounts) > 1 else principal
+
+    courses = _courses(subjects, author)
+    results, course_results = _results(rng, student_accounts, courses, academic_year, terms)
+    _class_history(student_accounts, academic_year)
+    booklists = _book_lists(rng, author, academic_year, items_per_list)
+    posts, applications = _job_posts(rng, principal, job_posts, applications_per_post)
+
+    counts = {
+        'students': len(student_accounts),
+        'staff': len(staff_accounts),
+        'courses': len(courses),
+        'results': results,
+        'course_results': course_results,
+        'booklists': booklists,
+        'job_posts': posts,
+        'job_applications': applications,
+    }
+    logger.info(f"Generated load test data (seed {seed}): {counts}")
+    return counts
@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from loadtest import datagen
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with a deterministic, school-sized synthetic dataset for load tests: "
+        "students in every class, courses, results, book lists, job posts and applications. "
+        f"Generated accounts use @{datagen.DOMAIN} addresses."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--students', type=int, default=2600, help="Spread evenly over the classes")
+        parser.add_argument('--staff', type=int, default=20, help="Staff accounts, including the principal")
+        parser.add_argument('--subjects', type=int, default=12, choices=range(1, len(datagen.SUBJECTS) + 1),
+                            metavar=f"1-{len(datagen.SUBJECTS)}")
+        parser.add_argument('--academic-year', default='2024-2025')
+        parser.add_argument('--terms', default=','.join(datagen.TERMS), help="Comma separated, e.g. first,second")
+        parser.add_argument('--items-per-list', type=int, default=10, help="Items on each book list")
+        parser.add_argument('--job-posts', type=int, default=30)
+        parser.add_argument('--applications-per-post', type=int, default=20)
+        parser.add_argument('--password', default='loadtest', help="Password of every generated account")
+        parser.add_argument('--clear', action='store_true', help="Delete previously generated data first")
+        parser.add_argument('--clear-only', action='store_true', help="Delete previously generated data and stop")
+
+    def handle(self, *args, **options):
+        if options['clear'] or options['clear_only']:
+            deleted = datagen.clear()
+            self.stdout.write(f"Deleted {deleted} generated rows")
+            if options['clear_only']:
+                return
+
+        terms = [term.strip() for term in options['terms'].split(',') if term.strip()]
+        unknown = set(terms) - set(datagen.TERMS)
+        if unknown:
+            raise CommandError(f"Unknown terms: {', '.join(sorted(unknown))}")
+
+        started = time.perf_counter()
+        try:
+            counts = datagen.generate(
+                seed=options['seed'], students=options['students'], staff=options['staff'],
+                subjects=options['subjects'], academic_year=options['academic_year'], terms=terms,
+                items_per_list=options['items_per_list'], job_posts=options['job_posts'],
+                applications_per_post=options['applications_per_post'], password=options['password'],
+            )
+        except ValueError as e:
+            raise CommandError(f"{str(e)} Use --clear.")
+
+        for name, count in counts.items():
+            self.stdout.write(f"{name:<18}{count:>8}")
+        self.stdout.write(self.style.SUCCESS(f"Generated in {time.perf_counter() - started:.1f}s"))
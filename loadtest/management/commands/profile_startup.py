@@ -0,0 +1,55 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from loadtest.startup import by_package, import_times, total_seconds
+
+
+class Command(BaseCommand):
+    help = (
+        "Import Schoolproject.wsgi in a fresh interpreter, as a gunicorn worker does on boot, and "
+        "report the import cost per module and per package. The fastest of --runs runs is reported, "
+        "the others being slowed down by a cold disk cache or a busy machine."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--module', default='Schoolproject.wsgi')
+        parser.add_argument('--urls', action='store_true',
+                            help="Also load the URLconf and with it every view, as the first request does")
+        parser.add_argument('--runs', type=int, default=3)
+        parser.add_argument('--top', type=int, default=25, help="Modules and packages to list")
+        parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+
+    def handle(self, *args, **options):
+        if options['runs'] < 1:
+            raise CommandError("--runs must be at least 1")
+        try:
+            runs = [import_times(options['module'], options['urls']) for _ in range(options['runs'])]
+        except RuntimeError as e:
+            raise CommandError(str(e))
+        entries = min(runs, key=total_seconds)
+        top = options['top']
+        modules = sorted(entries, key=lambda entry: entry.cumulative_seconds, reverse=True)[:top]
+        packages = list(by_package(entries).items())[:top]
+
+        if options['json']:
+            self.stdout.write(json.dumps({
+                'module': options['module'],
+                'urls': options['urls'],
+                'total_seconds': round(total_seconds(entries), 4),
+                'modules_imported': len(entries),
+                'modules': [{'module': entry.module, 'self_seconds': round(entry.self_seconds, 4),
+                             'cumulative_seconds': round(entry.cumulative_seconds, 4)} for entry in modules],
+                'packages': [{'package': package, 'seconds': round(seconds, 4)} for package, seconds in packages],
+            }, indent=2))
+            return
+
+        self.stdout.write(f"{options['module']}: {total_seconds(entries) * 1000:.0f} ms, "
+                          f"{len(entries)} modules (fastest of {options['runs']})\n")
+        self.stdout.write(f"{'cumulative ms':>14} {'self ms':>9}  module")
+        for entry in modules:
+            self.stdout.write(f"{entry.cumulative_seconds * 1000:14.1f} {entry.self_seconds * 1000:9.1f}  "
+                              f"{'  ' * entry.depth}{entry.module}")
+        self.stdout.write(f"\n{'ms':>14}  package (its own modules only)")
+        for package, seconds in packages:
+            self.stdout.write(f"{seconds * 1000:14.1f}  {package}")
@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from loadtest.stub_email import StubEmailApi
+from momo_pay.stub_gateway import StubGateway
+
+
+class Command(BaseCommand):
+    help = (
+        "Run local stubs of the Brevo email API and the MoMo/Hubtel payment gateways for load "
+        "tests, and print the environment the server under test needs to use them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--email-port', type=int, default=8025)
+        parser.add_argument('--gateway-port', type=int, default=8099)
+        parser.add_argument('--email-latency', type=float, default=0.05, help="Seconds per email API call")
+        parser.add_argument('--callback-delay', type=float, default=0.5, help="Seconds before payment callbacks")
+        parser.add_argument('--server-url', default='http://127.0.0.1:8000', help="Where payment callbacks go")
+
+    def handle(self, *args, **options):
+        email = StubEmailApi(latency=options['email_latency'])
+        gateway = StubGateway(callback_delay=options['callback_delay'])
+        email_url = email.start(options['host'], options['email_port'])
+        gateway_url = gateway.start(options['host'], options['gateway_port'])
+        server_url = options['server_url'].rstrip('/')
+
+        self.stdout.write("Start the server under test with:\n")
+        for name, value in [
+            ('BREVO_API_HOST', f"{email_url}/v3"),
+            ('MOMO_BASE_URL', gateway_url),
+            ('MOMO_SUBSCRIPTION_KEY', 'loadtest'),
+            ('MOMO_API_USER', 'loadtest'),
+            ('MOMO_API_KEY', 'loadtest'),
+            ('MOMO_CALLBACK_URL', f"{server_url}/api/payments/callback/momo/"),
+            ('HUBTEL_BASE_URL', gateway_url),
+            ('HUBTEL_STATUS_URL', gateway_url),
+            ('HUBTEL_CALLBACK_URL', f"{server_url}/api/payments/callback/hubtel/"),
+        ]:
+            self.stdout.write(f"    export {name}={value}")
+        self.stdout.write("\nStubs running, Ctrl-C to stop.")
+
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            email.stop()
+            gateway.stop()
+        self.stdout.write(f"Stub email API accepted {len(email.messages)} messages")
@@ -0,0 +1,130 @@
+import json
+import random
+import subprocess
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from authapp.models import CustomUser
+from loadtest import datagen
+from loadtest.runner import LoadTest, VirtualUser, assign_roles
+from loadtest.workloads import DEFAULT_MIX, WORKLOADS
+
+
+def parse_mix(value):
+    """'student=70,staff=20,public=10' -> {'student': 70, 'staff': 20, 'public': 10}"""
+    mix = {}
+    for part in value.split(','):
+        role, _, weight = part.partition('=')
+        role = role.strip()
+        if role not in WORKLOADS or not weight.strip().isdigit():
+            raise CommandError(f"Bad --mix entry '{part}'; roles are {', '.join(WORKLOADS)}")
+        mix[role] = int(weight)
+    if not any(mix.values()):
+        raise CommandError("--mix needs at least one role with a weight above 0")
+    return mix
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a mix of student portal, staff and public traffic against a running server with "
+        "many concurrent clients, and report p50/p95/p99 latency and throughput per endpoint as "
+        "JSON. Needs the data from generate_school_data in the server's database and the same "
+        "SECRET_KEY, since access tokens are minted locally."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--clients', type=int, default=50, help="Concurrent virtual users")
+        parser.add_argument('--duration', type=float, default=30, help="Measured seconds")
+        parser.add_argument('--warmup', type=float, default=5, help="Seconds of load before measuring")
+        parser.add_argument('--mix', default=','.join(f"{role}={weight}" for role, weight in DEFAULT_MIX.items()),
+                            help="Relative share of clients per role")
+        parser.add_argument('--think-time', type=float, default=0, help="Mean seconds between a client's requests")
+        parser.add_argument('--timeout', type=float, default=30, help="Seconds before a request counts as failed")
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--output', help="Write the JSON report here instead of standard output")
+
+    def virtual_users(self, roles, seed):
+        rng = random.Random(seed)
+        accounts = CustomUser.objects.filter(email__endswith=f"@{datagen.DOMAIN}", is_active=True).order_by('id')
+        # Not the youngest class: every student endpoint, previous_classes included, then has data
+        students = list(accounts.filter(role='student').exclude(class_name=datagen.CLASSES[0]))
+        staff = list(accounts.filter(role__in=['staff', 'principal']))
+        if not students or not staff:
+            raise CommandError("No generated accounts found; run generate_school_data first.")
+
+        users = []
+        for role in roles:
+            if role == 'public':
+                users.append(VirtualUser(role))
+            elif role == 'student':
+                student = rng.choice(students)
+                users.append(VirtualUser(
+                    role, token=str(AccessToken.for_user(student)), student_id=student.pk,
+                    class_name=student.class_name, previous_class=datagen.previous_class(student.class_name),
+                ))
+            else:
+                users.append(VirtualUser(role, token=str(AccessToken.for_user(rng.choice(staff)))))
+        return users, [student.pk for student in students]
+
+    def handle(self, *args, **options):
+        mix = parse_mix(options['mix'])
+        roles = assign_roles(options['clients'], mix)
+        users, student_ids = self.virtual_users(roles, options['seed'])
+
+        started_at = datetime.now(timezone.utc)
+        load_test = LoadTest(
+            options['base_url'], users, classes=datagen.CLASSES, terms=list(datagen.TERMS), student_ids=student_ids,
+            duration=options['duration'], warmup=options['warmup'], seed=options['seed'],
+            timeout=options['timeout'], think_time=options['think_time'],
+        )
+        self.stderr.write(
+            f"{len(users)} clients ({', '.join(f'{roles.count(role)} {role}' for role in mix)}) "
+            f"for {options['warmup']:g}s + {options['duration']:g}s against {options['base_url']}"
+        )
+        summary = load_test.run()
+
+        report = {
+            'meta': {
+                'base_url': options['base_url'],
+                'commit': git_commit(),
+                'started_at': started_at.isoformat(),
+                'clients': len(users),
+                'mix': mix,
+                'duration': options['duration'],
+                'warmup': options['warmup'],
+                'think_time': options['think_time'],
+                'seed': options['seed'],
+            },
+            **summary,
+        }
+
+        self.stderr.write(
+            f"{'endpoint':<36}{'requests':>9}{'errors':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+        )
+        for name, stats in [*summary['endpoints'].items(), ('total', summary['totals'])]:
+            self.stderr.write(
+                f"{name:<36}{stats['requests']:>9}{stats['errors']:>8}{stats['throughput']:>9.1f}"
+                f"{stats['p50_ms']:>9.1f}{stats['p95_ms']:>9.1f}{stats['p99_ms']:>9.1f}"
+            )
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+            self.stderr.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+        else:
+            self.stdout.write(output)
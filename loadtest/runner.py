@@ -0,0 +1,152 @@
+"""
+Closed-loop HTTP load generator.
+
+Each virtual user is one coroutine that sends a request, waits for the answer
+(plus `think_time`), and sends the next, so the load rises with the number of
+clients and the server's speed rather than with a fixed arrival rate. Requests
+that start during the warm-up are not counted. summarize() reduces the samples
+to per-endpoint latency percentiles and throughput.
+"""
+import asyncio
+import itertools
+import math
+import random
+import time
+from dataclasses import dataclass
+
+import aiohttp
+
+from .workloads import WORKLOADS
+
+
+@dataclass
+class VirtualUser:
+    role: str
+    token: str = None
+    student_id: int = None
+    class_name: str = None
+    previous_class: str = None
+
+
+@dataclass
+class Sample:
+    endpoint: str
+    started: float  # seconds since the start of the run
+    latency: float  # seconds
+    status: int  # 0 when no response arrived
+
+
+def assign_roles(clients, mix):
+    """Split `clients` between the roles in proportion to `mix` (largest remainder first)"""
+    total = sum(mix.values())
+    shares = {role: clients * weight / total for role, weight in mix.items()}
+    counts = {role: int(share) for role, share in shares.items()}
+    leftover = sorted(shares, key=lambda role: shares[role] - counts[role], reverse=True)
+    for role in leftover[:clients - sum(counts.values())]:
+        counts[role] += 1
+    return [role for role in mix for _ in range(counts[role])]
+
+
+def percentile(ordered, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    return ordered[max(math.ceil(pct / 100 * len(ordered)) - 1, 0)]
+
+
+def summarize(samples, duration):
+    """Per-endpoint and overall counts, error counts, throughput and latency percentiles (ms)"""
+    def stats(group):
+        latencies = sorted(sample.latency * 1000 for sample in group)
+        statuses = {}
+        for sample in group:
+            statuses[str(sample.status)] = statuses.get(str(sample.status), 0) + 1
+        return {
+            'requests': len(group),
+            'errors': sum(1 for sample in group if not 200 <= sample.status < 400),
+            'throughput': round(len(group) / duration, 2) if duration else 0,
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p95_ms': round(percentile(latencies, 95), 2),
+            'p99_ms': round(percentile(latencies, 99), 2),
+            'max_ms': round(latencies[-1], 2) if latencies else 0.0,
+            'statuses': dict(sorted(statuses.items())),
+        }
+
+    by_endpoint = {}
+    for sample in samples:
+        by_endpoint.setdefault(sample.endpoint, []).append(sample)
+    return {
+        'totals': stats(samples),
+        'endpoints': {name: stats(group) for name, group in sorted(by_endpoint.items())},
+    }
+
+
+class LoadTest:
+
+    def __init__(self, base_url, users, classes, terms, student_ids, duration=30, warmup=0, seed=1,
+                 timeout=30, think_time=0, workloads=WORKLOADS):
+        self.base_url = base_url.rstrip('/')
+        self.users = users
+        self.classes = classes
+        self.terms = terms
+        self.student_ids = student_ids
+        self.duration = duration
+        self.warmup = warmup
+        self.seed = seed
+        self.timeout = timeout
+        self.think_time = think_time
+        self.workloads = workloads
+        # Unique per run too, so POSTed addresses do not collide with earlier runs'
+        self._numbers = (f"{int(time.time())}{n}" for n in itertools.count())
+        self.samples = []
+
+    def _placeholders(self, user, rng):
+        return {
+            'class_name': user.class_name or rng.choice(self.classes),
+            'previous_class': user.previous_class or rng.choice(self.classes),
+            'term': rng.choice(self.terms),
+            'student': user.student_id or rng.choice(self.student_ids),
+            'n': next(self._numbers),
+            # The stub gateway settles payers ending in 0 or 6-9 as SUCCESSFUL
+            'payer': f"024{rng.randrange(10 ** 6):06d}{rng.choice('06789')}",
+        }
+
+    async def _client(self, session, user, rng, started, deadline):
+        endpoints = self.workloads[user.role]
+        weights = [endpoint.weight for endpoint in endpoints]
+        headers = {'Authorization': f"Bearer {user.token}"} if user.token else {}
+
+        while time.monotonic() < deadline:
+            endpoint = rng.choices(endpoints, weights)[0]
+            values = self._placeholders(user, rng)
+            url = self.base_url + endpoint.path.format(**values)
+            body = {key: value.format(**values) for key, value in endpoint.body.items()} or None
+
+            sent = time.monotonic()
+            try:
+                async with session.request(endpoint.method, url, json=body, headers=headers) as response:
+                    await response.read()
+                    status = response.status
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                status = 0
+            if sent - started >= self.warmup:
+                self.samples.append(Sample(endpoint.name, sent - started, time.monotonic() - sent, status))
+            if self.think_time:
+                await asyncio.sleep(rng.expovariate(1 / self.think_time))
+
+    async def _run(self):
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        connector = aiohttp.TCPConnector(limit=len(self.users))
+        async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+            started = time.monotonic()
+            deadline = started + self.warmup + self.duration
+            await asyncio.gather(*[
+                self._client(session, user, random.Random(f"{self.seed}-{n}"), started, deadline)
+                for n, user in enumerate(self.users)
+            ])
+
+    def run(self):
+        """Run the load and return the summary"""
+        self.samples = []
+        asyncio.run(self._run())
+        return summarize(self.samples, self.duration)
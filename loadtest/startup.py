@@ -0,0 +1,63 @@
+"""
+What a worker spends on imports before it can serve a request.
+
+import_times() imports a module (Schoolproject.wsgi by default, which loads the
+settings, every installed app and the middleware, as each gunicorn worker does)
+in a fresh interpreter under `python -X importtime`, and returns the cost of
+every module it imported. With urls=True the URLconf is loaded too, which
+otherwise happens on the worker's first request and brings in all the views.
+"""
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from dataclasses import dataclass
+
+from django.conf import settings
+
+IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$')
+
+
+@dataclass
+class ImportTime:
+    module: str
+    self_seconds: float
+    cumulative_seconds: float
+    depth: int
+
+    @property
+    def package(self):
+        return self.module.split('.')[0]
+
+
+def import_times(module='Schoolproject.wsgi', urls=False):
+    """Every module imported by `import module`, in import order"""
+    code = f"import {module}"
+    if urls:
+        code += "; from django.urls import get_resolver; get_resolver().url_patterns"
+    environment = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'Schoolproject.settings'))
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=settings.BASE_DIR,
+                            env=environment, capture_output=True, text=True)
+    if result.returncode:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append(ImportTime(name, int(self_us) / 1e6, int(cumulative_us) / 1e6, len(indent) // 2))
+    return entries
+
+
+def total_seconds(entries):
+    return sum(entry.cumulative_seconds for entry in entries if entry.depth == 0)
+
+
+def by_package(entries):
+    """{top-level package: seconds spent in its own modules}, most expensive first"""
+    totals = defaultdict(float)
+    for entry in entries:
+        totals[entry.package] += entry.self_seconds
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
@@ -0,0 +1,59 @@
+"""
+Local stand-in for the Brevo transactional email API, so a load test can drive the
+endpoints that send mail without sending any.
+
+Accepts POST /v3/smtp/email (single messages and messageVersions batches) after
+`latency` seconds and answers like Brevo does. Point the SDK at it with
+BREVO_API_HOST, see use_email_host().
+"""
+import asyncio
+import itertools
+import logging
+
+from aiohttp import web
+from sib_api_v3_sdk import Configuration
+
+from momo_pay.stub_gateway import BackgroundServer
+
+logger = logging.getLogger(__name__)
+
+
+def use_email_host(host):
+    """
+    Send every Brevo SDK call in this process to `host` (e.g. http://127.0.0.1:8025/v3).
+    The views build a fresh Configuration() per email, and those copy the default.
+    """
+    configuration = None
+    if host:
+        configuration = Configuration()
+        configuration.host = host.rstrip('/')
+    Configuration.set_default(configuration)
+
+
+class StubEmailApi(BackgroundServer):
+    thread_name = 'stub-email'
+
+    def __init__(self, latency=0.05):
+        super().__init__()
+        self.latency = latency
+        self.messages = []
+        self._ids = itertools.count(1)
+
+    def app(self):
+        app = web.Application()
+        app.add_routes([web.post('/v3/smtp/email', self.send_email)])
+        return app
+
+    async def send_email(self, request):
+        if not request.headers.get('api-key'):
+            return web.json_response({'code': 'unauthorized', 'message': 'Key not found'}, status=401)
+        body = await request.json()
+        if not body.get('to') and not body.get('messageVersions'):
+            return web.json_response({'code': 'missing_parameter', 'message': 'to is missing'}, status=400)
+
+        await asyncio.sleep(self.latency)
+        self.messages.append(body)
+        versions = body.get('messageVersions')
+        if versions:
+            return web.json_response({'messageIds': [f"<stub-{next(self._ids)}@localhost>" for _ in versions]}, status=201)
+        return web.json_response({'messageId': f"<stub-{next(self._ids)}@localhost>"}, status=201)
@@ -0,0 +1,138 @@
+import os
+
+from django.test import LiveServerTestCase, SimpleTestCase, TestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from authapp.models import CustomUser
+from ResultsEntry.models import CourseResult, Result
+
+from . import datagen, startup
+from .runner import LoadTest, Sample, VirtualUser, assign_roles, percentile, summarize
+from .stub_email import StubEmailApi, use_email_host
+from .workloads import WORKLOADS
+
+SMALL = dict(students=26, staff=3, subjects=3, terms=('first',), items_per_list=2, job_posts=2,
+             applications_per_post=2)
+
+
+def snapshot():
+    return list(
+        CourseResult.objects.order_by('result__student__email', 'result__academic_year', 'class_course__course__code')
+        .values_list('result__student__email', 'result__class_name', 'class_score', 'exam_score', 'position')
+    )
+
+
+class DataGenerationTests(TestCase):
+
+    def test_same_seed_gives_same_data(self):
+        datagen.generate(seed=7, **SMALL)
+        first = snapshot()
+        datagen.clear()
+        datagen.generate(seed=7, **SMALL)
+        self.assertEqual(snapshot(), first)
+
+        datagen.clear()
+        datagen.generate(seed=8, **SMALL)
+        self.assertNotEqual(snapshot(), first)
+
+    def test_school_shape(self):
+        counts = datagen.generate(**SMALL)
+        self.assertEqual(counts['students'], 26)
+        students = CustomUser.objects.filter(role='student')
+        for class_name in datagen.CLASSES:
+            self.assertEqual(students.filter(class_name=class_name).count(), 2)
+        # This year's first term for everyone, last year's third term for all but the youngest class
+        self.assertEqual(Result.objects.filter(term='first').count(), 26)
+        self.assertEqual(Result.objects.filter(term='third', academic_year='2023-2024').count(), 24)
+        self.assertEqual(CourseResult.objects.count(), 50 * 3)
+        self.assertFalse(Result.objects.filter(overall_position__isnull=True).exists())
+
+    def test_refuses_to_generate_twice(self):
+        datagen.generate(**SMALL)
+        with self.assertRaises(ValueError):
+            datagen.generate(**SMALL)
+        datagen.clear()
+        self.assertFalse(CustomUser.objects.filter(email__endswith=f"@{datagen.DOMAIN}").exists())
+        self.assertFalse(Result.objects.exists())
+
+
+class SummaryTests(SimpleTestCase):
+
+    def test_assign_roles(self):
+        self.assertEqual(assign_roles(10, {'student': 70, 'staff': 20, 'public': 10}),
+                         ['student'] * 7 + ['staff'] * 2 + ['public'])
+        self.assertEqual(len(assign_roles(7, {'student': 1, 'staff': 1, 'public': 1})), 7)
+
+    def test_percentiles(self):
+        ordered = list(range(1, 101))
+        self.assertEqual(percentile(ordered, 50), 50)
+        self.assertEqual(percentile(ordered, 99), 99)
+        self.assertEqual(percentile([], 50), 0.0)
+
+    def test_summarize(self):
+        samples = [Sample('a', 0, 0.010, 200), Sample('a', 0, 0.030, 500), Sample('b', 0, 0.020, 0)]
+        summary = summarize(samples, duration=2)
+        self.assertEqual(summary['totals']['requests'], 3)
+        self.assertEqual(summary['totals']['errors'], 2)
+        self.assertEqual(summary['endpoints']['a']['throughput'], 1.0)
+        self.assertEqual(summary['endpoints']['a']['p99_ms'], 30.0)
+        self.assertEqual(summary['endpoints']['b']['statuses'], {'0': 1})
+
+
+class LoadTestRunTests(LiveServerTestCase):
+    """A short run of every workload but payments against the live server, emails going to the stub"""
+
+    def setUp(self):
+        self.email = StubEmailApi(latency=0)
+        self.email.start()
+        self.addCleanup(self.email.stop)
+        use_email_host(f"{self.email.base_url}/v3")
+        self.addCleanup(use_email_host, None)
+
+    def test_run(self):
+        datagen.generate(**SMALL)
+        student = CustomUser.objects.filter(role='student', class_name='Class 2').first()
+        staff = CustomUser.objects.get(email=f"principal@{datagen.DOMAIN}")
+        users = [
+            VirtualUser('student', token=str(AccessToken.for_user(student)), student_id=student.pk,
+                        class_name=student.class_name, previous_class='Class 1'),
+            VirtualUser('staff', token=str(AccessToken.for_user(staff))),
+            VirtualUser('public'),
+        ]
+        # Payments would need the gateway stub and a payment worker; momo_pay's tests cover those
+        workloads = {**WORKLOADS, 'public': [e for e in WORKLOADS['public'] if e.name != 'request-payment']}
+
+        summary = LoadTest(
+            self.live_server_url, users, classes=datagen.CLASSES, terms=['first'],
+            student_ids=[student.pk], duration=2, seed=3, timeout=10, workloads=workloads,
+        ).run()
+
+        self.assertGreater(summary['totals']['requests'], 0)
+        self.assertEqual(summary['totals']['errors'], 0, summary['endpoints'])
+        for stats in summary['endpoints'].values():
+            self.assertLessEqual(stats['p50_ms'], stats['p95_ms'])
+            self.assertLessEqual(stats['p95_ms'], stats['p99_ms'])
+        subscriptions = summary['endpoints'].get('subscriptions create', {}).get('requests', 0)
+        self.assertEqual(len(self.email.messages), subscriptions)
+
+
+class StartupTests(SimpleTestCase):
+    # About 0.65s on a development laptop, down from 0.9s before the heavy imports
+    # were deferred; set STARTUP_IMPORT_BUDGET on slower machines
+    COLD_IMPORT_BUDGET = float(os.environ.get('STARTUP_IMPORT_BUDGET', 1.0))
+    # Only needed for PDFs, emails and resume text, never to start a worker
+    DEFERRED = ['reportlab', 'sib_api_v3_sdk', 'pypdf', 'PIL', 'geoip2', 'google', 'rest_framework_jwt']
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.runs = [startup.import_times() for _ in range(3)]
+
+    def test_cold_import_time(self):
+        fastest = min(startup.total_seconds(entries) for entries in self.runs)
+        self.assertLess(fastest, self.COLD_IMPORT_BUDGET,
+                        "Schoolproject.wsgi imports too slowly; see `manage.py profile_startup`")
+
+    def test_heavy_packages_not_imported(self):
+        packages = {entry.package for entry in self.runs[0]}
+        self.assertEqual([package for package in self.DEFERRED if package in packages], [])
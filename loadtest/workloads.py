@@ -0,0 +1,65 @@
+"""
+What each kind of simulated user does.
+
+A client picks its next request from its role's list, weighted by `weight`.
+Paths and bodies may use these placeholders, filled per request:
+
+    {class_name}  the student's own class; a random class for staff and visitors
+    {previous_class}  the class below the student's (their own in the youngest class)
+    {term}        a random term
+    {student}     the student's own id; a random generated student for staff
+    {n}           a number unique to the request, for addresses in POST bodies
+    {payer}       a mobile money number the stub gateway settles as SUCCESSFUL
+
+Reports are keyed on `name`, so keep names stable when paths change.
+"""
+from dataclasses import dataclass, field
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    name: str
+    path: str
+    weight: int = 1
+    method: str = 'GET'
+    body: dict = field(default_factory=dict)
+
+
+WORKLOADS = {
+    # The student portal: results, report history and book lists
+    'student': [
+        Endpoint('my-results', '/api/my-results/', weight=6),
+        Endpoint('my-results current_class', '/api/my-results/current_class/', weight=4),
+        Endpoint('my-results previous_classes',
+                 '/api/my-results/previous_classes/?class_name={previous_class}&term=third', weight=1),
+        Endpoint('booklists my_class', '/api/booklists/my_class/', weight=3),
+        Endpoint('booklists current_class', '/api/booklists/current_class/', weight=2),
+        Endpoint('booklists history', '/api/booklists/history/', weight=1),
+        Endpoint('user-detail-auth', '/api/user-detail-auth/', weight=2),
+    ],
+    # Teachers entering and reviewing results, the office handling applications
+    'staff': [
+        Endpoint('results get_class_results', '/api/results/get_class_results/?class_name={class_name}&term={term}',
+                 weight=4),
+        Endpoint('results get_students_by_class', '/api/results/get_students_by_class/?class_name={class_name}',
+                 weight=2),
+        Endpoint('results get_student_results', '/api/results/get_student_results/?student={student}', weight=3),
+        Endpoint('class-courses by_class_and_term',
+                 '/api/class-courses/by_class_and_term/?class_name={class_name}&term={term}', weight=2),
+        Endpoint('booklists', '/api/booklists/', weight=1),
+        Endpoint('job-applications', '/api/job-applications/', weight=1),
+        Endpoint('tickets', '/api/tickets/', weight=1),
+        Endpoint('triage depth', '/api/triage/depth/', weight=1),
+    ],
+    # Visitors to the public site; these reach the email and payment stubs
+    'public': [
+        Endpoint('jobposts list_published_posts', '/api/api/jobposts/list_published_posts/', weight=8),
+        Endpoint('courses', '/api/courses/', weight=2),
+        Endpoint('subscriptions create', '/api/subscriptions/', method='POST',
+                 body={'full_name': 'Load Test Reader', 'email': 'reader{n}@loadtest.example.com'}),
+        Endpoint('request-payment', '/api/request-payment/', method='POST',
+                 body={'amount': '25.00', 'payer': '{payer}', 'description': 'School fees'}),
+    ],
+}
+
+DEFAULT_MIX = {'student': 70, 'staff': 20, 'public': 10}
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class MediaStoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'media_store'
+
+    def ready(self):
+        from .tracking import connect_tracked_fields
+        connect_tracked_fields()
@@ -0,0 +1,144 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from media_store.models import MediaBlob
+from media_store.tracking import get_tracked_models
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete content-hashed media blobs that no model references any more. "
+        "Optionally recount references from the database first and sweep legacy "
+        "suffixed files (e.g. old report card renders) left in the upload folders."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Report what would be deleted without deleting")
+        parser.add_argument(
+            '--grace-minutes', type=int, default=60,
+            help="Keep unreferenced blobs younger than this, so uploads in flight are not collected (default 60)"
+        )
+        parser.add_argument(
+            '--recount', action='store_true',
+            help="Recompute every blob's ref_count from the referencing tables before collecting"
+        )
+        parser.add_argument(
+            '--legacy', action='store_true',
+            help="Also delete unreferenced files stored before content hashing, directly under each upload folder"
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        references = self._count_references()
+
+        if options['recount']:
+            self._recount(references, dry_run)
+
+        cutoff = timezone.now() - timedelta(minutes=options['grace_minutes'])
+        orphans = MediaBlob.objects.filter(ref_count__lte=0, last_stored_at__lt=cutoff)
+
+        deleted_blobs, freed_bytes = 0, 0
+        for blob, storage in self._with_storage(orphans):
+            if blob.name in references:
+                # Counter drifted; the file is still referenced
+                continue
+            if not dry_run and not self._delete_blob(blob, storage, cutoff):
+                # Reused by an upload since it was selected
+                continue
+            self.stdout.write(f"Orphaned blob: {blob.name} ({blob.size} bytes)")
+            deleted_blobs += 1
+            freed_bytes += blob.size
+
+        deleted_legacy = 0
+        if options['legacy']:
+            deleted_legacy, legacy_bytes = self._sweep_legacy(references, cutoff, dry_run)
+            freed_bytes += legacy_bytes
+
+        verb = "Would delete" if dry_run else "Deleted"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {deleted_blobs} orphaned blobs and {deleted_legacy} legacy files, "
+            f"{freed_bytes / (1024 * 1024):.2f} MB"
+        ))
+
+    def _delete_blob(self, blob, storage, cutoff):
+        """
+        Delete the blob's row and file, unless it has been referenced or stored again
+        since it was selected. The row goes first, in the same transaction, so an
+        upload claiming the blob (ContentHashStorage._claim) waits for both and then
+        finds neither.
+        """
+        with transaction.atomic():
+            deleted, _ = MediaBlob.objects.filter(
+                pk=blob.pk, ref_count__lte=0, last_stored_at__lt=cutoff
+            ).delete()
+            if deleted:
+                storage.delete(blob.name)
+        return bool(deleted)
+
+    def _count_references(self):
+        """Map of stored file name -> number of rows referencing it, one grouped query per field"""
+        references = {}
+        for model, fields in get_tracked_models():
+            for field in fields:
+                rows = model._default_manager.exclude(**{field.attname: ''}).exclude(
+                    **{f"{field.attname}__isnull": True}
+                ).values(field.attname).annotate(total=Count('pk')).order_by()
+                for row in rows:
+                    name = row[field.attname]
+                    references[name] = references.get(name, 0) + row['total']
+        return references
+
+    def _recount(self, references, dry_run):
+        changed = []
+        for blob in MediaBlob.objects.only('id', 'name', 'ref_count'):
+            actual = references.get(blob.name, 0)
+            if blob.ref_count != actual:
+                blob.ref_count = actual
+                changed.append(blob)
+
+        self.stdout.write(f"{len(changed)} blob reference counts out of sync")
+        if changed and not dry_run:
+            MediaBlob.objects.bulk_update(changed, ['ref_count'], batch_size=500)
+
+    def _with_storage(self, blobs):
+        """Pair each blob with the storage of the upload folder it lives in"""
+        storages = {}
+        for model, fields in get_tracked_models():
+            for field in fields:
+                storages.setdefault(field.upload_to.rstrip('/'), field.storage)
+
+        for blob in blobs:
+            storage = storages.get(blob.name.split('/', 1)[0])
+            if storage is not None:
+                yield blob, storage
+
+    def _sweep_legacy(self, references, cutoff, dry_run):
+        """Delete unreferenced pre-hashing files sitting directly in each upload folder"""
+        deleted, freed = 0, 0
+        seen_folders = set()
+        for model, fields in get_tracked_models():
+            for field in fields:
+                folder = field.upload_to.rstrip('/')
+                if folder in seen_folders or not field.storage.exists(folder):
+                    continue
+                seen_folders.add(folder)
+
+                # Only top-level files: hashed blobs live in two-character subfolders
+                _dirs, files = field.storage.listdir(folder)
+                for filename in files:
+                    name = f"{folder}/{filename}"
+                    if name in references or filename.startswith('.'):
+                        continue
+                    if field.storage.get_modified_time(name) >= cutoff:
+                        continue
+                    size = field.storage.size(name)
+                    self.stdout.write(f"Unreferenced legacy file: {name} ({size} bytes)")
+                    if not dry_run:
+                        field.storage.delete(name)
+                    deleted += 1
+                    freed += size
+        return deleted, freed
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.6 on 2026-10-19 12:08
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media_store', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediablob',
+            name='last_stored_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
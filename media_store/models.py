@@ -0,0 +1,24 @@
+from django.db import models
+from django.utils import timezone
+
+
+class MediaBlob(models.Model):
+    """
+    A stored upload, named after the SHA-256 of its content.
+    Identical uploads share one blob; ref_count tracks how many model fields point at it.
+    """
+    name = models.CharField(max_length=255, unique=True, help_text="Storage name relative to MEDIA_ROOT")
+    sha256 = models.CharField(max_length=64, db_index=True)
+    size = models.PositiveBigIntegerField(default=0)
+    ref_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Set again whenever an upload with the same content reuses the blob
+    last_stored_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} refs)"
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Media Blob"
+        verbose_name_plural = "Media Blobs"
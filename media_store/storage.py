@@ -0,0 +1,83 @@
+"""
+Content-addressed file storage for uploads and generated files.
+
+Files are streamed to a temporary file in chunks while being hashed, then moved to
+`<upload_to>/<first two hex digits>/<sha256><ext>`. A second upload with the same
+bytes lands on the same name and is discarded instead of getting a `_AbC123x`
+suffix, so regenerating an unchanged report card writes nothing new.
+"""
+import hashlib
+import os
+import posixpath
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.utils import timezone
+
+
+class ContentHashStorage(FileSystemStorage):
+
+    def get_available_name(self, name, max_length=None):
+        # The final name comes from the content in _save, so never suffix it
+        return name
+
+    def _save(self, name, content):
+        from .models import MediaBlob
+
+        directory, filename = posixpath.split(name.replace('\\', '/'))
+        extension = os.path.splitext(filename)[1].lower()
+
+        full_directory = self.path(directory)
+        os.makedirs(full_directory, exist_ok=True)
+
+        hasher = hashlib.sha256()
+        size = 0
+        fd, temp_path = tempfile.mkstemp(dir=full_directory, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode('utf-8')
+                    hasher.update(chunk)
+                    temp_file.write(chunk)
+                    size += len(chunk)
+
+            digest = hasher.hexdigest()
+            blob_name = posixpath.join(directory, digest[:2], f"{digest}{extension}")
+            blob_path = self.path(blob_name)
+
+            # Claim the blob before looking for its file. The garbage collector deletes
+            # a blob's row and file together, and never one stored within its grace
+            # period, so the file is either still there or already gone and rewritten here
+            self._claim(blob_name, digest, size)
+            if os.path.exists(blob_path):
+                # Same bytes are already stored
+                os.remove(temp_path)
+            else:
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                os.replace(temp_path, blob_path)
+                if self.file_permissions_mode is not None:
+                    os.chmod(blob_path, self.file_permissions_mode)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        return blob_name
+
+    def _claim(self, blob_name, digest, size):
+        from .models import MediaBlob
+
+        if not MediaBlob.objects.filter(name=blob_name).update(last_stored_at=timezone.now()):
+            MediaBlob.objects.get_or_create(name=blob_name, defaults={'sha256': digest, 'size': size})
+
+
+_content_hash_storage = None
+
+
+def content_hash_storage():
+    """Callable used as `storage=` on model file fields so migrations stay stable"""
+    global _content_hash_storage
+    if _content_hash_storage is None:
+        _content_hash_storage = ContentHashStorage()
+    return _content_hash_storage
@@ -0,0 +1,89 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from tickets.models import Ticket
+from .models import MediaBlob
+from .storage import content_hash_storage
+
+
+def make_ticket(screenshot=b'png bytes'):
+    return Ticket.objects.create(
+        TicketID=f"RCSTK{Ticket.objects.count() + 1:04d}", full_name='Test User', email='user@example.com',
+        phone_number='0240000000', section='others', severity='low', description='Broken link',
+        screenshot=ContentFile(screenshot, name='shot.png'),
+    )
+
+
+class MediaStoreTests(TestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.storage = content_hash_storage()
+
+    def age_blobs(self, hours=2):
+        MediaBlob.objects.update(last_stored_at=timezone.now() - timedelta(hours=hours))
+
+    def collect(self, **options):
+        out = StringIO()
+        call_command('collect_media_garbage', stdout=out, **options)
+        return out.getvalue()
+
+    def test_identical_uploads_share_a_blob(self):
+        first, second = make_ticket(), make_ticket()
+        self.assertEqual(first.screenshot.name, second.screenshot.name)
+        self.assertEqual(MediaBlob.objects.get().ref_count, 2)
+
+        first.delete()
+        self.assertEqual(MediaBlob.objects.get().ref_count, 1)
+
+    def test_referenced_blob_is_kept(self):
+        ticket = make_ticket()
+        self.age_blobs()
+        self.collect()
+        self.assertTrue(self.storage.exists(ticket.screenshot.name))
+        self.assertTrue(MediaBlob.objects.exists())
+
+    def test_referenced_blob_with_drifted_counter_is_kept(self):
+        ticket = make_ticket()
+        MediaBlob.objects.update(ref_count=0)
+        self.age_blobs()
+        self.collect()
+        self.assertTrue(self.storage.exists(ticket.screenshot.name))
+
+    def test_unreferenced_blob_is_deleted(self):
+        name = self.storage.save('screenshots/shot.png', ContentFile(b'orphan'))
+        self.age_blobs()
+        self.assertIn("Would delete 1 orphaned blobs", self.collect(dry_run=True))
+        self.assertTrue(self.storage.exists(name))
+
+        self.assertIn("Deleted 1 orphaned blobs", self.collect())
+        self.assertFalse(self.storage.exists(name))
+        self.assertFalse(MediaBlob.objects.exists())
+
+    def test_reused_blob_is_kept_for_the_grace_period(self):
+        name = self.storage.save('screenshots/shot.png', ContentFile(b'orphan'))
+        self.age_blobs()
+        # An upload of the same bytes, not yet referenced by a saved row
+        self.assertEqual(self.storage.save('screenshots/again.png', ContentFile(b'orphan')), name)
+        self.collect()
+        self.assertTrue(self.storage.exists(name))
+
+    def test_blob_file_is_restored_if_collected_before_the_claim(self):
+        name = self.storage.save('screenshots/shot.png', ContentFile(b'orphan'))
+        self.age_blobs()
+        self.collect()
+        # Stored again right after the collector removed it
+        self.assertEqual(self.storage.save('screenshots/again.png', ContentFile(b'orphan')), name)
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(MediaBlob.objects.get().name, name)
@@ -0,0 +1,85 @@
+"""
+Reference counting for blobs held in ContentHashStorage.
+
+Every model file field using the storage is picked up automatically. The stored
+name is remembered when an instance is loaded, and on save or delete the
+difference is applied to MediaBlob.ref_count with F() updates.
+"""
+from functools import lru_cache
+
+from django.apps import apps
+from django.db.models import F, FileField
+from django.db.models.fields.files import FieldFile
+from django.db.models.signals import post_init, post_save, post_delete
+
+from .models import MediaBlob
+from .storage import ContentHashStorage
+
+ORIGINALS_ATTR = '_media_store_originals'
+
+
+@lru_cache(maxsize=None)
+def get_tracked_fields(model):
+    """File fields of `model` whose storage is content-hashed"""
+    return tuple(
+        field for field in model._meta.concrete_fields
+        if isinstance(field, FileField) and isinstance(field.storage, ContentHashStorage)
+    )
+
+
+def get_tracked_models():
+    """(model, [fields]) pairs for every installed model with tracked file fields"""
+    tracked = []
+    for model in apps.get_models():
+        fields = get_tracked_fields(model)
+        if fields:
+            tracked.append((model, fields))
+    return tracked
+
+
+def _stored_name(instance, field):
+    # Read __dict__ directly so a deferred field is not fetched just to track it
+    value = instance.__dict__.get(field.attname)
+    if isinstance(value, FieldFile):
+        # Uncommitted uploads have no blob yet
+        return value.name if value._committed and value.name else None
+    if isinstance(value, str):
+        return value or None
+    return None
+
+
+def _adjust(name, delta):
+    if name:
+        MediaBlob.objects.filter(name=name).update(ref_count=F('ref_count') + delta)
+
+
+def _remember(sender, instance, **kwargs):
+    setattr(instance, ORIGINALS_ATTR, {
+        field.attname: _stored_name(instance, field)
+        for field in get_tracked_fields(sender)
+    })
+
+
+def _apply_save(sender, instance, **kwargs):
+    originals = getattr(instance, ORIGINALS_ATTR, {})
+    for field in get_tracked_fields(sender):
+        old_name = originals.get(field.attname)
+        new_name = _stored_name(instance, field)
+        if old_name != new_name:
+            _adjust(new_name, 1)
+            _adjust(old_name, -1)
+    _remember(sender, instance)
+
+
+def _apply_delete(sender, instance, **kwargs):
+    originals = getattr(instance, ORIGINALS_ATTR, {})
+    for field in get_tracked_fields(sender):
+        _adjust(originals.get(field.attname), -1)
+
+
+def connect_tracked_fields():
+    for model, _fields in get_tracked_models():
+        uid = f"media_store_{model._meta.label_lower}"
+        post_init.connect(_remember, sender=model, dispatch_uid=f"{uid}_init")
+        post_save.connect(_apply_save, sender=model, dispatch_uid=f"{uid}_save")
+        post_delete.connect(_apply_delete, sender=model, dispatch_uid=f"{uid}_delete")
@@ -1,3 +1,10 @@
 from django.contrib import admin
+from .models import Payment
 
-# Register your models here.
+
+@admin.register(Payment)
+class PaymentAdmin(admin.ModelAdmin):
+    list_display = ['transaction_id', 'provider', 'amount', 'currency', 'status', 'provider_status', 'created_at']
+    list_filter = ['provider', 'status']
+    search_fields = ['transaction_id', 'idempotency_key', 'payer', 'provider_reference']
+    readonly_fields = ['created_at', 'updated_at', 'completed_at']
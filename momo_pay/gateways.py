@@ -0,0 +1,238 @@
+"""
+Async clients for the payment gateways (MTN MoMo collections and Hubtel checkout).
+
+Each gateway keeps one pooled aiohttp session per event loop with connect and total
+timeouts. Calls are retried with exponential backoff on connection errors, timeouts,
+429 and 5xx responses; retrying is safe because every request carries the payment's
+reference as an idempotency key (X-Reference-Id for MTN, clientReference for Hubtel).
+"""
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+
+import aiohttp
+from django.conf import settings
+
+from Schoolproject import tracing
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'PENDING'
+SUCCESSFUL = 'SUCCESSFUL'
+FAILED = 'FAILED'
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class GatewayError(Exception):
+    """A request the gateway answered with a definitive error; retrying will not help"""
+
+    def __init__(self, message, status=None, body=None):
+        super().__init__(message)
+        self.status = status
+        self.body = body
+
+
+class GatewayUnavailable(Exception):
+    """The gateway could not be reached or kept failing after all retries"""
+
+
+@dataclass
+class GatewayResult:
+    status: str
+    reason: str = ''
+    provider_status: str = ''
+    data: dict = field(default_factory=dict)
+
+
+class BaseGateway:
+    name = None
+
+    def __init__(self, config):
+        self.config = config
+        self.timeout = aiohttp.ClientTimeout(
+            total=config.get('TIMEOUT', 10), connect=config.get('CONNECT_TIMEOUT', 3)
+        )
+        self.max_attempts = config.get('MAX_ATTEMPTS', 3)
+        self.backoff = config.get('BACKOFF', 0.5)
+        self._session = None
+
+    async def session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.config.get('POOL_SIZE', 20), keepalive_timeout=30
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def _request(self, method, url, **kwargs):
+        """Return (status, json body or {}), retrying transient failures"""
+        session = await self.session()
+        last_error = None
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                with tracing.span(f"{method} {self.name}", tracing.CLIENT, **{
+                    'http.method': method, 'url.full': url, 'attempt': attempt,
+                }) as call:
+                    async with session.request(method, url, **kwargs) as response:
+                        if call is not None:
+                            call.set_attribute('http.status_code', response.status)
+                        try:
+                            body = await response.json(content_type=None)
+                        except ValueError:
+                            body = {}
+                        if response.status not in RETRY_STATUSES:
+                            return response.status, body or {}
+                        last_error = f"HTTP {response.status}"
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                last_error = f"{type(e).__name__}: {e}"
+
+            logger.warning(f"{self.name} {method} {url} failed (attempt {attempt}/{self.max_attempts}): {last_error}")
+            if attempt < self.max_attempts:
+                await asyncio.sleep(self.backoff * (2 ** (attempt - 1)) * (1 + random.random()))
+
+        raise GatewayUnavailable(f"{self.name} unavailable: {last_error}")
+
+    async def request_payment(self, payment):
+        """Ask the gateway to collect `payment`; returns provider data to store"""
+        raise NotImplementedError
+
+    async def get_status(self, payment):
+        """Current GatewayResult of a payment that was requested earlier"""
+        raise NotImplementedError
+
+
+class MomoGateway(BaseGateway):
+    name = 'momo'
+
+    def __init__(self, config):
+        super().__init__(config)
+        self._token = None
+        self._token_expires = 0
+
+    def _headers(self, token=None):
+        headers = {
+            'Ocp-Apim-Subscription-Key': self.config['SUBSCRIPTION_KEY'],
+            'X-Target-Environment': self.config.get('TARGET_ENVIRONMENT', 'sandbox'),
+        }
+        if token:
+            headers['Authorization'] = f"Bearer {token}"
+        return headers
+
+    async def _access_token(self):
+        if self._token and time.monotonic() < self._token_expires:
+            return self._token
+
+        status, body = await self._request(
+            'POST', f"{self.config['BASE_URL']}/collection/token/",
+            headers={'Ocp-Apim-Subscription-Key': self.config['SUBSCRIPTION_KEY']},
+            auth=aiohttp.BasicAuth(self.config['API_USER'], self.config['API_KEY']),
+        )
+        if status != 200 or 'access_token' not in body:
+            raise GatewayError("Could not obtain MoMo access token", status, body)
+
+        self._token = body['access_token']
+        # Refresh a minute early so a token never expires mid-request
+        self._token_expires = time.monotonic() + int(body.get('expires_in', 3600)) - 60
+        return self._token
+
+    async def request_payment(self, payment):
+        headers = self._headers(await self._access_token())
+        headers['X-Reference-Id'] = payment.transaction_id
+        if self.config.get('CALLBACK_URL'):
+            headers['X-Callback-Url'] = self.config['CALLBACK_URL']
+
+        status, body = await self._request(
+            'POST', f"{self.config['BASE_URL']}/collection/v1_0/requesttopay",
+            headers=headers,
+            json={
+                'amount': str(payment.amount),
+                'currency': payment.currency,
+                'externalId': payment.transaction_id,
+                'payer': {'partyIdType': 'MSISDN', 'partyId': payment.payer},
+                'payerMessage': payment.description[:160],
+                'payeeNote': payment.description[:160],
+            },
+        )
+        # 409 means this reference was already accepted by an earlier attempt
+        if status in (202, 409):
+            return {}
+        raise GatewayError(f"MoMo rejected the payment request (HTTP {status})", status, body)
+
+    async def get_status(self, payment):
+        status, body = await self._request(
+            'GET', f"{self.config['BASE_URL']}/collection/v1_0/requesttopay/{payment.transaction_id}",
+            headers=self._headers(await self._access_token()),
+        )
+        if status == 404:
+            return GatewayResult(FAILED, reason='Payment request not found at the gateway', provider_status='NOT_FOUND')
+        if status != 200:
+            raise GatewayError(f"MoMo status check failed (HTTP {status})", status, body)
+
+        provider_status = body.get('status', '')
+        mapped = {'SUCCESSFUL': SUCCESSFUL, 'FAILED': FAILED, 'REJECTED': FAILED, 'TIMEOUT': FAILED}
+        reason = body.get('reason') or ''
+        if isinstance(reason, dict):
+            reason = reason.get('message') or reason.get('code') or ''
+        return GatewayResult(mapped.get(provider_status, PENDING), str(reason), provider_status, body)
+
+
+class HubtelGateway(BaseGateway):
+    name = 'hubtel'
+
+    def _auth(self):
+        return aiohttp.BasicAuth(self.config['API_ID'], self.config['API_KEY'])
+
+    async def request_payment(self, payment):
+        status, body = await self._request(
+            'POST', f"{self.config['BASE_URL']}/items/initiate",
+            auth=self._auth(),
+            json={
+                'totalAmount': float(payment.amount),
+                'description': payment.description,
+                'callbackUrl': self.config.get('CALLBACK_URL', ''),
+                'returnUrl': self.config.get('RETURN_URL', ''),
+                'cancellationUrl': self.config.get('CANCELLATION_URL', ''),
+                'merchantAccountNumber': self.config['MERCHANT_ACCOUNT'],
+                'clientReference': payment.transaction_id,
+            },
+        )
+        if status == 200 and body.get('responseCode') == '0000':
+            data = body.get('data') or {}
+            return {'checkout_url': data.get('checkoutUrl', ''), 'provider_reference': data.get('checkoutId', '')}
+        raise GatewayError(f"Hubtel rejected the checkout request (HTTP {status})", status, body)
+
+    async def get_status(self, payment):
+        status, body = await self._request(
+            'GET', f"{self.config['STATUS_URL']}/transactions/{self.config['MERCHANT_ACCOUNT']}/status",
+            auth=self._auth(),
+            params={'clientReference': payment.transaction_id},
+        )
+        if status == 404:
+            return GatewayResult(PENDING, provider_status='NOT_FOUND')
+        if status != 200:
+            raise GatewayError(f"Hubtel status check failed (HTTP {status})", status, body)
+
+        data = body.get('data') or {}
+        provider_status = data.get('status', '')
+        # Unpaid checkouts stay pending until they are paid or expire
+        mapped = {'Paid': SUCCESSFUL, 'Refunded': FAILED, 'Failed': FAILED}
+        return GatewayResult(mapped.get(provider_status, PENDING), data.get('description', '') or '', provider_status, body)
+
+
+GATEWAY_CLASSES = {
+    'momo': MomoGateway,
+    'hubtel': HubtelGateway,
+}
+
+
+def build_gateways():
+    """One gateway instance per configured provider"""
+    configs = getattr(settings, 'PAYMENT_GATEWAYS', {})
+    return {name: gateway_class(configs.get(name, {})) for name, gateway_class in GATEWAY_CLASSES.items()}
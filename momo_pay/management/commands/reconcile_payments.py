@@ -0,0 +1,98 @@
+import asyncio
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from momo_pay.gateways import build_gateways, PENDING
+from momo_pay.models import Payment
+from momo_pay.service import apply_result, poll_statuses, MAX_CONCURRENT_REQUESTS, RESULT_FIELDS
+
+
+class Command(BaseCommand):
+    help = (
+        "Poll the gateways for every pending payment and record the ones that have "
+        "finished. Payments are read in chunks and each chunk is checked concurrently, "
+        "so run this on a schedule rather than polling from requests."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500, help="Payments read and updated per batch")
+        parser.add_argument(
+            '--concurrency', type=int, default=MAX_CONCURRENT_REQUESTS,
+            help="Maximum status requests in flight at once"
+        )
+        parser.add_argument(
+            '--min-age', type=int, default=60,
+            help="Skip payments younger than this many seconds; their callback is probably on its way"
+        )
+        parser.add_argument('--provider', choices=[choice for choice, _label in Payment.PROVIDER_CHOICES])
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        pending = Payment.objects.filter(
+            status=PENDING, created_at__lte=timezone.now() - timedelta(seconds=options['min_age'])
+        )
+        if options['provider']:
+            pending = pending.filter(provider=options['provider'])
+
+        gateways = build_gateways()
+        # One loop for the whole run so the gateways' connection pools are reused across chunks
+        loop = asyncio.new_event_loop()
+        counts = {'checked': 0, 'SUCCESSFUL': 0, 'FAILED': 0, 'PENDING': 0, 'errors': 0, 'skipped': 0}
+        last_pk = 0
+        try:
+            while True:
+                chunk = list(pending.filter(pk__gt=last_pk).order_by('pk')[:options['chunk_size']])
+                if not chunk:
+                    break
+                last_pk = chunk[-1].pk
+
+                results = loop.run_until_complete(poll_statuses(chunk, gateways, options['concurrency']))
+                self._apply(results, counts)
+        finally:
+            for gateway in gateways.values():
+                loop.run_until_complete(gateway.close())
+            loop.close()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {counts['checked']} pending payments in {elapsed:.1f}s: "
+            f"{counts['SUCCESSFUL']} successful, {counts['FAILED']} failed, {counts['PENDING']} still pending, "
+            f"{counts['errors']} could not be checked, {counts['skipped']} finished meanwhile."
+        ))
+
+    def _apply(self, results, counts):
+        now = timezone.now()
+        changed = {}
+        errored = {}
+        for payment, result, error in results:
+            counts['checked'] += 1
+            if error is not None:
+                payment.last_error = str(error)[:255]
+                payment.updated_at = now
+                errored[payment.pk] = payment
+                self.stderr.write(f"{payment.provider} {payment.transaction_id}: {error}")
+            elif apply_result(payment, result, now):
+                changed[payment.pk] = payment
+            else:
+                counts[PENDING] += 1
+
+        with transaction.atomic():
+            # A callback may have finished some of these while we were polling; leave those alone
+            still_pending = set(
+                Payment.objects.select_for_update()
+                .filter(pk__in=[*changed, *errored], status=PENDING)
+                .values_list('pk', flat=True)
+            )
+            counts['skipped'] += len(changed) + len(errored) - len(still_pending)
+            changed = [payment for pk, payment in changed.items() if pk in still_pending]
+            errored = [payment for pk, payment in errored.items() if pk in still_pending]
+            Payment.objects.bulk_update(changed, RESULT_FIELDS)
+            Payment.objects.bulk_update(errored, ['last_error', 'updated_at'])
+
+        for payment in changed:
+            counts[payment.status] += 1
+        counts['errors'] += len(errored)
@@ -0,0 +1,23 @@
+from aiohttp import web
+from django.core.management.base import BaseCommand
+
+from momo_pay.stub_gateway import StubGateway
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a local stub of the MTN MoMo and Hubtel APIs. Point MOMO_BASE_URL, "
+        "HUBTEL_BASE_URL and HUBTEL_STATUS_URL at it for development without sandbox access."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8099)
+        parser.add_argument('--callback-delay', type=float, default=2.0, help="Seconds before status callbacks are sent")
+        parser.add_argument('--no-callbacks', action='store_true', help="Never send status callbacks")
+
+    def handle(self, *args, **options):
+        stub = StubGateway(callback_delay=options['callback_delay'], send_callbacks=not options['no_callbacks'])
+        stub.base_url = f"http://{options['host']}:{options['port']}"
+        self.stdout.write(f"Stub payment gateway listening on {stub.base_url}")
+        web.run_app(stub.app(), host=options['host'], port=options['port'], print=None)
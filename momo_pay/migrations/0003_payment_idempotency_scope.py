@@ -0,0 +1,27 @@
+# Generated by Django 5.0.6 on 2026-10-19 12:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('momo_pay', '0002_payment_gateway_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='request_hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='payment',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='payment',
+            constraint=models.UniqueConstraint(fields=('provider', 'idempotency_key'), name='unique_payment_idempotency_key'),
+        ),
+    ]
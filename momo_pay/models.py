@@ -1,7 +1,48 @@
 from django.db import models
 
+
 class Payment(models.Model):
+    PROVIDER_CHOICES = [
+        ('momo', 'MTN Mobile Money'),
+        ('hubtel', 'Hubtel'),
+    ]
+
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('SUCCESSFUL', 'Successful'),
+        ('FAILED', 'Failed'),
+    ]
+
     amount = models.DecimalField(max_digits=10, decimal_places=2)
+    # Our reference for the payment, sent to the gateway as its idempotency key
     transaction_id = models.CharField(max_length=100, unique=True)
-    status = models.CharField(max_length=20)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
     created_at = models.DateTimeField(auto_now_add=True)
+
+    provider = models.CharField(max_length=20, choices=PROVIDER_CHOICES, default='momo')
+    # Supplied by the client (Idempotency-Key header) so a retried request finds the same payment;
+    # unique per provider, and request_hash is the SHA-256 of the request it was first used with
+    idempotency_key = models.CharField(max_length=100, null=True, blank=True)
+    request_hash = models.CharField(max_length=64, blank=True)
+    currency = models.CharField(max_length=3, default='GHS')
+    payer = models.CharField(max_length=20, blank=True)
+    description = models.CharField(max_length=255, blank=True)
+    provider_reference = models.CharField(max_length=100, blank=True)
+    provider_status = models.CharField(max_length=50, blank=True)
+    checkout_url = models.URLField(max_length=500, blank=True)
+    failure_reason = models.CharField(max_length=255, blank=True)
+    last_error = models.CharField(max_length=255, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'provider', 'created_at']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['provider', 'idempotency_key'], name='unique_payment_idempotency_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.provider} {self.transaction_id} - {self.amount} {self.currency} ({self.status})"
@@ -0,0 +1,27 @@
+from decimal import Decimal
+
+from rest_framework import serializers
+from .models import Payment
+
+
+class PaymentSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Payment
+        fields = [
+            'transaction_id', 'provider', 'amount', 'currency', 'payer', 'description',
+            'status', 'provider_status', 'checkout_url', 'failure_reason', 'created_at', 'completed_at',
+        ]
+        read_only_fields = fields
+
+
+class PaymentRequestSerializer(serializers.Serializer):
+    amount = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0.01'))
+    currency = serializers.CharField(max_length=3, default='GHS')
+    payer = serializers.RegexField(r'^\+?\d{9,15}$', required=False, allow_blank=True)
+    description = serializers.CharField(max_length=255, required=False, allow_blank=True, default='')
+
+    def validate(self, data):
+        # Mobile money collections are addressed to the payer's number
+        if self.context.get('provider') == 'momo' and not data.get('payer'):
+            raise serializers.ValidationError({'payer': 'This field is required.'})
+        return data
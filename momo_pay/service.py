@@ -0,0 +1,227 @@
+"""
+Payment processing off the request path.
+
+A single background thread runs an asyncio event loop that owns the pooled gateway
+clients. Views create a PENDING Payment row, hand its id to the loop and return
+straight away, so a slow gateway never holds a web worker. Gateway callbacks are
+put on an asyncio queue and consumed by a few tasks that re-read the status from
+the gateway (callbacks themselves are unsigned, so they are only a hint) before
+moving the payment to SUCCESSFUL or FAILED.
+"""
+import asyncio
+import logging
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from Schoolproject import metrics, tracing
+
+from .gateways import (
+    build_gateways, GatewayError, GatewayResult, GatewayUnavailable, PENDING, FAILED
+)
+from .models import Payment
+
+logger = logging.getLogger(__name__)
+
+WORKER_SETTINGS = getattr(settings, 'PAYMENT_WORKER', {})
+MAX_CONCURRENT_REQUESTS = WORKER_SETTINGS.get('MAX_CONCURRENT_REQUESTS', 20)
+CALLBACK_CONSUMERS = WORKER_SETTINGS.get('CALLBACK_CONSUMERS', 4)
+CALLBACK_QUEUE_SIZE = WORKER_SETTINGS.get('CALLBACK_QUEUE_SIZE', 1000)
+
+# Fields written when a gateway result is applied
+RESULT_FIELDS = ['status', 'provider_status', 'failure_reason', 'completed_at', 'last_error', 'updated_at']
+
+
+def apply_result(payment, result, now=None):
+    """
+    Move a pending payment to the state in `result`, in memory only. Finished
+    payments never change again. Returns True when something changed.
+    """
+    if payment.status != PENDING:
+        return False
+
+    changed = False
+    provider_status = (result.provider_status or '')[:50]
+    if payment.provider_status != provider_status:
+        payment.provider_status = provider_status
+        changed = True
+
+    if result.status != PENDING:
+        payment.status = result.status
+        payment.failure_reason = (result.reason or '')[:255] if result.status == FAILED else ''
+        payment.completed_at = now or timezone.now()
+        payment.last_error = ''
+        changed = True
+
+    if changed:
+        payment.updated_at = now or timezone.now()
+    return changed
+
+
+async def save_result(payment, result):
+    """Apply `result` and persist it, unless another writer finished the payment first"""
+    if not apply_result(payment, result):
+        return False
+    updated = await Payment.objects.filter(pk=payment.pk, status=PENDING).aupdate(
+        **{name: getattr(payment, name) for name in RESULT_FIELDS}
+    )
+    if updated:
+        logger.info(f"Payment {payment.transaction_id} is now {payment.status} ({payment.provider_status})")
+    return bool(updated)
+
+
+class PaymentWorker:
+
+    def __init__(self, gateways=None):
+        self._gateways = gateways
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def gateways(self):
+        return self._gateways
+
+    def start(self):
+        with self._lock:
+            if self._loop is not None:
+                return
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                if self._gateways is None:
+                    self._gateways = build_gateways()
+                self._semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+                self._callbacks = asyncio.Queue(maxsize=CALLBACK_QUEUE_SIZE)
+                self._consumers = [loop.create_task(self._consume_callbacks()) for _ in range(CALLBACK_CONSUMERS)]
+                ready.set()
+                loop.run_forever()
+
+            self._thread = threading.Thread(target=run, name='payments', daemon=True)
+            self._thread.start()
+            ready.wait()
+            self._loop = loop
+
+    def stop(self):
+        with self._lock:
+            if self._loop is None:
+                return
+            loop, self._loop = self._loop, None
+
+        async def shutdown():
+            for task in self._consumers:
+                task.cancel()
+            for gateway in self._gateways.values():
+                await gateway.close()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), loop).result(timeout=10)
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join(timeout=10)
+
+    def submit(self, coroutine_function, *args):
+        """Run a coroutine on the payments loop; returns a concurrent.futures.Future"""
+        self.start()
+        job = tracing.wrap(self._run_job, f"payments.{coroutine_function.__name__}")
+        return metrics.track_queue(
+            'payments', asyncio.run_coroutine_threadsafe(job(coroutine_function, *args), self._loop)
+        )
+
+    def initiate(self, payment_id):
+        return self.submit(self.initiate_payment, payment_id)
+
+    def enqueue_callback(self, provider, reference):
+        self.start()
+        metrics.BACKGROUND_QUEUE_DEPTH.labels(queue='payment-callbacks').inc()
+        handle_callback = tracing.wrap(self.handle_callback, 'payments.handle_callback')
+        return asyncio.run_coroutine_threadsafe(
+            self._callbacks.put((handle_callback, provider, reference)), self._loop
+        )
+
+    async def _run_job(self, coroutine_function, *args):
+        try:
+            return await coroutine_function(*args)
+        except Exception as e:
+            logger.error(f"Payment job {coroutine_function.__name__}{args} failed: {str(e)}", exc_info=True)
+            raise
+        finally:
+            # The async ORM runs queries on one shared thread; let it drop stale connections
+            await sync_to_async(close_old_connections)()
+
+    async def initiate_payment(self, payment_id):
+        payment = await Payment.objects.aget(pk=payment_id)
+        if payment.status != PENDING:
+            return payment
+
+        gateway = self._gateways[payment.provider]
+        try:
+            async with self._semaphore:
+                provider_data = await gateway.request_payment(payment)
+        except GatewayError as e:
+            logger.warning(f"Payment {payment.transaction_id} rejected by {payment.provider}: {str(e)}")
+            await save_result(payment, GatewayResult(FAILED, reason=str(e), provider_status=str(e.status or 'ERROR')))
+            return payment
+        except GatewayUnavailable as e:
+            # Stays pending; the callback or the reconciliation job settles it later
+            payment.last_error = str(e)[:255]
+            await Payment.objects.filter(pk=payment.pk).aupdate(last_error=payment.last_error, updated_at=timezone.now())
+            return payment
+
+        if provider_data:
+            for name, value in provider_data.items():
+                setattr(payment, name, value)
+            await Payment.objects.filter(pk=payment.pk).aupdate(**provider_data, updated_at=timezone.now())
+        logger.info(f"Payment {payment.transaction_id} requested from {payment.provider}")
+        return payment
+
+    async def refresh_status(self, payment):
+        """Ask the gateway for the current status of a pending payment and store it"""
+        if payment.status != PENDING:
+            return payment
+        async with self._semaphore:
+            result = await self._gateways[payment.provider].get_status(payment)
+        await save_result(payment, result)
+        return payment
+
+    async def handle_callback(self, provider, reference):
+        payment = await Payment.objects.filter(transaction_id=reference, provider=provider).afirst()
+        if payment is None:
+            logger.warning(f"Callback from {provider} for unknown payment {reference}")
+            return None
+        return await self.refresh_status(payment)
+
+    async def _consume_callbacks(self):
+        while True:
+            handle_callback, provider, reference = await self._callbacks.get()
+            try:
+                await self._run_job(handle_callback, provider, reference)
+            except Exception:
+                # Already logged by _run_job; keep consuming
+                pass
+            finally:
+                self._callbacks.task_done()
+                metrics.BACKGROUND_QUEUE_DEPTH.labels(queue='payment-callbacks').dec()
+
+
+async def poll_statuses(payments, gateways, concurrency=MAX_CONCURRENT_REQUESTS):
+    """
+    Ask the gateways for the status of many payments at once, at most `concurrency`
+    requests in flight. Returns [(payment, GatewayResult or None, error or None)].
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def poll(payment):
+        async with semaphore:
+            try:
+                return payment, await gateways[payment.provider].get_status(payment), None
+            except (GatewayError, GatewayUnavailable) as e:
+                return payment, None, e
+
+    return await asyncio.gather(*(poll(payment) for payment in payments))
+
+
+payment_worker = PaymentWorker()
@@ -0,0 +1,198 @@
+"""
+Local stand-in for the MTN MoMo collections API and Hubtel checkout, for tests and
+development without sandbox credentials.
+
+MoMo outcomes are chosen by the last digit of the payer number:
+    1 -> FAILED, 2 -> stays PENDING, 3 -> answers after `slow_seconds`,
+    5 -> first attempt gets HTTP 503, anything else -> SUCCESSFUL.
+Hubtel checkouts are Paid unless `hubtel_outcome` says otherwise. Tests can force
+a result for one reference with `outcomes[reference] = 'FAILED'` etc.
+
+After accepting a request the stub posts a callback to the callback URL it was
+given, like the real gateways do.
+"""
+import asyncio
+import logging
+import threading
+import uuid
+
+import aiohttp
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundServer:
+    """An aiohttp stub that tests can run on a background thread"""
+    thread_name = 'stub-server'
+
+    def __init__(self):
+        self._runner = None
+        self._loop = None
+        self._thread = None
+        self.base_url = None
+
+    def app(self):
+        raise NotImplementedError
+
+    def start(self, host='127.0.0.1', port=0):
+        """Serve on a background thread; returns the base URL"""
+        ready = threading.Event()
+        self._loop = asyncio.new_event_loop()
+
+        async def serve():
+            self._runner = web.AppRunner(self.app())
+            await self._runner.setup()
+            site = web.TCPSite(self._runner, host, port)
+            await site.start()
+            bound_port = site._server.sockets[0].getsockname()[1]
+            self.base_url = f"http://{host}:{bound_port}"
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(serve())
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name=self.thread_name, daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self.base_url
+
+    def stop(self):
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result(timeout=10)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=10)
+        self._loop = None
+
+
+class StubGateway(BackgroundServer):
+    thread_name = 'stub-gateway'
+
+    def __init__(self, callback_delay=0.05, send_callbacks=True, hubtel_outcome='Paid', slow_seconds=30):
+        super().__init__()
+        self.callback_delay = callback_delay
+        self.slow_seconds = slow_seconds
+        self.send_callbacks = send_callbacks
+        self.hubtel_outcome = hubtel_outcome
+        self.outcomes = {}
+        self.momo_requests = {}
+        self.hubtel_checkouts = {}
+        self.request_counts = {}
+
+    def app(self):
+        app = web.Application()
+        app.add_routes([
+            web.post('/collection/token/', self.momo_token),
+            web.post('/collection/v1_0/requesttopay', self.momo_request_to_pay),
+            web.get('/collection/v1_0/requesttopay/{reference}', self.momo_status),
+            web.post('/items/initiate', self.hubtel_initiate),
+            web.get('/transactions/{merchant}/status', self.hubtel_status),
+        ])
+        return app
+
+    # MTN MoMo
+
+    async def momo_token(self, request):
+        if not request.headers.get('Authorization', '').startswith('Basic '):
+            return web.json_response({'error': 'unauthorized'}, status=401)
+        return web.json_response({'access_token': uuid.uuid4().hex, 'token_type': 'access_token', 'expires_in': 3600})
+
+    def _momo_outcome(self, reference, payer):
+        if reference in self.outcomes:
+            return self.outcomes[reference]
+        return {'1': 'FAILED', '2': 'PENDING'}.get(payer[-1:], 'SUCCESSFUL')
+
+    async def momo_request_to_pay(self, request):
+        if not request.headers.get('Authorization', '').startswith('Bearer '):
+            return web.json_response({'code': 'UNAUTHORIZED'}, status=401)
+        reference = request.headers.get('X-Reference-Id')
+        if not reference:
+            return web.json_response({'code': 'INVALID_REFERENCE_ID'}, status=400)
+
+        body = await request.json()
+        payer = body.get('payer', {}).get('partyId', '')
+        attempts = self.request_counts[reference] = self.request_counts.get(reference, 0) + 1
+
+        if payer.endswith('3'):
+            await asyncio.sleep(self.slow_seconds)
+        if payer.endswith('5') and attempts == 1:
+            return web.json_response({'code': 'SERVICE_UNAVAILABLE'}, status=503)
+        if reference in self.momo_requests:
+            return web.json_response({'code': 'RESOURCE_ALREADY_EXIST'}, status=409)
+
+        status = self._momo_outcome(reference, payer)
+        self.momo_requests[reference] = dict(body, status=status)
+        callback_url = request.headers.get('X-Callback-Url')
+        if callback_url and status != 'PENDING':
+            self._schedule_callback(callback_url, {
+                'externalId': body.get('externalId'), 'amount': body.get('amount'),
+                'currency': body.get('currency'), 'payer': body.get('payer'), 'status': status,
+            }, method='PUT')
+        return web.Response(status=202)
+
+    async def momo_status(self, request):
+        payment = self.momo_requests.get(request.match_info['reference'])
+        if payment is None:
+            return web.json_response({'code': 'RESOURCE_NOT_FOUND'}, status=404)
+        body = {key: payment.get(key) for key in ('amount', 'currency', 'externalId', 'payer', 'status')}
+        if payment['status'] == 'FAILED':
+            body['reason'] = 'APPROVAL_REJECTED'
+        return web.json_response(body)
+
+    # Hubtel
+
+    async def hubtel_initiate(self, request):
+        if not request.headers.get('Authorization', '').startswith('Basic '):
+            return web.json_response({'responseCode': '4010', 'status': 'Unauthorized'}, status=401)
+        body = await request.json()
+        reference = body.get('clientReference')
+        if not reference or not body.get('totalAmount'):
+            return web.json_response({'responseCode': '4000', 'status': 'Error'}, status=400)
+
+        checkout_id = self.hubtel_checkouts.get(reference, {}).get('checkoutId') or uuid.uuid4().hex
+        status = self.outcomes.get(reference, self.hubtel_outcome)
+        self.hubtel_checkouts[reference] = dict(body, checkoutId=checkout_id, status=status)
+        if body.get('callbackUrl') and status != 'Unpaid':
+            self._schedule_callback(body['callbackUrl'], {
+                'ResponseCode': '0000' if status == 'Paid' else '2001',
+                'Status': 'Success' if status == 'Paid' else 'Failed',
+                'Data': {'CheckoutId': checkout_id, 'ClientReference': reference,
+                         'Status': status, 'Amount': body.get('totalAmount')},
+            })
+        return web.json_response({
+            'responseCode': '0000',
+            'status': 'Success',
+            'data': {
+                'checkoutUrl': f"{self.base_url or ''}/checkout/{checkout_id}",
+                'checkoutId': checkout_id,
+                'clientReference': reference,
+            },
+        })
+
+    async def hubtel_status(self, request):
+        checkout = self.hubtel_checkouts.get(request.query.get('clientReference', ''))
+        if checkout is None:
+            return web.json_response({'responseCode': '2001', 'message': 'Transaction not found'}, status=404)
+        return web.json_response({
+            'responseCode': '0000',
+            'data': {'status': checkout['status'], 'clientReference': checkout['clientReference'],
+                     'amount': checkout['totalAmount']},
+        })
+
+    # Callbacks
+
+    def _schedule_callback(self, url, payload, method='POST'):
+        if self.send_callbacks:
+            asyncio.get_running_loop().create_task(self._send_callback(url, payload, method))
+
+    async def _send_callback(self, url, payload, method):
+        await asyncio.sleep(self.callback_delay)
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.request(method, url, json=payload) as response:
+                    logger.debug(f"Stub callback to {url} answered {response.status}")
+        except aiohttp.ClientError as e:
+            logger.warning(f"Stub callback to {url} failed: {str(e)}")
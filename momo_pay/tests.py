@@ -1,3 +1,214 @@
-from django.test import TestCase
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import LiveServerTestCase, SimpleTestCase
+from django.utils import timezone
+from unittest import mock
+
+from . import service
+from .gateways import GatewayResult, HubtelGateway, MomoGateway, FAILED, SUCCESSFUL
+from .models import Payment
+from .stub_gateway import StubGateway
+
+
+class PaymentGatewayTests(LiveServerTestCase):
+    """End to end against the local stub gateway, with callbacks coming back to the live server"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.stub = StubGateway(slow_seconds=2)
+        cls.stub.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.stub.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.stub.outcomes.clear()
+        self.stub.momo_requests.clear()
+        self.stub.hubtel_checkouts.clear()
+        self.stub.request_counts.clear()
+
+        common = {'TIMEOUT': 1, 'CONNECT_TIMEOUT': 1, 'MAX_ATTEMPTS': 2, 'BACKOFF': 0.01}
+        self.gateway_settings = {
+            'momo': dict(
+                common, BASE_URL=self.stub.base_url, SUBSCRIPTION_KEY='key', API_USER='user', API_KEY='secret',
+                CALLBACK_URL=f"{self.live_server_url}/api/payments/callback/momo/",
+            ),
+            'hubtel': dict(
+                common, BASE_URL=self.stub.base_url, STATUS_URL=self.stub.base_url, API_ID='id', API_KEY='secret',
+                MERCHANT_ACCOUNT='2017101', CALLBACK_URL=f"{self.live_server_url}/api/payments/callback/hubtel/",
+            ),
+        }
+        self.worker = service.PaymentWorker(gateways={
+            'momo': MomoGateway(self.gateway_settings['momo']),
+            'hubtel': HubtelGateway(self.gateway_settings['hubtel']),
+        })
+        patcher = mock.patch.object(service, 'payment_worker', self.worker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.worker.stop)
+
+    def request_payment(self, payer, key=None, path='/api/request-payment/', amount='12.50'):
+        headers = {'HTTP_IDEMPOTENCY_KEY': key} if key else {}
+        return self.client.post(path, {'amount': amount, 'payer': payer, 'description': 'Fees'},
+                                content_type='application/json', **headers)
+
+    def wait_for(self, transaction_id, predicate, timeout=5):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            payment = Payment.objects.get(transaction_id=transaction_id)
+            if predicate(payment):
+                return payment
+            time.sleep(0.05)
+        self.fail(f"Payment {transaction_id} never reached the expected state: {payment.status}")
+
+    def test_successful_payment_is_settled_by_callback(self):
+        response = self.request_payment('0240000000')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], 'PENDING')
+
+        payment = self.wait_for(response.data['transaction_id'], lambda p: p.status != 'PENDING')
+        self.assertEqual(payment.status, 'SUCCESSFUL')
+        self.assertEqual(payment.provider_status, 'SUCCESSFUL')
+        self.assertIsNotNone(payment.completed_at)
+
+        status_response = self.client.get(f"/api/payments/{payment.transaction_id}/")
+        self.assertEqual(status_response.data['status'], 'SUCCESSFUL')
+
+    def test_rejected_payment_is_failed(self):
+        response = self.request_payment('0240000001')
+        payment = self.wait_for(response.data['transaction_id'], lambda p: p.status != 'PENDING')
+        self.assertEqual(payment.status, 'FAILED')
+        self.assertEqual(payment.failure_reason, 'APPROVAL_REJECTED')
+
+    def test_idempotency_key_returns_the_same_payment(self):
+        first = self.request_payment('0240000000', key='order-17')
+        second = self.request_payment('0240000000', key='order-17')
+        self.assertEqual(first.status_code, 202)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(first.data['transaction_id'], second.data['transaction_id'])
+        self.assertEqual(Payment.objects.filter(idempotency_key='order-17').count(), 1)
+
+        self.wait_for(first.data['transaction_id'], lambda p: p.status == 'SUCCESSFUL')
+        self.assertEqual(self.stub.request_counts, {first.data['transaction_id']: 1})
+
+    def test_idempotency_key_reused_with_a_different_request(self):
+        first = self.request_payment('0240000000', key='order-18')
+        self.assertEqual(first.status_code, 202)
+        self.assertEqual(self.request_payment('0240000000', key='order-18', amount='12.5').status_code, 200)
+
+        response = self.request_payment('0240000000', key='order-18', amount='99.00')
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(self.request_payment('0240000009', key='order-18').status_code, 422)
+        self.assertEqual(Payment.objects.count(), 1)
+        self.wait_for(first.data['transaction_id'], lambda p: p.status != 'PENDING')
+
+    def test_idempotency_key_is_scoped_to_the_provider(self):
+        momo = self.request_payment('0240000000', key='order-19')
+        hubtel = self.request_payment('0240000000', key='order-19', path='/api/request-money/')
+        self.assertEqual((momo.status_code, hubtel.status_code), (202, 202))
+        self.assertNotEqual(momo.data['transaction_id'], hubtel.data['transaction_id'])
+        self.assertEqual(hubtel.data['provider'], 'hubtel')
+        for response in (momo, hubtel):
+            self.wait_for(response.data['transaction_id'], lambda p: p.status != 'PENDING')
+
+    def test_overlong_idempotency_key_is_rejected(self):
+        self.assertEqual(self.request_payment('0240000000', key='k' * 101).status_code, 400)
+        self.assertFalse(Payment.objects.exists())
+        self.assertEqual(self.request_payment('0240000000', key='k' * 100).status_code, 202)
+        self.wait_for(Payment.objects.get().transaction_id, lambda p: p.status != 'PENDING')
+
+    def test_unavailable_gateway_is_retried_with_the_same_reference(self):
+        response = self.request_payment('0240000005')
+        transaction_id = response.data['transaction_id']
+        self.wait_for(transaction_id, lambda p: p.status == 'SUCCESSFUL')
+        self.assertEqual(self.stub.request_counts[transaction_id], 2)
+
+    def test_slow_gateway_leaves_payment_pending(self):
+        # The stub accepts the request eventually; keep its late callback out of this test
+        self.stub.send_callbacks = False
+        self.addCleanup(setattr, self.stub, 'send_callbacks', True)
+        started = time.monotonic()
+        response = self.request_payment('0240000003')
+        # The request returns before the gateway answers
+        self.assertLess(time.monotonic() - started, 1)
+
+        payment = self.wait_for(response.data['transaction_id'], lambda p: p.last_error)
+        self.assertEqual(payment.status, 'PENDING')
+        self.assertIn('unavailable', payment.last_error)
+
+    def test_pending_payment_is_refreshed_by_polling(self):
+        response = self.request_payment('0240000002')
+        transaction_id = response.data['transaction_id']
+        self.wait_for(transaction_id, lambda p: transaction_id in self.stub.momo_requests)
+
+        self.stub.momo_requests[transaction_id]['status'] = 'SUCCESSFUL'
+        payment = Payment.objects.get(transaction_id=transaction_id)
+        self.worker.submit(self.worker.refresh_status, payment).result(timeout=5)
+        self.assertEqual(Payment.objects.get(transaction_id=transaction_id).status, 'SUCCESSFUL')
+
+    def test_hubtel_checkout(self):
+        response = self.request_payment('', path='/api/request-money/')
+        self.assertEqual(response.status_code, 202)
+        payment = self.wait_for(response.data['transaction_id'], lambda p: p.status != 'PENDING')
+        self.assertEqual(payment.status, 'SUCCESSFUL')
+        self.assertTrue(payment.checkout_url.startswith(self.stub.base_url))
+        self.assertTrue(payment.provider_reference)
+
+    def test_momo_requires_payer(self):
+        response = self.request_payment('')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Payment.objects.exists())
+
+    def test_callback_without_reference_is_rejected(self):
+        response = self.client.post('/api/payments/callback/momo/', {'status': 'SUCCESSFUL'},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_reconcile_payments(self):
+        outcomes = ['SUCCESSFUL'] * 5 + ['FAILED'] * 3 + ['PENDING'] * 2
+        for number, outcome in enumerate(outcomes):
+            reference = f"ref-{number}"
+            Payment.objects.create(amount=Decimal('100.00'), transaction_id=reference, payer='0240000000')
+            self.stub.momo_requests[reference] = {'externalId': reference, 'status': outcome}
+        # Never reached the gateway
+        Payment.objects.create(amount=Decimal('100.00'), transaction_id='lost', payer='0240000000')
+        # Too recent to reconcile
+        Payment.objects.create(amount=Decimal('100.00'), transaction_id='new', payer='0240000000')
+        Payment.objects.exclude(transaction_id='new').update(created_at=timezone.now() - timedelta(minutes=5))
+
+        out = StringIO()
+        with self.settings(PAYMENT_GATEWAYS=self.gateway_settings):
+            call_command('reconcile_payments', chunk_size=4, concurrency=3, stdout=out)
+
+        statuses = dict(Payment.objects.values_list('transaction_id', 'status'))
+        self.assertEqual(list(statuses.values()).count('SUCCESSFUL'), 5)
+        self.assertEqual(list(statuses.values()).count('FAILED'), 4)
+        self.assertEqual(statuses['lost'], 'FAILED')
+        self.assertEqual(statuses['new'], 'PENDING')
+        self.assertIn("Checked 11 pending payments", out.getvalue())
+        self.assertIn("5 successful, 4 failed, 2 still pending", out.getvalue())
+
+
+class ApplyResultTests(SimpleTestCase):
+
+    def make_payment(self, status='PENDING'):
+        return Payment(amount=Decimal('5.00'), transaction_id='ref', status=status)
+
+    def test_finished_payment_never_changes(self):
+        payment = self.make_payment('SUCCESSFUL')
+        self.assertFalse(service.apply_result(payment, GatewayResult(FAILED, reason='late')))
+        self.assertEqual(payment.status, 'SUCCESSFUL')
+
+    def test_success_clears_failure_details(self):
+        payment = self.make_payment()
+        payment.last_error = 'timeout'
+        now = timezone.now()
+        self.assertTrue(service.apply_result(payment, GatewayResult(SUCCESSFUL, provider_status='SUCCESSFUL'), now))
+        self.assertEqual((payment.status, payment.last_error, payment.completed_at), ('SUCCESSFUL', '', now))
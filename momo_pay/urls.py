@@ -1,7 +1,8 @@
 from django.urls import path
-from .views import request_payment
+from .views import request_payment, payment_status, payment_callback
 
 urlpatterns = [
     path('request-payment/', request_payment, name='request_payment'),
-    # Add other URLs for your Django app as needed
+    path('payments/callback/<str:provider>/', payment_callback, name='payment_callback'),
+    path('payments/<str:transaction_id>/', payment_status, name='payment_status'),
 ]
@@ -1,66 +1,118 @@
-import requests
+import hashlib
 import json
+import logging
 from uuid import uuid4
-from django.http import JsonResponse
 
+from django.db import IntegrityError, transaction
+from django.shortcuts import get_object_or_404
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+
+from . import service
+from .models import Payment
+from .serializers import PaymentSerializer, PaymentRequestSerializer
+
+logger = logging.getLogger(__name__)
+
+
+IDEMPOTENCY_KEY_LENGTH = Payment._meta.get_field('idempotency_key').max_length
+
+
+def _request_hash(validated_data):
+    payload = json.dumps(validated_data, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _replay(payment, request_hash):
+    """The response for a repeated Idempotency-Key: the original payment, if the request matches"""
+    if payment.request_hash != request_hash:
+        return Response(
+            {'detail': 'Idempotency-Key was already used with a different request.'},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    return Response(PaymentSerializer(payment).data, status=status.HTTP_200_OK)
+
+
+def start_payment(request, provider):
+    """
+    Record a PENDING payment and hand it to the background payment worker.
+    A repeated Idempotency-Key for the same provider returns the payment created
+    by the first request, or 422 if the request body is different.
+    """
+    idempotency_key = request.headers.get('Idempotency-Key') or None
+    if idempotency_key and len(idempotency_key) > IDEMPOTENCY_KEY_LENGTH:
+        return Response(
+            {'detail': f'Idempotency-Key must be at most {IDEMPOTENCY_KEY_LENGTH} characters.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    serializer = PaymentRequestSerializer(data=request.data, context={'provider': provider})
+    serializer.is_valid(raise_exception=True)
+    request_hash = _request_hash(serializer.validated_data)
+
+    if idempotency_key:
+        existing = Payment.objects.filter(provider=provider, idempotency_key=idempotency_key).first()
+        if existing:
+            return _replay(existing, request_hash)
+
+    try:
+        with transaction.atomic():
+            payment = Payment.objects.create(
+                provider=provider,
+                transaction_id=str(uuid4()),
+                idempotency_key=idempotency_key,
+                request_hash=request_hash,
+                status='PENDING',
+                **serializer.validated_data
+            )
+            transaction.on_commit(lambda: service.payment_worker.initiate(payment.pk))
+    except IntegrityError:
+        # A concurrent request with the same key won the race
+        payment = get_object_or_404(Payment, provider=provider, idempotency_key=idempotency_key)
+        return _replay(payment, request_hash)
+
+    logger.info(f"Payment {payment.transaction_id} of {payment.amount} {payment.currency} queued for {provider}")
+    return Response(PaymentSerializer(payment).data, status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
 def request_payment(request):
-    # Define the endpoint for requesting payment
-    endpoint = "https://sandbox.momodeveloper.mtn.com/collection/v1_0/requesttopay"
-
-    # Define your API credentials
-    primary_key = "a166d4787fc9420e91e128349a4c0ec7"
-    secondary_key = "e9b6963d0458434e9e692f4043def610"
-    access_token = "your_access_token"
-    target_environment = "sandbox"
-    reference_id = str(uuid4())  # Generate a unique reference ID for the transaction
-
-    # Define the payment request payload
-    payload = {
-        "amount": "100",  # Specify the amount to be paid
-        "currency": "GHC",  # Specify the currency
-        "externalId": "123456789",  # Specify your unique reference ID for the transaction
-        "payer": {
-            "partyIdType": "MSISDN",
-            "partyId": "0551751552"  # Specify the phone number of the payer
-        },
-        "payerMessage": "Payment request message",
-        "payeeNote": "Note for payee"
-    }
-
-    # Set up headers with access token and primary key
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Ocp-Apim-Subscription-Key": primary_key,
-        "Content-Type": "application/json",
-        "X-Reference-Id": reference_id,
-        "X-Target-Environment": target_environment
-    }
-
-    print("Initiating payment request...")
-
-    # Make the POST request to initiate the payment
-    response = requests.post(endpoint, json=payload, headers=headers)
-
-    # Log the request payload
-    print("Request payload:", payload)
-
-    # Log the response status
-    print("Response status code:", response.status_code)
-
-    # Check if the request was successful
-    if response.status_code == 202:
-        # Payment request was successful, log the success
-        print("Payment request successful.")
-        return JsonResponse({"status": "success", "data": response.json()}, status=202)
-    elif response.status_code == 400:
-        # Bad request, log and return the error message
-        print("Bad request, invalid data was sent.")
-        return JsonResponse({"status": "error", "message": "Bad request, invalid data was sent"}, status=400)
-    elif response.status_code == 409:
-        # Conflict, duplicated reference id, log and return the error message
-        print("Conflict, duplicated reference id.")
-        return JsonResponse({"status": "error", "message": "Conflict, duplicated reference id"}, status=409)
-    else:
-        # Other error, log and return the error message
-        print("Internal server error.")
-        return JsonResponse({"status": "error", "message": "Internal server error"}, status=500)
+    """
+    Request a mobile money payment from the payer's number.
+    Poll payment_status with the returned transaction_id for the outcome.
+    """
+    return start_payment(request, 'momo')
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def payment_status(request, transaction_id):
+    payment = get_object_or_404(Payment, transaction_id=transaction_id)
+    return Response(PaymentSerializer(payment).data)
+
+
+def _callback_reference(provider, data):
+    if provider == 'momo':
+        return data.get('externalId') or data.get('referenceId')
+    if provider == 'hubtel':
+        payload = data.get('Data') or data.get('data') or {}
+        return payload.get('ClientReference') or payload.get('clientReference')
+    return None
+
+
+@api_view(['POST', 'PUT'])
+@permission_classes([AllowAny])
+def payment_callback(request, provider):
+    """
+    Gateway status webhook. The body only tells us which payment changed; the
+    worker confirms the status with the gateway before recording it.
+    """
+    reference = _callback_reference(provider, request.data if isinstance(request.data, dict) else {})
+    if not reference:
+        return Response({'detail': 'Unrecognised callback.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    service.payment_worker.enqueue_callback(provider, str(reference))
+    return Response({'detail': 'Accepted'}, status=status.HTTP_202_ACCEPTED)
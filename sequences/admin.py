@@ -0,0 +1,8 @@
+from django.contrib import admin
+from .models import Sequence
+
+
+@admin.register(Sequence)
+class SequenceAdmin(admin.ModelAdmin):
+    list_display = ['name', 'prefix', 'padding', 'last_value']
+    search_fields = ['name', 'prefix']
@@ -0,0 +1,162 @@
+"""
+Race-free allocation of sequential reference numbers.
+
+Each allocation is one atomic `UPDATE ... SET last_value = last_value + n ... RETURNING`
+on the sequence row, so concurrent submissions never read the same "last" number and
+no query ever scans the numbered table.
+
+Usage:
+    TICKET_IDS = SequenceAllocator('ticket_id', prefix='RCSTK', padding=4)
+    TICKET_IDS.next_formatted()  # 'RCSTK0042'
+"""
+import logging
+import threading
+
+from django.db import IntegrityError, connections, router, transaction
+
+from .models import Sequence
+
+logger = logging.getLogger(__name__)
+
+# Backends that support UPDATE ... RETURNING
+RETURNING_VENDORS = ('sqlite', 'postgresql')
+
+
+class SequenceAllocator:
+    """
+    Hands out values from a named Sequence.
+
+    With the default block_size of 1 every value comes straight from the database,
+    and when called inside the caller's transaction a rollback also returns the
+    value, so the sequence stays gap-free.
+
+    A block_size above 1 reserves that many values per worker process and serves
+    them from memory. This trades gap-freedom (unused values are lost when the
+    worker exits) and strict ordering across workers for fewer writes. A block
+    reserved inside a transaction is only handed out within that transaction
+    until it commits, and is dropped if it rolls back, since the reservation is
+    rolled back with it.
+    """
+
+    def __init__(self, name, prefix='', padding=6, block_size=1, seed=None):
+        """
+        `seed` is an optional callable returning the highest value already in use.
+        It runs once, when the sequence row is first created, so numbering
+        continues from existing data.
+        """
+        self.name = name
+        self.prefix = prefix
+        self.padding = padding
+        self.block_size = max(1, block_size)
+        self.seed = seed
+        self._lock = threading.Lock()
+        self._next_value = None
+        self._block_end = None
+        # (thread id, connection, on_commit callback) while the block's reservation is uncommitted
+        self._pending = None
+
+    def format(self, value):
+        return f"{self.prefix}{value:0{self.padding}d}"
+
+    def next_value(self):
+        """Return the next integer value of the sequence"""
+        if self.block_size == 1:
+            return self._advance(1)
+
+        with self._lock:
+            if self._next_value is None or self._next_value > self._block_end or not self._block_usable():
+                self._reserve_block()
+            value = self._next_value
+            self._next_value += 1
+            return value
+
+    def next_formatted(self):
+        """Return the next value with prefix and zero padding applied, e.g. 'RF000123'"""
+        return self.format(self.next_value())
+
+    def reset_block(self):
+        """Drop any values reserved by this process"""
+        with self._lock:
+            self._next_value = None
+            self._block_end = None
+            self._pending = None
+
+    def _reserve_block(self):
+        db_alias = router.db_for_write(Sequence)
+        connection = connections[db_alias]
+        self._block_end = self._advance(self.block_size)
+        self._next_value = self._block_end - self.block_size + 1
+        self._pending = None
+        if not connection.in_atomic_block:
+            return
+
+        def confirm():
+            with self._lock:
+                if self._pending is pending:
+                    self._pending = None
+
+        pending = (threading.get_ident(), connection, confirm)
+        self._pending = pending
+        transaction.on_commit(confirm, using=db_alias)
+
+    def _block_usable(self):
+        """
+        Whether the current block may be handed out here: always once its reservation
+        has committed, before that only in the transaction that reserved it. A
+        rollback discards the transaction's on_commit callbacks, and with them ours.
+        """
+        if self._pending is None:
+            return True
+        thread_id, connection, confirm = self._pending
+        return thread_id == threading.get_ident() and any(
+            callback is confirm for _, callback, _ in connection.run_on_commit
+        )
+
+    def _advance(self, count):
+        """Atomically add `count` to the sequence and return the new last value"""
+        value = self._update_returning(count)
+        if value is None:
+            self._create_sequence()
+            value = self._update_returning(count)
+        return value
+
+    def _update_returning(self, count):
+        db_alias = router.db_for_write(Sequence)
+        connection = connections[db_alias]
+        table = connection.ops.quote_name(Sequence._meta.db_table)
+
+        with connection.cursor() as cursor:
+            if connection.vendor in RETURNING_VENDORS:
+                cursor.execute(
+                    f"UPDATE {table} SET last_value = last_value + %s WHERE name = %s RETURNING last_value",
+                    [count, self.name]
+                )
+                row = cursor.fetchone()
+                return row[0] if row else None
+
+            # No RETURNING: the UPDATE's row lock keeps the follow-up read consistent
+            with transaction.atomic(using=db_alias):
+                cursor.execute(
+                    f"UPDATE {table} SET last_value = last_value + %s WHERE name = %s",
+                    [count, self.name]
+                )
+                if cursor.rowcount == 0:
+                    return None
+                cursor.execute(f"SELECT last_value FROM {table} WHERE name = %s", [self.name])
+                return cursor.fetchone()[0]
+
+    def _create_sequence(self):
+        """Create the sequence row on first use, seeded from existing data"""
+        initial_value = self.seed() if self.seed else 0
+        try:
+            with transaction.atomic():
+                Sequence.objects.create(
+                    name=self.name,
+                    prefix=self.prefix,
+                    padding=self.padding,
+                    last_value=initial_value or 0
+                )
+            logger.info(f"Created sequence {self.name} starting after {initial_value or 0}")
+        except IntegrityError:
+            # Another worker created it first
+            pass
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.6 on 2026-10-19 10:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Sequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('prefix', models.CharField(blank=True, max_length=10)),
+                ('padding', models.PositiveSmallIntegerField(default=6, help_text='Minimum number of digits after the prefix')),
+                ('last_value', models.PositiveBigIntegerField(default=0, help_text='Last value handed out')),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import models
+
+
+class Sequence(models.Model):
+    """
+    Named counter used to hand out reference numbers (job posts, tickets, admissions).
+    Values are advanced with a single-row UPDATE instead of scanning the numbered table.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    prefix = models.CharField(max_length=10, blank=True)
+    padding = models.PositiveSmallIntegerField(default=6, help_text="Minimum number of digits after the prefix")
+    last_value = models.PositiveBigIntegerField(default=0, help_text="Last value handed out")
+
+    def format_value(self, value):
+        return f"{self.prefix}{value:0{self.padding}d}"
+
+    def __str__(self):
+        return f"{self.name} ({self.format_value(self.last_value)})"
+
+    class Meta:
+        ordering = ['name']
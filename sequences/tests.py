@@ -0,0 +1,93 @@
+import threading
+from unittest import mock
+
+from django.db import connection, transaction
+from django.test import Client, TestCase, TransactionTestCase
+
+from loadtest.stub_email import StubEmailApi, use_email_host
+from tickets.models import Ticket
+from tickets.serializers import TicketSerializer
+from .allocator import SequenceAllocator
+from .models import Sequence
+
+TICKET = {
+    'full_name': 'Test User',
+    'email': 'user@example.com',
+    'phone_number': '0240000000',
+    'section': 'others',
+    'severity': 'low',
+    'description': 'Parallel insert',
+}
+
+
+class SequenceAllocatorTests(TestCase):
+    def test_values_are_sequential_and_formatted(self):
+        allocator = SequenceAllocator('test_sequence', prefix='RF', padding=6)
+        self.assertEqual(allocator.next_formatted(), 'RF000001')
+        self.assertEqual(allocator.next_formatted(), 'RF000002')
+        self.assertEqual(Sequence.objects.get(name='test_sequence').last_value, 2)
+
+    def test_seed_continues_existing_numbering(self):
+        allocator = SequenceAllocator('seeded_sequence', prefix='RCS', padding=6, seed=lambda: 41)
+        self.assertEqual(allocator.next_formatted(), 'RCS000042')
+
+    def test_block_allocation_reserves_values_per_process(self):
+        allocator = SequenceAllocator('block_sequence', block_size=10)
+        values = [allocator.next_value() for _ in range(12)]
+        self.assertEqual(values, list(range(1, 13)))
+        # Two blocks reserved, the second one partially used
+        self.assertEqual(Sequence.objects.get(name='block_sequence').last_value, 20)
+
+    def test_block_reserved_in_rolled_back_transaction_is_dropped(self):
+        Sequence.objects.create(name='block_sequence', last_value=0)
+        allocator = SequenceAllocator('block_sequence', block_size=10)
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.assertEqual(allocator.next_value(), 1)
+            raise RuntimeError
+        # The reservation was rolled back, so 1-10 are free again and must not be
+        # served from memory as well
+        self.assertEqual(Sequence.objects.get(name='block_sequence').last_value, 0)
+        self.assertEqual(allocator.next_value(), 1)
+        self.assertEqual(Sequence.objects.get(name='block_sequence').last_value, 10)
+
+
+class SequenceConcurrencyTests(TransactionTestCase):
+
+    def setUp(self):
+        email = StubEmailApi(latency=0)
+        email.start()
+        self.addCleanup(email.stop)
+        use_email_host(f"{email.base_url}/v3")
+        self.addCleanup(use_email_host, None)
+
+    def test_parallel_submissions_get_unique_contiguous_ids(self):
+        thread_count, per_thread = 8, 10
+        errors = []
+
+        def submit_tickets():
+            client = Client()
+            try:
+                for _ in range(per_thread):
+                    response = client.post('/api/tickets/', TICKET)
+                    if response.status_code != 200:
+                        errors.append(response.content)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=submit_tickets) for _ in range(thread_count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        ticket_ids = sorted(Ticket.objects.values_list('TicketID', flat=True))
+        expected = [f'RCSTK{n:04d}' for n in range(1, thread_count * per_thread + 1)]
+        self.assertEqual(ticket_ids, expected)
+
+    def test_failed_submission_does_not_use_up_an_id(self):
+        save = TicketSerializer.save
+        with mock.patch.object(TicketSerializer, 'save', side_effect=[RuntimeError("disk full"), save], autospec=True):
+            self.assertEqual(self.client.post('/api/tickets/', TICKET).status_code, 500)
+        self.client.post('/api/tickets/', TICKET)
+        self.assertEqual(list(Ticket.objects.values_list('TicketID', flat=True)), ['RCSTK0001'])
@@ -12,11 +12,9 @@ import jwt
 import logging
 
 from authapp.models import CustomUser
+from Schoolproject import metrics
 from .serializers import StudentUserSerializer
 from .permissions import IsTeacherOrPrincipalOrSuperuser
-from sib_api_v3_sdk import Configuration, ApiClient, SendSmtpEmail
-from sib_api_v3_sdk.api.transactional_emails_api import TransactionalEmailsApi
-from sib_api_v3_sdk.rest import ApiException
 from django.conf import settings
 
 # Ensure that the is_active field is set to False by default when creating a new user
@@ -85,6 +83,9 @@ class StudentSignUpView(generics.CreateAPIView):
                         status=status.HTTP_201_CREATED, headers=headers)
 
     def send_verification_email(self, user):
+        from sib_api_v3_sdk import Configuration, ApiClient, TransactionalEmailsApi, SendSmtpEmail
+        from sib_api_v3_sdk.rest import ApiException
+
         verification_token = RefreshToken.for_user(user).access_token
         verification_url = reverse('student-verify-email', kwargs={'user_id': user.id, 'token': str(verification_token)})
         verification_url = self.request.build_absolute_uri(verification_url)  # Make the URL absolute
@@ -209,7 +210,10 @@ class StudentLoginView(APIView):
                           status=status.HTTP_401_UNAUTHORIZED)
 
         # Check if the password matches
-        if check_password(password, user.password):
+        with metrics.timed('auth.check_password'):
+            password_matches = check_password(password, user.password)
+        metrics.LOGINS.labels(portal='student', outcome='success' if password_matches else 'wrong_password').inc()
+        if password_matches:
             login(request, user)
             refresh = RefreshToken.for_user(user)
             return Response({
@@ -279,6 +283,9 @@ class BatchStudentCreationView(generics.CreateAPIView):
         }, status=status.HTTP_201_CREATED if created_students else status.HTTP_400_BAD_REQUEST)
     
     def send_verification_email(self, user):
+        from sib_api_v3_sdk import Configuration, ApiClient, TransactionalEmailsApi, SendSmtpEmail
+        from sib_api_v3_sdk.rest import ApiException
+
         verification_token = RefreshToken.for_user(user).access_token
         verification_url = reverse('student-verify-email', kwargs={'user_id': user.id, 'token': str(verification_token)})
         verification_url = self.request.build_absolute_uri(verification_url)  # Make the URL absolute
@@ -1,3 +1,8 @@
 from django.contrib import admin
+from .models import TicketSignature
 
-# Register your models here.
+
+@admin.register(TicketSignature)
+class TicketSignatureAdmin(admin.ModelAdmin):
+    list_display = ['ticket', 'updated_at']
+    readonly_fields = ['ticket', 'signature', 'updated_at']
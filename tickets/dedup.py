@@ -0,0 +1,133 @@
+"""
+Near-duplicate detection for tickets.
+
+Each description is normalised into word shingles and summarised by a MinHash
+signature of NUM_PERMUTATIONS values. The signature is split into BANDS bands of
+ROWS_PER_BAND values and each band is hashed into an LSH bucket key stored in
+TicketLSHBucket. Tickets sharing at least one bucket are candidates, which are
+then scored by comparing signatures, so finding duplicates is one indexed lookup
+on the bucket keys instead of a scan of every description.
+
+With 16 bands of 4 rows, pairs with a Jaccard similarity around 0.5 or more are
+very likely to share a bucket.
+"""
+import hashlib
+import random
+import re
+import struct
+
+from django.db import transaction
+
+from .models import Ticket, TicketSignature, TicketLSHBucket
+
+NUM_PERMUTATIONS = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+SHINGLE_SIZE = 3
+DEFAULT_MIN_SIMILARITY = 0.5
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_SIGNATURE_FORMAT = f'<{NUM_PERMUTATIONS}I'
+
+# Fixed seed: stored signatures must stay comparable across processes and deploys
+_rng = random.Random(20240611)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERMUTATIONS)
+]
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def shingles(text):
+    """Set of SHINGLE_SIZE-word shingles of the normalised text (single words for short texts)"""
+    words = WORD_RE.findall((text or '').lower())
+    if len(words) < SHINGLE_SIZE:
+        return set(words)
+    return {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def _hash64(value):
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def minhash(shingle_set):
+    """MinHash signature as a tuple of NUM_PERMUTATIONS 32-bit values"""
+    if not shingle_set:
+        return (_MAX_HASH,) * NUM_PERMUTATIONS
+    hashes = [_hash64(shingle) for shingle in shingle_set]
+    return tuple(
+        min(((a * value + b) % _MERSENNE_PRIME) & _MAX_HASH for value in hashes)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def bucket_keys(signature):
+    """One signed 64-bit bucket key per band, with the band number mixed in"""
+    keys = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(
+            struct.pack(f'<H{ROWS_PER_BAND}I', band, *rows), digest_size=8
+        ).digest()
+        keys.append(int.from_bytes(digest, 'little', signed=True))
+    return keys
+
+
+def pack_signature(signature):
+    return struct.pack(_SIGNATURE_FORMAT, *signature)
+
+
+def unpack_signature(data):
+    return struct.unpack(_SIGNATURE_FORMAT, bytes(data))
+
+
+def similarity(signature_a, signature_b):
+    """Estimated Jaccard similarity: the share of matching MinHash values"""
+    return sum(1 for a, b in zip(signature_a, signature_b) if a == b) / NUM_PERMUTATIONS
+
+
+def index_ticket(ticket):
+    """Compute and store the ticket's signature and LSH buckets, replacing old ones"""
+    shingle_set = shingles(ticket.description)
+    signature = minhash(shingle_set)
+    packed = pack_signature(signature)
+
+    # Most saves are status changes; leave unchanged descriptions alone
+    stored = TicketSignature.objects.filter(ticket=ticket).values_list('signature', flat=True).first()
+    if stored is not None and bytes(stored) == packed:
+        return signature
+
+    with transaction.atomic():
+        TicketLSHBucket.objects.filter(ticket=ticket).delete()
+        TicketSignature.objects.update_or_create(
+            ticket=ticket, defaults={'signature': packed}
+        )
+        # An empty description would put every empty ticket in the same buckets
+        if shingle_set:
+            TicketLSHBucket.objects.bulk_create([
+                TicketLSHBucket(ticket=ticket, key=key) for key in bucket_keys(signature)
+            ])
+    return signature
+
+
+def find_similar(ticket, min_similarity=DEFAULT_MIN_SIMILARITY, limit=10):
+    """Return [(ticket, similarity)] of likely duplicates, most similar first"""
+    stored = TicketSignature.objects.filter(ticket=ticket).first()
+    signature = unpack_signature(stored.signature) if stored else index_ticket(ticket)
+
+    candidate_ids = TicketLSHBucket.objects.filter(
+        key__in=bucket_keys(signature)
+    ).exclude(ticket=ticket).values_list('ticket_id', flat=True).distinct()
+
+    scored = []
+    for candidate in TicketSignature.objects.filter(ticket_id__in=candidate_ids):
+        score = similarity(signature, unpack_signature(candidate.signature))
+        if score >= min_similarity:
+            scored.append((candidate.ticket_id, score))
+    scored.sort(key=lambda item: (-item[1], item[0]))
+    scored = scored[:limit]
+
+    tickets = Ticket.objects.in_bulk([ticket_id for ticket_id, _score in scored])
+    return [(tickets[ticket_id], score) for ticket_id, score in scored if ticket_id in tickets]
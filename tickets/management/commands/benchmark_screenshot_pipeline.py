@@ -0,0 +1,70 @@
+import random
+import time
+from io import BytesIO
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from PIL import Image, ImageDraw
+
+from tickets.tasks import OUTPUT_FORMAT, process_image
+
+
+class Command(BaseCommand):
+    help = (
+        "Report bytes saved and time taken by the screenshot pipeline for each image. "
+        "Pass image files, or run without arguments to use generated phone-sized screenshots."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', help="Image files to process")
+        parser.add_argument('--samples', type=int, default=5, help="Generated images when no paths are given")
+        parser.add_argument('--seed', type=int, default=1, help="Seed for generated images")
+
+    def handle(self, *args, **options):
+        if options['paths']:
+            images = [(Path(path).name, Path(path).read_bytes()) for path in options['paths']]
+        else:
+            rng = random.Random(options['seed'])
+            images = [(f"generated-{n}.png", self._generate_screenshot(rng)) for n in range(options['samples'])]
+
+        self.stdout.write(f"Output format: {OUTPUT_FORMAT}")
+        self.stdout.write(f"{'image':<28}{'original':>12}{'full':>12}{'thumb':>10}{'saved':>9}{'ms':>9}")
+
+        total_original, total_stored = 0, 0
+        for name, data in images:
+            started = time.perf_counter()
+            full_bytes, thumbnail_bytes = process_image(data)
+            elapsed = (time.perf_counter() - started) * 1000
+
+            saved = 1 - len(full_bytes) / len(data)
+            total_original += len(data)
+            total_stored += len(full_bytes)
+            self.stdout.write(
+                f"{name[:27]:<28}{len(data):>12}{len(full_bytes):>12}{len(thumbnail_bytes):>10}"
+                f"{saved:>8.1%}{elapsed:>9.1f}"
+            )
+
+        if total_original:
+            self.stdout.write(self.style.SUCCESS(
+                f"Total {total_original} -> {total_stored} bytes "
+                f"({1 - total_stored / total_original:.1%} saved over {len(images)} images)"
+            ))
+
+    def _generate_screenshot(self, rng):
+        """A 1170x2532 PNG resembling a phone screenshot: flat UI blocks, text lines and a photo area"""
+        image = Image.new('RGB', (1170, 2532), (245, 245, 245))
+        draw = ImageDraw.Draw(image)
+        draw.rectangle([0, 0, 1170, 180], fill=(33, 99, 186))
+        for row in range(40):
+            y = 240 + row * 50
+            width = rng.randint(300, 1050)
+            draw.rectangle([60, y, 60 + width, y + 22], fill=(rng.randint(40, 90),) * 3)
+        # Noisy photo region, the part that makes real screenshots expensive to store
+        photo = Image.effect_noise((1050, 500), 40).convert('RGB')
+        image.paste(photo, (60, 2300 - 500))
+
+        buffer = BytesIO()
+        exif = Image.Exif()
+        exif[0x010F] = 'Generated'  # Make
+        image.save(buffer, 'PNG', exif=exif)
+        return buffer.getvalue()
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from tickets.dedup import index_ticket
+from tickets.models import Ticket
+
+
+class Command(BaseCommand):
+    help = (
+        "Compute MinHash signatures and LSH buckets for tickets that have none, "
+        "e.g. tickets filed before duplicate detection existed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Reindex every ticket, not only missing ones")
+
+    def handle(self, *args, **options):
+        tickets = Ticket.objects.only('id', 'description').order_by('id')
+        if not options['all']:
+            tickets = tickets.filter(signature__isnull=True)
+
+        count = 0
+        for ticket in tickets.iterator():
+            index_ticket(ticket)
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} tickets."))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from tickets.models import Ticket
+from tickets.tasks import process_ticket_screenshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Process ticket screenshots that the background worker has not handled yet "
+        "(strip metadata, downsize, re-encode and build thumbnails)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=None, help="Process at most this many tickets")
+
+    def handle(self, *args, **options):
+        pending = Ticket.objects.filter(
+            screenshot_processed_at__isnull=True
+        ).exclude(screenshot='').exclude(screenshot__isnull=True).order_by('id').values_list('id', flat=True)
+        if options['limit']:
+            pending = pending[:options['limit']]
+
+        processed, failed, original_total, stored_total = 0, 0, 0, 0
+        for ticket_id in pending:
+            try:
+                sizes = process_ticket_screenshot(ticket_id)
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f"Ticket {ticket_id}: {str(e)}")
+                continue
+            if sizes:
+                processed += 1
+                original_total += sizes[0]
+                stored_total += sizes[1]
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {processed} screenshots ({failed} failed), "
+            f"{original_total / (1024 * 1024):.2f} MB -> {stored_total / (1024 * 1024):.2f} MB"
+        ))
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.6 on 2026-10-19 10:19
+
+import media_store.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0009_remove_ticketlog_reservation_ticketlog_ticket'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ticket',
+            name='screenshot',
+            field=models.ImageField(blank=True, null=True, storage=media_store.storage.content_hash_storage, upload_to='screenshots/'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.6 on 2026-10-19 10:26
+
+import media_store.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0010_alter_ticket_screenshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='screenshot_processed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='screenshot_thumbnail',
+            field=models.ImageField(blank=True, editable=False, null=True, storage=media_store.storage.content_hash_storage, upload_to='screenshots/thumbnails/'),
+        ),
+    ]
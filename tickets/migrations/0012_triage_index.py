@@ -0,0 +1,17 @@
+# Generated by Django 5.0.6 on 2026-10-19 10:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0011_ticket_screenshot_thumbnail'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['status', 'severity', 'created_at'], name='ticket_triage_idx'),
+        ),
+    ]
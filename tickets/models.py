@@ -1,5 +1,6 @@
 from django.db import models
 from authapp.models import CustomUser
+from media_store.storage import content_hash_storage
 
 
 class Ticket(models.Model):
@@ -30,10 +31,21 @@ class Ticket(models.Model):
     section = models.CharField(max_length=50, choices=SECTION_CHOICES)
     severity = models.CharField(max_length=50, choices=SEVERITY_CHOICES)
     description = models.TextField()
-    screenshot = models.ImageField(upload_to='screenshots/', blank=True, null=True)
+    screenshot = models.ImageField(upload_to='screenshots/', storage=content_hash_storage, blank=True, null=True)
+    # Filled in by the background screenshot processing (tickets/tasks.py)
+    screenshot_thumbnail = models.ImageField(
+        upload_to='screenshots/thumbnails/', storage=content_hash_storage, blank=True, null=True, editable=False
+    )
+    screenshot_processed_at = models.DateTimeField(null=True, blank=True, editable=False)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='unattended')
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Triage queue: open tickets by severity, oldest first
+            models.Index(fields=['status', 'severity', 'created_at'], name='ticket_triage_idx'),
+        ]
+
     def __str__(self):
         return f"{self.full_name} - {self.section} - {self.TicketID}"
 
@@ -45,6 +57,30 @@ class TicketLog(models.Model):
     changed_fields = models.TextField()
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # A record's history, newest first
+            models.Index(fields=['ticket', '-timestamp'], name='ticketlog_history_idx'),
+        ]
+
     def __str__(self):
         user_email = self.user_email if self.user_email else 'Unknown user'
-        return f"Log for {self.ticket} by {user_email} at {self.timestamp}"
\ No newline at end of file
+        return f"Log for {self.ticket} by {user_email} at {self.timestamp}"
+
+class TicketSignature(models.Model):
+    """MinHash signature of a ticket description, see dedup.py"""
+    ticket = models.OneToOneField(Ticket, on_delete=models.CASCADE, related_name='signature')
+    signature = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Signature for {self.ticket.TicketID}"
+
+
+class TicketLSHBucket(models.Model):
+    """One LSH band bucket a ticket falls into; tickets sharing a key are duplicate candidates"""
+    ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name='lsh_buckets')
+    key = models.BigIntegerField(db_index=True)
+
+    def __str__(self):
+        return f"{self.ticket_id}: {self.key}"
@@ -2,6 +2,11 @@ from rest_framework import serializers
 from .models import Ticket, TicketLog
 
 class TicketSerializer(serializers.ModelSerializer):
+    # `screenshot` is the full-size URL; both are replaced by the processed
+    # versions once the background screenshot processing has run
+    screenshot_thumbnail = serializers.ImageField(read_only=True)
+    screenshot_processed_at = serializers.DateTimeField(read_only=True)
+
     class Meta:
         model = Ticket
         fields = '__all__'
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Ticket
+from . import dedup
+
+
+@receiver(post_save, sender=Ticket)
+def index_ticket_description(sender, instance, created, update_fields=None, **kwargs):
+    # Saves that don't touch the description keep their signature
+    if created or update_fields is None or 'description' in update_fields:
+        dedup.index_ticket(instance)
@@ -0,0 +1,131 @@
+"""
+Background processing of ticket screenshots.
+
+After a ticket commits, its screenshot is queued on a small bounded thread pool.
+The worker applies the EXIF orientation, drops all metadata, downsizes the image,
+re-encodes it as WebP (JPEG when Pillow lacks WebP support) and stores a small
+thumbnail next to it, so the support dashboard no longer loads multi-MB phone
+screenshots. Tickets missed by the worker can be reprocessed with
+`python manage.py process_ticket_screenshots`.
+"""
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps, features
+
+from Schoolproject import metrics, tracing
+
+from .models import Ticket
+
+logger = logging.getLogger(__name__)
+
+WORKERS = getattr(settings, 'SCREENSHOT_PROCESSING_WORKERS', 2)
+MAX_DIMENSION = 1920
+THUMBNAIL_DIMENSION = 320
+QUALITY = 80
+THUMBNAIL_QUALITY = 70
+# Refuse decompression bombs well before Pillow's own warning threshold
+MAX_PIXELS = 40_000_000
+
+OUTPUT_FORMAT = 'WEBP' if features.check('webp') else 'JPEG'
+OUTPUT_EXTENSION = '.webp' if OUTPUT_FORMAT == 'WEBP' else '.jpg'
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='screenshot')
+    return _executor
+
+
+def _encode(image, quality):
+    if OUTPUT_FORMAT == 'JPEG' and image.mode != 'RGB':
+        # JPEG has no alpha; flatten onto white like a browser would
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A') if 'A' in image.getbands() else None)
+        image = background
+
+    options = {'method': 4} if OUTPUT_FORMAT == 'WEBP' else {'optimize': True, 'progressive': True}
+    buffer = io.BytesIO()
+    # No exif/icc_profile arguments, so none of the original metadata is written
+    image.save(buffer, OUTPUT_FORMAT, quality=quality, **options)
+    return buffer.getvalue()
+
+
+def process_image(data):
+    """
+    Return (full_size_bytes, thumbnail_bytes) for the image in `data`, both in
+    OUTPUT_FORMAT and without metadata.
+    """
+    with Image.open(io.BytesIO(data)) as source:
+        if source.width * source.height > MAX_PIXELS:
+            raise ValueError(f"Image too large ({source.width}x{source.height})")
+
+        image = ImageOps.exif_transpose(source)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+
+        full_size = image.copy()
+        full_size.thumbnail((MAX_DIMENSION, MAX_DIMENSION), Image.LANCZOS)
+        full_bytes = _encode(full_size, QUALITY)
+
+        thumbnail = full_size.copy()
+        thumbnail.thumbnail((THUMBNAIL_DIMENSION, THUMBNAIL_DIMENSION), Image.LANCZOS)
+        thumbnail_bytes = _encode(thumbnail, THUMBNAIL_QUALITY)
+
+    return full_bytes, thumbnail_bytes
+
+
+def process_ticket_screenshot(ticket_id):
+    """
+    Replace a ticket's screenshot with the processed version and store its
+    thumbnail. Returns (original_bytes, stored_bytes) or None when skipped.
+    """
+    ticket = Ticket.objects.filter(pk=ticket_id).first()
+    if ticket is None or not ticket.screenshot or ticket.screenshot_processed_at:
+        return None
+
+    with ticket.screenshot.open('rb') as file_obj:
+        original = file_obj.read()
+
+    full_bytes, thumbnail_bytes = process_image(original)
+    stem = str(ticket.TicketID or ticket.pk)
+
+    # Same bytes map to the same stored name, so a retry writes nothing new
+    ticket.screenshot.save(f"{stem}{OUTPUT_EXTENSION}", ContentFile(full_bytes), save=False)
+    ticket.screenshot_thumbnail.save(f"{stem}{OUTPUT_EXTENSION}", ContentFile(thumbnail_bytes), save=False)
+    ticket.screenshot_processed_at = timezone.now()
+    ticket.save(update_fields=['screenshot', 'screenshot_thumbnail', 'screenshot_processed_at'])
+
+    logger.info(
+        f"Processed screenshot for ticket {ticket.TicketID}: {len(original)} -> {len(full_bytes)} bytes, "
+        f"thumbnail {len(thumbnail_bytes)} bytes"
+    )
+    return len(original), len(full_bytes)
+
+
+def _run_processing(ticket_id):
+    try:
+        process_ticket_screenshot(ticket_id)
+    except Exception as e:
+        logger.error(f"Screenshot processing for ticket {ticket_id} failed: {str(e)}", exc_info=True)
+    finally:
+        close_old_connections()
+
+
+def queue_screenshot_processing(ticket):
+    """Schedule processing on the worker pool once the current transaction commits"""
+    if not ticket.screenshot:
+        return
+    ticket_id = ticket.pk
+    run_processing = tracing.wrap(_run_processing, 'screenshot.process')
+    transaction.on_commit(
+        lambda: metrics.track_queue('screenshot', _get_executor().submit(run_processing, ticket_id))
+    )
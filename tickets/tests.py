@@ -1,3 +1,231 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from concurrent.futures import Future
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from authapp.models import CustomUser
+from loadtest.stub_email import StubEmailApi, use_email_host
+
+from . import dedup, tasks
+from .models import Ticket, TicketLSHBucket, TicketSignature
+
+PRINTER = "The printer in the admissions office jams every time we print more than ten pages of forms"
+PRINTER_AGAIN = "The printer in the admissions office jams every time we print more than twenty pages of forms"
+WIFI = "Students cannot connect to the library wifi since the router was replaced last week"
+
+
+def make_ticket(description, number=None):
+    number = number or Ticket.objects.count() + 1
+    return Ticket.objects.create(
+        TicketID=f"RCSTK{number:04d}", full_name='Test User', email='user@example.com',
+        phone_number='0240000000', section='others', severity='low', description=description,
+    )
+
+
+class MinHashTests(TestCase):
+
+    def test_shingles(self):
+        self.assertEqual(dedup.shingles("Wifi is DOWN again"), {'wifi is down', 'is down again'})
+        self.assertEqual(dedup.shingles("Wifi down"), {'wifi', 'down'})
+        self.assertEqual(dedup.shingles(""), set())
+
+    def test_similarity_tracks_jaccard(self):
+        printer, printer_again, wifi = (dedup.minhash(dedup.shingles(text)) for text in [PRINTER, PRINTER_AGAIN, WIFI])
+        self.assertEqual(dedup.similarity(printer, printer), 1.0)
+        self.assertGreater(dedup.similarity(printer, printer_again), 0.5)
+        self.assertLess(dedup.similarity(printer, wifi), 0.2)
+
+    def test_signature_round_trip(self):
+        signature = dedup.minhash(dedup.shingles(PRINTER))
+        self.assertEqual(dedup.unpack_signature(dedup.pack_signature(signature)), signature)
+        self.assertEqual(len(dedup.bucket_keys(signature)), dedup.BANDS)
+
+
+class SimilarTicketTests(TestCase):
+
+    def test_near_duplicates_share_buckets(self):
+        printer = make_ticket(PRINTER)
+        printer_again = make_ticket(PRINTER_AGAIN)
+        make_ticket(WIFI)
+
+        [(match, score)] = dedup.find_similar(printer)
+        self.assertEqual(match, printer_again)
+        self.assertGreater(score, 0.5)
+
+    def test_edited_description_is_reindexed(self):
+        printer = make_ticket(PRINTER)
+        wifi = make_ticket(WIFI)
+        self.assertEqual(dedup.find_similar(printer), [])
+
+        wifi.description = PRINTER
+        wifi.save()
+        self.assertEqual([match for match, _score in dedup.find_similar(printer)], [wifi])
+
+    def test_status_change_keeps_the_signature(self):
+        ticket = make_ticket(PRINTER)
+        buckets = set(TicketLSHBucket.objects.filter(ticket=ticket).values_list('id', flat=True))
+        ticket.status = 'in_progress'
+        ticket.save()
+        self.assertEqual(set(TicketLSHBucket.objects.filter(ticket=ticket).values_list('id', flat=True)), buckets)
+
+    def test_empty_descriptions_are_not_bucketed(self):
+        first, _second = make_ticket(''), make_ticket('')
+        self.assertFalse(TicketLSHBucket.objects.exists())
+        self.assertEqual(dedup.find_similar(first), [])
+
+    def test_backfill_command_indexes_missing_tickets(self):
+        ticket = make_ticket(PRINTER)
+        TicketSignature.objects.all().delete()
+        TicketLSHBucket.objects.all().delete()
+
+        out = StringIO()
+        call_command('index_ticket_signatures', stdout=out)
+        self.assertIn("Indexed 1 tickets.", out.getvalue())
+        self.assertEqual(TicketLSHBucket.objects.filter(ticket=ticket).count(), dedup.BANDS)
+
+
+class SimilarTicketViewTests(TestCase):
+
+    def setUp(self):
+        self.printer = make_ticket(PRINTER)
+        self.printer_again = make_ticket(PRINTER_AGAIN)
+        self.url = f'/api/tickets/{self.printer.pk}/similar/'
+
+    def test_requires_authentication(self):
+        self.assertIn(self.client.get(self.url).status_code, (401, 403))
+
+    def test_lists_similar_tickets(self):
+        client = APIClient()
+        client.force_authenticate(CustomUser.objects.create_user(
+            username='support', email='support@example.com', password='secret', role='staff',
+        ))
+        response = client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([match['TicketID'] for match in response.data['results']], [self.printer_again.TicketID])
+
+        self.assertEqual(client.get(self.url, {'min_similarity': 'high'}).status_code, 400)
+        self.assertEqual(client.get(self.url, {'min_similarity': 1.0}).data['results'], [])
+
+
+def make_image(size, orientation=None, fmt='JPEG'):
+    exif = Image.Exif()
+    exif[0x010F] = 'Test Camera'  # Make
+    if orientation:
+        exif[0x0112] = orientation
+    out = BytesIO()
+    Image.new('RGB', size, 'red').save(out, fmt, exif=exif)
+    return out.getvalue()
+
+
+class InlineExecutor:
+    """Runs submitted work straight away so on_commit callbacks can be followed through"""
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+class ScreenshotProcessingTests(TestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def make_ticket(self, screenshot):
+        ticket = make_ticket('Broken link')
+        ticket.screenshot.save('shot.jpg', ContentFile(screenshot))
+        return ticket
+
+    def test_applies_exif_orientation_and_strips_metadata(self):
+        full_bytes, thumbnail_bytes = tasks.process_image(make_image((200, 100), orientation=6))
+        for data in (full_bytes, thumbnail_bytes):
+            with Image.open(BytesIO(data)) as image:
+                self.assertEqual(image.format, tasks.OUTPUT_FORMAT)
+                self.assertEqual(image.height, 2 * image.width)
+                self.assertEqual(len(image.getexif()), 0)
+                self.assertNotIn('icc_profile', image.info)
+
+    def test_downsizes_and_makes_thumbnail(self):
+        full_bytes, thumbnail_bytes = tasks.process_image(make_image((4000, 1000)))
+        with Image.open(BytesIO(full_bytes)) as image:
+            self.assertEqual(image.size, (tasks.MAX_DIMENSION, tasks.MAX_DIMENSION // 4))
+        with Image.open(BytesIO(thumbnail_bytes)) as image:
+            self.assertEqual(image.size, (tasks.THUMBNAIL_DIMENSION, tasks.THUMBNAIL_DIMENSION // 4))
+
+    def test_small_image_is_not_enlarged(self):
+        full_bytes, _ = tasks.process_image(make_image((64, 48), fmt='PNG'))
+        with Image.open(BytesIO(full_bytes)) as image:
+            self.assertEqual(image.size, (64, 48))
+
+    def test_rejects_images_over_max_pixels(self):
+        with mock.patch.object(tasks, 'MAX_PIXELS', 100 * 100):
+            with self.assertRaisesMessage(ValueError, "Image too large (101x100)"):
+                tasks.process_image(make_image((101, 100)))
+
+    def test_process_ticket_screenshot(self):
+        original = make_image((3000, 2000))
+        ticket = self.make_ticket(original)
+
+        self.assertEqual(tasks.process_ticket_screenshot(ticket.pk)[0], len(original))
+        ticket.refresh_from_db()
+        self.assertIsNotNone(ticket.screenshot_processed_at)
+        self.assertTrue(ticket.screenshot.name.endswith(tasks.OUTPUT_EXTENSION))
+        with Image.open(ticket.screenshot) as image:
+            self.assertEqual(max(image.size), tasks.MAX_DIMENSION)
+        with Image.open(ticket.screenshot_thumbnail) as image:
+            self.assertEqual(max(image.size), tasks.THUMBNAIL_DIMENSION)
+
+    def test_skips_processed_tickets(self):
+        ticket = self.make_ticket(make_image((3000, 2000)))
+        processed_at = timezone.now()
+        Ticket.objects.filter(pk=ticket.pk).update(screenshot_processed_at=processed_at)
+        name = ticket.screenshot.name
+
+        self.assertIsNone(tasks.process_ticket_screenshot(ticket.pk))
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.screenshot.name, name)
+        self.assertFalse(ticket.screenshot_thumbnail)
+        self.assertEqual(ticket.screenshot_processed_at, processed_at)
+
+        self.assertIsNone(tasks.process_ticket_screenshot(make_ticket('No screenshot').pk))
+
+    def test_create_queues_processing_after_commit(self):
+        email = StubEmailApi(latency=0)
+        email.start()
+        self.addCleanup(email.stop)
+        use_email_host(f"{email.base_url}/v3")
+        self.addCleanup(use_email_host, None)
+
+        data = {
+            'full_name': 'Test User', 'email': 'user@example.com', 'phone_number': '0240000000',
+            'section': 'others', 'severity': 'low', 'description': 'Broken link',
+            'screenshot': SimpleUploadedFile('shot.jpg', make_image((3000, 2000)), content_type='image/jpeg'),
+        }
+        # The real close_old_connections would end the test case's transaction
+        with mock.patch.object(tasks, '_get_executor', return_value=InlineExecutor()), \
+                mock.patch.object(tasks, 'close_old_connections'):
+            with self.captureOnCommitCallbacks() as callbacks:
+                response = self.client.post('/api/tickets/', data)
+            self.assertEqual(response.status_code, 200, response.content)
+            ticket = Ticket.objects.get()
+            self.assertIsNone(ticket.screenshot_processed_at)
+
+            for callback in callbacks:
+                callback()
+
+        ticket.refresh_from_db()
+        self.assertIsNotNone(ticket.screenshot_processed_at)
+        self.assertTrue(ticket.screenshot_thumbnail)
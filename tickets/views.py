@@ -5,20 +5,31 @@ from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.utils import timezone
+from django.db import transaction
 from django.db.models import Max
 from django.conf import settings
 from pathlib import Path
 from dotenv import load_dotenv
-from sib_api_v3_sdk import Configuration, ApiClient, SendSmtpEmail
-from sib_api_v3_sdk.api.transactional_emails_api import TransactionalEmailsApi
-from sib_api_v3_sdk.rest import ApiException
 
+from sequences.allocator import SequenceAllocator
 from .models import Ticket, TicketLog
 from .serializers import TicketSerializer, TicketLogSerializer
+from .tasks import queue_screenshot_processing
+from . import dedup
 
 # Configure logger
 logger = logging.getLogger(__name__)
 
+
+def _last_ticket_number():
+    """Highest ticket number already in use, used to seed the sequence on first use"""
+    last_ticket_id = Ticket.objects.filter(TicketID__regex=r'^RCSTK\d{4}$').aggregate(Max('TicketID'))['TicketID__max']
+    return int(last_ticket_id[5:]) if last_ticket_id else 0
+
+
+TICKET_IDS = SequenceAllocator('ticket_id', prefix='RCSTK', padding=4, seed=_last_ticket_number)
+
+
 class TicketViewSet(viewsets.ModelViewSet):
     queryset = Ticket.objects.all()
     serializer_class = TicketSerializer
@@ -30,15 +41,19 @@ class TicketViewSet(viewsets.ModelViewSet):
             serializer = self.get_serializer(data=request.data)
             serializer.is_valid(raise_exception=True)
 
-            # Generate a unique TicketID
-            ticket_id = self.generate_ticket_id()
-            serializer.validated_data['TicketID'] = ticket_id
-            logger.debug(f"Generated ticket ID: {ticket_id}")
+            with transaction.atomic():
+                # Generate a unique TicketID
+                ticket_id = self.generate_ticket_id()
+                serializer.validated_data['TicketID'] = ticket_id
+                logger.debug(f"Generated ticket ID: {ticket_id}")
 
-            # Save the ticket
-            ticket = serializer.save()
+                # Save the ticket
+                ticket = serializer.save()
             logger.info(f"Successfully created ticket with ID: {ticket_id}")
 
+            # Shrink the screenshot and build its thumbnail after the response
+            queue_screenshot_processing(ticket)
+
             # Send confirmation email
             self.send_ticket_confirmation_email(ticket)
 
@@ -56,17 +71,7 @@ class TicketViewSet(viewsets.ModelViewSet):
     def generate_ticket_id(self):
         logger.debug("Generating new ticket ID")
         try:
-            last_ticket = Ticket.objects.filter(TicketID__regex=r'^RCSTK\d{4}$').aggregate(Max('TicketID'))
-            last_ticket_id = last_ticket['TicketID__max']
-
-            if last_ticket_id:
-                new_id_number = int(last_ticket_id[5:]) + 1
-                logger.debug(f"Generated next ID from last ticket: {last_ticket_id}")
-            else:
-                new_id_number = 1
-                logger.debug("No existing tickets found, starting with ID 1")
-
-            new_ticket_id = f"RCSTK{new_id_number:04d}"
+            new_ticket_id = TICKET_IDS.next_formatted()
             logger.info(f"Successfully generated new ticket ID: {new_ticket_id}")
             return new_ticket_id
         except Exception as e:
@@ -74,6 +79,9 @@ class TicketViewSet(viewsets.ModelViewSet):
             raise
 
     def send_ticket_confirmation_email(self, ticket):
+        from sib_api_v3_sdk import Configuration, ApiClient, TransactionalEmailsApi, SendSmtpEmail
+        from sib_api_v3_sdk.rest import ApiException
+
         logger.info(f"Attempting to send confirmation email for ticket: {ticket.TicketID}")
         
         # Check for required environment variables
@@ -127,9 +135,45 @@ class TicketViewSet(viewsets.ModelViewSet):
             logger.error(f"Unexpected error sending confirmation email for ticket {ticket.TicketID}: {str(e)}", exc_info=True)
             raise
 
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        """
+        Likely duplicates of this ticket with estimated similarity scores.
+        URL: /api/tickets/<id>/similar/?min_similarity=0.5&limit=10
+        """
+        ticket = self.get_object()
+        try:
+            min_similarity = float(request.query_params.get('min_similarity', dedup.DEFAULT_MIN_SIMILARITY))
+            limit = min(int(request.query_params.get('limit', 10)), 50)
+        except ValueError:
+            return Response(
+                {'detail': 'min_similarity must be a number and limit an integer.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        matches = dedup.find_similar(ticket, min_similarity=min_similarity, limit=max(limit, 1))
+        logger.debug(f"Found {len(matches)} similar tickets for {ticket.TicketID}")
+        return Response({
+            'ticket': ticket.TicketID,
+            'results': [
+                {
+                    'id': match.id,
+                    'TicketID': match.TicketID,
+                    'full_name': match.full_name,
+                    'email': match.email,
+                    'section': match.section,
+                    'severity': match.severity,
+                    'status': match.status,
+                    'created_at': match.created_at,
+                    'similarity': round(score, 3),
+                }
+                for match, score in matches
+            ]
+        })
+
     def get_permissions(self):
         logger.debug(f"Getting permissions for action: {self.action}")
-        if self.action in ['update', 'partial_update']:
+        if self.action in ['update', 'partial_update', 'similar']:
             self.permission_classes = [IsAuthenticated]
             logger.debug("Using IsAuthenticated permission class")
         else:
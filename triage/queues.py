@@ -0,0 +1,114 @@
+"""
+Open-item queues for support staff.
+
+Each queue lists the open rows of one model, most severe first and oldest first
+within a severity, using keyset pagination: the cursor holds the position of the
+last item returned, so every page is an index range scan on the model's
+(status, [severity,] age) index no matter how deep the queue is. Severities are
+read one at a time in weight order, which keeps the ORDER BY on indexed columns
+instead of sorting on a computed weight.
+"""
+import base64
+import binascii
+import json
+
+from django.db.models import Count, Q
+from django.utils.dateparse import parse_datetime
+
+from Admissionapp.models import Admission
+from Schoolapp.models import Contact
+from tickets.models import Ticket
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class TriageQueue:
+
+    def __init__(self, model, open_statuses, age_field, fields, severity_field=None,
+                 severity_order=(None,), group_by=('status',)):
+        self.model = model
+        self.open_statuses = list(open_statuses)
+        self.age_field = age_field
+        self.fields = list(fields)
+        self.severity_field = severity_field
+        # Most severe first; a queue without severities has a single band
+        self.severity_order = list(severity_order)
+        self.group_by = list(group_by)
+
+    def open_items(self):
+        return self.model._default_manager.filter(status__in=self.open_statuses)
+
+    def page(self, limit, cursor=None):
+        """Return (items, next_cursor); next_cursor is None at the end of the queue"""
+        rank, after_age, after_id = self._decode(cursor) if cursor else (0, None, None)
+
+        items = []
+        for band in range(rank, len(self.severity_order)):
+            queryset = self.open_items()
+            if self.severity_field:
+                queryset = queryset.filter(**{self.severity_field: self.severity_order[band]})
+            if band == rank and after_age is not None:
+                queryset = queryset.filter(
+                    Q(**{f"{self.age_field}__gt": after_age}) |
+                    Q(**{self.age_field: after_age, 'id__gt': after_id})
+                )
+
+            rows = list(queryset.order_by(self.age_field, 'id').values(*self.fields)[:limit - len(items) + 1])
+            for row in rows:
+                row['severity_rank'] = band
+            items.extend(rows)
+            if len(items) > limit:
+                break
+
+        has_more = len(items) > limit
+        items = items[:limit]
+        next_cursor = self._encode(items[-1]) if has_more else None
+        return items, next_cursor
+
+    def depth(self):
+        """Open item counts per group, from a single grouped query"""
+        rows = self.open_items().order_by().values(*self.group_by).annotate(count=Count('id'))
+        groups = sorted(rows, key=lambda row: [str(row[field]) for field in self.group_by])
+        return {'total': sum(row['count'] for row in groups), 'groups': groups}
+
+    def _encode(self, item):
+        position = [item['severity_rank'], item[self.age_field].isoformat(), item['id']]
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+    def _decode(self, cursor):
+        try:
+            rank, age, item_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            age = parse_datetime(age)
+        except (ValueError, TypeError, binascii.Error, UnicodeDecodeError):
+            raise InvalidCursor("Invalid cursor")
+        if (age is None or not isinstance(rank, int) or not isinstance(item_id, int)
+                or not 0 <= rank < len(self.severity_order)):
+            raise InvalidCursor("Invalid cursor")
+        return rank, age, item_id
+
+
+QUEUES = {
+    'tickets': TriageQueue(
+        Ticket,
+        open_statuses=['unattended', 'in_progress'],
+        age_field='created_at',
+        fields=['id', 'TicketID', 'full_name', 'email', 'section', 'severity', 'status', 'created_at'],
+        severity_field='severity',
+        severity_order=['critical', 'high', 'medium', 'low'],
+        group_by=['section', 'severity'],
+    ),
+    'contacts': TriageQueue(
+        Contact,
+        open_statuses=['unattended', 'in_progress'],
+        age_field='timestamp',
+        fields=['id', 'firstName', 'lastName', 'email', 'status', 'timestamp'],
+    ),
+    'admissions': TriageQueue(
+        Admission,
+        open_statuses=['pending', 'in_review'],
+        age_field='submit_date',
+        fields=['id', 'admission_number', 'first_name', 'last_name', 'email', 'status', 'submit_date'],
+    ),
+}
@@ -0,0 +1,56 @@
+import base64
+import json
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from authapp.models import CustomUser
+from tickets.models import Ticket
+
+
+def make_ticket(number, severity, status='unattended'):
+    return Ticket.objects.create(
+        TicketID=f"RCSTK{number:04d}", full_name='Test User', email='user@example.com',
+        phone_number='0240000000', section='others', severity=severity, description='Broken link', status=status,
+    )
+
+
+def encode(position):
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+class TriageQueueTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(CustomUser.objects.create_user(
+            username='support', email='support@example.com', password='secret', role='staff',
+        ))
+
+    def get_queue(self, **params):
+        return self.client.get('/api/triage/tickets/', params)
+
+    def test_pages_follow_severity_then_age(self):
+        severities = ['low', 'critical', 'medium', 'critical', 'high', 'low', 'medium']
+        tickets = [make_ticket(number, severity) for number, severity in enumerate(severities, 1)]
+        make_ticket(len(severities) + 1, 'critical', status='resolved')
+
+        seen, cursor = [], None
+        while True:
+            response = self.get_queue(limit=2, **({'cursor': cursor} if cursor else {}))
+            self.assertEqual(response.status_code, 200)
+            seen.extend(item['TicketID'] for item in response.data['results'])
+            cursor = response.data['next_cursor']
+            if cursor is None:
+                break
+
+        order = ['critical', 'high', 'medium', 'low']
+        expected = sorted(tickets, key=lambda ticket: (order.index(ticket.severity), ticket.created_at, ticket.id))
+        self.assertEqual(seen, [ticket.TicketID for ticket in expected])
+
+    def test_bad_cursors_are_rejected(self):
+        for cursor in ['not a cursor', encode([0, '2024-01-01T00:00:00+00:00', {'id': 1}]),
+                       encode([0, '2024-01-01T00:00:00+00:00', '1']), encode([9, '2024-01-01T00:00:00+00:00', 1]),
+                       encode([0, 'yesterday', 1]), encode({'rank': 0})]:
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.get_queue(cursor=cursor).status_code, 400)
@@ -0,0 +1,7 @@
+from django.urls import path
+from .views import TriageQueueView, QueueDepthView
+
+urlpatterns = [
+    path('triage/depth/', QueueDepthView.as_view(), name='triage-depth'),
+    path('triage/<str:queue>/', TriageQueueView.as_view(), name='triage-queue'),
+]
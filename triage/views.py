@@ -0,0 +1,46 @@
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .queues import QUEUES, InvalidCursor
+
+
+class TriageQueueView(APIView):
+    """
+    Next open items of one queue, most severe and oldest first.
+    URL: /api/triage/<tickets|contacts|admissions>/?limit=25&cursor=<next_cursor>
+    """
+    permission_classes = [IsAuthenticated]
+
+    DEFAULT_LIMIT = 25
+    MAX_LIMIT = 100
+
+    def get(self, request, queue):
+        triage_queue = QUEUES.get(queue)
+        if triage_queue is None:
+            return Response({'detail': f"Unknown queue '{queue}'."}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            limit = int(request.query_params.get('limit', self.DEFAULT_LIMIT))
+        except ValueError:
+            return Response({'detail': 'limit must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, self.MAX_LIMIT))
+
+        try:
+            items, next_cursor = triage_queue.page(limit, request.query_params.get('cursor'))
+        except InvalidCursor as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({'results': items, 'next_cursor': next_cursor})
+
+
+class QueueDepthView(APIView):
+    """
+    Open item counts for every queue; tickets are broken down by section and severity.
+    URL: /api/triage/depth/
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response({name: queue.depth() for name, queue in QUEUES.items()})